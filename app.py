@@ -2,11 +2,17 @@
 of call transcripts based on audio recordings.
 """
 
+import os
+
 import streamlit as st
-from domain.transcription.transcription import Transcriber
-from domain.diarization.diarization import Diarizer
-from domain.sentiment_analysis.sentiment_analysis import SentimentAnalyzer
-from domain.google_sheets.google_sheets import GoogleSheetsExporter
+from domain.alignment.alignment import align
+from domain.audio.uploads import UploadSpool
+from domain.cache.result_cache import audio_digest
+from domain.jobs.job_queue import JOBS_PATH, STATES, SQLiteJobStore
+from domain.metrics.conversation import ConversationBatch
+from domain.pipeline.admission import AdmissionRejected
+from domain.pipeline.resources import AnalysisResources
+from domain.results.call_result import CallResult
 
 class CallQualityRateApp:
     """
@@ -14,26 +20,50 @@ class CallQualityRateApp:
     Call Quality Rate (CQR) of call transcripts based on audio recordings.
 
     Attributes:
-        transcriber (Transcriber): An instance of the Transcriber class
-                                   for audio transcription.
-        diarizer (Diarizer): An instance of the Diarizer class for diarization.
-        sentiment_analyzer (SentimentAnalyzer): An instance of the SentimentAnalyzer
-                                                class for sentiment analysis.
+        resources (AnalysisResources): Models, pipeline and admission queue shared
+                                       by every session in the process, so reruns
+                                       and concurrent uploads reuse one copy of
+                                       each model.
+        transcriber (Transcriber): The shared transcriber, with a bounded pool
+                                   of recognizers and silence skipping.
+        pipeline (AnalysisPipeline): Runs transcription, diarization and sentiment
+                                     encoding concurrently, reusing cached results
+                                     on reruns and repeated uploads.
         google_sheets_exporter (GoogleSheetsExporter): An instance of
-                                the GoogleSheetsExporter class for exporting results.
+                                the GoogleSheetsExporter class for exporting results
+                                through a durable background spool.
 
     Methods:
+        upload_spool(): Returns the session's spool of decoded uploads.
         analyze_transcript(uploaded_file): Analyzes the uploaded audio file to calculate
                                            CQR and export results.
+        show_readiness(): Starts loading models in the background and shows
+                          which are ready.
+        show_job_status(): Shows the state of the shared job queue, if any.
         run(): Runs the Streamlit web app, allowing users to upload and analyze
                audio files.
     """
 
     def __init__(self):
-        self.transcriber = Transcriber(model_path="models/vosk-model-ru-0.42.zip")
-        self.diarizer = Diarizer()
-        self.sentiment_analyzer = SentimentAnalyzer(model_name="paraphrase-multilingual-MiniLM-L12-v2")
-        self.google_sheets_exporter = GoogleSheetsExporter(credentials_path="credentials.json")
+        self.resources = AnalysisResources.shared()
+        self.transcriber = self.resources.transcriber
+        self.pipeline = self.resources.pipeline
+        self.google_sheets_exporter = self.resources.exporter
+
+    def upload_spool(self):
+        """
+        Returns the spool of decoded uploads of the current session, creating it
+        on first use. It lives in the session state, so its files are removed
+        when the session ends and the spool is garbage collected.
+
+        Returns:
+            UploadSpool: The session's spool.
+        """
+        spool = st.session_state.get("upload_spool")
+        if spool is None:
+            spool = UploadSpool(self.resources.decoder)
+            st.session_state["upload_spool"] = spool
+        return spool
 
     def analyze_transcript(self, uploaded_file):
         """
@@ -46,11 +76,28 @@ class CallQualityRateApp:
         Returns:
             None
         """
-        transcript = self.transcriber.transcribe(uploaded_file)
-        diarization_result = self.diarizer.diarize(uploaded_file)
-
-        sentences = [item["text"] for item in transcript]
-        sentiment_scores = self.sentiment_analyzer.analyze_sentiment(sentences)
+        audio_hash = audio_digest(uploaded_file)
+        if self.pipeline.is_cached(audio_hash):
+            result = self.pipeline.run(uploaded_file, audio_hash=audio_hash)
+        else:
+            waiting = st.empty()
+
+            def show_position(position, estimate):
+                waiting.info(f"Waiting for a free analysis slot: position {position} "
+                             f"in the queue, about {estimate:.0f} s.")
+
+            try:
+                with self.resources.admission.admit(on_wait=show_position):
+                    waiting.empty()
+                    audio_path = self.upload_spool().decoded_path(uploaded_file, audio_hash)
+                    result = self.pipeline.run(audio_path, audio_hash=audio_hash)
+            except AdmissionRejected:
+                waiting.warning("The server is busy analyzing other calls. "
+                                "Please try again in a few minutes.")
+                return
+        transcript = result.transcript
+        diarization_result = result.diarization
+        sentiment_scores = result.sentiment_scores
 
         st.write("Sentiment Scores:")
         for i, score in enumerate(sentiment_scores):
@@ -59,14 +106,73 @@ class CallQualityRateApp:
         cqr_score = sum(sentiment_scores)
         st.write(f"Call Quality Rate (CQR): {cqr_score:.4f}")
 
+        vad_report = self.transcriber.vad_report
+        if vad_report is not None and vad_report.audio_seconds:
+            st.caption(f"Silence skipped: {vad_report.skipped_seconds:.1f} s "
+                       f"of {vad_report.audio_seconds:.1f} s ({vad_report.skipped_share:.0%})")
+
+        call_result = CallResult.from_transcript(
+            transcript, align(transcript, diarization_result), sentiment_scores,
+            metadata={"audio_hash": audio_hash},
+            )
+        metrics = ConversationBatch()
+        metrics.add(diarization_result, call_result)
+        conversation = metrics.compute()
+        st.write("Conversation Metrics:")
+        st.table(conversation.speaker_rows(0))
+        st.write(f"Silence: {conversation.silence_share[0]:.1%}, "
+                 f"overlapping speech: {conversation.overlap_share[0]:.1%}")
+
         if st.button("Export Results to Google Sheets"):
-            data_to_export = [["Transcript", "Speaker", "Sentiment Score"]]
-            for item in transcript:
-                speaker = diarization_result[item["start"]].pop("speaker")
-                sentiment_score = sentiment_scores.pop(0)
-                data_to_export.append([item["text"], speaker, sentiment_score])
-            self.google_sheets_exporter.export_to_sheets(data_to_export)
-            st.success("Results exported to Google Sheets!")
+            if self.google_sheets_exporter.enqueue_export(audio_hash, call_result.to_rows()):
+                st.success("Results queued for export to Google Sheets!")
+            else:
+                st.info("Results of this call were already exported.")
+
+        backlog = self.google_sheets_exporter.backlog()
+        if backlog["pending"]:
+            st.caption(f"Exports pending: {backlog['pending']} "
+                       f"(oldest {backlog['oldest_age_seconds']:.0f} s)")
+
+    def show_readiness(self):
+        """
+        Starts loading the models in the background, if not started yet, and
+        shows which of them are ready. The page renders without waiting for
+        them; an analysis started earlier waits for the models it needs.
+
+        Returns:
+            None
+        """
+        warmup = self.resources.warmup
+        warmup.start()
+        status = warmup.status()
+        if warmup.ready():
+            st.sidebar.success("Models ready")
+            return
+        labels = {"pending": "waiting", "loading": "loading…", "ready": "ready", "failed": "failed"}
+        st.sidebar.info("Models are loading; analyses start once they are ready.")
+        for name, step in status.items():
+            st.sidebar.write(f"{name.capitalize()}: {labels[step['state']]}")
+
+    def show_job_status(self):
+        """
+        Shows job counts and per-worker throughput of the job queue used by
+        batch workers, if one exists.
+
+        Returns:
+            None
+        """
+        if not os.path.exists(JOBS_PATH):
+            return
+        status = SQLiteJobStore(JOBS_PATH).status()
+        st.sidebar.write("Job queue:")
+        st.sidebar.write(", ".join(f"{state}: {status[state]}" for state in STATES))
+        if status["workers"]:
+            st.sidebar.table([
+                {"node": worker["node"], "done": worker["done"],
+                 "calls/hour": round(worker["calls_per_hour"], 1)}
+                for worker in status["workers"]
+                ])
 
     def run(self):
         """
@@ -79,10 +185,13 @@ class CallQualityRateApp:
         st.write("Upload an audio file to analyze Call Quality Rate (CQR) of call transcripts.")
 
         uploaded_file = st.file_uploader("Upload an audio file (WAV or MP3 format)", type=["wav", "mp3"])
+        self.show_readiness()
 
         if uploaded_file:
             self.analyze_transcript(uploaded_file)
 
+        self.show_job_status()
+
         st.write("Author: Denis Chunarev")
         st.write("Last Updated: 2023-08-11")
 
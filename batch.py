@@ -0,0 +1,55 @@
+"""Headless batch analysis of Call Quality Rate (CQR) for many recordings.
+
+Usage:
+    python batch.py data/raw --workers 4
+"""
+
+import argparse
+
+from domain.batch.batch import MODEL_PATH, SENTIMENT_MODEL, BatchRunner, build_pipeline, find_audio
+
+
+def main():
+    """
+    Analyze every recording not done yet and print the throughput.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=["data/raw"],
+                        help="audio files or directories to scan")
+    parser.add_argument("--output-dir", default="data/processed")
+    parser.add_argument("--manifest", default=None,
+                        help="manifest path; defaults to manifest.jsonl in the output directory")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--sentiment-model", default=SENTIMENT_MODEL)
+    parser.add_argument("--no-vad", action="store_true", help="recognize silence as well")
+    parser.add_argument("--triage-model-path", default=None,
+                        help="small Vosk model decoding first; the large model only "
+                             "decodes spans it is unsure of")
+    args = parser.parse_args()
+
+    paths = find_audio(args.sources)
+    runner = BatchRunner(
+        args.output_dir, args.manifest, args.workers, build_pipeline,
+        (args.model_path, args.sentiment_model, not args.no_vad, args.triage_model_path),
+        )
+
+    def progress(entry):
+        if entry["status"] == "done":
+            print(f"done    {entry['source']}  audio={entry['audio_seconds']:.1f}s  "
+                  f"wall={entry['wall_seconds']:.1f}s  cqr={entry['cqr']:.4f}", flush=True)
+        else:
+            print(f"failed  {entry['source']}  {entry['error']}", flush=True)
+
+    report = runner.run(paths, progress)
+    print(f"calls={report.calls}  failed={report.failed}  skipped={report.skipped}  "
+          f"workers={report.workers}  wall={report.wall_seconds:.1f}s")
+    print(f"throughput: {report.calls_per_hour:.1f} calls/hour, "
+          f"{report.audio_hours_per_wall_hour:.2f} audio-hours per wall-hour")
+
+
+if __name__ == "__main__":
+    main()
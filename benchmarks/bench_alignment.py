@@ -0,0 +1,103 @@
+"""Measures speaker alignment of long calls against the interval index.
+
+Usage:
+    python -m benchmarks.bench_alignment --segments 20000 --utterances 40000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from domain.alignment.alignment import SpeakerIndex
+
+
+def synthetic_call(segments, utterances, speakers, seed=0):
+    """
+    Build a diarization with overlapping speech and a word-timed transcript.
+
+    Args:
+        segments (int): Number of diarization segments.
+        utterances (int): Number of utterances.
+        speakers (int): Number of speakers.
+        seed (int): Random seed.
+
+    Returns:
+        Tuple[List[dict], List[dict]]: Segments and utterances.
+    """
+    rng = np.random.default_rng(seed)
+    duration = segments * 2.0
+    starts = np.sort(rng.uniform(0, duration, segments))
+    lengths = rng.exponential(2.5, segments)
+    labels = rng.integers(0, speakers, segments)
+    diarization = [
+        {"start": float(start), "end": float(start + length), "speaker": f"SPEAKER_{label:02d}"}
+        for start, length, label in zip(starts, lengths, labels)
+        ]
+    utterance_starts = np.sort(rng.uniform(0, duration, utterances))
+    transcript = [
+        {"text": "...", "start": float(start), "end": float(start + length)}
+        for start, length in zip(utterance_starts, rng.exponential(3.0, utterances))
+        ]
+    return diarization, transcript
+
+
+def naive_labels(diarization, transcript):
+    """
+    Label utterances by scanning every segment, as a reference.
+
+    Args:
+        diarization (List[dict]): Segments.
+        transcript (List[dict]): Utterances.
+
+    Returns:
+        List[str]: Speaker per utterance, or None.
+    """
+    labels = []
+    for item in transcript:
+        totals = {}
+        for segment in diarization:
+            overlap = min(item["end"], segment["end"]) - max(item["start"], segment["start"])
+            if overlap > 0:
+                totals[segment["speaker"]] = totals.get(segment["speaker"], 0.0) + overlap
+        labels.append(max(totals, key=totals.get) if totals else None)
+    return labels
+
+
+def main():
+    """
+    Time index construction and alignment, and a full scan on a sample.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=20000)
+    parser.add_argument("--utterances", type=int, default=40000)
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args()
+
+    diarization, transcript = synthetic_call(args.segments, args.utterances, args.speakers)
+
+    started = time.perf_counter()
+    index = SpeakerIndex(diarization)
+    built = time.perf_counter()
+    labels = index.label(transcript, nearest=False)
+    aligned = time.perf_counter()
+    print(f"index   segments={args.segments}  {1000 * (built - started):.1f} ms")
+    print(f"align   utterances={args.utterances}  {1000 * (aligned - built):.1f} ms  "
+          f"({1e6 * (aligned - built) / args.utterances:.2f} us/utterance)")
+
+    sample = transcript[:args.sample]
+    started = time.perf_counter()
+    reference = naive_labels(diarization, sample)
+    elapsed = time.perf_counter() - started
+    mismatches = sum(label != expected for label, expected in zip(labels, reference))
+    print(f"scan    utterances={len(sample)}  {1000 * elapsed:.1f} ms  "
+          f"(~{elapsed * args.utterances / len(sample):.1f} s for all; "
+          f"{mismatches} label differences incl. ties)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compares two-pass cascade transcription with the large model alone.
+
+Usage:
+    python -m benchmarks.bench_cascade data/raw/audio.mp3 \
+        --triage-model-path models/vosk-model-small-ru-0.22.zip --threshold 0.8
+"""
+
+import argparse
+import time
+
+from domain.audio.decoding import AudioDecoder
+from domain.transcription.cascade import TRIAGE_THRESHOLD
+from domain.transcription.transcription import Transcriber
+
+
+def transcribe(transcriber, wav_path):
+    """
+    Transcribe a file and return its text and wall time.
+
+    Args:
+        transcriber (Transcriber): Transcriber with its models loaded.
+        wav_path (str): Path to the decoded recording.
+
+    Returns:
+        Tuple[List[str], float]: Utterance texts and wall seconds.
+    """
+    started = time.perf_counter()
+    texts = [utterance.text for utterance in transcriber.transcribe_words(wav_path)]
+    return texts, time.perf_counter() - started
+
+
+def word_agreement(reference, hypothesis):
+    """
+    Return the share of reference words that the hypothesis recognized in the same order.
+
+    Args:
+        reference (List[str]): Utterance texts of the large model.
+        hypothesis (List[str]): Utterance texts of the cascade.
+
+    Returns:
+        float: Longest common subsequence of words over the reference length.
+    """
+    first = " ".join(reference).split()
+    second = " ".join(hypothesis).split()
+    if not first:
+        return 1.0
+    previous = [0] * (len(second) + 1)
+    for word in first:
+        current = [0]
+        for index, other in enumerate(second):
+            current.append(previous[index] + 1 if word == other
+                           else max(previous[index + 1], current[index]))
+        previous = current
+    return previous[-1] / len(first)
+
+
+def main():
+    """
+    Transcribe one file with the large model and with the cascade, and print both.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio_path")
+    parser.add_argument("--model-path", default="models/vosk-model-ru-0.42.zip")
+    parser.add_argument("--triage-model-path", required=True)
+    parser.add_argument("--threshold", type=float, default=TRIAGE_THRESHOLD)
+    args = parser.parse_args()
+
+    decoder = AudioDecoder()
+    large = Transcriber(args.model_path, decoder=decoder)
+    cascade = Transcriber(args.model_path, decoder=decoder,
+                          triage_model_path=args.triage_model_path,
+                          triage_threshold=args.threshold)
+    large.model
+    cascade.model_registry.get(args.triage_model_path)
+
+    with decoder.decoded(args.audio_path) as wav_path:
+        reference, large_seconds = transcribe(large, wav_path)
+        hypothesis, cascade_seconds = transcribe(cascade, wav_path)
+
+    report = cascade.report
+    print(f"large    audio={large.report.audio_seconds:.1f}s  wall={large_seconds:.1f}s  "
+          f"rtf={large.report.real_time_factor:.3f}")
+    print(f"cascade  wall={cascade_seconds:.1f}s  triage={report.triage_wall_seconds:.1f}s  "
+          f"second pass={report.second_pass_wall_seconds:.1f}s over {report.spans} spans")
+    print(f"second-pass fraction={report.second_pass_fraction:.1%}  "
+          f"speedup={large_seconds / cascade_seconds:.2f}x  "
+          f"word agreement with large model={word_agreement(reference, hypothesis):.1%}")
+
+
+if __name__ == "__main__":
+    main()
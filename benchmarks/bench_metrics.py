@@ -0,0 +1,74 @@
+"""Measures the conversation metrics engine on synthetic batches of calls.
+
+Usage:
+    python -m benchmarks.bench_metrics --calls 1000 --segments 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from domain.metrics.conversation import ConversationBatch
+
+
+def synthetic_segments(count, speakers, rng):
+    """
+    Build alternating speaker turns with pauses and occasional overlaps.
+
+    Args:
+        count (int): Number of segments.
+        speakers (int): Number of speakers.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        List[dict]: Segments with start, end and speaker.
+    """
+    lengths = rng.exponential(4.0, count) + 0.3
+    gaps = rng.normal(0.5, 0.8, count)
+    starts = np.cumsum(np.maximum(lengths + gaps, 0.1)) - lengths[0]
+    labels = rng.integers(0, speakers, count)
+    return [
+        {"start": float(start), "end": float(start + length), "speaker": f"SPEAKER_{label:02d}"}
+        for start, length, label in zip(starts, lengths, labels)
+        ]
+
+
+def main():
+    """
+    Time one batched pass over many calls and a single multi-hour call.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--segments", type=int, default=1000)
+    parser.add_argument("--speakers", type=int, default=2)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    calls = [synthetic_segments(args.segments, args.speakers, rng) for _ in range(args.calls)]
+    batch = ConversationBatch()
+    started = time.perf_counter()
+    for segments in calls:
+        batch.add(segments)
+    added = time.perf_counter()
+    batch.compute()
+    computed = time.perf_counter()
+    total = args.calls * args.segments
+    print(f"batch   calls={args.calls}  segments={total}  add={added - started:.2f}s  "
+          f"compute={computed - added:.3f}s  ({1e9 * (computed - added) / total:.0f} ns/segment)")
+
+    for count in (total // 10, total):
+        single = ConversationBatch()
+        single.add(synthetic_segments(count, args.speakers, rng))
+        started = time.perf_counter()
+        metrics = single.compute()
+        elapsed = time.perf_counter() - started
+        print(f"single  segments={count}  call={metrics.call_seconds[0] / 3600:.1f}h  "
+              f"compute={elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compares accuracy and throughput of the sentence encoding backends.
+
+Usage:
+    python -m benchmarks.bench_sentiment_backends --sentences 2000 --threads 4
+"""
+
+import argparse
+import time
+
+from domain.sentiment_analysis.backends import BACKENDS, create_backend, embedding_agreement
+
+MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+PHRASES = [
+    "Здравствуйте, чем могу помочь?",
+    "Оставайтесь на линии, пожалуйста.",
+    "Я проверю информацию по вашему заказу.",
+    "Спасибо за ожидание, вопрос решён.",
+    "Мне очень жаль, что так получилось.",
+    "Хорошего дня, до свидания!",
+    ]
+
+
+def main():
+    """
+    Encode the same sentences with every backend and print agreement with
+    the torch embeddings and sentences per second.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    sentences = [f"{PHRASES[index % len(PHRASES)]} ({index})" for index in range(args.sentences)]
+    reference = None
+    for name in BACKENDS:
+        backend = create_backend(name, MODEL_NAME, threads=args.threads)
+        backend.encode(sentences[:args.batch_size], args.batch_size)
+        started = time.perf_counter()
+        embeddings = backend.encode(sentences, args.batch_size)
+        elapsed = time.perf_counter() - started
+        if reference is None:
+            reference = embeddings
+        agreement = embedding_agreement(reference, embeddings)
+        print(f"{name:>10}  {len(sentences) / elapsed:8.1f} sentences/s  "
+              f"min cos={agreement['min_cosine']:.4f}  mean cos={agreement['mean_cosine']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
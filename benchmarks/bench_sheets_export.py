@@ -0,0 +1,130 @@
+"""Measures Google Sheets export requests and wall time against a local fake API.
+
+Usage:
+    python -m benchmarks.bench_sheets_export --rows 500 --latency-ms 50
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import gspread
+import requests
+
+from domain.google_sheets.google_sheets import GoogleSheetsExporter
+
+
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+    """
+    A minimal local stand-in for the Drive and Sheets APIs used by gspread.
+
+    Every response is delayed by the server attribute `latency` to stand in
+    for the round trip to Google.
+    """
+
+    SPREADSHEET = {
+        "spreadsheetId": "sheet1",
+        "properties": {"title": "Call Quality Rate"},
+        "sheets": [{"properties": {"sheetId": 0, "title": "Sheet1", "index": 0,
+                                   "gridProperties": {"rowCount": 1000, "columnCount": 26}}}],
+        }
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silence request logging."""
+
+    def _reply(self, body):
+        """Send a JSON response after the configured latency."""
+        time.sleep(self.server.latency)
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the Drive file listing and the spreadsheet metadata."""
+        if self.path.startswith("/drive/v3/files"):
+            self._reply({"files": [{"id": "sheet1", "name": "Call Quality Rate"}]})
+        else:
+            self._reply(self.SPREADSHEET)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Accept values:append requests."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self._reply({"spreadsheetId": "sheet1", "updates": {}})
+
+
+class LocalRedirectAdapter(requests.adapters.HTTPAdapter):
+    """
+    A transport adapter that sends Google API requests to a local server.
+    """
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Rewrite the Google API host to the local server and send."""
+        request.url = re.sub(r"^https://[^/]*googleapis\.com", self.base_url, request.url)
+        return super().send(request, **kwargs)
+
+
+def local_client(port):
+    """
+    Build a gspread client whose requests go to the local fake API.
+
+    Args:
+        port (int): Port of the fake server.
+
+    Returns:
+        gspread.Client: The client.
+    """
+    session = requests.Session()
+    session.mount("https://", LocalRedirectAdapter(f"http://127.0.0.1:{port}"))
+    return gspread.Client(None, session=session)
+
+
+def main():
+    """
+    Export one call in bulk and row by row, and print requests and wall time.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSheetsHandler)
+    server.latency = args.latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    data = [["Transcript", "Speaker", "Sentiment Score"]]
+    data += [[f"utterance {index}", "SPEAKER_00", 0.5] for index in range(args.rows)]
+    try:
+        exporter = GoogleSheetsExporter("credentials.json", client=local_client(server.server_port))
+        exporter.export_to_sheets(data)
+        first = exporter.last_export
+        exporter.export_to_sheets(data)
+        second = exporter.last_export
+        print(f"bulk    rows={len(data)}  first: {first['requests']} requests "
+              f"{1000 * first['seconds']:.1f} ms  warm: {second['requests']} requests "
+              f"{1000 * second['seconds']:.1f} ms")
+
+        worksheet = local_client(server.server_port).open("Call Quality Rate").get_worksheet(0)
+        started = time.perf_counter()
+        for row in data:
+            worksheet.append_row(row, value_input_option="RAW")
+        elapsed = time.perf_counter() - started
+        print(f"per-row rows={len(data)}  {len(data)} requests  {1000 * elapsed:.1f} ms")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
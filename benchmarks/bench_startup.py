@@ -0,0 +1,83 @@
+"""Measures cold start of the app: imports, first render and model warm-up.
+
+Each run starts a fresh interpreter, so nothing is cached in the process.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 3
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+instance = app.CallQualityRateApp()
+instance.run()
+rendered = time.perf_counter()
+ready = None
+if {wait_models}:
+    instance.resources.warmup.wait()
+    ready = time.perf_counter() - started
+print(json.dumps({{
+    "import_seconds": imported - started,
+    "first_render_seconds": rendered - started,
+    "models_ready_seconds": ready,
+    "models": instance.resources.warmup.status(),
+    }}))
+"""
+
+
+def measure(wait_models):
+    """
+    Start the app in a fresh interpreter and time its startup.
+
+    Args:
+        wait_models (bool): Whether to wait for the warm-up to finish.
+
+    Returns:
+        dict: Seconds to import the app, to render the first page and to
+              have every model loaded, plus the per-model warm-up status.
+    """
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(wait_models=wait_models)],
+        check=True, capture_output=True, text=True,
+        ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["interpreter_seconds"] = time.perf_counter() - started
+    return result
+
+
+def main():
+    """
+    Time several cold starts and print the median of each phase.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-models", action="store_true",
+                        help="only time imports and the first render")
+    args = parser.parse_args()
+
+    runs = [measure(not args.skip_models) for _ in range(args.runs)]
+    for phase in ("import_seconds", "first_render_seconds", "models_ready_seconds"):
+        values = [run[phase] for run in runs if run[phase] is not None]
+        if values:
+            print(f"{phase:<22} median={statistics.median(values):.3f}s  "
+                  f"min={min(values):.3f}s  max={max(values):.3f}s")
+    for name, step in runs[-1]["models"].items():
+        detail = f"  {step['error']}" if step["error"] else ""
+        print(f"  {name:<14} {step['state']:<8} {step['seconds']:.2f}s{detail}")
+
+
+if __name__ == "__main__":
+    main()
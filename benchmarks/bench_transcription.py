@@ -0,0 +1,39 @@
+"""Compares the real-time factor of serial and parallel transcription.
+
+Usage:
+    python -m benchmarks.bench_transcription data/raw/audio.mp3 --workers 4
+"""
+
+import argparse
+
+from domain.audio.decoding import AudioDecoder
+from domain.transcription.transcription import Transcriber
+
+
+def main():
+    """
+    Transcribe one file in serial and parallel mode and print each report.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio_path")
+    parser.add_argument("--model-path", default="models/vosk-model-ru-0.42.zip")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    decoder = AudioDecoder()
+    with decoder.decoded(args.audio_path) as wav_path:
+        for workers in (1, args.workers):
+            transcriber = Transcriber(args.model_path, decoder=decoder, workers=workers)
+            utterances = sum(1 for _ in transcriber.transcribe(wav_path))
+            transcriber.close()
+            report = transcriber.report
+            print(f"{report.mode:>8}  workers={report.workers}  utterances={utterances}  "
+                  f"audio={report.audio_seconds:.1f}s  wall={report.wall_seconds:.1f}s  "
+                  f"rtf={report.real_time_factor:.3f}")
+
+
+if __name__ == "__main__":
+    main()
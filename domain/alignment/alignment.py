@@ -0,0 +1,228 @@
+"""The module aligns transcript utterances and words to speaker segments."""
+
+import numpy as np
+
+POINT_SECONDS = 1e-6
+
+
+def item_span(item):
+    """
+    Return the time span of an utterance or word.
+
+    Utterances without their own start and end take the span of their words.
+
+    Args:
+        item (dict): Utterance or word with start/end, or with a "result" word list.
+
+    Returns:
+        Tuple[float, float]: Start and end in seconds; NaN if the item has no timing.
+    """
+    if "start" in item and "end" in item:
+        return float(item["start"]), float(item["end"])
+    words = item.get("result")
+    if words:
+        return float(words[0]["start"]), float(words[-1]["end"])
+    return float("nan"), float("nan")
+
+
+class SpeakerIndex:
+    """
+    Sorted interval index of diarization segments.
+
+    Segments are kept as NumPy arrays sorted by start. An interval and a
+    segment intersect exactly when the segment starts inside the interval,
+    or the interval starts inside the segment after the segment began. The
+    first pairs are found by searchsorted of each interval on the segment
+    starts, the second by searchsorted of each segment on the sorted
+    interval starts, so every candidate pair really intersects and one long
+    segment costs only the intervals it covers. Assigning N intervals
+    against M segments costs O((N + M) log(N + M)) plus the number of
+    intersecting pairs. The running maximum of the ends is kept for
+    nearest-segment lookups.
+
+    Args:
+        segments (Iterable[dict]): Segments with start, end and speaker.
+
+    Attributes:
+        labels (List[str]): Speaker labels; assignments index into this list.
+
+    Methods:
+        assign(starts, ends, nearest): Returns the speaker index of each interval.
+        candidates(starts, ends): Returns the intersecting (interval, segment) pairs.
+        label(items, nearest): Returns the speaker label of each utterance or word.
+    """
+
+    def __init__(self, segments):
+        """
+        Build the index. The segments are not modified.
+
+        Args:
+            segments (Iterable[dict]): Segments with start, end and speaker.
+        """
+        segments = list(segments)
+        labels = {}
+        codes = np.fromiter(
+            (labels.setdefault(segment["speaker"], len(labels)) for segment in segments),
+            dtype=np.int64, count=len(segments),
+            )
+        starts = np.fromiter((segment["start"] for segment in segments), dtype=np.float64,
+                             count=len(segments))
+        ends = np.fromiter((segment["end"] for segment in segments), dtype=np.float64,
+                           count=len(segments))
+        order = np.argsort(starts, kind="stable")
+        self.labels = list(labels)
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.speakers = codes[order]
+        self.max_ends = np.maximum.accumulate(self.ends) if len(segments) else self.ends
+        # Position of the segment holding the running maximum end, for nearest-segment lookups.
+        reaches = np.where(self.ends == self.max_ends, np.arange(len(segments)), 0)
+        self.max_end_owner = np.maximum.accumulate(reaches) if len(segments) else reaches
+
+    def assign(self, starts, ends, nearest=True):
+        """
+        Return the speaker with the most overlap for each interval.
+
+        Overlap is summed per speaker, so a speaker with several short
+        segments inside an interval can win over one long segment. Ties go
+        to the speaker seen first. A zero-length interval, such as a word
+        with equal start and end, is matched to the segment containing it.
+
+        Args:
+            starts (array_like): Interval starts in seconds.
+            ends (array_like): Interval ends in seconds.
+            nearest (bool): Whether intervals overlapping no segment take the
+                            speaker of the closest segment instead of -1.
+
+        Returns:
+            np.ndarray: Speaker index per interval, into labels; -1 if none.
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.maximum(np.asarray(ends, dtype=np.float64), starts + POINT_SECONDS)
+        result = np.full(len(starts), -1, dtype=np.int64)
+        if not len(self.starts) or not len(starts):
+            return result
+
+        queries, segments = self.candidates(starts, ends)
+        if len(queries):
+            overlap = (np.minimum(ends[queries], self.ends[segments])
+                       - np.maximum(starts[queries], self.starts[segments]))
+            keep = overlap > 0
+            if keep.any():
+                keys, inverse = np.unique(
+                    queries[keep] * len(self.labels) + self.speakers[segments[keep]],
+                    return_inverse=True,
+                    )
+                totals = np.bincount(inverse.ravel(), weights=overlap[keep])
+                pair_queries, pair_speakers = np.divmod(keys, len(self.labels))
+                best = np.lexsort((pair_speakers, -totals, pair_queries))
+                firsts = np.ones(len(best), dtype=bool)
+                firsts[1:] = pair_queries[best][1:] != pair_queries[best][:-1]
+                winners = best[firsts]
+                result[pair_queries[winners]] = pair_speakers[winners]
+
+        if nearest:
+            unmatched = np.flatnonzero((result < 0) & ~np.isnan(starts))
+            if len(unmatched):
+                result[unmatched] = self._nearest(starts[unmatched], ends[unmatched])
+        return result
+
+    def candidates(self, starts, ends):
+        """
+        Return the pairs of intervals and segments that intersect.
+
+        Args:
+            starts (np.ndarray): float64 interval starts in seconds.
+            ends (np.ndarray): float64 interval ends, greater than the starts.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Interval and sorted-segment position
+                                           of each pair, in no particular order.
+        """
+        # Segments starting inside the interval.
+        first = np.searchsorted(self.starts, starts, side="left")
+        last = np.searchsorted(self.starts, ends, side="left")
+        inside_queries, inside_segments = _expand(np.arange(len(starts)), first, last)
+
+        # Intervals starting inside a segment that began before them.
+        order = np.argsort(starts, kind="stable")
+        sorted_starts = starts[order]
+        first = np.searchsorted(sorted_starts, self.starts, side="right")
+        last = np.searchsorted(sorted_starts, self.ends, side="left")
+        covering_segments, covered = _expand(np.arange(len(self.starts)), first, last)
+        return (np.concatenate([inside_queries, order[covered]]),
+                np.concatenate([inside_segments, covering_segments]))
+
+    def label(self, items, nearest=True):
+        """
+        Return the speaker label of each utterance or word.
+
+        Args:
+            items (Sequence[dict]): Utterances or words; see item_span().
+            nearest (bool): Whether items overlapping no segment take the
+                            speaker of the closest segment instead of None.
+
+        Returns:
+            List[str]: Speaker label per item, or None.
+        """
+        spans = np.array([item_span(item) for item in items], dtype=np.float64).reshape(-1, 2)
+        codes = self.assign(spans[:, 0], spans[:, 1], nearest=nearest)
+        return [self.labels[code] if code >= 0 else None for code in codes]
+
+    def _nearest(self, starts, ends):
+        """
+        Return the speaker of the segment closest to each interval.
+
+        Args:
+            starts (np.ndarray): Interval starts of intervals overlapping no segment.
+            ends (np.ndarray): Interval ends.
+
+        Returns:
+            np.ndarray: Speaker index per interval.
+        """
+        following = np.searchsorted(self.starts, ends, side="left")
+        preceding = following - 1
+        gap_after = np.where(
+            following < len(self.starts),
+            self.starts[np.minimum(following, len(self.starts) - 1)] - ends, np.inf,
+            )
+        gap_before = np.where(
+            preceding >= 0, starts - self.max_ends[np.maximum(preceding, 0)], np.inf,
+            )
+        before = self.speakers[self.max_end_owner[np.maximum(preceding, 0)]]
+        after = self.speakers[np.minimum(following, len(self.starts) - 1)]
+        return np.where(gap_before <= gap_after, before, after)
+
+
+def _expand(owners, first, last):
+    """
+    Expand half-open position ranges into (owner, position) pairs.
+
+    Args:
+        owners (np.ndarray): Owner of each range.
+        first (np.ndarray): First position of each range.
+        last (np.ndarray): Position after the last of each range.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Owner and position of every pair.
+    """
+    counts = np.maximum(last - first, 0)
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(owners, counts), np.repeat(first, counts) + offsets
+
+
+def align(transcript, segments, nearest=True):
+    """
+    Return the speaker of each utterance of a transcript.
+
+    Args:
+        transcript (Sequence[dict]): Utterances; see item_span().
+        segments (Iterable[dict]): Diarization segments with start, end and speaker.
+        nearest (bool): Whether utterances overlapping no segment take the
+                        speaker of the closest segment instead of None.
+
+    Returns:
+        List[str]: Speaker label per utterance, or None.
+    """
+    return SpeakerIndex(segments).label(transcript, nearest=nearest)
@@ -0,0 +1,704 @@
+"""The module decodes audio files into a stream of 16 kHz mono PCM frames."""
+
+import contextlib
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 4000
+READ_SAMPLES = 8000
+RAW_SAMPLE_RATE = 16000
+FIR_TAPS = 31
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_ALAW = 0x0006
+WAVE_FORMAT_MULAW = 0x0007
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _mulaw_table():
+    """
+    Build the G.711 mu-law decoding table.
+
+    Returns:
+        np.ndarray: 256 float32 samples in the int16 range.
+    """
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = ((((codes & 0x0F) << 3) + 0x84) << exponent) - 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.float32)
+
+
+def _alaw_table():
+    """
+    Build the G.711 A-law decoding table.
+
+    Returns:
+        np.ndarray: 256 float32 samples in the int16 range.
+    """
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    exponent = (codes >> 4) & 0x07
+    mantissa = (codes & 0x0F) << 4
+    magnitude = np.where(
+        exponent == 0,
+        mantissa + 8,
+        (mantissa + 0x108) << np.maximum(exponent - 1, 0),
+        )
+    return np.where(codes & 0x80, magnitude, -magnitude).astype(np.float32)
+
+
+class WavFormat:
+    """
+    Sample layout of a WAV file's data chunk.
+
+    Attributes:
+        audio_format (int): WAVE format tag (PCM, IEEE float, A-law, mu-law).
+        channels (int): Number of interleaved channels.
+        sample_rate (int): Samples per second per channel.
+        bits (int): Bits per sample.
+        data_size (int): Size of the data chunk in bytes.
+    """
+
+    __slots__ = ("audio_format", "channels", "sample_rate", "bits", "data_size")
+
+    def __init__(self, audio_format, channels, sample_rate, bits, data_size):
+        self.audio_format = audio_format
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits = bits
+        self.data_size = data_size
+
+    @property
+    def block_align(self):
+        """Bytes per interleaved sample frame."""
+        return self.channels * self.bits // 8
+
+    def dtype(self):
+        """
+        Return the NumPy dtype of a single sample, or None if unsupported.
+
+        Returns:
+            np.dtype: Sample dtype.
+        """
+        if self.audio_format == WAVE_FORMAT_PCM:
+            return {8: np.dtype(np.uint8), 16: np.dtype("<i2"), 32: np.dtype("<i4")}.get(self.bits)
+        if self.audio_format == WAVE_FORMAT_IEEE_FLOAT and self.bits == 32:
+            return np.dtype("<f4")
+        if self.audio_format in (WAVE_FORMAT_ALAW, WAVE_FORMAT_MULAW) and self.bits == 8:
+            return np.dtype(np.uint8)
+        return None
+
+    def is_target(self, sample_rate):
+        """
+        Check whether the data is already 16-bit mono PCM at the given rate.
+
+        Args:
+            sample_rate (int): Target sample rate.
+
+        Returns:
+            bool: True if the data can be passed through unchanged.
+        """
+        return (self.audio_format == WAVE_FORMAT_PCM and self.bits == 16
+                and self.channels == 1 and self.sample_rate == sample_rate)
+
+
+def read_wav_header(stream):
+    """
+    Parse a RIFF/WAVE header and position the stream at the start of the samples.
+
+    Args:
+        stream (BinaryIO): Stream positioned at the start of the file.
+
+    Returns:
+        WavFormat: Sample layout, or None if the stream is not a WAV file.
+    """
+    riff = stream.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        return None
+    fmt = None
+    while True:
+        header = stream.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"fmt ":
+            body = stream.read(size + (size & 1))
+            audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                audio_format = struct.unpack("<H", body[24:26])[0]
+            fmt = (audio_format, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            return WavFormat(*fmt, data_size=size)
+        else:
+            stream.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class StreamingResampler:
+    """
+    Converts a stream of samples between sample rates with constant memory.
+
+    Uses linear interpolation, preceded by a windowed-sinc low-pass filter when
+    downsampling. Filter and interpolation state carry across calls, so chunk
+    boundaries are seamless. All work buffers are allocated once up front.
+
+    Args:
+        source_rate (int): Input sample rate.
+        target_rate (int): Output sample rate.
+        max_chunk (int): Largest number of input samples passed to process().
+
+    Methods:
+        process(samples): Resamples one chunk and returns a view of the output.
+    """
+
+    def __init__(self, source_rate, target_rate, max_chunk):
+        """
+        Initialize the StreamingResampler and allocate its work buffers.
+
+        Args:
+            source_rate (int): Input sample rate.
+            target_rate (int): Output sample rate.
+            max_chunk (int): Largest number of input samples passed to process().
+        """
+        self.step = source_rate / target_rate
+        self.position = 1.0
+        if source_rate > target_rate:
+            cutoff = 0.5 * target_rate / source_rate
+            n = np.arange(FIR_TAPS) - (FIR_TAPS - 1) / 2
+            taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(FIR_TAPS)
+            self.taps = (taps / taps.sum()).astype(np.float32)
+        else:
+            self.taps = np.ones(1, dtype=np.float32)
+        history = len(self.taps) - 1
+        self._history = history
+        self._input = np.zeros(history + max_chunk, dtype=np.float32)
+        self._filtered = np.zeros(max_chunk + 1, dtype=np.float32)
+        self._scratch = np.zeros(max_chunk + 1, dtype=np.float32)
+        max_out = int(np.ceil((max_chunk + 1) / self.step)) + 1
+        self._ramp = np.arange(max_out, dtype=np.float64)
+        self._positions = np.zeros(max_out, dtype=np.float64)
+        self._floors = np.zeros(max_out, dtype=np.float64)
+        self._index = np.zeros(max_out, dtype=np.intp)
+        self._frac = np.zeros(max_out, dtype=np.float32)
+        self._left = np.zeros(max_out, dtype=np.float32)
+        self._right = np.zeros(max_out, dtype=np.float32)
+        self._output = np.zeros(max_out, dtype=np.float32)
+
+    def process(self, samples):
+        """
+        Resample one chunk of samples.
+
+        Args:
+            samples (np.ndarray): float32 input samples, at most max_chunk long.
+
+        Returns:
+            np.ndarray: View of the resampled output, valid until the next call.
+        """
+        n = len(samples)
+        history = self._history
+        self._input[history:history + n] = samples
+
+        # filtered[0] holds the last filtered sample of the previous chunk.
+        filtered = self._filtered[:n + 1]
+        filtered[1:] = 0.0
+        scratch = self._scratch[:n]
+        for j, tap in enumerate(self.taps[::-1]):
+            np.multiply(self._input[j:j + n], tap, out=scratch)
+            np.add(filtered[1:], scratch, out=filtered[1:])
+        if history:
+            self._input[:history] = self._input[n:n + history]
+
+        count = max(int(np.ceil((n - self.position) / self.step)), 0)
+        positions, floors = self._positions[:count], self._floors[:count]
+        np.multiply(self._ramp[:count], self.step, out=positions)
+        positions += self.position
+        np.floor(positions, out=floors)
+        index, frac = self._index[:count], self._frac[:count]
+        index[:] = floors
+        np.subtract(positions, floors, out=positions)
+        frac[:] = positions
+
+        left, right, output = self._left[:count], self._right[:count], self._output[:count]
+        np.take(filtered, index, out=left)
+        index += 1
+        np.take(filtered, index, out=right)
+        np.subtract(right, left, out=right)
+        np.multiply(right, frac, out=right)
+        np.add(left, right, out=output)
+
+        self.position += count * self.step - n
+        self._filtered[0] = filtered[n]
+        return output
+
+
+class DecodedAudio:
+    """
+    A decoded 16 kHz mono 16-bit WAV file mapped into memory.
+
+    The samples are a read-only view of a memory map over the data chunk,
+    so every stage reading the file shares the same page-cache pages
+    instead of copying them into buffers of its own, and only the pages
+    that are touched are read from disk.
+
+    Args:
+        path (str): Path to the WAV file.
+        sample_rate (int): Sample rate of the file.
+        offset (int): Byte offset of the first sample.
+        count (int): Number of samples.
+
+    Attributes:
+        samples (np.ndarray): Read-only int16 view of every sample.
+
+    Methods:
+        open(path, sample_rate): Maps a file if it has the decoded layout.
+        frames(frame_samples): Yields consecutive views of the samples.
+        span(start, end): Returns a view of the samples between two times.
+    """
+
+    def __init__(self, path, sample_rate, offset, count):
+        """
+        Initialize the DecodedAudio by mapping the samples of the file.
+
+        Args:
+            path (str): Path to the WAV file.
+            sample_rate (int): Sample rate of the file.
+            offset (int): Byte offset of the first sample.
+            count (int): Number of samples.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        if count:
+            self.samples = np.memmap(path, dtype="<i2", mode="r", offset=offset,
+                                     shape=(count,)).view(np.ndarray)
+        else:
+            self.samples = np.zeros(0, dtype="<i2")
+
+    @classmethod
+    def open(cls, path, sample_rate=SAMPLE_RATE):
+        """
+        Map a WAV file if it is already 16-bit mono at the given rate.
+
+        Args:
+            path (str): Path to the file.
+            sample_rate (int): Required sample rate.
+
+        Returns:
+            DecodedAudio: The mapped file, or None if it has another layout.
+        """
+        path = os.fspath(path)
+        with open(path, "rb") as stream:
+            fmt = read_wav_header(stream)
+            offset = stream.tell()
+        if fmt is None or not fmt.is_target(sample_rate):
+            return None
+        available = os.path.getsize(path) - offset
+        size = min(fmt.data_size, available) if fmt.data_size else available
+        return cls(path, sample_rate, offset, max(size, 0) // 2)
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def duration(self):
+        """Length of the audio in seconds."""
+        return len(self.samples) / self.sample_rate
+
+    def frames(self, frame_samples=FRAME_SAMPLES):
+        """
+        Yield consecutive fixed-size views of the samples without copying them.
+
+        Args:
+            frame_samples (int): Samples per frame; the last frame may be shorter.
+
+        Yields:
+            np.ndarray: Read-only int16 view.
+        """
+        for start in range(0, len(self.samples), frame_samples):
+            yield self.samples[start:start + frame_samples]
+
+    def span(self, start, end):
+        """
+        Return the samples between two times without copying them.
+
+        Args:
+            start (float): Start in seconds.
+            end (float): End in seconds.
+
+        Returns:
+            np.ndarray: Read-only int16 view.
+        """
+        return self.samples[max(int(start * self.sample_rate), 0):int(end * self.sample_rate)]
+
+
+class AudioDecoder:
+    """
+    Decodes WAV, MP3 and raw PCM audio into fixed-size 16 kHz mono int16 frames.
+
+    WAV (PCM, IEEE float, A-law, mu-law) and raw PCM are decoded natively with
+    NumPy; other formats such as MP3 are decoded by an ffmpeg subprocess. Every
+    path streams the input through buffers allocated once per file, so memory
+    use does not depend on the length of the recording.
+
+    Args:
+        sample_rate (int): Output sample rate.
+        frame_samples (int): Number of samples in each yielded frame.
+        raw_sample_rate (int): Sample rate assumed for headerless 16-bit PCM.
+        ffmpeg (str): Name or path of the ffmpeg executable.
+
+    Methods:
+        frames(source): Yields decoded frames from a path or binary file object.
+        mapped(source): Maps an already-decoded file into memory.
+        decode_to_file(source, target_path): Writes the decoded audio as a WAV file.
+        decoded(source): Context manager yielding a path to decoded audio.
+        is_decoded(source): Checks whether a file already has the output layout.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_samples=FRAME_SAMPLES,
+                 raw_sample_rate=RAW_SAMPLE_RATE, ffmpeg="ffmpeg"):
+        """
+        Initialize the AudioDecoder.
+
+        Args:
+            sample_rate (int): Output sample rate.
+            frame_samples (int): Number of samples in each yielded frame.
+            raw_sample_rate (int): Sample rate assumed for headerless 16-bit PCM.
+            ffmpeg (str): Name or path of the ffmpeg executable.
+        """
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+        self.raw_sample_rate = raw_sample_rate
+        self.ffmpeg = ffmpeg
+
+    def frames(self, source):
+        """
+        Decode audio into fixed-size frames of 16 kHz mono int16 samples.
+
+        The same buffer is reused for every frame, so a yielded array is only
+        valid until the next one is requested; copy it to keep it. The last
+        frame may be shorter than frame_samples. A path to an already-decoded
+        WAV file is memory-mapped instead, and its frames are read-only views
+        of the mapping.
+
+        Args:
+            source (str | BinaryIO): Path to an audio file or a seekable binary
+                                     file object such as a Streamlit upload.
+
+        Yields:
+            np.ndarray: int16 frame of at most frame_samples samples.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            audio = self.mapped(source)
+            if audio is not None:
+                yield from audio.frames(self.frame_samples)
+                return
+            with open(source, "rb") as stream:
+                yield from self._decode(stream, os.fspath(source))
+        else:
+            source.seek(0)
+            yield from self._decode(source, getattr(source, "name", ""))
+
+    def decode_to_file(self, source, target_path):
+        """
+        Decode audio and write it as a 16 kHz mono 16-bit WAV file.
+
+        Args:
+            source (str | BinaryIO): Path to an audio file or a binary file object.
+            target_path (str): Path of the WAV file to write.
+
+        Returns:
+            str: The target path.
+        """
+        with wave.open(target_path, "wb") as target:
+            target.setnchannels(1)
+            target.setsampwidth(2)
+            target.setframerate(self.sample_rate)
+            for frame in self.frames(source):
+                target.writeframesraw(frame.data.cast("B"))
+        return target_path
+
+    def mapped(self, source):
+        """
+        Map an already-decoded WAV file into memory.
+
+        Args:
+            source (str | BinaryIO): Path to an audio file or a binary file object.
+
+        Returns:
+            DecodedAudio: The mapped samples, or None if the source is not a
+                          path to a 16-bit mono WAV at the output rate.
+        """
+        if not isinstance(source, (str, os.PathLike)):
+            return None
+        return DecodedAudio.open(source, self.sample_rate)
+
+    def is_decoded(self, source):
+        """
+        Check whether a file is already a 16-bit mono WAV at the output rate.
+
+        Args:
+            source (str | BinaryIO): Path to an audio file or a binary file object.
+
+        Returns:
+            bool: True if the source is a path to an already-decoded WAV file.
+        """
+        if not isinstance(source, (str, os.PathLike)):
+            return False
+        with open(source, "rb") as stream:
+            fmt = read_wav_header(stream)
+        return fmt is not None and fmt.is_target(self.sample_rate)
+
+    @contextlib.contextmanager
+    def decoded(self, source):
+        """
+        Provide a path to the source decoded as a 16 kHz mono WAV file.
+
+        The source is decoded into a temporary file only if it is not already
+        in that layout; the temporary file is removed on exit. Decoding once
+        and handing the path to every stage avoids decoding it per stage.
+
+        Args:
+            source (str | BinaryIO): Path to an audio file or a binary file object.
+
+        Yields:
+            str: Path to the decoded WAV file.
+        """
+        if self.is_decoded(source):
+            yield os.fspath(source)
+            return
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        try:
+            yield self.decode_to_file(source, path)
+        finally:
+            os.remove(path)
+
+    def _decode(self, stream, name):
+        """
+        Dispatch a stream to the matching decoding path.
+
+        Args:
+            stream (BinaryIO): Seekable stream positioned at the start of the file.
+            name (str): File name, used to recognize headerless PCM.
+
+        Yields:
+            np.ndarray: int16 frame.
+        """
+        fmt = read_wav_header(stream)
+        if fmt is not None:
+            if fmt.is_target(self.sample_rate):
+                yield from self._read_frames(_LimitedReader(stream, fmt.data_size))
+                return
+            if fmt.dtype() is not None:
+                yield from self._convert_frames(_LimitedReader(stream, fmt.data_size), fmt)
+                return
+        stream.seek(0)
+        if os.path.splitext(name)[1].lower() in (".pcm", ".raw"):
+            raw = WavFormat(WAVE_FORMAT_PCM, 1, self.raw_sample_rate, 16, 0)
+            if raw.is_target(self.sample_rate):
+                yield from self._read_frames(stream)
+            else:
+                yield from self._convert_frames(stream, raw)
+            return
+        yield from self._ffmpeg_frames(stream, name)
+
+    def _read_frames(self, stream):
+        """
+        Read already-decoded 16-bit mono PCM straight into the frame buffer.
+
+        Args:
+            stream (BinaryIO): Stream of little-endian int16 samples.
+
+        Yields:
+            np.ndarray: int16 frame.
+        """
+        frame = np.zeros(self.frame_samples, dtype="<i2")
+        view = memoryview(frame).cast("B")
+        size, fill = len(view), 0
+        while True:
+            read = stream.readinto(view[fill:])
+            if not read:
+                break
+            fill += read
+            if fill == size:
+                yield frame
+                fill = 0
+        if fill >= 2:
+            yield frame[:fill // 2]
+
+    def _convert_frames(self, stream, fmt):
+        """
+        Decode, downmix and resample PCM samples into frames.
+
+        Args:
+            stream (BinaryIO): Stream of interleaved samples.
+            fmt (WavFormat): Sample layout of the stream.
+
+        Yields:
+            np.ndarray: int16 frame.
+        """
+        dtype, channels, block = fmt.dtype(), fmt.channels, fmt.block_align
+        raw = bytearray(READ_SAMPLES * block)
+        raw_view = memoryview(raw)
+        work = np.zeros(READ_SAMPLES * channels, dtype=np.float32)
+        mono = np.zeros(READ_SAMPLES, dtype=np.float32)
+        table = None
+        if fmt.audio_format == WAVE_FORMAT_MULAW:
+            table = _mulaw_table()
+        elif fmt.audio_format == WAVE_FORMAT_ALAW:
+            table = _alaw_table()
+        resampler = None
+        if fmt.sample_rate != self.sample_rate:
+            resampler = StreamingResampler(fmt.sample_rate, self.sample_rate, READ_SAMPLES)
+        framer = _Framer(self.frame_samples)
+
+        carry = 0
+        while True:
+            read = stream.readinto(raw_view[carry:])
+            if not read:
+                break
+            available = carry + read
+            count = available // block
+            values = count * channels
+            samples = np.frombuffer(raw, dtype=dtype, count=values)
+            target = work[:values]
+            if table is not None:
+                np.take(table, samples, out=target)
+            else:
+                target[:] = samples
+                if fmt.bits == 8:
+                    target -= 128.0
+                    target *= 256.0
+                elif fmt.bits == 32 and dtype.kind == "i":
+                    target *= 1.0 / 65536.0
+                elif dtype.kind == "f":
+                    target *= 32768.0
+            if channels > 1:
+                target.reshape(count, channels).mean(axis=1, out=mono[:count])
+                target = mono[:count]
+            if resampler is not None:
+                target = resampler.process(target)
+            yield from framer.push(target)
+
+            carry = available - count * block
+            if carry:
+                raw[:carry] = raw[count * block:available]
+        yield from framer.flush()
+
+    def _ffmpeg_frames(self, stream, name):
+        """
+        Decode any ffmpeg-supported format (e.g. MP3) through a subprocess.
+
+        Args:
+            stream (BinaryIO): Stream positioned at the start of the file.
+            name (str): Path of the file, passed to ffmpeg directly when it exists.
+
+        Yields:
+            np.ndarray: int16 frame.
+        """
+        if shutil.which(self.ffmpeg) is None:
+            raise RuntimeError(f"ffmpeg is required to decode {name or 'this audio'}")
+        from_path = bool(name) and os.path.isfile(name)
+        command = [
+            self.ffmpeg, "-nostdin", "-loglevel", "error",
+            "-i", name if from_path else "pipe:0",
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", "1", "-ar", str(self.sample_rate), "pipe:1",
+            ]
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL if from_path else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            )
+        feeder = None
+        if not from_path:
+            feeder = threading.Thread(target=_feed, args=(stream, process.stdin), daemon=True)
+            feeder.start()
+        finished = False
+        try:
+            yield from self._read_frames(process.stdout)
+            finished = True
+        finally:
+            if not finished:
+                # The consumer stopped early or failed; ffmpeg's exit status
+                # would only report the broken pipe, so it is not checked.
+                process.kill()
+            process.stdout.close()
+            if feeder is not None:
+                feeder.join()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            returncode = process.wait()
+        if returncode != 0:
+            message = stderr.decode(errors="replace").strip() or f"exit status {returncode}"
+            raise RuntimeError(f"ffmpeg failed: {message}")
+
+
+class _Framer:
+    """Packs float samples into fixed-size int16 frames through one reusable buffer."""
+
+    def __init__(self, frame_samples):
+        self.frame = np.zeros(frame_samples, dtype="<i2")
+        self.fill = 0
+
+    def push(self, samples):
+        """Append samples and yield every frame that becomes full."""
+        np.clip(samples, -32768.0, 32767.0, out=samples)
+        np.rint(samples, out=samples)
+        offset, total = 0, len(samples)
+        while offset < total:
+            take = min(len(self.frame) - self.fill, total - offset)
+            self.frame[self.fill:self.fill + take] = samples[offset:offset + take]
+            self.fill += take
+            offset += take
+            if self.fill == len(self.frame):
+                yield self.frame
+                self.fill = 0
+
+    def flush(self):
+        """Yield the final, partially filled frame."""
+        if self.fill:
+            yield self.frame[:self.fill]
+            self.fill = 0
+
+
+class _LimitedReader:
+    """Exposes at most ``limit`` bytes of a stream through readinto()."""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit if 0 < limit < 0xFFFFFFFF else None
+
+    def readinto(self, buffer):
+        """Read into buffer without crossing the end of the data chunk."""
+        if self.remaining is None:
+            return self.stream.readinto(buffer)
+        if self.remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self.remaining]
+        read = self.stream.readinto(view) or 0
+        self.remaining -= read
+        return read
+
+
+def _feed(stream, pipe):
+    """Copy a file object into a subprocess pipe in fixed-size chunks."""
+    try:
+        for chunk in iter(lambda: stream.read(1 << 16), b""):
+            pipe.write(chunk)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            pipe.close()
+        except BrokenPipeError:
+            pass
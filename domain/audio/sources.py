@@ -0,0 +1,123 @@
+"""The module reads live 16 kHz mono PCM from pipes, sockets and replayed files."""
+
+import contextlib
+import socket
+import time
+
+import numpy as np
+
+from domain.audio.decoding import SAMPLE_RATE
+
+CHUNK_SECONDS = 0.1
+
+
+def read_pcm(stream, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+    """
+    Read raw little-endian int16 mono PCM from a stream as it arrives.
+
+    A frame is yielded as soon as chunk_seconds of audio are available, so
+    a slow producer such as a phone line is never waited on for longer
+    than one chunk. An odd trailing byte at the end of the stream is dropped.
+
+    Args:
+        stream (BinaryIO): Unbuffered or line-buffered binary stream, such as
+                           sys.stdin.buffer or socket.makefile("rb").
+        sample_rate (int): Sample rate of the stream.
+        chunk_seconds (float): Audio per yielded frame.
+
+    Yields:
+        np.ndarray: int16 frame of at most chunk_seconds of audio.
+    """
+    chunk_bytes = max(int(sample_rate * chunk_seconds), 1) * 2
+    pending = b""
+    while True:
+        data = stream.read(chunk_bytes - len(pending))
+        if not data:
+            break
+        pending += data
+        if len(pending) == chunk_bytes:
+            yield np.frombuffer(pending, dtype="<i2").astype(np.int16)
+            pending = b""
+    if len(pending) >= 2:
+        yield np.frombuffer(pending[:len(pending) // 2 * 2], dtype="<i2").astype(np.int16)
+
+
+def replay_file(decoder, source, speed=1.0, chunk_seconds=CHUNK_SECONDS, clock=time.monotonic,
+                sleep=time.sleep):
+    """
+    Replay a recording as if it were arriving live.
+
+    Frames are released no earlier than their position in the recording,
+    divided by speed, so lag measured against a replay matches lag on a
+    real call.
+
+    Args:
+        decoder (AudioDecoder): Decoder of the recording.
+        source (str | BinaryIO): Path to an audio file or a binary file object.
+        speed (float): Playback speed; 0 replays as fast as possible.
+        chunk_seconds (float): Audio per yielded frame.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+        sleep (Callable[[float], None]): Waits for the given seconds.
+
+    Yields:
+        np.ndarray: int16 frame of at most chunk_seconds of audio.
+    """
+    chunk = max(int(decoder.sample_rate * chunk_seconds), 1)
+    started = clock()
+    samples = 0
+    pending = []
+    pending_samples = 0
+    for frame in decoder.frames(source):
+        pending.append(frame.copy())
+        pending_samples += len(frame)
+        while pending_samples >= chunk:
+            joined = np.concatenate(pending)
+            samples += chunk
+            _wait_until(started, samples, decoder.sample_rate, speed, clock, sleep)
+            yield joined[:chunk]
+            pending = [joined[chunk:]]
+            pending_samples -= chunk
+    if pending_samples:
+        samples += pending_samples
+        _wait_until(started, samples, decoder.sample_rate, speed, clock, sleep)
+        yield np.concatenate(pending)
+
+
+def _wait_until(started, samples, sample_rate, speed, clock, sleep):
+    """
+    Sleep until the given amount of audio would have been spoken.
+
+    Args:
+        started (float): Clock time of the first sample.
+        samples (int): Samples released so far, including the next frame.
+        sample_rate (int): Sample rate of the audio.
+        speed (float): Playback speed; 0 does not wait.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+        sleep (Callable[[float], None]): Waits for the given seconds.
+
+    Returns:
+        None
+    """
+    if speed <= 0:
+        return
+    delay = started + samples / sample_rate / speed - clock()
+    if delay > 0:
+        sleep(delay)
+
+
+@contextlib.contextmanager
+def accept_pcm(port, host="0.0.0.0"):
+    """
+    Wait for one connection sending raw PCM and provide its stream.
+
+    Args:
+        port (int): TCP port to listen on.
+        host (str): Address to bind.
+
+    Yields:
+        BinaryIO: Binary stream of the connection, for read_pcm().
+    """
+    with socket.create_server((host, port)) as server:
+        connection, _ = server.accept()
+        with connection, connection.makefile("rb", buffering=0) as stream:
+            yield stream
@@ -0,0 +1,114 @@
+"""The module spools uploaded recordings to disk and decodes each of them once."""
+
+import collections
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+from domain.audio.decoding import AudioDecoder
+
+CHUNK_BYTES = 1 << 20
+KEEP_UPLOADS = 1
+
+
+class UploadSpool:
+    """
+    Decoded copies of the recordings uploaded in one session, on disk.
+
+    An upload is copied to the spool directory in fixed-size chunks and
+    decoded once into a 16 kHz mono WAV file. Every stage then reads that
+    file through a shared memory map, instead of each stage decoding the
+    in-memory upload again. Reruns of the session reuse the file.
+
+    The directory is removed by close(), or when the spool is garbage
+    collected together with the session that owns it, or at interpreter
+    exit, whichever comes first.
+
+    Args:
+        decoder (AudioDecoder): Decoder of the uploads.
+        directory (str): Parent of the spool directory; the system temporary
+                         directory by default.
+        keep (int): Most recent uploads kept; older ones are removed.
+
+    Methods:
+        decoded_path(upload, audio_hash): Returns the path of the decoded upload.
+        close(): Removes every spooled file.
+    """
+
+    def __init__(self, decoder=None, directory=None, keep=KEEP_UPLOADS):
+        """
+        Initialize the UploadSpool and create its directory.
+
+        Args:
+            decoder (AudioDecoder): Decoder of the uploads.
+            directory (str): Parent of the spool directory.
+            keep (int): Most recent uploads kept; older ones are removed.
+        """
+        self.decoder = decoder or AudioDecoder()
+        self.keep = keep
+        self.directory = tempfile.mkdtemp(prefix="cqr-uploads-", dir=directory)
+        self._paths = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    @property
+    def closed(self):
+        """Whether the spooled files have been removed."""
+        return not self._finalizer.alive
+
+    def decoded_path(self, upload, audio_hash):
+        """
+        Return the path of an upload decoded as a 16 kHz mono WAV file.
+
+        Uploads already in that layout are only copied; others are decoded
+        from the copy, which is then removed.
+
+        Args:
+            upload (BinaryIO): Uploaded file object, such as a Streamlit upload.
+            audio_hash (str): Digest of the upload, from audio_digest().
+
+        Returns:
+            str: Path to the decoded file, valid until close() or until
+                 keep newer uploads have been spooled.
+        """
+        with self._lock:
+            if self.closed:
+                raise ValueError("The upload spool is closed")
+            path = self._paths.get(audio_hash)
+            if path is not None and os.path.exists(path):
+                self._paths.move_to_end(audio_hash)
+                return path
+            name = audio_hash[:16]
+            suffix = os.path.splitext(getattr(upload, "name", ""))[1].lower()
+            spooled = os.path.join(self.directory, f"{name}.upload{suffix}")
+            upload.seek(0)
+            with open(spooled, "wb") as target:
+                shutil.copyfileobj(upload, target, CHUNK_BYTES)
+            upload.seek(0)
+            if self.decoder.is_decoded(spooled):
+                path = spooled
+            else:
+                path = os.path.join(self.directory, f"{name}.wav")
+                try:
+                    self.decoder.decode_to_file(spooled, path)
+                finally:
+                    os.remove(spooled)
+            self._paths[audio_hash] = path
+            while len(self._paths) > self.keep:
+                _, old_path = self._paths.popitem(last=False)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+            return path
+
+    def close(self):
+        """
+        Remove the spool directory and every file in it.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._paths.clear()
+            self._finalizer()
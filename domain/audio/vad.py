@@ -0,0 +1,399 @@
+"""The module finds speech regions in decoded audio by frame energy and zero crossings."""
+
+import collections
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+FRAME_MS = 20
+HANGOVER_MS = 300
+PREROLL_MS = 100
+MIN_SPEECH_MS = 250
+MARGIN_DB = 12.0
+MIN_ENERGY_DB = 30.0
+NOISE_PERCENTILE = 10
+MAX_ZERO_CROSSINGS = 0.4
+
+
+class VadReport:
+    """
+    How much audio a stage skipped thanks to voice activity detection.
+
+    The saving is an estimate that assumes the stage's cost grows linearly
+    with the amount of audio it processes.
+
+    Attributes:
+        audio_seconds (float): Duration of the original audio.
+        speech_seconds (float): Duration of the speech regions processed.
+        detect_seconds (float): Wall time spent detecting speech.
+        stage_seconds (float): Wall time the stage spent on the speech regions.
+    """
+
+    __slots__ = ("audio_seconds", "speech_seconds", "detect_seconds", "stage_seconds")
+
+    def __init__(self, audio_seconds=0.0, speech_seconds=0.0, detect_seconds=0.0, stage_seconds=0.0):
+        self.audio_seconds = audio_seconds
+        self.speech_seconds = speech_seconds
+        self.detect_seconds = detect_seconds
+        self.stage_seconds = stage_seconds
+
+    @property
+    def skipped_seconds(self):
+        """Seconds of audio the stage did not process."""
+        return self.audio_seconds - self.speech_seconds
+
+    @property
+    def skipped_share(self):
+        """Share of the audio the stage did not process."""
+        return self.skipped_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    @property
+    def saved_seconds(self):
+        """Estimated stage time saved, net of the time spent detecting speech."""
+        if not self.speech_seconds:
+            return -self.detect_seconds
+        return self.stage_seconds * self.skipped_seconds / self.speech_seconds - self.detect_seconds
+
+    def as_dict(self):
+        """
+        Convert the report to a plain dictionary.
+
+        Returns:
+            dict: Report fields including skipped audio and the estimated saving.
+        """
+        report = {name: getattr(self, name) for name in self.__slots__}
+        report.update(skipped_seconds=self.skipped_seconds, skipped_share=self.skipped_share,
+                      saved_seconds=self.saved_seconds)
+        return report
+
+
+class SpeechRegions:
+    """
+    Speech regions of a recording and the mapping between the original
+    timeline and the compacted timeline that contains only speech.
+
+    Args:
+        starts (np.ndarray): int64 first sample of each region.
+        ends (np.ndarray): int64 sample after the last of each region.
+        total_samples (int): Length of the recording in samples.
+        sample_rate (int): Sample rate of the recording.
+
+    Methods:
+        speech_frames(frames): Yields only the speech samples of decoded frames.
+        to_original(times, side): Maps compacted times to original times.
+        split(start, end): Maps a compacted span to original spans.
+    """
+
+    __slots__ = ("starts", "ends", "total_samples", "sample_rate", "_compact_starts")
+
+    def __init__(self, starts, ends, total_samples, sample_rate):
+        """
+        Initialize the SpeechRegions.
+
+        Args:
+            starts (np.ndarray): int64 first sample of each region.
+            ends (np.ndarray): int64 sample after the last of each region.
+            total_samples (int): Length of the recording in samples.
+            sample_rate (int): Sample rate of the recording.
+        """
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.total_samples = int(total_samples)
+        self.sample_rate = sample_rate
+        self._compact_starts = np.concatenate([[0], np.cumsum(self.ends - self.starts)])
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def audio_seconds(self):
+        """Duration of the recording."""
+        return self.total_samples / self.sample_rate
+
+    @property
+    def speech_seconds(self):
+        """Duration of all speech regions together."""
+        return float(self._compact_starts[-1]) / self.sample_rate
+
+    def speech_frames(self, frames):
+        """
+        Yield only the speech samples of a stream of decoded frames.
+
+        Yielded arrays are views of the incoming frames and share their
+        lifetime.
+
+        Args:
+            frames (Iterable[np.ndarray]): Frames of the same recording, in order.
+
+        Yields:
+            np.ndarray: Consecutive pieces of speech.
+        """
+        region, position = 0, 0
+        for frame in frames:
+            frame_end = position + len(frame)
+            while region < len(self.starts) and self.starts[region] < frame_end:
+                first = max(self.starts[region], position)
+                last = min(self.ends[region], frame_end)
+                if last > first:
+                    yield frame[first - position:last - position]
+                if self.ends[region] > frame_end:
+                    break
+                region += 1
+            position = frame_end
+            if region == len(self.starts):
+                return
+
+    def to_original(self, times, side="right"):
+        """
+        Map times on the compacted timeline to the original timeline.
+
+        A time exactly on the border of two regions is the end of the first
+        region with side="left" and the start of the next with side="right".
+
+        Args:
+            times (array_like): Seconds on the compacted timeline.
+            side (str): "right" for start times, "left" for end times.
+
+        Returns:
+            np.ndarray: Seconds on the original timeline.
+        """
+        samples = np.asarray(times, dtype=np.float64) * self.sample_rate
+        if not len(self.starts):
+            return samples / self.sample_rate
+        region = np.clip(np.searchsorted(self._compact_starts[1:], samples, side=side),
+                         0, len(self.starts) - 1)
+        return (self.starts[region] + samples - self._compact_starts[region]) / self.sample_rate
+
+    def split(self, start, end):
+        """
+        Map a span of the compacted timeline to the original spans it covers.
+
+        Args:
+            start (float): Span start on the compacted timeline.
+            end (float): Span end on the compacted timeline.
+
+        Returns:
+            List[Tuple[float, float]]: Original spans, one per region touched.
+        """
+        if not len(self.starts):
+            return [(start, end)]
+        borders = self._compact_starts / self.sample_rate
+        first = int(np.clip(np.searchsorted(borders[1:], start, side="right"), 0, len(self.starts) - 1))
+        last = int(np.clip(np.searchsorted(borders[1:], end, side="left"), 0, len(self.starts) - 1))
+        spans = []
+        for region in range(first, last + 1):
+            piece_start = max(start, borders[region])
+            piece_end = min(end, borders[region + 1])
+            if piece_end > piece_start:
+                offset = self.starts[region] / self.sample_rate - borders[region]
+                spans.append((piece_start + offset, piece_end + offset))
+        return spans
+
+
+class VoiceActivityDetector:
+    """
+    Marks speech by short-time energy and zero-crossing rate.
+
+    The audio is cut into frames of frame_ms. A frame is speech when its
+    energy exceeds the threshold and its zero-crossing rate is below
+    max_zero_crossings, which rejects hiss and other broadband noise. By
+    default the threshold adapts to the recording: margin_db above its
+    noise floor (the noise_percentile of frame energies), but never below
+    min_energy_db. The floor is only trusted when the loud frames (the
+    same percentile from the top) are more than margin_db above it; a
+    recording without quiet stretches, such as a trimmed clip of continuous
+    speech, has no noise floor to measure and uses min_energy_db instead.
+    Speech is then extended by hangover_ms after and
+    preroll_ms before each speech frame, so short pauses and word onsets
+    are kept, and regions shorter than min_speech_ms are dropped. Features
+    are computed frame by frame from the decoder, so only one small value
+    per frame is held in memory.
+
+    The most recent results are kept per file, so stages analyzing the
+    same decoded file share one detection pass, including stages that ask
+    at the same time: later callers wait for the pass already running.
+
+    Args:
+        frame_ms (int): Analysis frame length.
+        hangover_ms (int): Speech kept after the last speech frame.
+        preroll_ms (int): Speech kept before the first speech frame.
+        min_speech_ms (int): Shortest region kept.
+        threshold_db (float): Fixed energy threshold in dB re one int16 step;
+                              None adapts it to each recording.
+        margin_db (float): Adaptive threshold above the noise floor.
+        min_energy_db (float): Lowest adaptive threshold.
+        noise_percentile (float): Percentile of frame energies taken as noise floor.
+        max_zero_crossings (float): Highest zero-crossing rate of speech, per sample.
+
+    Methods:
+        detect(frames, sample_rate): Returns the speech regions of decoded frames.
+        detect_file(decoder, path): Returns the speech regions of a file, cached.
+    """
+
+    _CACHE_ENTRIES = 4
+
+    def __init__(self, frame_ms=FRAME_MS, hangover_ms=HANGOVER_MS, preroll_ms=PREROLL_MS,
+                 min_speech_ms=MIN_SPEECH_MS, threshold_db=None, margin_db=MARGIN_DB,
+                 min_energy_db=MIN_ENERGY_DB, noise_percentile=NOISE_PERCENTILE,
+                 max_zero_crossings=MAX_ZERO_CROSSINGS):
+        """
+        Initialize the VoiceActivityDetector.
+
+        Args:
+            frame_ms (int): Analysis frame length.
+            hangover_ms (int): Speech kept after the last speech frame.
+            preroll_ms (int): Speech kept before the first speech frame.
+            min_speech_ms (int): Shortest region kept.
+            threshold_db (float): Fixed energy threshold in dB re one int16 step;
+                                  None adapts it to each recording.
+            margin_db (float): Adaptive threshold above the noise floor.
+            min_energy_db (float): Lowest adaptive threshold.
+            noise_percentile (float): Percentile of frame energies taken as noise floor.
+            max_zero_crossings (float): Highest zero-crossing rate of speech, per sample.
+        """
+        self.frame_ms = frame_ms
+        self.hangover_ms = hangover_ms
+        self.preroll_ms = preroll_ms
+        self.min_speech_ms = min_speech_ms
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.noise_percentile = noise_percentile
+        self.max_zero_crossings = max_zero_crossings
+        self._cache = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self):
+        """
+        Settings that change the detected regions, for cache keys.
+
+        Returns:
+            str: Description of the settings.
+        """
+        return (f"vad:{self.frame_ms}:{self.hangover_ms}:{self.preroll_ms}:{self.min_speech_ms}:"
+                f"{self.threshold_db}:{self.margin_db}:{self.min_energy_db}:"
+                f"{self.noise_percentile}:{self.max_zero_crossings}")
+
+    def detect(self, frames, sample_rate):
+        """
+        Find the speech regions of a recording.
+
+        Args:
+            frames (Iterable[np.ndarray]): int16 frames, as yielded by AudioDecoder.
+            sample_rate (int): Sample rate of the frames.
+
+        Returns:
+            SpeechRegions: The speech regions.
+        """
+        length = max(int(sample_rate * self.frame_ms / 1000), 1)
+        energies, crossings = [], []
+        carry = np.zeros(length, dtype=np.float32)
+        fill, total = 0, 0
+        for frame in frames:
+            total += len(frame)
+            samples = frame.astype(np.float32)
+            offset = 0
+            if fill:
+                take = min(length - fill, len(samples))
+                carry[fill:fill + take] = samples[:take]
+                fill += take
+                offset = take
+                if fill == length:
+                    self._features(carry[None], energies, crossings)
+                    fill = 0
+            usable = (len(samples) - offset) // length * length
+            if usable:
+                self._features(samples[offset:offset + usable].reshape(-1, length), energies, crossings)
+            rest = len(samples) - offset - usable
+            if rest:
+                carry[:rest] = samples[offset + usable:]
+                fill = rest
+        if fill:
+            self._features(carry[None, :fill], energies, crossings)
+
+        if not energies:
+            return SpeechRegions(np.zeros(0), np.zeros(0), total, sample_rate)
+        energy_db = np.concatenate(energies)
+        zero_crossings = np.concatenate(crossings)
+        threshold = self.threshold_db
+        if threshold is None:
+            floor, loud = np.percentile(energy_db, [self.noise_percentile,
+                                                    100 - self.noise_percentile])
+            threshold = self.min_energy_db
+            if loud - floor > self.margin_db:
+                threshold = max(floor + self.margin_db, self.min_energy_db)
+        active = (energy_db > threshold) & (zero_crossings <= self.max_zero_crossings)
+
+        active = self._extend(active, int(np.ceil(self.hangover_ms / self.frame_ms)))
+        active = self._extend(active[::-1], int(np.ceil(self.preroll_ms / self.frame_ms)))[::-1]
+        edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+        run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        keep = (run_ends - run_starts) * self.frame_ms >= self.min_speech_ms
+        return SpeechRegions(run_starts[keep] * length,
+                             np.minimum(run_ends[keep] * length, total), total, sample_rate)
+
+    def detect_file(self, decoder, path):
+        """
+        Find the speech regions of a decoded file, reusing recent results.
+
+        Args:
+            decoder (AudioDecoder): Decoder producing the frames.
+            path (str): Path to the file.
+
+        Returns:
+            Tuple[SpeechRegions, float]: The regions and the seconds spent
+                                         detecting them (0 for a cached result).
+        """
+        status = os.stat(path)
+        key = (os.path.abspath(path), status.st_size, status.st_mtime_ns, decoder.sample_rate)
+        with self._lock:
+            regions = self._cache.get(key)
+            if regions is not None:
+                self._cache.move_to_end(key)
+                return regions, 0.0
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+        if not owner:
+            return pending.result(), 0.0
+
+        started = time.perf_counter()
+        try:
+            regions = self.detect(decoder.frames(path), decoder.sample_rate)
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(error)
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            del self._pending[key]
+            self._cache[key] = regions
+            while len(self._cache) > self._CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        pending.set_result(regions)
+        return regions, elapsed
+
+    @staticmethod
+    def _features(blocks, energies, crossings):
+        """Append the energy in dB and zero-crossing rate of each row of blocks."""
+        energy = np.einsum("ij,ij->i", blocks, blocks) / blocks.shape[1]
+        energies.append(10.0 * np.log10(energy + 1e-10))
+        signs = np.signbit(blocks)
+        crossings.append(np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / blocks.shape[1])
+
+    @staticmethod
+    def _extend(active, frames):
+        """Mark the given number of frames after every active frame as active."""
+        if frames <= 0 or not len(active):
+            return active
+        counts = np.cumsum(active, dtype=np.int64)
+        lag = min(frames + 1, len(counts))
+        lagged = np.concatenate([np.zeros(lag, dtype=np.int64), counts[:len(counts) - lag]])
+        return (counts - lagged) > 0
@@ -0,0 +1,379 @@
+"""The module analyzes many recordings headlessly in a pool of worker processes."""
+
+import json
+import multiprocessing
+import os
+import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from domain.alignment.alignment import align
+from domain.cache.result_cache import audio_digest
+from domain.results.call_result import CallResult
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".ogg", ".flac", ".m4a", ".raw", ".pcm")
+MODEL_PATH = "models/vosk-model-ru-0.42.zip"
+SENTIMENT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+_worker_pipeline = None
+
+
+def find_audio(sources, extensions=AUDIO_EXTENSIONS):
+    """
+    Collect audio files from files and directories.
+
+    Directories are scanned recursively for files with a known extension;
+    files given explicitly are kept whatever their extension.
+
+    Args:
+        sources (Iterable[str]): Paths to audio files or directories.
+        extensions (Tuple[str]): Lower-case extensions of audio files.
+
+    Returns:
+        List[str]: Absolute paths in a stable order, without duplicates.
+    """
+    found = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, names in os.walk(source):
+                found.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(extensions))
+        else:
+            found.append(source)
+    return sorted({os.path.abspath(path) for path in found})
+
+
+def build_pipeline(model_path=MODEL_PATH, sentiment_model=SENTIMENT_MODEL, vad=True,
+                   triage_model_path=None):
+    """
+    Build the analysis pipeline used by the app and load all of its models.
+
+    Args:
+        model_path (str): Path to the Vosk model directory or zip archive.
+        sentiment_model (str): Name of the SentenceTransformer model.
+        vad (bool): Whether to skip silence before recognition and diarization.
+        triage_model_path (str): Small Vosk model decoding first, so that the
+                                 model at model_path only decodes the spans it
+                                 is unsure of; None decodes everything with it.
+
+    Returns:
+        AnalysisPipeline: The pipeline, with models loaded.
+    """
+    from domain.audio.decoding import AudioDecoder
+    from domain.audio.vad import VoiceActivityDetector
+    from domain.cache.result_cache import result_cache
+    from domain.diarization.diarization import Diarizer
+    from domain.instrumentation.export import MetricsExporter
+    from domain.pipeline.pipeline import AnalysisPipeline
+    from domain.sentiment_analysis.embedding_cache import EmbeddingCache
+    from domain.sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+    from domain.transcription.transcription import Transcriber
+
+    decoder = AudioDecoder()
+    detector = VoiceActivityDetector() if vad else None
+    transcriber = Transcriber(model_path=model_path, decoder=decoder, vad=detector,
+                              triage_model_path=triage_model_path)
+    diarizer = Diarizer(decoder=decoder, vad=detector)
+    sentiment_analyzer = SentimentAnalyzer(
+        model_name=sentiment_model, embedding_cache=EmbeddingCache(sentiment_model)
+        )
+    # Load the models now rather than on the first recording.
+    transcriber.model
+    if triage_model_path is not None:
+        transcriber.model_registry.get(triage_model_path)
+    diarizer.backend
+    sentiment_analyzer.backend
+    # Workers only write call records; a port would be contended by every worker.
+    metrics = MetricsExporter.from_environment(serve=False)
+    return AnalysisPipeline(transcriber, diarizer, sentiment_analyzer,
+                            cache=result_cache, decoder=decoder, call_sink=metrics.write_call)
+
+
+def _init_worker(factory, factory_args):
+    """
+    Build the pipeline once in a worker process.
+
+    Args:
+        factory (Callable): Top-level function returning an AnalysisPipeline.
+        factory_args (tuple): Arguments of the factory.
+
+    Returns:
+        None
+    """
+    global _worker_pipeline
+    _worker_pipeline = factory(*factory_args)
+
+
+def analyze_file(path, output_dir, pipeline=None):
+    """
+    Analyze one recording and save its CallResult.
+
+    The file is decoded once; every stage reads the decoded copy.
+
+    Args:
+        path (str): Path to the recording.
+        output_dir (str): Directory receiving the result file.
+        pipeline (AnalysisPipeline): Pipeline to use; the worker's pipeline if omitted.
+
+    Returns:
+        dict: Manifest fields: audio_hash, output, audio_seconds, cqr and wall_seconds.
+    """
+    pipeline = pipeline or _worker_pipeline
+    started = time.perf_counter()
+    audio_hash = audio_digest(path)
+    with pipeline.decoder.decoded(path) as wav_path:
+        with wave.open(wav_path, "rb") as wav:
+            audio_seconds = wav.getnframes() / wav.getframerate()
+        result = pipeline.run(wav_path, audio_hash=audio_hash)
+    cqr = float(sum(result.sentiment_scores))
+    call = CallResult.from_transcript(
+        result.transcript, align(result.transcript, result.diarization), result.sentiment_scores,
+        metadata={"audio_hash": audio_hash, "source": path, "cqr": cqr,
+                  "audio_seconds": audio_seconds},
+        )
+    output = os.path.join(output_dir, f"{audio_hash[:16]}.cqr")
+    call.save(output)
+    return {"audio_hash": audio_hash, "output": output, "audio_seconds": audio_seconds,
+            "cqr": cqr, "wall_seconds": time.perf_counter() - started}
+
+
+def _analyze_in_worker(path, output_dir):
+    """Analyze one recording with the pipeline of the current worker process."""
+    return analyze_file(path, output_dir)
+
+
+class BatchManifest:
+    """
+    Append-only JSON lines record of every recording a batch has finished.
+
+    Each line is written and flushed to disk as soon as a recording is
+    done or has failed, so a run that is interrupted loses at most the
+    recordings in flight. A recording counts as done only while its size
+    and modification time are unchanged; failed recordings are retried by
+    the next run.
+
+    Args:
+        path (str): Path to the manifest file.
+
+    Methods:
+        is_done(path): Checks whether a recording was already analyzed.
+        record(path, status, fields): Appends the outcome of a recording.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the BatchManifest and load the outcomes of earlier runs.
+
+        Args:
+            path (str): Path to the manifest file.
+        """
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as stream:
+                for line in stream:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an interrupted run
+                    if entry.get("status") == "done":
+                        self.done[entry["source"]] = entry
+                    else:
+                        self.done.pop(entry.get("source"), None)
+
+    @staticmethod
+    def _fingerprint(path):
+        """Return the size and modification time of a file, or None if it cannot be read."""
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+        return [status.st_size, status.st_mtime_ns]
+
+    def is_done(self, path):
+        """
+        Check whether a recording was already analyzed and has not changed since.
+
+        Args:
+            path (str): Absolute path to the recording.
+
+        Returns:
+            bool: True if the recording can be skipped.
+        """
+        entry = self.done.get(path)
+        if entry is None:
+            return False
+        fingerprint = self._fingerprint(path)
+        return fingerprint is not None and fingerprint == entry["fingerprint"]
+
+    def record(self, path, status, fields=None):
+        """
+        Append the outcome of a recording.
+
+        Args:
+            path (str): Absolute path to the recording.
+            status (str): "done" or "failed".
+            fields (dict): Further fields, e.g. from analyze_file() or the error.
+
+        Returns:
+            dict: The entry written.
+        """
+        entry = {"source": path, "status": status, "fingerprint": self._fingerprint(path),
+                 "finished_at": time.time()}
+        entry.update(fields or {})
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as stream:
+            stream.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            stream.flush()
+            os.fsync(stream.fileno())
+        if status == "done":
+            self.done[path] = entry
+        else:
+            self.done.pop(path, None)
+        return entry
+
+
+class BatchReport:
+    """
+    Throughput of a batch run.
+
+    Attributes:
+        calls (int): Recordings analyzed in this run.
+        failed (int): Recordings that failed.
+        skipped (int): Recordings already done by an earlier run.
+        audio_seconds (float): Duration of the recordings analyzed.
+        wall_seconds (float): Wall-clock time of the run.
+        workers (int): Number of worker processes.
+    """
+
+    __slots__ = ("calls", "failed", "skipped", "audio_seconds", "wall_seconds", "workers")
+
+    def __init__(self, calls=0, failed=0, skipped=0, audio_seconds=0.0, wall_seconds=0.0,
+                 workers=1):
+        self.calls = calls
+        self.failed = failed
+        self.skipped = skipped
+        self.audio_seconds = audio_seconds
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+
+    @property
+    def calls_per_hour(self):
+        """Recordings analyzed per wall-clock hour."""
+        return self.calls * 3600.0 / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def audio_hours_per_wall_hour(self):
+        """Hours of audio analyzed per wall-clock hour."""
+        return self.audio_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def as_dict(self):
+        """
+        Convert the report to a plain dictionary.
+
+        Returns:
+            dict: Report fields including both throughput figures.
+        """
+        report = {name: getattr(self, name) for name in self.__slots__}
+        report.update(calls_per_hour=self.calls_per_hour,
+                      audio_hours_per_wall_hour=self.audio_hours_per_wall_hour)
+        return report
+
+
+class BatchRunner:
+    """
+    Analyzes recordings in a pool of worker processes.
+
+    Each worker builds the pipeline once when it starts, so models are
+    loaded once per worker rather than once per recording, and then
+    analyzes recordings until the queue is empty. At most two recordings
+    per worker are in flight, so the manifest stays close to the work
+    actually done when a run is interrupted.
+
+    Args:
+        output_dir (str): Directory receiving one CallResult file per recording.
+        manifest_path (str): Path to the manifest; defaults to manifest.jsonl
+                             in output_dir.
+        workers (int): Number of worker processes.
+        factory (Callable): Top-level function building the pipeline in each worker.
+        factory_args (tuple): Arguments of the factory.
+
+    Methods:
+        run(paths, progress): Analyzes the recordings not done yet.
+    """
+
+    def __init__(self, output_dir="data/processed", manifest_path=None, workers=2,
+                 factory=build_pipeline, factory_args=()):
+        """
+        Initialize the BatchRunner.
+
+        Args:
+            output_dir (str): Directory receiving one CallResult file per recording.
+            manifest_path (str): Path to the manifest; defaults to manifest.jsonl
+                                 in output_dir.
+            workers (int): Number of worker processes.
+            factory (Callable): Top-level function building the pipeline in each worker.
+            factory_args (tuple): Arguments of the factory.
+        """
+        self.output_dir = output_dir
+        self.manifest = BatchManifest(manifest_path or os.path.join(output_dir, "manifest.jsonl"))
+        self.workers = workers
+        self.factory = factory
+        self.factory_args = factory_args
+
+    def run(self, paths, progress=None):
+        """
+        Analyze the recordings that no earlier run has finished.
+
+        Args:
+            paths (Iterable[str]): Paths to the recordings, e.g. from find_audio().
+            progress (Callable): Called with each manifest entry as it is written.
+
+        Returns:
+            BatchReport: Counts and throughput of this run.
+        """
+        started = time.perf_counter()
+        report = BatchReport(workers=self.workers)
+        pending = []
+        for path in paths:
+            path = os.path.abspath(path)
+            if self.manifest.is_done(path):
+                report.skipped += 1
+            else:
+                pending.append(path)
+        if pending:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.factory, self.factory_args),
+            ) as pool:
+                queued = iter(pending)
+                running = {}
+                for path in queued:
+                    running[pool.submit(_analyze_in_worker, path, self.output_dir)] = path
+                    if len(running) >= 2 * self.workers:
+                        break
+                while running:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path = running.pop(future)
+                        try:
+                            fields = future.result()
+                        except Exception as error:
+                            entry = self.manifest.record(path, "failed", {"error": repr(error)})
+                            report.failed += 1
+                        else:
+                            entry = self.manifest.record(path, "done", fields)
+                            report.calls += 1
+                            report.audio_seconds += fields["audio_seconds"]
+                        if progress is not None:
+                            progress(entry)
+                        following = next(queued, None)
+                        if following is not None:
+                            running[pool.submit(_analyze_in_worker, following, self.output_dir)] = following
+        report.wall_seconds = time.perf_counter() - started
+        return report
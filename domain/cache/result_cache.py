@@ -0,0 +1,251 @@
+"""The module caches analysis results by the content of the analyzed audio."""
+
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+CACHE_DIR = "data/cache/results"
+MEMORY_ENTRIES = 64
+DISK_BYTES = 1 << 30
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def audio_digest(source):
+    """
+    Compute the SHA-256 of an audio file or file object.
+
+    Args:
+        source (str | BinaryIO): Path to an audio file or a seekable binary file object.
+
+    Returns:
+        str: Hex digest of the audio bytes.
+    """
+    sha = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as stream:
+            for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+                sha.update(chunk)
+    else:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+        source.seek(0)
+    return sha.hexdigest()
+
+
+def cache_key(audio_hash, stage, *identity):
+    """
+    Build a cache key for one stage's output on one recording.
+
+    Args:
+        audio_hash (str): Digest of the audio bytes, from audio_digest().
+        stage (str): Name of the stage, e.g. "transcription".
+        *identity: Model names and parameters that affect the stage output.
+
+    Returns:
+        str: Hex key.
+    """
+    material = "\x1f".join([audio_hash, stage] + [repr(part) for part in identity])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of stage outputs keyed by content hash.
+
+    Entries live in an in-memory LRU and in pickle files on disk. The disk
+    tier is capped by total size and evicts the least recently used files
+    first. Both tiers are shared by every caller in the process.
+
+    Args:
+        cache_dir (str): Directory of the on-disk tier; None disables it.
+        memory_entries (int): Capacity of the in-memory tier.
+        disk_bytes (int): Size cap of the on-disk tier.
+
+    Methods:
+        get(key): Returns a cached value or None.
+        contains(key): Checks whether a key is cached without loading it.
+        put(key, value): Stores a value in both tiers.
+        stats(): Returns hit and miss counters.
+        clear(): Removes every entry from both tiers.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_entries=MEMORY_ENTRIES, disk_bytes=DISK_BYTES):
+        """
+        Initialize the ResultCache.
+
+        Args:
+            cache_dir (str): Directory of the on-disk tier; None disables it.
+            memory_entries (int): Capacity of the in-memory tier.
+            disk_bytes (int): Size cap of the on-disk tier.
+        """
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+        self._disk_usage = None
+
+    def get(self, key):
+        """
+        Return a cached value, promoting disk hits into memory.
+
+        Args:
+            key (str): Key from cache_key().
+
+        Returns:
+            Any: The cached value, or None on a miss.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return self._memory[key]
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def contains(self, key):
+        """
+        Check whether a key is cached, without loading it or counting a lookup.
+
+        Args:
+            key (str): Key from cache_key().
+
+        Returns:
+            bool: True if either tier holds the key.
+        """
+        with self._lock:
+            if key in self._memory:
+                return True
+        return self.cache_dir is not None and os.path.exists(self._path(key))
+
+    def put(self, key, value):
+        """
+        Store a value in both tiers.
+
+        Args:
+            key (str): Key from cache_key().
+            value (Any): Picklable value; None is not cached.
+
+        Returns:
+            None
+        """
+        if value is None:
+            return
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def stats(self):
+        """
+        Return hit and miss counters.
+
+        Returns:
+            dict: memory_hits, disk_hits, misses, evictions and hit_rate.
+        """
+        with self._lock:
+            counters = {
+                name: self._counters[name]
+                for name in ("memory_hits", "disk_hits", "misses", "evictions")
+                }
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        counters["hit_rate"] = hits / lookups if lookups else 0.0
+        return counters
+
+    def clear(self):
+        """
+        Remove every entry from both tiers.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._memory.clear()
+            for path, _, _ in self._disk_entries():
+                os.remove(path)
+            self._disk_usage = 0
+
+    def _remember(self, key, value):
+        """Insert into the in-memory LRU; the caller holds the lock."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        """Return the file holding a key in the disk tier."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _read_disk(self, key):
+        """Load a value from the disk tier and mark it recently used."""
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as entry:
+                value = pickle.load(entry)
+            os.utime(path)
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_disk(self, key, value):
+        """Write a value to the disk tier atomically and enforce the size cap."""
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".partial")
+        with os.fdopen(handle, "wb") as entry:
+            pickle.dump(value, entry, protocol=pickle.HIGHEST_PROTOCOL)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(partial, path)
+        with self._lock:
+            if self._disk_usage is None:
+                self._disk_usage = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_usage += os.path.getsize(path) - previous
+            if self._disk_usage > self.disk_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        """List (path, size, mtime) of every file in the disk tier."""
+        entries = []
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".pkl"):
+                    path = os.path.join(root, name)
+                    info = os.stat(path)
+                    entries.append((path, info.st_size, info.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        """Delete least recently used files until the tier fits its cap."""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        usage = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if usage <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            usage -= size
+            self._counters["evictions"] += 1
+        self._disk_usage = usage
+
+
+result_cache = ResultCache()
@@ -1,29 +1,498 @@
 """The module performs audio diarization"""
 
-import pyannote.audio as pyaudio
+import contextlib
+import os
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+from domain.audio.decoding import AudioDecoder
+from domain.audio.vad import VadReport
+from domain.instrumentation.instrumentation import instruments
+
+PIPELINE_NAME = "pyannote/speaker-diarization"
+EMBEDDING_NAME = "pyannote/embedding"
+WINDOW_SECONDS = 60.0
+OVERLAP_SECONDS = 5.0
+LINK_THRESHOLD = 0.5
+MIN_EMBEDDING_SECONDS = 0.5
+
+
+class PyannoteBackend:
+    """
+    Loads the pyannote.audio diarization pipeline and embedding model once
+    per process and runs them on files or sample arrays.
+
+    Args:
+        pipeline_name (str): Name of the pretrained diarization pipeline.
+        embedding_name (str): Name of the pretrained speaker embedding model.
+        use_auth_token (str): Hugging Face token for gated models.
+
+    Methods:
+        segments(audio, sample_rate): Diarizes a file or a sample array.
+        embed(samples, sample_rate): Returns the speaker embedding of samples.
+        shared(pipeline_name, embedding_name, use_auth_token): Returns the
+            process-wide backend for the given models.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pipeline_name=PIPELINE_NAME, embedding_name=EMBEDDING_NAME,
+                 use_auth_token=None):
+        """
+        Initialize the PyannoteBackend and load the pipeline.
+
+        Args:
+            pipeline_name (str): Name of the pretrained diarization pipeline.
+            embedding_name (str): Name of the pretrained speaker embedding model.
+            use_auth_token (str): Hugging Face token for gated models.
+        """
+        from pyannote.audio import Pipeline
+
+        self.pipeline_name = pipeline_name
+        self.embedding_name = embedding_name
+        self.use_auth_token = use_auth_token
+        self.pipeline = Pipeline.from_pretrained(pipeline_name, use_auth_token=use_auth_token)
+        self._inference = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, pipeline_name=PIPELINE_NAME, embedding_name=EMBEDDING_NAME,
+               use_auth_token=None):
+        """
+        Return the process-wide backend for the given models, loading it on first use.
+
+        Args:
+            pipeline_name (str): Name of the pretrained diarization pipeline.
+            embedding_name (str): Name of the pretrained speaker embedding model.
+            use_auth_token (str): Hugging Face token for gated models.
+
+        Returns:
+            PyannoteBackend: The shared backend.
+        """
+        with cls._shared_lock:
+            key = (pipeline_name, embedding_name)
+            backend = cls._shared.get(key)
+            if backend is None:
+                with instruments.timer("diarization.model_load"):
+                    backend = cls(pipeline_name, embedding_name, use_auth_token)
+                cls._shared[key] = backend
+            return backend
+
+    def segments(self, audio, sample_rate=None):
+        """
+        Diarize a file or a sample array.
+
+        Args:
+            audio (str | np.ndarray): Path to a WAV file, or float32 samples in [-1, 1].
+            sample_rate (int): Sample rate of the samples; ignored for a path.
+
+        Returns:
+            List[Tuple[float, float, str]]: (start, end, label) of each speech turn,
+                                            in seconds relative to the audio.
+        """
+        annotation = self.pipeline(self._audio_file(audio, sample_rate))
+        return [
+            (float(turn.start), float(turn.end), str(label))
+            for turn, _, label in annotation.itertracks(yield_label=True)
+            ]
+
+    def embed(self, samples, sample_rate):
+        """
+        Return the speaker embedding of a stretch of single-speaker audio.
+
+        Args:
+            samples (np.ndarray): float32 samples in [-1, 1].
+            sample_rate (int): Sample rate of the samples.
+
+        Returns:
+            np.ndarray: One-dimensional embedding.
+        """
+        with self._lock:
+            if self._inference is None:
+                from pyannote.audio import Inference, Model
+
+                with instruments.timer("diarization.embedding_load"):
+                    model = Model.from_pretrained(self.embedding_name,
+                                                  use_auth_token=self.use_auth_token)
+                    self._inference = Inference(model, window="whole")
+        return np.ravel(self._inference(self._audio_file(samples, sample_rate)))
+
+    @staticmethod
+    def _audio_file(audio, sample_rate):
+        """Wrap samples in the in-memory file mapping pyannote.audio accepts."""
+        if isinstance(audio, str):
+            return audio
+        import torch
+
+        return {"waveform": torch.from_numpy(np.ascontiguousarray(audio))[None], "sample_rate": sample_rate}
+
+
+class _SpeakerLinker:
+    """
+    Maps window-local speaker labels to call-wide labels.
+
+    Each call-wide speaker keeps the duration-weighted sum of its unit
+    embeddings; a local speaker is linked to the most similar call-wide
+    speaker above the threshold, at most one local speaker per call-wide
+    speaker and window. Speakers with too little speech for a reliable
+    embedding are linked by their overlap with the previous window instead.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.centroids = []
+
+    def link(self, embeddings, durations, overlap_votes):
+        """
+        Link local speakers to call-wide speakers.
+
+        Args:
+            embeddings (dict): Local label to embedding, or None if too short.
+            durations (dict): Local label to seconds of speech in the window.
+            overlap_votes (dict): Local label to {call-wide index: seconds shared
+                                  with the previous window}.
+
+        Returns:
+            dict: Local label to call-wide speaker index.
+        """
+        mapping, taken = {}, set()
+        pairs = []
+        known = [index for index, centroid in enumerate(self.centroids) if centroid is not None]
+        if known:
+            centroids = np.stack([self.centroids[index] for index in known])
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+            for label, embedding in embeddings.items():
+                if embedding is None:
+                    continue
+                similarity = centroids @ (embedding / max(np.linalg.norm(embedding), 1e-12))
+                pairs.extend((float(value), label, index) for index, value in zip(known, similarity))
+        for value, label, index in sorted(pairs, key=lambda pair: pair[0], reverse=True):
+            if value < self.threshold:
+                break
+            if label not in mapping and index not in taken:
+                mapping[label] = index
+                taken.add(index)
+
+        for label in sorted(embeddings, key=lambda name: durations[name], reverse=True):
+            if label in mapping:
+                continue
+            votes = {index: seconds for index, seconds in overlap_votes.get(label, {}).items()
+                     if index not in taken}
+            if votes:
+                mapping[label] = max(votes, key=votes.get)
+            else:
+                self.centroids.append(None)
+                mapping[label] = len(self.centroids) - 1
+            taken.add(mapping[label])
+
+        for label, index in mapping.items():
+            embedding = embeddings[label]
+            if embedding is None:
+                continue
+            weighted = durations[label] * embedding / max(np.linalg.norm(embedding), 1e-12)
+            if self.centroids[index] is None:
+                self.centroids[index] = weighted
+            else:
+                self.centroids[index] = self.centroids[index] + weighted
+        return mapping
+
 
 class Diarizer:
     """
     Performs diarization on audio using pyannote.audio.
 
+    The pretrained pipeline is loaded once per process and shared by every
+    Diarizer. In streaming mode the audio is diarized in fixed windows that
+    overlap by overlap_seconds; speakers are linked across windows by the
+    similarity of their embeddings, and segments are emitted as soon as
+    they can no longer grow, so peak memory stays at about one window no
+    matter how long the call is. With a voice activity detector, only the
+    speech regions are diarized, as one compacted recording, and segment
+    times are mapped back to the original timeline.
+
+    Args:
+        decoder (AudioDecoder): Decoder producing 16 kHz mono PCM.
+        backend (PyannoteBackend): Diarization backend; the shared pyannote
+                                   backend is loaded on first use if omitted.
+        streaming (bool): Whether diarize() processes the audio window by window.
+        window_seconds (float): Length of a streaming window.
+        overlap_seconds (float): Overlap between consecutive windows.
+        link_threshold (float): Smallest cosine similarity linking two speakers.
+        use_auth_token (str): Hugging Face token for gated pyannote models.
+        vad (VoiceActivityDetector): Detector restricting diarization to speech
+                                     regions; None diarizes everything.
+
+    Attributes:
+        vad_report (VadReport): Audio skipped by the detector in the most
+                                recent diarization in the calling thread, if a
+                                detector is set.
+
     Methods:
         diarize(audio_path): Performs diarization on the given audio file.
+        diarize_stream(audio_path): Yields speaker segments window by window.
     """
 
+    def __init__(self, decoder=None, backend=None, streaming=False, window_seconds=WINDOW_SECONDS,
+                 overlap_seconds=OVERLAP_SECONDS, link_threshold=LINK_THRESHOLD,
+                 use_auth_token=None, vad=None):
+        """
+        Initialize the Diarizer.
+
+        Args:
+            decoder (AudioDecoder): Decoder producing 16 kHz mono PCM.
+            backend (PyannoteBackend): Diarization backend; the shared pyannote
+                                       backend is loaded on first use if omitted.
+            streaming (bool): Whether diarize() processes the audio window by window.
+            window_seconds (float): Length of a streaming window.
+            overlap_seconds (float): Overlap between consecutive windows.
+            link_threshold (float): Smallest cosine similarity linking two speakers.
+            use_auth_token (str): Hugging Face token for gated pyannote models.
+            vad (VoiceActivityDetector): Detector restricting diarization to speech
+                                         regions; None diarizes everything.
+        """
+        if not 0 <= overlap_seconds < window_seconds / 2:
+            raise ValueError("overlap_seconds must be less than half of window_seconds")
+        self.decoder = decoder or AudioDecoder()
+        self.streaming = streaming
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.link_threshold = link_threshold
+        self.use_auth_token = use_auth_token
+        self.vad = vad
+        self._local = threading.local()
+        self._backend = backend
+
+    @property
+    def vad_report(self):
+        """Audio skipped by the detector in the most recent diarization in the calling thread."""
+        return getattr(self._local, "vad_report", None)
+
+    @vad_report.setter
+    def vad_report(self, report):
+        self._local.vad_report = report
+
+    @property
+    def backend(self):
+        """
+        The diarization backend, loaded on first use.
+
+        Returns:
+            PyannoteBackend: The backend.
+        """
+        if self._backend is None:
+            self._backend = PyannoteBackend.shared(use_auth_token=self.use_auth_token)
+        return self._backend
+
     def diarize(self, audio_path):
         """
         Perform diarization on the given audio file.
 
+        Audio that is not already a 16 kHz mono WAV is decoded first; pass
+        the output of AudioDecoder.decoded() to reuse an existing decode.
+
         Args:
-            audio_path (str): Path to the audio file for diarization.
+            audio_path (str | BinaryIO): Path to the audio file for diarization,
+                                         or an uploaded file object.
 
         Returns:
-            pyannote.audio.pipeline.Pipeline: Diarization results.
-        """
-        pipeline = pyaudio.ApplicationDiarization(
-            uri=audio_path,
-            sad="smn",
-            pipeline=["pyAudioSMN", "pyAudioClustering"]
-            )
-        diarization = pipeline()
-        return diarization
+            List[dict]: Speaker segments with start, end (seconds) and speaker,
+                        ordered by start.
+        """
+        with instruments.timer("diarization.diarize") as timer:
+            if instruments.enabled:
+                audio = self.decoder.mapped(audio_path)
+                timer.set_audio(audio.duration if audio is not None else 0.0)
+            return self._diarize(audio_path)
+
+    def _diarize(self, audio_path):
+        """
+        Perform diarization on the given audio file with the configured mode.
+
+        Args:
+            audio_path (str | BinaryIO): Path to the audio file or an uploaded file object.
+
+        Returns:
+            List[dict]: Speaker segments ordered by start.
+        """
+        if self.streaming:
+            segments = list(self.diarize_stream(audio_path))
+        elif self.vad is None:
+            with self.decoder.decoded(audio_path) as wav_path:
+                segments = [
+                    {"start": start, "end": end, "speaker": speaker}
+                    for start, end, speaker in self.backend.segments(wav_path)
+                    ]
+        else:
+            segments = []
+            with self.decoder.decoded(audio_path) as wav_path:
+                regions, detect_seconds = self.vad.detect_file(self.decoder, wav_path)
+                started = time.perf_counter()
+                if len(regions):
+                    with self._speech_file(regions, wav_path) as speech_path:
+                        turns = self.backend.segments(speech_path)
+                    segments = [
+                        {"start": float(start), "end": float(end), "speaker": speaker}
+                        for turn_start, turn_end, speaker in turns
+                        for start, end in regions.split(turn_start, turn_end)
+                        ]
+                self.vad_report = VadReport(regions.audio_seconds, regions.speech_seconds,
+                                            detect_seconds, time.perf_counter() - started)
+        return sorted(segments, key=lambda segment: (segment["start"], segment["end"]))
+
+    def diarize_stream(self, audio_path):
+        """
+        Diarize the audio window by window, yielding segments incrementally.
+
+        Each window owns the part of the timeline between the midpoints of its
+        overlaps with its neighbours; turns are cut to that part, and a turn
+        reaching the end of the part is held back until the next window can
+        extend it. Segments are yielded once final, roughly in time order.
+
+        Args:
+            audio_path (str | BinaryIO): Path to the audio file for diarization,
+                                         or an uploaded file object.
+
+        Yields:
+            dict: Speaker segment with start, end (seconds) and speaker.
+        """
+        if self.vad is None:
+            yield from self._stream(self.decoder.frames(audio_path))
+            return
+        with self.decoder.decoded(audio_path) as wav_path:
+            regions, detect_seconds = self.vad.detect_file(self.decoder, wav_path)
+            started = time.perf_counter()
+            for segment in self._stream(regions.speech_frames(self.decoder.frames(wav_path))):
+                for start, end in regions.split(segment["start"], segment["end"]):
+                    yield {"start": float(start), "end": float(end), "speaker": segment["speaker"]}
+        self.vad_report = VadReport(regions.audio_seconds, regions.speech_seconds,
+                                    detect_seconds, time.perf_counter() - started)
+
+    def _stream(self, frames):
+        """
+        Diarize a stream of frames window by window.
+
+        Args:
+            frames (Iterable[np.ndarray]): int16 frames.
+
+        Yields:
+            dict: Speaker segment with start, end (seconds) and speaker.
+        """
+        rate = self.decoder.sample_rate
+        window = int(round(self.window_seconds * rate))
+        overlap = int(round(self.overlap_seconds * rate))
+        buffer = np.zeros(window, dtype=np.float32)
+        fill = 0
+        offset = 0
+        state = {"linker": _SpeakerLinker(self.link_threshold), "previous": [], "held": {}}
+        for frame in frames:
+            position = 0
+            while position < len(frame):
+                if fill == window:
+                    yield from self._diarize_window(buffer, offset, False, state)
+                    buffer[:overlap] = buffer[window - overlap:]
+                    offset += window - overlap
+                    fill = overlap
+                take = min(window - fill, len(frame) - position)
+                np.multiply(frame[position:position + take], 1.0 / 32768.0,
+                            out=buffer[fill:fill + take], casting="unsafe")
+                fill += take
+                position += take
+        if fill:
+            yield from self._diarize_window(buffer[:fill], offset, True, state)
+
+    @contextlib.contextmanager
+    def _speech_file(self, regions, wav_path):
+        """
+        Write the speech regions of a decoded file into a temporary WAV file.
+
+        Args:
+            regions (SpeechRegions): Regions to keep.
+            wav_path (str): Path to the decoded WAV file.
+
+        Yields:
+            str: Path to the temporary file, which is removed on exit.
+        """
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        try:
+            with wave.open(path, "wb") as target:
+                target.setnchannels(1)
+                target.setsampwidth(2)
+                target.setframerate(self.decoder.sample_rate)
+                for piece in regions.speech_frames(self.decoder.frames(wav_path)):
+                    target.writeframesraw(piece.tobytes())
+            yield path
+        finally:
+            os.remove(path)
+
+    def _diarize_window(self, samples, offset, last, state):
+        """
+        Diarize one window, link its speakers and yield the segments it finalizes.
+
+        Args:
+            samples (np.ndarray): float32 samples of the window.
+            offset (int): Sample index of the window start in the call.
+            last (bool): Whether this is the final window.
+            state (dict): Linker, previous window's turns and held segments.
+
+        Yields:
+            dict: Speaker segment with start, end (seconds) and speaker.
+        """
+        rate = self.decoder.sample_rate
+        start_time = offset / rate
+        turns = [
+            (start_time + start, start_time + end, label)
+            for start, end, label in self.backend.segments(samples, rate)
+            if end > start
+            ]
+
+        durations, pieces = {}, {}
+        for start, end, label in turns:
+            durations[label] = durations.get(label, 0.0) + end - start
+            first = int(max(start - start_time, 0.0) * rate)
+            pieces.setdefault(label, []).append(samples[first:int((end - start_time) * rate)])
+        embeddings = {}
+        for label, parts in pieces.items():
+            speech = np.concatenate(parts)
+            if len(speech) >= MIN_EMBEDDING_SECONDS * rate:
+                embeddings[label] = self.backend.embed(speech, rate)
+            else:
+                embeddings[label] = None
+
+        overlap_votes = {}
+        for start, end, label in turns:
+            for p_start, p_end, index in state["previous"]:
+                shared = min(end, p_end) - max(start, p_start)
+                if shared > 0:
+                    votes = overlap_votes.setdefault(label, {})
+                    votes[index] = votes.get(index, 0.0) + shared
+        mapping = state["linker"].link(embeddings, durations, overlap_votes)
+        state["previous"] = [(start, end, mapping[label]) for start, end, label in turns]
+
+        owned_start = start_time + self.overlap_seconds / 2 if offset else 0.0
+        owned_end = float("inf") if last else start_time + len(samples) / rate - self.overlap_seconds / 2
+        held, state["held"] = state["held"], {}
+        finished = []
+        for start, end, label in sorted(turns):
+            start, end = max(start, owned_start), min(end, owned_end)
+            if end <= start:
+                continue
+            segment = {"start": start, "end": end, "speaker": f"SPEAKER_{mapping[label]:02d}"}
+            previous = held.pop(segment["speaker"], None)
+            if previous is not None and start <= owned_start + 1e-6:
+                segment["start"] = previous["start"]
+            elif previous is not None:
+                finished.append(previous)
+            if end >= owned_end - 1e-6:
+                if segment["speaker"] in state["held"]:
+                    finished.append(state["held"][segment["speaker"]])
+                state["held"][segment["speaker"]] = segment
+            else:
+                finished.append(segment)
+        finished.extend(held.values())
+        yield from sorted(finished, key=lambda segment: (segment["start"], segment["end"]))
@@ -1,29 +1,95 @@
 """The module performs Exports data to Google Sheets."""
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import collections
+import random
+import threading
+import time
+
+from domain.google_sheets.spool import SpoolFlusher
+from domain.instrumentation.instrumentation import instruments
+
+SPREADSHEET_NAME = "Call Quality Rate"
+MAX_ROWS_PER_REQUEST = 1000
+MAX_RETRIES = 6
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 64.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 class GoogleSheetsExporter:
     """
     Exports data to Google Sheets using the Google Sheets API.
 
+    The client is authorized and the worksheet opened once, then reused by
+    every export. Rows are appended in bulk, one API request per chunk of
+    up to max_rows_per_request rows, and throttled or failed requests are
+    retried with exponential backoff.
+
+    With a spool_path, exports can be queued with enqueue_export instead:
+    they are written to a durable local spool and appended by a background
+    flusher, so callers never wait on the Sheets API. Queued rows of many
+    calls share the worksheet, so each is appended with its call id first.
+
     Args:
         credentials_path (str): Path to the Google Sheets API credentials JSON file.
+        spreadsheet_name (str): Title of the spreadsheet to append to.
+        client (gspread.Client): Authorized client to use instead of the credentials.
+        max_rows_per_request (int): Largest number of rows sent in one request.
+        max_retries (int): Retries of a throttled or failed request before giving up.
+        backoff_seconds (float): Backoff before the first retry; doubles per retry.
+        spool_path (str): Path of the export spool; None disables enqueue_export.
 
     Attributes:
         client (gspread.Client): Google Sheets API client.
+        last_export (dict): Rows, requests, retries and seconds of the last export.
+        flusher (SpoolFlusher): Background flusher of the spool, if any.
 
     Methods:
         export_to_sheets(data): Exports data to a Google Sheets worksheet.
+        enqueue_export(call_id, data): Queues data for export and returns immediately.
+        backlog(): Returns the number and age of exports waiting in the spool.
     """
 
-    def __init__(self, credentials_path):
+    def __init__(self, credentials_path, spreadsheet_name=SPREADSHEET_NAME, client=None,
+                 max_rows_per_request=MAX_ROWS_PER_REQUEST, max_retries=MAX_RETRIES,
+                 backoff_seconds=BACKOFF_SECONDS, spool_path=None):
         """
         Initialize the GoogleSheetsExporter with Google Sheets API credentials.
 
         Args:
             credentials_path (str): Path to the Google Sheets API credentials JSON file.
+            spreadsheet_name (str): Title of the spreadsheet to append to.
+            client (gspread.Client): Authorized client to use instead of the credentials.
+            max_rows_per_request (int): Largest number of rows sent in one request.
+            max_retries (int): Retries of a throttled or failed request before giving up.
+            backoff_seconds (float): Backoff before the first retry; doubles per retry.
+            spool_path (str): Path of the export spool; None disables enqueue_export.
+        """
+        self.credentials_path = credentials_path
+        self.spreadsheet_name = spreadsheet_name
+        self.max_rows_per_request = max_rows_per_request
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.last_export = None
+        self._client = client
+        self._worksheet = None
+        self._lock = threading.Lock()
+        self.flusher = None
+        if spool_path is not None:
+            self.flusher = SpoolFlusher.shared(spool_path, self.export_to_sheets,
+                                               chunk_rows=max_rows_per_request)
+
+    @property
+    def client(self):
         """
+        The authorized client, created on first use.
+
+        Returns:
+            gspread.Client: An authorized client for Google Sheets API.
+        """
+        with self._lock:
+            if self._client is None:
+                self._client = self._get_credentials()
+            return self._client
 
     def _get_credentials(self):
         """
@@ -32,19 +98,126 @@ class GoogleSheetsExporter:
         Returns:
             gspread.Client: An authorized client for Google Sheets API.
         """
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
         scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
         credentials = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_path, scope)
         return gspread.authorize(credentials)
 
+    def _get_worksheet(self, counters):
+        """
+        Open the first worksheet of the spreadsheet once and reuse it.
+
+        Args:
+            counters (collections.Counter): Requests and retries of the current export.
+
+        Returns:
+            gspread.Worksheet: The worksheet receiving exported rows.
+        """
+        if self._worksheet is None:
+            spreadsheet = self._call(counters, self.client.open, self.spreadsheet_name)
+            self._worksheet = self._call(counters, spreadsheet.get_worksheet, 0)
+        return self._worksheet
+
     def export_to_sheets(self, data):
         """
         Export data to a Google Sheets worksheet.
 
+        Rows are appended after the existing data, in order.
+
         Args:
             data (List[List]): List of lists representing data to be exported.
         """
-        client = self._get_credentials()
-        spreadsheet = client.open("Call Quality Rate")
-        worksheet = spreadsheet.get_worksheet(0)
-        for row in data:
-            worksheet.insert_row(row)
+        started = time.perf_counter()
+        counters = collections.Counter()
+        try:
+            worksheet = self._get_worksheet(counters)
+            for start in range(0, len(data), self.max_rows_per_request):
+                chunk = data[start:start + self.max_rows_per_request]
+                self._call(counters, worksheet.append_rows, chunk, value_input_option="RAW")
+        except Exception:
+            instruments.count("google_sheets.failures")
+            raise
+        finally:
+            instruments.count("google_sheets.requests", counters["requests"])
+            instruments.count("google_sheets.retries", counters["retries"])
+        last_export = {
+            "rows": len(data),
+            "requests": counters["requests"],
+            "retries": counters["retries"],
+            "seconds": time.perf_counter() - started,
+            }
+        self.last_export = last_export
+        instruments.observe("google_sheets.export", last_export["seconds"])
+        instruments.count("google_sheets.rows", len(data))
+
+    def enqueue_export(self, call_id, data):
+        """
+        Queue data for export and return without waiting on the Sheets API.
+
+        Each call id is exported at most once; queuing a call that is already
+        pending or exported has no effect. The rows are appended with the call
+        id as their first column.
+
+        Args:
+            call_id (str): Identifier of the analyzed call, e.g. its audio digest.
+            data (List[List]): Data rows to be exported, without a header row.
+
+        Returns:
+            bool: True if the export was queued, False if the call was seen before.
+        """
+        if self.flusher is None:
+            raise RuntimeError("enqueue_export requires a spool_path")
+        added = self.flusher.spool.enqueue(call_id, data)
+        if added:
+            self.flusher.wake()
+        return added
+
+    def backlog(self):
+        """
+        Return the number and age of exports waiting in the spool.
+
+        Returns:
+            dict: pending, pending_rows and oldest_age_seconds.
+        """
+        if self.flusher is None:
+            return {"pending": 0, "pending_rows": 0, "oldest_age_seconds": 0.0}
+        return self.flusher.spool.backlog()
+
+    def _call(self, counters, function, *args, **kwargs):
+        """
+        Call the Sheets API, retrying throttled and failed requests.
+
+        Retries use exponential backoff with full jitter, capped at
+        MAX_BACKOFF_SECONDS, for HTTP 429 and 5xx responses and for
+        connection errors.
+
+        Args:
+            counters (collections.Counter): Requests and retries of the current
+                                            export, incremented in place.
+            function (Callable): gspread method performing one request.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            Any: The method's return value.
+        """
+        import gspread
+        import requests
+
+        for attempt in range(self.max_retries + 1):
+            counters["requests"] += 1
+            try:
+                return function(*args, **kwargs)
+            except gspread.exceptions.APIError as error:
+                status = getattr(error.response, "status_code", None)
+                if status not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise
+            except requests.exceptions.ConnectionError:
+                if attempt == self.max_retries:
+                    raise
+            counters["retries"] += 1
+            delay = min(self.backoff_seconds * (2 ** attempt), MAX_BACKOFF_SECONDS)
+            time.sleep(random.uniform(0, delay))
+        return None
@@ -0,0 +1,373 @@
+"""The module keeps pending Google Sheets exports in a durable local spool."""
+
+import collections
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from domain.instrumentation.instrumentation import instruments
+
+SPOOL_PATH = "data/spool/exports.sqlite"
+LEASE_SECONDS = 300.0
+
+logger = logging.getLogger(__name__)
+
+
+class ExportSpool:
+    """
+    Durable queue of exports waiting to be written to Google Sheets.
+
+    Exports are stored in SQLite, so they survive crashes and restarts.
+    Each call id is accepted once: an export for a call that is already
+    pending or already exported is ignored. Flushers claim pending exports
+    under a lease, so two flushers never send the same export, and a claim
+    left behind by a crashed flusher expires after lease_seconds. Rows of
+    an export that were already appended are recorded with advance(), so
+    a retry sends only the rest.
+
+    Args:
+        path (str): Path of the SQLite database.
+        lease_seconds (float): How long a claim stays valid.
+
+    Methods:
+        enqueue(call_id, rows): Adds an export unless the call was seen before.
+        claim(owner, max_rows): Claims the oldest pending exports.
+        advance(progress): Records rows of claimed exports as appended.
+        complete(call_ids): Marks claimed exports as written.
+        release(call_ids, error): Returns claimed exports to the queue.
+        backlog(): Returns the number of pending exports and the oldest one's age.
+    """
+
+    def __init__(self, path=SPOOL_PATH, lease_seconds=LEASE_SECONDS):
+        """
+        Initialize the ExportSpool, creating the database if needed.
+
+        Args:
+            path (str): Path of the SQLite database.
+            lease_seconds (float): How long a claim stays valid.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, call_id TEXT UNIQUE NOT NULL, "
+            "rows TEXT NOT NULL, row_count INTEGER NOT NULL, enqueued_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, "
+            "claimed_by TEXT, claimed_until REAL, sent INTEGER NOT NULL DEFAULT 0)"
+            )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending)")}
+        if "sent" not in columns:
+            self._db.execute("ALTER TABLE pending ADD COLUMN sent INTEGER NOT NULL DEFAULT 0")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS exported (call_id TEXT PRIMARY KEY, exported_at REAL NOT NULL)"
+            )
+
+    def enqueue(self, call_id, rows):
+        """
+        Add an export unless the call is already pending or exported.
+
+        Args:
+            call_id (str): Identifier of the analyzed call.
+            rows (List[List]): Rows to append to the worksheet.
+
+        Returns:
+            bool: True if the export was added.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                seen = self._db.execute(
+                    "SELECT 1 FROM exported WHERE call_id = ?", (call_id,)
+                    ).fetchone()
+                added = False
+                if seen is None:
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO pending (call_id, rows, row_count, enqueued_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (call_id, json.dumps(rows, ensure_ascii=False), len(rows), time.time()),
+                        )
+                    added = cursor.rowcount == 1
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(self, owner, max_rows):
+        """
+        Claim the oldest unclaimed exports, up to max_rows unsent rows in total.
+
+        At least one export is claimed if any is available, even if it alone
+        exceeds max_rows.
+
+        Args:
+            owner (str): Identifier of the claiming flusher.
+            max_rows (int): Row budget of the claim.
+
+        Returns:
+            List[Tuple[str, List[List]]]: (call_id, rows not yet appended) pairs
+                                          in enqueue order.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                candidates = self._db.execute(
+                    "SELECT call_id, rows, row_count, sent FROM pending "
+                    "WHERE claimed_until IS NULL OR claimed_until < ? ORDER BY seq",
+                    (now,),
+                    )
+                claimed, total = [], 0
+                for call_id, rows, row_count, sent in candidates:
+                    if claimed and total + row_count - sent > max_rows:
+                        break
+                    claimed.append((call_id, json.loads(rows)[sent:]))
+                    total += row_count - sent
+                self._db.executemany(
+                    "UPDATE pending SET claimed_by = ?, claimed_until = ?, attempts = attempts + 1 "
+                    "WHERE call_id = ?",
+                    [(owner, now + self.lease_seconds, call_id) for call_id, _ in claimed],
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def advance(self, progress):
+        """
+        Record rows of claimed exports as appended, so a retry skips them.
+
+        Args:
+            progress (Dict[str, int]): Rows appended per call id since the claim
+                                       or the previous advance().
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._db.executemany(
+                "UPDATE pending SET sent = sent + ? WHERE call_id = ?",
+                [(rows, call_id) for call_id, rows in progress.items()],
+                )
+
+    def complete(self, call_ids):
+        """
+        Mark claimed exports as written.
+
+        Args:
+            call_ids (List[str]): Exports that were appended to the worksheet.
+
+        Returns:
+            None
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO exported (call_id, exported_at) VALUES (?, ?)",
+                    [(call_id, now) for call_id in call_ids],
+                    )
+                self._db.executemany(
+                    "DELETE FROM pending WHERE call_id = ?", [(call_id,) for call_id in call_ids]
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def release(self, call_ids, error=None):
+        """
+        Return claimed exports to the queue after a failed write.
+
+        Args:
+            call_ids (List[str]): Exports that could not be written.
+            error (str): Description of the failure.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._db.executemany(
+                "UPDATE pending SET claimed_by = NULL, claimed_until = NULL, last_error = ? "
+                "WHERE call_id = ?",
+                [(error, call_id) for call_id in call_ids],
+                )
+
+    def backlog(self):
+        """
+        Return the size of the backlog.
+
+        Returns:
+            dict: pending exports, rows not yet appended and the age in
+                  seconds of the oldest pending export.
+        """
+        with self._lock:
+            count, rows, oldest = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(row_count - sent), 0), MIN(enqueued_at) FROM pending"
+                ).fetchone()
+        return {
+            "pending": count,
+            "pending_rows": rows,
+            "oldest_age_seconds": time.time() - oldest if oldest is not None else 0.0,
+            }
+
+
+class SpoolFlusher:
+    """
+    Drains an ExportSpool in the background.
+
+    The flusher thread claims the oldest pending exports and appends their
+    rows in chunks of up to chunk_rows rows, which may span several calls.
+    Every row is prefixed with the id of its call, so rows of many calls
+    stay traceable in one worksheet. After each chunk is appended the rows
+    it held are recorded in the spool and fully sent exports are marked
+    written, so a failed chunk returns only the unsent rows to the spool,
+    to be retried after interval seconds. Because the spool is durable,
+    exports left behind by a crash or restart are sent by the next flusher
+    to open the same spool. Errors of the spool itself, such as a database
+    locked by another process, are logged and retried in the same way.
+
+    Args:
+        spool (ExportSpool): Spool to drain.
+        export_rows (Callable[[List[List]], None]): Appends rows to the worksheet.
+        interval (float): Seconds between polls of an idle or failing spool.
+        max_rows (int): Largest number of rows claimed by one flush.
+        chunk_rows (int): Largest number of rows passed to one export_rows call.
+
+    Methods:
+        flush(): Sends one claimed batch and returns the number of exports completed.
+        wake(): Asks the thread to flush without waiting for the next poll.
+        stop(): Stops the thread.
+        shared(path, export_rows): Returns the process-wide flusher of a spool.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, spool, export_rows, interval=5.0, max_rows=5000, chunk_rows=1000):
+        """
+        Initialize the SpoolFlusher and start its thread.
+
+        Args:
+            spool (ExportSpool): Spool to drain.
+            export_rows (Callable[[List[List]], None]): Appends rows to the worksheet.
+            interval (float): Seconds between polls of an idle or failing spool.
+            max_rows (int): Largest number of rows claimed by one flush.
+            chunk_rows (int): Largest number of rows passed to one export_rows call.
+        """
+        self.spool = spool
+        self.export_rows = export_rows
+        self.interval = interval
+        self.max_rows = max_rows
+        self.chunk_rows = chunk_rows
+        self.owner = f"{os.getpid()}-{id(self):x}"
+        self._wake = threading.Event()
+        self._stopping = False
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="export-spool", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def shared(cls, path, export_rows, **options):
+        """
+        Return the process-wide flusher of a spool, creating it on first use.
+
+        Args:
+            path (str): Path of the spool database.
+            export_rows (Callable[[List[List]], None]): Appends rows to the worksheet.
+            **options: Keyword arguments for a newly created flusher.
+
+        Returns:
+            SpoolFlusher: The shared flusher.
+        """
+        with cls._shared_lock:
+            flusher = cls._shared.get(path)
+            if flusher is None:
+                flusher = cls(ExportSpool(path), export_rows, **options)
+                cls._shared[path] = flusher
+            return flusher
+
+    def flush(self):
+        """
+        Send the rows of one claimed batch of pending exports, chunk by chunk.
+
+        Returns:
+            int: Number of exports completed; 0 if the spool is empty or the
+                 first chunk failed.
+        """
+        with self._flush_lock:
+            claimed = self.spool.claim(self.owner, self.max_rows)
+            if not claimed:
+                return 0
+            rows = [[call_id] + list(row) for call_id, call_rows in claimed for row in call_rows]
+            remaining = {call_id: len(call_rows) for call_id, call_rows in claimed}
+            completed = [call_id for call_id, count in remaining.items() if not count]
+            if completed:
+                self.spool.complete(completed)
+            for start in range(0, len(rows), self.chunk_rows):
+                chunk = rows[start:start + self.chunk_rows]
+                try:
+                    self.export_rows(chunk)
+                except Exception as error:  # pylint: disable=broad-except
+                    unsent = [call_id for call_id, count in remaining.items() if count]
+                    self.spool.release(unsent, error=repr(error))
+                    return len(completed)
+                progress = collections.Counter(row[0] for row in chunk)
+                for call_id, count in progress.items():
+                    remaining[call_id] -= count
+                finished = [call_id for call_id in progress if not remaining[call_id]]
+                self.spool.advance({call_id: count for call_id, count in progress.items()
+                                    if remaining[call_id]})
+                self.spool.complete(finished)
+                completed += finished
+            return len(completed)
+
+    def wake(self):
+        """
+        Ask the thread to flush without waiting for the next poll.
+
+        Returns:
+            None
+        """
+        self._wake.set()
+
+    def stop(self):
+        """
+        Stop the thread after its current flush.
+
+        Returns:
+            None
+        """
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        """
+        Flush until the spool is empty, then wait for a wake-up or the next poll.
+
+        A failure of the spool itself is logged and counted, and the flush is
+        retried after interval seconds.
+
+        Returns:
+            None
+        """
+        while not self._stopping:
+            try:
+                if self.flush():
+                    continue
+            except Exception:  # pylint: disable=broad-except
+                # E.g. "database is locked" by another process; keep the thread alive.
+                logger.exception("Flushing the export spool %s failed", self.spool.path)
+                instruments.count("google_sheets.spool_errors")
+            self._wake.wait(self.interval)
+            self._wake.clear()
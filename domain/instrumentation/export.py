@@ -0,0 +1,227 @@
+"""The module publishes instrumentation as Prometheus text and JSON lines per call."""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from domain.instrumentation.instrumentation import instruments as default_instruments
+
+PORT_VARIABLE = "CQR_METRICS_PORT"
+CALLS_VARIABLE = "CQR_METRICS_CALLS"
+HOST = "127.0.0.1"
+
+_STAGE_METRICS = (
+    ("cqr_stage_runs_total", "counter", "Timed runs of the stage.", "calls"),
+    ("cqr_stage_seconds_total", "counter", "Wall time spent in the stage.", "seconds"),
+    ("cqr_stage_max_seconds", "gauge", "Longest run of the stage.", "max_seconds"),
+    ("cqr_stage_audio_seconds_total", "counter", "Audio processed by the stage.", "audio_seconds"),
+    ("cqr_stage_real_time_factor", "gauge", "Wall time per second of audio.", "real_time_factor"),
+    )
+
+
+def _label(value):
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text(snapshot):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Args:
+        snapshot (dict): Output of Instruments.snapshot().
+
+    Returns:
+        str: Metrics text, ending with a newline.
+    """
+    lines = []
+    stages = sorted(snapshot["stages"].items())
+    for metric, kind, description, field in _STAGE_METRICS:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+        for stage, stats in stages:
+            if stats[field] is not None:
+                lines.append(f'{metric}{{stage="{_label(stage)}"}} {stats[field]!r}')
+    lines += ["# HELP cqr_events_total Counted events.", "# TYPE cqr_events_total counter"]
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f'cqr_events_total{{name="{_label(name)}"}} {value!r}')
+    lines += ["# HELP cqr_peak_rss_bytes Peak resident set size of the process.",
+              "# TYPE cqr_peak_rss_bytes gauge",
+              f"cqr_peak_rss_bytes {snapshot['peak_rss_bytes']}"]
+    return "\n".join(lines) + "\n"
+
+
+class JsonLinesWriter:
+    """
+    Appends one JSON object per line to a file, safely from several threads.
+
+    Each line is written with a single write to a file opened for appending,
+    so worker processes sharing the file do not interleave their lines.
+
+    Args:
+        path (str): Path of the file; its directory is created if needed.
+
+    Methods:
+        write(record): Appends a record.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the JsonLinesWriter.
+
+        Args:
+            path (str): Path of the file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, record):
+        """
+        Append a record as one line.
+
+        Args:
+            record (dict): JSON-serializable record.
+
+        Returns:
+            None
+        """
+        line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            descriptor = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(descriptor, line)
+            finally:
+                os.close(descriptor)
+
+
+class MetricsExporter:
+    """
+    Serves the instruments on a local Prometheus endpoint and writes call records.
+
+    Both outputs are optional: without a port nothing is served and without
+    a calls path call records are dropped. from_environment() builds the
+    exporter from CQR_METRICS_PORT and CQR_METRICS_CALLS, once per process.
+
+    Args:
+        instruments (Instruments): Instruments to publish.
+        port (int): Port of the /metrics endpoint; None serves nothing, 0 picks a free port.
+        host (str): Address of the endpoint; local only by default.
+        calls_path (str): JSON lines file receiving one record per call.
+
+    Methods:
+        start(): Starts the endpoint in a background thread.
+        write_call(record): Appends a call record, if a calls path is set.
+        close(): Stops the endpoint.
+        from_environment(serve): Returns the process-wide exporter.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, instruments=default_instruments, port=None, host=HOST, calls_path=None):
+        """
+        Initialize the MetricsExporter without starting it.
+
+        Args:
+            instruments (Instruments): Instruments to publish.
+            port (int): Port of the /metrics endpoint; None serves nothing.
+            host (str): Address of the endpoint.
+            calls_path (str): JSON lines file receiving one record per call.
+        """
+        self.instruments = instruments
+        self.port = port
+        self.host = host
+        self.writer = JsonLinesWriter(calls_path) if calls_path else None
+        self._server = None
+
+    @classmethod
+    def from_environment(cls, serve=True):
+        """
+        Return the process-wide exporter configured by environment variables.
+
+        Setting either variable also enables the instruments.
+
+        Args:
+            serve (bool): Whether this process may serve the endpoint; worker
+                          processes pass False so they do not compete for the port.
+
+        Returns:
+            MetricsExporter: The shared exporter, started if a port is set.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                port = os.environ.get(PORT_VARIABLE)
+                exporter = cls(port=int(port) if port and serve else None,
+                               calls_path=os.environ.get(CALLS_VARIABLE) or None)
+                if port or exporter.writer is not None:
+                    exporter.instruments.enable()
+                exporter.start()
+                cls._shared = exporter
+            return cls._shared
+
+    @property
+    def url(self):
+        """Address of the endpoint, or None if it is not running."""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        """
+        Start serving /metrics in a daemon thread, if a port is set.
+
+        Returns:
+            None
+        """
+        if self.port is None or self._server is not None:
+            return
+        instruments = self.instruments
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint: disable=invalid-name
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text(instruments.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-endpoint",
+                         daemon=True).start()
+
+    def write_call(self, record):
+        """
+        Append a call record to the JSON lines file, if one is set.
+
+        Args:
+            record (dict): Output of CallRecord.as_dict().
+
+        Returns:
+            None
+        """
+        if self.writer is not None:
+            self.writer.write(record)
+
+    def close(self):
+        """
+        Stop the endpoint.
+
+        Returns:
+            None
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
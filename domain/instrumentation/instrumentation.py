@@ -0,0 +1,354 @@
+"""The module measures where the analysis spends its time, when switched on."""
+
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ENABLE_VARIABLE = "CQR_METRICS"
+
+
+def peak_rss_bytes():
+    """
+    Return the peak resident set size of the process so far.
+
+    Returns:
+        int: Peak resident memory in bytes, or 0 if it cannot be determined.
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageStats:
+    """
+    Accumulated timings of one stage.
+
+    Attributes:
+        calls (int): Number of timed runs.
+        seconds (float): Total wall time.
+        max_seconds (float): Longest run.
+        audio_seconds (float): Total audio processed, for stages that report it.
+    """
+
+    __slots__ = ("calls", "seconds", "max_seconds", "audio_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.audio_seconds = 0.0
+
+    def add(self, seconds, audio_seconds):
+        """
+        Add one run.
+
+        Args:
+            seconds (float): Wall time of the run.
+            audio_seconds (float): Audio processed by the run, or 0.
+
+        Returns:
+            None
+        """
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.audio_seconds += audio_seconds
+
+    @property
+    def real_time_factor(self):
+        """Wall time per second of audio, or None for stages without audio."""
+        if not self.audio_seconds:
+            return None
+        return self.seconds / self.audio_seconds
+
+    def as_dict(self):
+        """
+        Convert the statistics to a plain dictionary.
+
+        Returns:
+            dict: Statistics including the real-time factor.
+        """
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats["real_time_factor"] = self.real_time_factor
+        return stats
+
+
+class _Timer:
+    """Times one block of code; see Instruments.timer()."""
+
+    __slots__ = ("instruments", "stage", "audio_seconds", "started")
+
+    def __init__(self, instruments, stage, audio_seconds):
+        self.instruments = instruments
+        self.stage = stage
+        self.audio_seconds = audio_seconds
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instruments.observe(self.stage, time.perf_counter() - self.started, self.audio_seconds)
+        return False
+
+    def set_audio(self, seconds):
+        """Set the audio processed by the block, once it is known."""
+        self.audio_seconds = seconds
+
+
+class _NullTimer:
+    """Stands in for a timer while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_audio(self, seconds):
+        """Ignore the audio length."""
+
+
+_NULL_TIMER = _NullTimer()
+_current_call = contextvars.ContextVar("current_call", default=None)
+
+
+class CallRecord:
+    """
+    Timings and counters of one analyzed call.
+
+    Stages running in other threads are attributed to the call when the
+    thread runs in a copy of the caller's context, see Instruments.bind().
+
+    Attributes:
+        call_id (str): Identifier of the call, e.g. its audio digest.
+        stages (Dict[str, StageStats]): Timings per stage.
+        counters (Dict[str, float]): Counter increments during the call.
+        fields (dict): Extra fields of the JSON line.
+    """
+
+    def __init__(self, call_id):
+        self.call_id = call_id
+        self.stages = {}
+        self.counters = {}
+        self.fields = {}
+        self._lock = threading.Lock()
+
+    def as_dict(self):
+        """
+        Convert the record to one JSON line's worth of data.
+
+        Returns:
+            dict: call_id, stages, counters, peak_rss_bytes and extra fields.
+        """
+        with self._lock:
+            record = {
+                "call_id": self.call_id,
+                "stages": {stage: stats.as_dict() for stage, stats in self.stages.items()},
+                "counters": dict(self.counters),
+                }
+        record["peak_rss_bytes"] = peak_rss_bytes()
+        record.update(self.fields)
+        return record
+
+
+class Instruments:
+    """
+    Process-wide timers and counters of the analysis stages.
+
+    Instrumentation is off by default: timer() then returns a shared no-op
+    context manager and count() returns at once, so instrumented code costs
+    one attribute check. Once enabled, every timed stage adds its wall time
+    and, where known, the audio it processed, from which the real-time
+    factor follows; the process's peak resident set size is read on export.
+
+    Args:
+        enabled (bool): Whether to record from the start.
+
+    Methods:
+        enable(): Starts recording.
+        disable(): Stops recording.
+        timer(stage, audio_seconds): Context manager timing a block.
+        observe(stage, seconds, audio_seconds): Records a duration measured elsewhere.
+        count(name, value): Increments a counter.
+        call(call_id, sink): Context manager collecting the record of one call.
+        bind(function): Wraps a function to run in the caller's call record.
+        snapshot(): Returns every stage, counter and the peak RSS.
+        reset(): Drops everything recorded.
+    """
+
+    def __init__(self, enabled=False):
+        """
+        Initialize the Instruments.
+
+        Args:
+            enabled (bool): Whether to record from the start.
+        """
+        self.enabled = enabled
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """
+        Start recording.
+
+        Returns:
+            None
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop recording; what was recorded is kept.
+
+        Returns:
+            None
+        """
+        self.enabled = False
+
+    def timer(self, stage, audio_seconds=0.0):
+        """
+        Time a block of code as a run of a stage.
+
+        Args:
+            stage (str): Dotted stage name, e.g. "transcription.recognize".
+            audio_seconds (float): Audio processed by the block, if known up
+                                   front; set_audio() sets it later.
+
+        Returns:
+            ContextManager: Timer with a set_audio(seconds) method.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, audio_seconds)
+
+    def observe(self, stage, seconds, audio_seconds=0.0):
+        """
+        Record a run of a stage whose duration was measured elsewhere.
+
+        Args:
+            stage (str): Dotted stage name.
+            seconds (float): Wall time of the run.
+            audio_seconds (float): Audio processed by the run, or 0.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds, audio_seconds)
+        record = _current_call.get()
+        if record is not None:
+            with record._lock:
+                stats = record.stages.get(stage)
+                if stats is None:
+                    stats = record.stages[stage] = StageStats()
+                stats.add(seconds, audio_seconds)
+
+    def count(self, name, value=1):
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Dotted counter name, e.g. "sentiment.sentences".
+            value (float): Increment.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        record = _current_call.get()
+        if record is not None:
+            with record._lock:
+                record.counters[name] = record.counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def call(self, call_id, sink=None):
+        """
+        Collect the timings and counters of one call and hand them to a sink.
+
+        Args:
+            call_id (str): Identifier of the call.
+            sink (Callable[[dict], None]): Receives the finished record, e.g.
+                                           JsonLinesWriter.write.
+
+        Yields:
+            CallRecord: The record, or None while instrumentation is off.
+        """
+        if not self.enabled:
+            yield None
+            return
+        record = CallRecord(call_id)
+        token = _current_call.set(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            _current_call.reset(token)
+            record.fields["wall_seconds"] = time.perf_counter() - started
+            if sink is not None:
+                sink(record.as_dict())
+
+    def bind(self, function):
+        """
+        Wrap a function so that it records into the caller's call, in any thread.
+
+        Args:
+            function (Callable): Function to run later, e.g. in an executor.
+
+        Returns:
+            Callable: The function bound to a copy of the current context.
+        """
+        if not self.enabled:
+            return function
+        context = contextvars.copy_context()
+        return lambda *args, **kwargs: context.run(function, *args, **kwargs)
+
+    def snapshot(self):
+        """
+        Return everything recorded so far.
+
+        Returns:
+            dict: stages (name to StageStats dict), counters and peak_rss_bytes.
+        """
+        with self._lock:
+            snapshot = {
+                "stages": {stage: stats.as_dict() for stage, stats in self._stages.items()},
+                "counters": dict(self._counters),
+                }
+        snapshot["peak_rss_bytes"] = peak_rss_bytes()
+        return snapshot
+
+    def reset(self):
+        """
+        Drop everything recorded.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+instruments = Instruments(enabled=os.environ.get(ENABLE_VARIABLE, "") not in ("", "0"))
@@ -0,0 +1,113 @@
+"""The module runs call analysis jobs from a job store on the local node."""
+
+import multiprocessing
+import os
+import signal
+import socket
+
+from domain.batch.batch import analyze_file, build_pipeline
+from domain.cache.result_cache import audio_digest
+from domain.jobs.job_queue import LEASE_SECONDS, JobWorker, open_store
+
+
+def submit_calls(store, paths, output_dir="data/processed"):
+    """
+    Submit one analysis job per recording.
+
+    Jobs are keyed by the audio hash, so a recording that was submitted
+    before, under any name, is not analyzed twice.
+
+    Args:
+        store (SQLiteJobStore): Store receiving the jobs.
+        paths (Iterable[str]): Paths to recordings reachable from every node.
+        output_dir (str): Directory receiving the result files.
+
+    Returns:
+        int: Number of jobs added.
+    """
+    added = 0
+    for path in paths:
+        payload = {"path": os.path.abspath(path), "output_dir": output_dir}
+        added += store.submit(audio_digest(path), payload)
+    return added
+
+
+def analyze_job(pipeline, payload):
+    """
+    Analyze the recording of a job.
+
+    Args:
+        pipeline (AnalysisPipeline): Pipeline with models loaded.
+        payload (dict): Job payload with path and output_dir.
+
+    Returns:
+        dict: Result summary from analyze_file().
+    """
+    os.makedirs(payload["output_dir"], exist_ok=True)
+    return analyze_file(payload["path"], payload["output_dir"], pipeline)
+
+
+def _work(location, node, node_limit, lease_seconds, factory, factory_args, idle_exit):
+    """
+    Build the pipeline once and run jobs in a worker process until stopped.
+
+    Args:
+        location (str): Location of the job store.
+        node (str): Name of this machine.
+        node_limit (int): Most jobs running on this node at once.
+        lease_seconds (float): Lease length of a claim.
+        factory (Callable): Top-level function building the pipeline.
+        factory_args (tuple): Arguments of the factory.
+        idle_exit (bool): Whether to exit once the queue is empty.
+
+    Returns:
+        None
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops workers with SIGTERM
+    pipeline = factory(*factory_args)
+    worker = JobWorker(open_store(location), lambda payload: analyze_job(pipeline, payload),
+                       node=node, node_limit=node_limit, lease_seconds=lease_seconds)
+    worker.run(idle_exit=idle_exit)
+
+
+def run_node(location, concurrency, node=None, lease_seconds=LEASE_SECONDS,
+             factory=build_pipeline, factory_args=(), idle_exit=False):
+    """
+    Run concurrency worker processes on this node until they exit or are interrupted.
+
+    The store caps the jobs running on the node at concurrency, so several
+    run_node() calls on one machine share that limit when they pass the
+    same node name.
+
+    Args:
+        location (str): Location of the job store.
+        concurrency (int): Number of worker processes and per-node job limit.
+        node (str): Name of this machine; the host name by default.
+        lease_seconds (float): Lease length of a claim.
+        factory (Callable): Top-level function building the pipeline in each worker.
+        factory_args (tuple): Arguments of the factory.
+        idle_exit (bool): Whether workers exit once the queue is empty.
+
+    Returns:
+        None
+    """
+    node = node or socket.gethostname()
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=_work,
+            args=(location, node, concurrency, lease_seconds, factory, factory_args, idle_exit),
+            name=f"job-worker-{index}",
+            )
+        for index in range(concurrency)
+        ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
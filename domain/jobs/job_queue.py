@@ -0,0 +1,363 @@
+"""The module distributes call analysis jobs across worker processes and nodes."""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+JOBS_PATH = "data/jobs/jobs.sqlite"
+LEASE_SECONDS = 120.0
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 2.0
+STATES = ("queued", "running", "done", "failed")
+STORES = ("sqlite",)
+
+
+class SQLiteJobStore:
+    """
+    Durable job queue in a SQLite database.
+
+    Jobs move from queued to running when a worker claims them and from
+    running to done or failed when the worker reports back. A claim is a
+    lease: the worker has to renew it with heartbeats, and a job whose lease
+    ran out because its worker died is queued again, or failed once it has
+    used up max_attempts. At most node_limit jobs run on one node at a time,
+    however many workers the node runs.
+
+    Every node reaches the same database, so the file has to live on a
+    filesystem with working locks. Other stores can be plugged into
+    JobWorker as long as they provide the same methods.
+
+    Args:
+        path (str): Path of the SQLite database.
+
+    Methods:
+        submit(key, payload, max_attempts): Adds a job unless its key was seen before.
+        claim(worker, node, lease_seconds, node_limit): Claims the oldest queued job.
+        heartbeat(job_id, worker, lease_seconds): Extends a lease.
+        complete(job_id, worker, result): Marks a job as done.
+        fail(job_id, worker, error): Queues a job again or marks it as failed.
+        status(): Returns job counts per state and throughput per worker.
+    """
+
+    def __init__(self, path=JOBS_PATH):
+        """
+        Initialize the SQLiteJobStore, creating the database if needed.
+
+        Args:
+            path (str): Path of the SQLite database.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, "
+            "payload TEXT NOT NULL, state TEXT NOT NULL DEFAULT 'queued', "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "worker TEXT, node TEXT, lease_until REAL, enqueued_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, result TEXT, error TEXT)"
+            )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+
+    def _transaction(self, work):
+        """Run work(db) in an immediate transaction and return its result."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._db)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return result
+
+    def submit(self, key, payload, max_attempts=MAX_ATTEMPTS):
+        """
+        Add a job unless a job with the same key was submitted before.
+
+        Args:
+            key (str): Identifier of the job, e.g. the audio hash of the call.
+            payload (dict): JSON-serializable job description.
+            max_attempts (int): Number of claims before the job fails for good.
+
+        Returns:
+            bool: True if the job was added.
+        """
+        def work(db):
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO jobs (key, payload, max_attempts, enqueued_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload, ensure_ascii=False), max_attempts, time.time()),
+                )
+            return cursor.rowcount == 1
+        return self._transaction(work)
+
+    def claim(self, worker, node, lease_seconds=LEASE_SECONDS, node_limit=None):
+        """
+        Claim the oldest queued job under a lease.
+
+        Jobs whose lease has expired are first queued again, or failed if
+        they have no attempts left.
+
+        Args:
+            worker (str): Identifier of the claiming worker.
+            node (str): Name of the worker's machine.
+            lease_seconds (float): How long the claim stays valid without a heartbeat.
+            node_limit (int): Most jobs running on the node at once; None for no limit.
+
+        Returns:
+            dict: The job with id, key, payload and attempts, or None if
+                  nothing is queued or the node is at its limit.
+        """
+        def work(db):
+            now = time.time()
+            db.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= max_attempts "
+                "THEN 'failed' ELSE 'queued' END, "
+                "error = 'lease expired on ' || worker, finished_at = CASE WHEN attempts "
+                ">= max_attempts THEN ? END, worker = NULL, lease_until = NULL "
+                "WHERE state = 'running' AND lease_until < ?",
+                (now, now),
+                )
+            if node_limit is not None:
+                running = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE state = 'running' AND node = ?", (node,)
+                    ).fetchone()[0]
+                if running >= node_limit:
+                    return None
+            row = db.execute(
+                "SELECT id, key, payload, attempts FROM jobs WHERE state = 'queued' "
+                "ORDER BY id LIMIT 1"
+                ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, node = ?, lease_until = ?, "
+                "started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, node, now + lease_seconds, now, row[0]),
+                )
+            return {"id": row[0], "key": row[1], "payload": json.loads(row[2]),
+                    "attempts": row[3] + 1}
+        return self._transaction(work)
+
+    def heartbeat(self, job_id, worker, lease_seconds=LEASE_SECONDS):
+        """
+        Extend the lease of a running job.
+
+        Args:
+            job_id (int): Id of the claimed job.
+            worker (str): Identifier of the worker holding the lease.
+            lease_seconds (float): New lease length from now.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time() + lease_seconds, job_id, worker),
+                )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result=None):
+        """
+        Mark a running job as done.
+
+        Args:
+            job_id (int): Id of the claimed job.
+            worker (str): Identifier of the worker holding the lease.
+            result (dict): JSON-serializable result summary.
+
+        Returns:
+            bool: False if the worker had lost the lease; the result is then dropped.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = 'done', finished_at = ?, result = ?, error = NULL, "
+                "lease_until = NULL WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time(), json.dumps(result, ensure_ascii=False), job_id, worker),
+                )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """
+        Queue a job again after a failed attempt, or fail it if no attempts are left.
+
+        Args:
+            job_id (int): Id of the claimed job.
+            worker (str): Identifier of the worker holding the lease.
+            error (str): Description of the failure.
+
+        Returns:
+            bool: False if the worker had lost the lease.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= max_attempts "
+                "THEN 'failed' ELSE 'queued' END, finished_at = ?, error = ?, lease_until = NULL "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time(), error, job_id, worker),
+                )
+        return cursor.rowcount == 1
+
+    def status(self):
+        """
+        Return job counts per state and throughput per worker.
+
+        Returns:
+            dict: Count per state in STATES, and "workers" with, per worker,
+                  node, done jobs, audio seconds, calls_per_hour and
+                  audio_hours_per_wall_hour over its active period.
+        """
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+            rows = self._db.execute(
+                "SELECT worker, node, COUNT(*), MIN(started_at), MAX(finished_at), "
+                "SUM(COALESCE(json_extract(result, '$.audio_seconds'), 0)) "
+                "FROM jobs WHERE state = 'done' GROUP BY worker, node ORDER BY node, worker"
+                ).fetchall()
+        status = {state: counts.get(state, 0) for state in STATES}
+        workers = []
+        for worker, node, done, first, last, audio_seconds in rows:
+            active = (last - first) if first is not None and last is not None else 0.0
+            workers.append({
+                "worker": worker,
+                "node": node,
+                "done": done,
+                "audio_seconds": audio_seconds,
+                "calls_per_hour": done * 3600.0 / active if active else 0.0,
+                "audio_hours_per_wall_hour": audio_seconds / active if active else 0.0,
+                })
+        status["workers"] = workers
+        return status
+
+
+def open_store(location=JOBS_PATH):
+    """
+    Open a job store by location.
+
+    Args:
+        location (str): Path of a SQLite database, optionally prefixed with "sqlite:".
+
+    Returns:
+        SQLiteJobStore: The store.
+    """
+    scheme, separator, rest = location.partition(":")
+    if not separator or len(scheme) == 1:
+        return SQLiteJobStore(location)  # a plain path, possibly with a drive letter
+    if scheme == "sqlite":
+        return SQLiteJobStore(rest)
+    raise ValueError(f"Unknown job store {scheme!r}; expected one of {', '.join(STORES)}")
+
+
+class JobWorker:
+    """
+    Claims jobs from a store and runs them one at a time.
+
+    While a job runs, a heartbeat thread renews its lease every third of
+    lease_seconds, so only jobs of workers that died or hung past their
+    lease are handed to another worker. If the lease was lost anyway, the
+    worker's result is dropped, because the job was already given to a
+    different worker.
+
+    Args:
+        store (SQLiteJobStore): Store to take jobs from.
+        handler (Callable[[dict], dict]): Runs a job payload and returns a
+                                          JSON-serializable result summary.
+        node (str): Name of this machine; the host name by default.
+        node_limit (int): Most jobs running on this node at once.
+        lease_seconds (float): Lease length of a claim.
+        poll_seconds (float): Wait between claims when nothing can be claimed.
+
+    Attributes:
+        worker_id (str): Identifier of the worker in the store.
+
+    Methods:
+        run_once(): Claims and runs one job.
+        run(stop, idle_exit): Runs jobs until stopped.
+    """
+
+    def __init__(self, store, handler, node=None, node_limit=None, lease_seconds=LEASE_SECONDS,
+                 poll_seconds=POLL_SECONDS):
+        """
+        Initialize the JobWorker.
+
+        Args:
+            store (SQLiteJobStore): Store to take jobs from.
+            handler (Callable[[dict], dict]): Runs a job payload and returns a
+                                              JSON-serializable result summary.
+            node (str): Name of this machine; the host name by default.
+            node_limit (int): Most jobs running on this node at once.
+            lease_seconds (float): Lease length of a claim.
+            poll_seconds (float): Wait between claims when nothing can be claimed.
+        """
+        self.store = store
+        self.handler = handler
+        self.node = node or socket.gethostname()
+        self.node_limit = node_limit
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{self.node}-{os.getpid()}-{id(self):x}"
+
+    def run_once(self):
+        """
+        Claim one job and run it.
+
+        Returns:
+            str: "done", "failed" or "lost" for a job that was run, None if
+                 no job could be claimed.
+        """
+        job = self.store.claim(self.worker_id, self.node, self.lease_seconds, self.node_limit)
+        if job is None:
+            return None
+        finished = threading.Event()
+        beating = threading.Thread(target=self._heartbeat, args=(job["id"], finished),
+                                   name="job-heartbeat", daemon=True)
+        beating.start()
+        try:
+            result = self.handler(job["payload"])
+        except Exception as error:  # pylint: disable=broad-except
+            finished.set()
+            beating.join()
+            return "failed" if self.store.fail(job["id"], self.worker_id, repr(error)) else "lost"
+        finished.set()
+        beating.join()
+        return "done" if self.store.complete(job["id"], self.worker_id, result) else "lost"
+
+    def run(self, stop=None, idle_exit=False):
+        """
+        Run jobs until stopped.
+
+        Args:
+            stop (threading.Event): Set to stop after the current job.
+            idle_exit (bool): Whether to return once no job can be claimed.
+
+        Returns:
+            None
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if self.run_once() is None:
+                if idle_exit:
+                    return
+                stop.wait(self.poll_seconds)
+
+    def _heartbeat(self, job_id, finished):
+        """
+        Renew the lease of a job until it finishes or the lease is lost.
+
+        Args:
+            job_id (int): Id of the running job.
+            finished (threading.Event): Set when the job has finished.
+
+        Returns:
+            None
+        """
+        while not finished.wait(self.lease_seconds / 3):
+            if not self.store.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                return
@@ -0,0 +1,259 @@
+"""The module computes per-speaker conversation metrics for batches of calls."""
+
+import numpy as np
+
+
+def _share(part, whole):
+    """
+    Divide element-wise, giving 0 where the whole is 0.
+
+    Args:
+        part (np.ndarray): Numerators.
+        whole (np.ndarray): Denominators.
+
+    Returns:
+        np.ndarray: part / whole, or 0 where whole is not positive.
+    """
+    part = np.asarray(part, dtype=np.float64)
+    return np.divide(part, whole, out=np.zeros_like(part), where=whole > 0)
+
+
+class ConversationMetrics:
+    """
+    Per-speaker and per-call metrics of a batch of calls.
+
+    Per-speaker arrays have one entry per (call, speaker) pair, ordered by
+    call and then by speaker; per-call arrays have one entry per call.
+
+    Attributes:
+        speaker_calls (np.ndarray): Call index of each speaker entry.
+        speakers (List[str]): Speaker label of each speaker entry.
+        talk_seconds (np.ndarray): Seconds of speech.
+        talk_ratio (np.ndarray): Share of the call's speech; 0 if nobody spoke.
+        interruptions (np.ndarray): Turns started while another speaker was talking.
+        overlap_seconds (np.ndarray): Seconds spoken over another speaker.
+        responses (np.ndarray): Turns taken after another speaker finished.
+        response_latency (np.ndarray): Mean seconds between another speaker's
+                                       turn ending and this speaker starting.
+        utterances (np.ndarray): Number of scored utterances.
+        mean_sentiment (np.ndarray): Mean sentiment score of the utterances.
+        sentiment_trend (np.ndarray): Least-squares slope of sentiment per minute.
+        call_seconds (np.ndarray): Duration of each call.
+        silence_share (np.ndarray): Share of each call with nobody speaking; 0 if
+                                   the call has no duration.
+        overlap_share (np.ndarray): Share of each call with overlapping speech; 0 if
+                                   the call has no duration.
+
+    Methods:
+        speaker_rows(call): Returns the per-speaker metrics of one call as dicts.
+    """
+
+    __slots__ = ("speaker_calls", "speakers", "talk_seconds", "talk_ratio", "interruptions",
+                 "overlap_seconds", "responses", "response_latency", "utterances",
+                 "mean_sentiment", "sentiment_trend", "call_seconds", "silence_share",
+                 "overlap_share")
+
+    SPEAKER_FIELDS = ("talk_seconds", "talk_ratio", "interruptions", "overlap_seconds", "responses",
+                      "response_latency", "utterances", "mean_sentiment", "sentiment_trend")
+
+    def __init__(self, **arrays):
+        for name in self.__slots__:
+            setattr(self, name, arrays[name])
+
+    def speaker_rows(self, call=0):
+        """
+        Return the per-speaker metrics of one call.
+
+        Args:
+            call (int): Index of the call in the batch.
+
+        Returns:
+            List[dict]: One dict per speaker with its label and metrics.
+        """
+        first, last = np.searchsorted(self.speaker_calls, [call, call + 1])
+        rows = []
+        for entry in range(first, last):
+            row = {"speaker": self.speakers[entry]}
+            for name in self.SPEAKER_FIELDS:
+                row[name] = getattr(self, name)[entry].item()
+            rows.append(row)
+        return rows
+
+
+class ConversationBatch:
+    """
+    Collects diarization segments and scored utterances of many calls and
+    computes their conversation metrics in one vectorized pass.
+
+    Segments of all calls are concatenated and shifted onto one timeline in
+    which every call starts after the previous one ends, so running maxima
+    and per-speaker sums over the whole batch never mix calls. The cost is
+    linear in the number of segments and utterances, plus a sort when the
+    segments are not already in time order.
+
+    Methods:
+        add(segments, utterances, duration): Adds one call and returns its index.
+        compute(): Returns the ConversationMetrics of all added calls.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty ConversationBatch.
+        """
+        self._segments = []
+        self._utterances = []
+        self._labels = []
+        self._durations = []
+
+    def __len__(self):
+        return len(self._labels)
+
+    def add(self, segments, utterances=None, duration=None):
+        """
+        Add one call.
+
+        Args:
+            segments (Sequence[dict]): Diarization segments with start, end and speaker.
+            utterances (CallResult): Scored utterances of the call, if any.
+            duration (float): Length of the call; the end of the last segment if omitted.
+
+        Returns:
+            int: Index of the call in the batch.
+        """
+        labels = {}
+        count = len(segments)
+        codes = np.fromiter((labels.setdefault(segment["speaker"], len(labels)) for segment in segments),
+                            dtype=np.int64, count=count)
+        starts = np.fromiter((segment["start"] for segment in segments), dtype=np.float64, count=count)
+        ends = np.fromiter((segment["end"] for segment in segments), dtype=np.float64, count=count)
+        self._segments.append((starts, ends, codes))
+
+        if utterances is not None and len(utterances):
+            remap = np.array([labels.setdefault(label, len(labels)) for label in utterances.speakers]
+                             + [-1], dtype=np.int64)
+            speaker_ids = remap[utterances.speaker_ids.astype(np.int64)]
+            self._utterances.append((np.asarray(utterances.starts, dtype=np.float64), speaker_ids,
+                                     np.asarray(utterances.sentiments, dtype=np.float64)))
+        else:
+            empty = np.zeros(0, dtype=np.float64)
+            self._utterances.append((empty, np.zeros(0, dtype=np.int64), empty))
+
+        self._labels.append(list(labels))
+        self._durations.append(np.nan if duration is None else float(duration))
+        return len(self._labels) - 1
+
+    def compute(self):
+        """
+        Compute the metrics of all added calls.
+
+        Returns:
+            ConversationMetrics: Per-speaker and per-call metrics.
+        """
+        calls = len(self._labels)
+        speaker_counts = np.array([len(labels) for labels in self._labels], dtype=np.int64)
+        speaker_base = np.concatenate([[0], np.cumsum(speaker_counts)[:-1]]).astype(np.int64)
+        entries = int(speaker_counts.sum())
+        speaker_calls = np.repeat(np.arange(calls), speaker_counts)
+
+        lengths = np.array([len(starts) for starts, _, _ in self._segments], dtype=np.int64)
+        call = np.repeat(np.arange(calls), lengths)
+        starts = np.concatenate([part[0] for part in self._segments] + [np.zeros(0)])
+        ends = np.concatenate([part[1] for part in self._segments] + [np.zeros(0)])
+        codes = np.concatenate([part[2] for part in self._segments] + [np.zeros(0, dtype=np.int64)])
+        keys = speaker_base[call] + codes
+
+        # Order by call, then start; calls are already contiguous, so only starts need checking.
+        if len(starts) and np.any((np.diff(starts) < 0) & (np.diff(call) == 0)):
+            order = np.lexsort((starts, call))
+            starts, ends, keys = starts[order], ends[order], keys[order]
+
+        first = np.ones(len(starts), dtype=bool)
+        first[1:] = call[1:] != call[:-1]
+        heads = np.flatnonzero(first)
+        last_end = np.zeros(calls)
+        if len(heads):
+            last_end[call[heads]] = np.maximum.reduceat(ends, heads)
+        durations = np.array(self._durations)
+        durations = np.where(np.isnan(durations), last_end, np.maximum(durations, last_end))
+
+        # One timeline: each call starts one second after the previous call ends.
+        offsets = np.concatenate([[0.0], np.cumsum(durations + 1.0)[:-1]])
+        shifted_starts = starts + offsets[call]
+        shifted_ends = ends + offsets[call]
+
+        running_end = np.maximum.accumulate(shifted_ends) if len(starts) else shifted_ends
+        reaches = np.where(shifted_ends == running_end, np.arange(len(starts)), 0)
+        running_owner = np.maximum.accumulate(reaches) if len(starts) else reaches
+        previous_end = np.concatenate([[-np.inf], running_end[:-1]])[:len(starts)]
+        previous_owner = np.concatenate([[0], running_owner[:-1]])[:len(starts)].astype(np.int64)
+        previous_key = keys[previous_owner].astype(np.int64)
+
+        other = ~first & (previous_key != keys)
+        overlap = np.where(other, np.clip(np.minimum(shifted_ends, previous_end) - shifted_starts,
+                                          0.0, None), 0.0)
+        interrupted = other & (shifted_starts < previous_end)
+        gaps = np.where(first, 0.0, shifted_starts - previous_end)
+        responded = other & (gaps >= 0)
+
+        talk = np.bincount(keys, weights=ends - starts, minlength=entries)
+        call_talk = np.bincount(speaker_calls, weights=talk, minlength=calls)
+        response_count = np.bincount(keys, weights=responded, minlength=entries)
+        response_total = np.bincount(keys, weights=np.where(responded, gaps, 0.0), minlength=entries)
+        overlap_seconds = np.bincount(keys, weights=overlap, minlength=entries)
+
+        leading = np.zeros(calls)
+        leading[call[heads]] = starts[heads]
+        silence = (leading + np.bincount(call, weights=np.clip(gaps, 0.0, None), minlength=calls)
+                   + durations - last_end)
+        call_overlap = np.bincount(speaker_calls, weights=overlap_seconds, minlength=calls)
+
+        sentiment = self._sentiment(speaker_base, entries)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return ConversationMetrics(
+                speaker_calls=speaker_calls,
+                speakers=[label for labels in self._labels for label in labels],
+                talk_seconds=talk,
+                talk_ratio=_share(talk, call_talk[speaker_calls]),
+                interruptions=np.bincount(keys, weights=interrupted, minlength=entries).astype(np.int64),
+                overlap_seconds=overlap_seconds,
+                responses=response_count.astype(np.int64),
+                response_latency=response_total / response_count,
+                call_seconds=durations,
+                silence_share=_share(silence, durations),
+                overlap_share=_share(call_overlap, durations),
+                **sentiment,
+                )
+
+    def _sentiment(self, speaker_base, entries):
+        """
+        Compute the mean and least-squares trend of sentiment per speaker.
+
+        Args:
+            speaker_base (np.ndarray): First speaker entry of each call.
+            entries (int): Number of speaker entries.
+
+        Returns:
+            dict: utterances, mean_sentiment and sentiment_trend arrays.
+        """
+        lengths = np.array([len(part[0]) for part in self._utterances], dtype=np.int64)
+        call = np.repeat(np.arange(len(lengths)), lengths)
+        minutes = np.concatenate([part[0] for part in self._utterances] + [np.zeros(0)]) / 60.0
+        codes = np.concatenate([part[1] for part in self._utterances] + [np.zeros(0, dtype=np.int64)])
+        scores = np.concatenate([part[2] for part in self._utterances] + [np.zeros(0)])
+        known = (codes >= 0) & ~np.isnan(minutes)
+        keys = speaker_base[call[known]] + codes[known]
+        minutes, scores = minutes[known], scores[known]
+
+        count = np.bincount(keys, minlength=entries).astype(np.float64)
+        sum_t = np.bincount(keys, weights=minutes, minlength=entries)
+        sum_s = np.bincount(keys, weights=scores, minlength=entries)
+        sum_tt = np.bincount(keys, weights=minutes * minutes, minlength=entries)
+        sum_ts = np.bincount(keys, weights=minutes * scores, minlength=entries)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            spread = count * sum_tt - sum_t * sum_t
+            trend = np.where(spread > 1e-12, (count * sum_ts - sum_t * sum_s) / spread, 0.0)
+            return {
+                "utterances": count.astype(np.int64),
+                "mean_sentiment": sum_s / count,
+                "sentiment_trend": np.where(count > 0, trend, np.nan),
+                }
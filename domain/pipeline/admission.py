@@ -0,0 +1,171 @@
+"""The module admits a bounded number of concurrent analyses and queues the rest."""
+
+import collections
+import contextlib
+import itertools
+import threading
+import time
+
+SLOTS = 2
+MAX_QUEUE = 16
+SERVICE_SECONDS = 60.0
+POLL_SECONDS = 1.0
+SMOOTHING = 0.2
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when the admission queue is full."""
+
+
+class AdmissionController:
+    """
+    Runs at most slots analyses at once and queues the rest in arrival order.
+
+    Waiting callers learn their queue position and an estimate of their
+    wait, based on a moving average of recent analysis durations. When
+    max_queue callers are already waiting, new callers are rejected at once
+    instead of piling up work the node cannot keep up with.
+
+    Args:
+        slots (int): Analyses running at once.
+        max_queue (int): Most callers waiting at once.
+        service_seconds (float): Initial estimate of one analysis' duration.
+
+    Methods:
+        admit(on_wait): Context manager holding a slot.
+        position(ticket): Returns a waiting caller's place in the queue.
+        wait_estimate(position): Returns the expected wait for a queue position.
+        stats(): Returns running and waiting callers and the duration estimate.
+        shared(name): Returns the process-wide controller of a resource.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, slots=SLOTS, max_queue=MAX_QUEUE, service_seconds=SERVICE_SECONDS):
+        """
+        Initialize the AdmissionController.
+
+        Args:
+            slots (int): Analyses running at once.
+            max_queue (int): Most callers waiting at once.
+            service_seconds (float): Initial estimate of one analysis' duration.
+        """
+        self.slots = slots
+        self.max_queue = max_queue
+        self.service_seconds = service_seconds
+        self._running = 0
+        self._waiting = collections.deque()
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def shared(cls, name, **options):
+        """
+        Return the process-wide controller of a resource, creating it on first use.
+
+        Args:
+            name (str): Name of the guarded resource.
+            **options: Keyword arguments for a newly created controller.
+
+        Returns:
+            AdmissionController: The shared controller.
+        """
+        with cls._shared_lock:
+            controller = cls._shared.get(name)
+            if controller is None:
+                controller = cls(**options)
+                cls._shared[name] = controller
+            return controller
+
+    def position(self, ticket):
+        """
+        Return a waiting caller's place in the queue.
+
+        Args:
+            ticket (int): Ticket of the caller.
+
+        Returns:
+            int: 1 for the next caller to run, 0 if the ticket is not waiting.
+        """
+        with self._condition:
+            try:
+                return self._waiting.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def wait_estimate(self, position):
+        """
+        Return the expected wait for a queue position.
+
+        Args:
+            position (int): Place in the queue, from position().
+
+        Returns:
+            float: Expected seconds until the caller runs.
+        """
+        if position <= 0:
+            return 0.0
+        return -(-position // self.slots) * self.service_seconds
+
+    def stats(self):
+        """
+        Return the controller's load.
+
+        Returns:
+            dict: running, waiting, slots and service_seconds.
+        """
+        with self._condition:
+            return {"running": self._running, "waiting": len(self._waiting),
+                    "slots": self.slots, "service_seconds": self.service_seconds}
+
+    @contextlib.contextmanager
+    def admit(self, on_wait=None, poll_seconds=POLL_SECONDS):
+        """
+        Hold a slot for the duration of the block, waiting for one if needed.
+
+        Args:
+            on_wait (Callable[[int, float], None]): Called while waiting with
+                                                    the queue position and the
+                                                    estimated wait in seconds.
+            poll_seconds (float): Interval of on_wait calls.
+
+        Yields:
+            None
+
+        Raises:
+            AdmissionRejected: If max_queue callers are already waiting.
+        """
+        with self._condition:
+            if self._running < self.slots and not self._waiting:
+                self._running += 1
+            else:
+                if len(self._waiting) >= self.max_queue:
+                    raise AdmissionRejected(
+                        f"{len(self._waiting)} analyses are already waiting; try again later"
+                        )
+                ticket = next(self._tickets)
+                self._waiting.append(ticket)
+                try:
+                    while self._waiting[0] != ticket or self._running >= self.slots:
+                        if on_wait is not None:
+                            position = self._waiting.index(ticket) + 1
+                            self._condition.release()
+                            try:
+                                on_wait(position, self.wait_estimate(position))
+                            finally:
+                                self._condition.acquire()
+                        self._condition.wait(poll_seconds)
+                finally:
+                    self._waiting.remove(ticket)
+                    self._condition.notify_all()
+                self._running += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._condition:
+                self._running -= 1
+                self.service_seconds += SMOOTHING * (elapsed - self.service_seconds)
+                self._condition.notify_all()
@@ -0,0 +1,130 @@
+"""The module scores a call while it is still in progress."""
+
+import time
+
+import numpy as np
+
+from domain.sentiment_analysis.scoring import RunningScore
+from domain.transcription.words import TokenTable
+
+
+class LiveUpdate:
+    """
+    One change to a live call's transcript and score.
+
+    Attributes:
+        kind (str): "partial" for a hypothesis that may still change, "final"
+                    for a closed, scored utterance.
+        text (str): Recognized text.
+        start (float): Start of the utterance in the call, or NaN for partials.
+        end (float): End of the utterance in the call, or NaN for partials.
+        score (float): Score of the utterance against the call so far, or
+                       None for partials.
+        cqr (float): Call Quality Rate after the update.
+        lag_seconds (float): Time from the arrival of the audio that produced
+                             the update until the update was ready.
+    """
+
+    __slots__ = ("kind", "text", "start", "end", "score", "cqr", "lag_seconds")
+
+    def __init__(self, kind, text, start, end, score, cqr, lag_seconds):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+        self.score = score
+        self.cqr = cqr
+        self.lag_seconds = lag_seconds
+
+
+class LiveCallScorer:
+    """
+    Transcribes live audio and keeps the call's CQR up to date.
+
+    Every final utterance is encoded on its own and added to a RunningScore,
+    which updates the CQR in O(d) instead of scoring the whole history
+    again. The lag of each update is measured from the arrival of the audio
+    frame that closed the utterance, so it covers recognition, encoding and
+    scoring, but not the recognizer's wait for the pause ending the
+    utterance.
+
+    Args:
+        transcriber (Transcriber): Transcriber providing the recognizer.
+        sentiment_analyzer (SentimentAnalyzer): Encoder of the utterances.
+
+    Attributes:
+        running (RunningScore): Score of the call so far.
+        utterances (List[RecognizedUtterance]): Final utterances so far.
+        lags (List[float]): Lag of each final update in seconds.
+
+    Methods:
+        run(frames): Yields updates while the frames arrive.
+        scores(): Returns every utterance's score against the whole call.
+        lag_percentiles(percentiles): Returns percentiles of the final update lag.
+    """
+
+    def __init__(self, transcriber, sentiment_analyzer):
+        """
+        Initialize the LiveCallScorer for one call.
+
+        Args:
+            transcriber (Transcriber): Transcriber providing the recognizer.
+            sentiment_analyzer (SentimentAnalyzer): Encoder of the utterances.
+        """
+        self.transcriber = transcriber
+        self.sentiment_analyzer = sentiment_analyzer
+        self.running = RunningScore()
+        self.utterances = []
+        self.lags = []
+
+    def run(self, frames, tokens=None):
+        """
+        Transcribe and score live audio, yielding an update for every change.
+
+        Args:
+            frames (Iterable[np.ndarray]): int16 audio at the transcriber's
+                                           sample rate, e.g. from a live source.
+            tokens (TokenTable): Table receiving the words; a new table per
+                                 call if omitted.
+
+        Yields:
+            LiveUpdate: Partial hypotheses and scored final utterances.
+        """
+        tokens = tokens if tokens is not None else TokenTable()
+        for event in self.transcriber.stream(frames, tokens):
+            if event.kind == "partial":
+                yield LiveUpdate("partial", event.text, float("nan"), float("nan"), None,
+                                 self.running.cqr(), time.perf_counter() - event.received)
+                continue
+            embedding = self.sentiment_analyzer.encode([event.text])[0]
+            score = self.running.add(embedding)
+            self.utterances.append(event.utterance)
+            lag = time.perf_counter() - event.received
+            self.lags.append(lag)
+            yield LiveUpdate("final", event.text, event.utterance.start, event.utterance.end,
+                             score, self.running.cqr(), lag)
+
+    def scores(self):
+        """
+        Return every utterance's score against the whole call so far.
+
+        Returns:
+            List[float]: Score per final utterance, as analyze_sentiment()
+                         would give for the same utterances.
+        """
+        return self.running.scores()
+
+    def lag_percentiles(self, percentiles=(50, 95, 100)):
+        """
+        Return percentiles of the final update lag.
+
+        Args:
+            percentiles (Sequence[float]): Percentiles to compute.
+
+        Returns:
+            dict: Percentile to lag in seconds; empty before the first utterance.
+        """
+        if not self.lags:
+            return {}
+        values = np.percentile(self.lags, percentiles)
+        return {percentile: float(value) for percentile, value in zip(percentiles, values)}
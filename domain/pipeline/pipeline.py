@@ -0,0 +1,397 @@
+"""The module runs the analysis stages of a call concurrently."""
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from domain.cache.result_cache import cache_key
+from domain.instrumentation.instrumentation import instruments
+from domain.transcription.words import WordTimeline
+
+ENCODE_BATCH_SIZE = 16
+_DONE = object()
+
+
+class PipelineResult:
+    """
+    Joined output of all analysis stages for one call.
+
+    Attributes:
+        transcript (List[dict]): Parsed recognizer results in time order.
+        diarization: Diarization result as returned by the Diarizer.
+        sentiment_scores (List[float]): Sentiment score per transcript item.
+        timings (dict): Seconds spent per stage and end to end.
+        words (WordTimeline): Words of the transcript as arrays, or None if
+                              the transcriber does not provide word timing.
+    """
+
+    __slots__ = ("transcript", "diarization", "sentiment_scores", "timings", "words")
+
+    def __init__(self, transcript, diarization, sentiment_scores, timings, words=None):
+        self.transcript = transcript
+        self.diarization = diarization
+        self.sentiment_scores = sentiment_scores
+        self.timings = timings
+        self.words = words
+
+
+class AnalysisPipeline:
+    """
+    Runs transcription, diarization and sentiment encoding as a pipeline.
+
+    Diarization runs in a background thread while the transcriber decodes
+    the same audio, and a second thread encodes utterances in batches as
+    soon as the transcriber yields them. Scoring needs every embedding, so
+    it runs in the final join step together with collecting diarization.
+    The recognizer, pyannote and the sentence encoder spend their time in
+    native code that releases the GIL, so end-to-end latency approaches that
+    of the slowest stage instead of the sum of all stages.
+
+    Args:
+        transcriber (Transcriber): Transcriber producing recognizer results.
+        diarizer (Diarizer): Diarizer for the same audio.
+        sentiment_analyzer (SentimentAnalyzer): Encoder and scorer of utterances.
+        batch_size (int): Largest number of utterances encoded at once.
+        cache (ResultCache): Cache of stage outputs; None disables caching.
+        decoder (AudioDecoder): Decoder used when a stage has to run; None
+                                passes the audio to the stages unchanged.
+        call_sink (Callable[[dict], None]): Receives the instrumentation record
+                                            of every call while instrumentation
+                                            is on, e.g. MetricsExporter.write_call.
+
+    Methods:
+        run(audio_path, audio_hash): Analyzes a decoded audio file.
+        is_cached(audio_hash): Checks whether every stage output is cached.
+    """
+
+    def __init__(self, transcriber, diarizer, sentiment_analyzer, batch_size=ENCODE_BATCH_SIZE,
+                 cache=None, decoder=None, call_sink=None):
+        """
+        Initialize the AnalysisPipeline.
+
+        Args:
+            transcriber (Transcriber): Transcriber producing recognizer results.
+            diarizer (Diarizer): Diarizer for the same audio.
+            sentiment_analyzer (SentimentAnalyzer): Encoder and scorer of utterances.
+            batch_size (int): Largest number of utterances encoded at once.
+            cache (ResultCache): Cache of stage outputs; None disables caching.
+            decoder (AudioDecoder): Decoder used when a stage has to run; None
+                                    passes the audio to the stages unchanged.
+            call_sink (Callable[[dict], None]): Receives the instrumentation record
+                                                of every call while instrumentation is on.
+        """
+        self.transcriber = transcriber
+        self.diarizer = diarizer
+        self.sentiment_analyzer = sentiment_analyzer
+        self.batch_size = batch_size
+        self.cache = cache
+        self.decoder = decoder
+        self.call_sink = call_sink
+
+    def run(self, audio_path, audio_hash=None):
+        """
+        Analyze a decoded audio file.
+
+        When a cache and the audio hash are given, each stage's output is
+        looked up first and only the missing stages are run; fresh outputs
+        are stored for the next run. The audio is decoded only if some stage
+        has to run.
+
+        Args:
+            audio_path (str | BinaryIO): Path to the audio file or an uploaded file object.
+            audio_hash (str): Digest of the original audio bytes, from audio_digest().
+
+        Returns:
+            PipelineResult: Transcript, diarization, sentiment scores and timings.
+        """
+        with instruments.call(audio_hash, sink=self.call_sink) as record:
+            result = self._analyze(audio_path, audio_hash)
+            if record is not None:
+                self._record(record, result)
+        return result
+
+    def _analyze(self, audio_path, audio_hash):
+        """
+        Look up cached stage outputs and run the missing stages.
+
+        Args:
+            audio_path (str | BinaryIO): Path to the audio file or an uploaded file object.
+            audio_hash (str): Digest of the original audio bytes, or None.
+
+        Returns:
+            PipelineResult: Transcript, diarization, sentiment scores and timings.
+        """
+        started = time.perf_counter()
+        timings = {}
+        keys = {}
+        if self.cache is not None and audio_hash:
+            keys = self._cache_keys(audio_hash)
+        cached = {stage: self.cache.get(key) for stage, key in keys.items()}
+        transcript, words = cached.get("transcription") or (None, None)
+        diarization_result = cached.get("diarization")
+        sentiment_scores = cached.get("sentiment")
+
+        missing = any(value is None for value in (transcript, diarization_result, sentiment_scores))
+        if missing and self.decoder is not None:
+            with self.decoder.decoded(audio_path) as wav_path:
+                transcript, words, diarization_result, sentiment_scores = self._run_stages(
+                    wav_path, transcript, words, diarization_result, sentiment_scores, timings
+                    )
+        elif missing:
+            transcript, words, diarization_result, sentiment_scores = self._run_stages(
+                audio_path, transcript, words, diarization_result, sentiment_scores, timings
+                )
+
+        fresh = {
+            "transcription": (transcript, words),
+            "diarization": diarization_result,
+            "sentiment": sentiment_scores,
+            }
+        for stage, key in keys.items():
+            if cached[stage] is None:
+                self.cache.put(key, fresh[stage])
+        timings["total"] = time.perf_counter() - started
+        return PipelineResult(transcript, diarization_result, list(sentiment_scores), timings, words)
+
+    def _record(self, record, result):
+        """
+        Add the stage times of an analyzed call to the instruments and its record.
+
+        Args:
+            record (CallRecord): Record of the call.
+            result (PipelineResult): Output of the call.
+
+        Returns:
+            None
+        """
+        report = getattr(self.transcriber, "report", None)
+        audio_seconds = 0.0
+        if "transcription" in result.timings and report is not None:
+            audio_seconds = report.audio_seconds
+        for stage in ("transcription", "diarization", "encoding", "join", "total"):
+            if stage in result.timings:
+                instruments.observe(f"pipeline.{stage}", result.timings[stage],
+                                    audio_seconds if stage != "join" else 0.0)
+        record.fields.update({
+            "audio_seconds": audio_seconds,
+            "utterances": len(result.transcript),
+            "cached": "total" in result.timings and len(result.timings) == 1,
+            "timings": dict(result.timings),
+            })
+
+    def is_cached(self, audio_hash):
+        """
+        Check whether every stage output of a recording is cached, so run()
+        would return without running any model.
+
+        Args:
+            audio_hash (str): Digest of the original audio bytes.
+
+        Returns:
+            bool: True if all stage outputs are cached.
+        """
+        if self.cache is None or not audio_hash:
+            return False
+        return all(self.cache.contains(key) for key in self._cache_keys(audio_hash).values())
+
+    def _run_stages(self, audio_path, transcript, words, diarization_result, sentiment_scores,
+                    timings):
+        """
+        Run every stage whose output is not already known.
+
+        Args:
+            audio_path (str): Path to the decoded audio file.
+            transcript (List[dict]): Cached transcript, or None.
+            words (WordTimeline): Cached word timeline, or None.
+            diarization_result: Cached diarization, or None.
+            sentiment_scores (List[float]): Cached scores, or None.
+            timings (dict): Receives per-stage times.
+
+        Returns:
+            Tuple[List[dict], WordTimeline, Any, List[float]]: Transcript, words,
+                diarization and scores.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            diarization = None
+            if diarization_result is None:
+                diarization = executor.submit(
+                    instruments.bind(self._timed), timings, "diarization", self.diarizer.diarize,
+                    audio_path,
+                    )
+            embeddings = []
+            if transcript is None or sentiment_scores is None:
+                transcript, fresh_words, embeddings = self._transcribe_and_encode(
+                    audio_path, transcript, sentiment_scores is None, timings
+                    )
+                words = words if words is not None else fresh_words
+
+            join_started = time.perf_counter()
+            if sentiment_scores is None:
+                sentiment_scores = self.sentiment_analyzer.score(embeddings)
+            if diarization is not None:
+                diarization_result = diarization.result()
+            timings["join"] = time.perf_counter() - join_started
+        return transcript, words, diarization_result, sentiment_scores
+
+    def _transcribe_and_encode(self, audio_path, transcript, encode, timings):
+        """
+        Transcribe the audio and, if requested, encode utterances as they arrive.
+
+        Transcribers providing transcribe_words() have each result parsed
+        once into word arrays; others yield recognizer JSON.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            transcript (List[dict]): Cached transcript to encode instead of
+                                     transcribing, or None.
+            encode (bool): Whether to encode the utterances.
+            timings (dict): Receives transcription and encoding times.
+
+        Returns:
+            Tuple[List[dict], WordTimeline, list]: Transcript, word timeline
+                (None without word timing) and embedding batches.
+        """
+        sentences = queue.Queue()
+        embeddings = []
+        failures = []
+        encoder = threading.Thread(
+            target=instruments.bind(self._encode_stream),
+            args=(sentences, embeddings, failures, timings), daemon=True,
+            )
+        if encode:
+            encoder.start()
+        items = []
+        utterances = None
+        try:
+            transcribe_started = time.perf_counter()
+            if transcript is not None:
+                source = iter(transcript)
+            elif hasattr(self.transcriber, "transcribe_words"):
+                utterances = []
+                source = self._word_items(audio_path, utterances)
+            else:
+                source = (json.loads(result) for result in self.transcriber.transcribe(audio_path))
+            for item in source:
+                items.append(item)
+                if encode:
+                    sentences.put(item["text"])
+            if transcript is None:
+                timings["transcription"] = time.perf_counter() - transcribe_started
+        finally:
+            if encode:
+                sentences.put(_DONE)
+                encoder.join()
+        if failures:
+            raise failures[0]
+        words = WordTimeline.from_utterances(utterances) if utterances is not None else None
+        return items, words, embeddings
+
+    def _word_items(self, audio_path, utterances):
+        """
+        Yield transcript items of recognized utterances, keeping the utterances.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            utterances (list): Receives each RecognizedUtterance.
+
+        Yields:
+            dict: Transcript item with text, start, end and confidence.
+        """
+        for utterance in self.transcriber.transcribe_words(audio_path):
+            utterances.append(utterance)
+            yield utterance.as_item()
+
+    def _cache_keys(self, audio_hash):
+        """
+        Build the cache key of each stage from the audio hash and model identities.
+
+        Args:
+            audio_hash (str): Digest of the original audio bytes.
+
+        Returns:
+            dict: Cache key per stage name.
+        """
+        transcription = (
+            getattr(self.transcriber, "model_path", None),
+            getattr(getattr(self.transcriber, "vad", None), "identity", None),
+            )
+        if getattr(self.transcriber, "triage_model_path", None) is not None:
+            transcription += (self.transcriber.triage_model_path, self.transcriber.triage_threshold)
+        return {
+            "transcription": cache_key(audio_hash, "transcription", *transcription, "words"),
+            "diarization": cache_key(
+                audio_hash, "diarization", type(self.diarizer).__name__,
+                getattr(self.diarizer, "streaming", None),
+                getattr(getattr(self.diarizer, "vad", None), "identity", None),
+                ),
+            "sentiment": cache_key(
+                audio_hash, "sentiment", *transcription,
+                getattr(self.sentiment_analyzer, "model_name", None),
+                getattr(self.sentiment_analyzer, "backend_name", None),
+                ),
+            }
+
+    def _encode_stream(self, sentences, embeddings, failures, timings):
+        """
+        Encode sentences in batches as they arrive on the queue.
+
+        A batch is flushed when it reaches batch_size or when the queue runs
+        dry, so encoding keeps pace with the transcriber without waiting for
+        a full batch.
+
+        Args:
+            sentences (queue.Queue): Sentences followed by a completion marker.
+            embeddings (list): Receives one embedding batch per encode call.
+            failures (list): Receives the exception if encoding fails.
+            timings (dict): Receives the time spent encoding.
+
+        Returns:
+            None
+        """
+        busy = 0.0
+        batch = []
+        done = False
+        try:
+            while not done:
+                item = sentences.get()
+                while item is not _DONE:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = sentences.get_nowait()
+                    except queue.Empty:
+                        break
+                done = item is _DONE
+                if batch:
+                    encode_started = time.perf_counter()
+                    embeddings.append(self.sentiment_analyzer.encode(batch))
+                    busy += time.perf_counter() - encode_started
+                    batch = []
+        except Exception as error:  # pylint: disable=broad-except
+            failures.append(error)
+            while not done:
+                done = sentences.get() is _DONE
+        timings["encoding"] = busy
+
+    @staticmethod
+    def _timed(timings, stage, function, *args):
+        """
+        Call a function and record how long it took.
+
+        Args:
+            timings (dict): Receives the elapsed time under the stage name.
+            stage (str): Name of the stage.
+            function (Callable): Function to call.
+            *args: Positional arguments for the function.
+
+        Returns:
+            Any: The function's return value.
+        """
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            timings[stage] = time.perf_counter() - started
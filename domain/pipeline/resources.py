@@ -0,0 +1,135 @@
+"""The module holds the analysis resources shared by every session of the app."""
+
+import os
+import threading
+
+from domain.audio.decoding import AudioDecoder
+from domain.audio.vad import VoiceActivityDetector
+from domain.batch.batch import MODEL_PATH, SENTIMENT_MODEL
+from domain.cache.result_cache import result_cache
+from domain.diarization.diarization import Diarizer
+from domain.google_sheets.google_sheets import GoogleSheetsExporter
+from domain.google_sheets.spool import SPOOL_PATH
+from domain.instrumentation.export import MetricsExporter
+from domain.pipeline.admission import MAX_QUEUE, AdmissionController
+from domain.pipeline.pipeline import AnalysisPipeline
+from domain.pipeline.warmup import ModelWarmup
+from domain.sentiment_analysis.embedding_cache import EmbeddingCache
+from domain.sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+from domain.transcription.transcription import Transcriber
+
+CREDENTIALS_PATH = "credentials.json"
+
+
+def default_slots():
+    """
+    Return the number of analyses to run at once on this machine.
+
+    Each analysis keeps about two cores busy, one for recognition and one
+    for diarization and encoding.
+
+    Returns:
+        int: Number of slots, at least one.
+    """
+    return max((os.cpu_count() or 2) // 2, 1)
+
+
+class AnalysisResources:
+    """
+    Models, pipeline and admission control shared by every app session.
+
+    Streamlit runs the app script again for every interaction of every
+    session, so anything it builds is built again. This class lives in an
+    imported module instead, and shared() returns one instance per process.
+    That means one copy of each model, one recognizer pool sized to the
+    analysis slots, one encoding service batching sentences from all
+    sessions, and one admission queue in front of the pipeline.
+
+    Building the resources is cheap. The models are loaded by the warm-up
+    thread, once the app has rendered, or by the first analysis that needs
+    them, whichever comes first.
+
+    Args:
+        slots (int): Analyses running at once; by default half the cores.
+        max_queue (int): Most analyses waiting at once.
+        model_path (str): Path to the Vosk model directory or zip archive.
+        sentiment_model (str): Name of the SentenceTransformer model.
+        credentials_path (str): Path to the Google Sheets API credentials.
+        spool_path (str): Path of the export spool.
+
+    Attributes:
+        decoder (AudioDecoder): Decoder shared by all stages.
+        vad (VoiceActivityDetector): Detector shared by the transcriber and diarizer.
+        transcriber (Transcriber): Transcriber drawing recognizers from a bounded pool.
+        diarizer (Diarizer): Diarizer with the shared pyannote backend.
+        sentiment_analyzer (SentimentAnalyzer): Analyzer using the shared encoding service.
+        pipeline (AnalysisPipeline): Pipeline over the stages above.
+        admission (AdmissionController): Queue in front of the pipeline.
+        exporter (GoogleSheetsExporter): Exporter with its background spool flusher.
+        warmup (ModelWarmup): Background loader of the three models.
+        metrics (MetricsExporter): Prometheus endpoint and call records, if
+                                   enabled by CQR_METRICS_PORT or CQR_METRICS_CALLS.
+
+    Methods:
+        shared(**options): Returns the process-wide resources.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, slots=None, max_queue=MAX_QUEUE, model_path=MODEL_PATH,
+                 sentiment_model=SENTIMENT_MODEL, credentials_path=CREDENTIALS_PATH,
+                 spool_path=SPOOL_PATH):
+        """
+        Initialize the AnalysisResources without loading any model.
+
+        Args:
+            slots (int): Analyses running at once; by default half the cores.
+            max_queue (int): Most analyses waiting at once.
+            model_path (str): Path to the Vosk model directory or zip archive.
+            sentiment_model (str): Name of the SentenceTransformer model.
+            credentials_path (str): Path to the Google Sheets API credentials.
+            spool_path (str): Path of the export spool.
+        """
+        slots = slots or default_slots()
+        self.decoder = AudioDecoder()
+        self.vad = VoiceActivityDetector()
+        self.transcriber = Transcriber(model_path=model_path, decoder=self.decoder, vad=self.vad,
+                                       recognizer_slots=slots)
+        self.diarizer = Diarizer(decoder=self.decoder, vad=self.vad)
+        self.sentiment_analyzer = SentimentAnalyzer(
+            model_name=sentiment_model, embedding_cache=EmbeddingCache(sentiment_model),
+            batching=True,
+            )
+        self.metrics = MetricsExporter.from_environment()
+        self.pipeline = AnalysisPipeline(self.transcriber, self.diarizer, self.sentiment_analyzer,
+                                         cache=result_cache, decoder=self.decoder,
+                                         call_sink=self.metrics.write_call)
+        self.admission = AdmissionController(slots=slots, max_queue=max_queue)
+        self.exporter = GoogleSheetsExporter(credentials_path=credentials_path,
+                                             spool_path=spool_path)
+        self.warmup = ModelWarmup([
+            ("transcription", lambda: self.transcriber.model),
+            ("sentiment", lambda: self.sentiment_analyzer.backend),
+            ("diarization", lambda: self.diarizer.backend),
+            ])
+
+    @classmethod
+    def shared(cls, **options):
+        """
+        Return the process-wide resources, creating them on first use.
+
+        Args:
+            **options: Keyword arguments of the resources; each distinct set
+                       of options gets its own instance.
+
+        Returns:
+            AnalysisResources: The shared resources.
+        """
+        with cls._shared_lock:
+            key = tuple(sorted(options.items()))
+            resources = cls._shared.get(key)
+            if resources is None:
+                resources = cls(**options)
+                cls._shared[key] = resources
+            return resources
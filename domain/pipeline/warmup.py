@@ -0,0 +1,104 @@
+"""The module loads models in the background so the app can render before they are ready."""
+
+import threading
+import time
+
+STATES = ("pending", "loading", "ready", "failed")
+
+
+class ModelWarmup:
+    """
+    Runs model loading steps one after another in a background thread.
+
+    Every step records its state, how long it took and, if it failed, the
+    error, so the UI can show which models are ready. A failed step does
+    not stop the steps after it; the model it was loading is loaded again,
+    and its error raised, by the first analysis that needs it.
+
+    Args:
+        steps (List[Tuple[str, Callable[[], object]]]): Named loading steps, in order.
+
+    Methods:
+        start(): Starts the thread once; later calls do nothing.
+        status(): Returns the state, seconds and error of each step.
+        ready(): Checks whether every step has finished successfully.
+        wait(timeout): Blocks until every step has finished.
+    """
+
+    def __init__(self, steps):
+        """
+        Initialize the ModelWarmup.
+
+        Args:
+            steps (List[Tuple[str, Callable[[], object]]]): Named loading steps, in order.
+        """
+        self.steps = list(steps)
+        self._status = {name: {"state": "pending", "seconds": 0.0, "error": None}
+                        for name, _ in self.steps}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start loading in the background, once per instance.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+                self._thread.start()
+
+    def status(self):
+        """
+        Return the progress of every step.
+
+        Returns:
+            dict: Step name to a dict with state (one of STATES), seconds and error.
+        """
+        with self._lock:
+            return {name: dict(step) for name, step in self._status.items()}
+
+    def ready(self):
+        """
+        Check whether every step has finished successfully.
+
+        Returns:
+            bool: True once every model is loaded.
+        """
+        return all(step["state"] == "ready" for step in self.status().values())
+
+    def wait(self, timeout=None):
+        """
+        Block until every step has finished or failed.
+
+        Args:
+            timeout (float): Longest wait in seconds; None waits indefinitely.
+
+        Returns:
+            bool: True if every step has finished.
+        """
+        return self._done.wait(timeout)
+
+    def _run(self):
+        """
+        Run every step and record its outcome.
+
+        Returns:
+            None
+        """
+        for name, step in self.steps:
+            with self._lock:
+                self._status[name]["state"] = "loading"
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as error:  # pylint: disable=broad-except
+                outcome = {"state": "failed", "error": repr(error)}
+            else:
+                outcome = {"state": "ready"}
+            with self._lock:
+                self._status[name].update(outcome, seconds=time.perf_counter() - started)
+        self._done.set()
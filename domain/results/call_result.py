@@ -0,0 +1,347 @@
+"""The module stores per-utterance call results in compact parallel arrays."""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from domain.alignment.alignment import item_span
+
+MAGIC = b"CQRCALL1"
+ALIGNMENT = 64
+COLUMNS = (
+    ("starts", np.float32),
+    ("ends", np.float32),
+    ("speaker_ids", np.int16),
+    ("sentiments", np.float32),
+    ("text_offsets", np.int64),
+    ("text_buffer", np.uint8),
+    )
+
+
+class Utterance:
+    """
+    View of one row of a CallResult; holds no data of its own.
+
+    Attributes:
+        start (float): Start of the utterance in seconds.
+        end (float): End of the utterance in seconds.
+        speaker_id (int): Index into CallResult.speakers, or -1.
+        speaker (str): Speaker label, or None.
+        sentiment (float): Sentiment score.
+        text (str): Transcribed text.
+    """
+
+    __slots__ = ("_result", "_row")
+
+    def __init__(self, result, row):
+        self._result = result
+        self._row = row
+
+    @property
+    def start(self):
+        return float(self._result.columns["starts"][self._row])
+
+    @property
+    def end(self):
+        return float(self._result.columns["ends"][self._row])
+
+    @property
+    def speaker_id(self):
+        return int(self._result.columns["speaker_ids"][self._row])
+
+    @property
+    def speaker(self):
+        code = self.speaker_id
+        return self._result.speakers[code] if code >= 0 else None
+
+    @property
+    def sentiment(self):
+        return float(self._result.columns["sentiments"][self._row])
+
+    @property
+    def text(self):
+        offsets = self._result.columns["text_offsets"]
+        start, end = offsets[self._row], offsets[self._row + 1]
+        return bytes(self._result.columns["text_buffer"][start:end]).decode("utf-8")
+
+    def __repr__(self):
+        return (f"Utterance(start={self.start:.2f}, end={self.end:.2f}, "
+                f"speaker={self.speaker!r}, sentiment={self.sentiment:.4f}, text={self.text!r})")
+
+
+class CallResult:
+    """
+    Per-utterance results of one call as parallel arrays.
+
+    Start and end times are float32 seconds, speakers int16 indices into
+    speakers, sentiment scores float32, and texts one shared UTF-8 buffer
+    addressed by int64 offsets. Slicing by position or time range returns
+    a view over the same arrays; selecting a speaker returns a view that
+    shares the arrays through an index of its rows. Rows are materialized
+    only as slotted Utterance views.
+
+    Args:
+        columns (dict): Arrays named as in COLUMNS; text_offsets has one more
+                        entry than there are rows.
+        speakers (List[str]): Speaker labels.
+        metadata (dict): JSON-serializable call metadata, e.g. its audio digest.
+        rows (slice | np.ndarray): Rows of columns visible through this result.
+
+    Methods:
+        from_transcript(transcript, speakers, sentiments): Builds a result.
+        between(start, end): Returns the utterances starting in a time range.
+        for_speaker(speaker): Returns the utterances of one speaker.
+        to_rows(): Returns [text, speaker, sentiment] lists for export.
+        save(path): Writes the result to a memory-mappable file.
+        load(path, mmap): Reads a result written by save().
+    """
+
+    __slots__ = ("columns", "speakers", "metadata", "_rows")
+
+    def __init__(self, columns, speakers, metadata=None, rows=None):
+        """
+        Initialize the CallResult.
+
+        Args:
+            columns (dict): Arrays named as in COLUMNS; text_offsets has one more
+                            entry than there are rows.
+            speakers (List[str]): Speaker labels.
+            metadata (dict): JSON-serializable call metadata, e.g. its audio digest.
+            rows (slice | np.ndarray): Rows of columns visible through this result.
+        """
+        self.columns = columns
+        self.speakers = list(speakers)
+        self.metadata = dict(metadata or {})
+        self._rows = slice(0, len(columns["starts"])) if rows is None else rows
+
+    @classmethod
+    def from_transcript(cls, transcript, speakers, sentiments, metadata=None):
+        """
+        Build a result from transcript items, their speakers and sentiment scores.
+
+        Args:
+            transcript (Sequence[dict]): Utterances with text and timing; see item_span().
+            speakers (Sequence[str]): Speaker label per utterance, or None.
+            sentiments (Sequence[float]): Sentiment score per utterance.
+            metadata (dict): JSON-serializable call metadata.
+
+        Returns:
+            CallResult: The result.
+        """
+        count = len(transcript)
+        labels = {}
+        speaker_ids = np.fromiter(
+            (-1 if speaker is None else labels.setdefault(speaker, len(labels)) for speaker in speakers),
+            dtype=np.int16, count=count,
+            )
+        spans = np.array([item_span(item) for item in transcript], dtype=np.float32).reshape(-1, 2)
+        encoded = [item["text"].encode("utf-8") for item in transcript]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        columns = {
+            "starts": np.ascontiguousarray(spans[:, 0]),
+            "ends": np.ascontiguousarray(spans[:, 1]),
+            "speaker_ids": speaker_ids,
+            "sentiments": np.asarray(sentiments, dtype=np.float32).reshape(count),
+            "text_offsets": offsets,
+            "text_buffer": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            }
+        return cls(columns, labels, metadata)
+
+    def _column(self, name):
+        """Return the visible rows of a column; a view unless rows is an index."""
+        return self.columns[name][self._rows]
+
+    @property
+    def starts(self):
+        return self._column("starts")
+
+    @property
+    def ends(self):
+        return self._column("ends")
+
+    @property
+    def speaker_ids(self):
+        return self._column("speaker_ids")
+
+    @property
+    def sentiments(self):
+        return self._column("sentiments")
+
+    def _row_numbers(self):
+        """Return the visible rows as an index array."""
+        if isinstance(self._rows, slice):
+            return np.arange(*self._rows.indices(len(self.columns["starts"])))
+        return self._rows
+
+    def __len__(self):
+        if isinstance(self._rows, slice):
+            return len(range(*self._rows.indices(len(self.columns["starts"]))))
+        return len(self._rows)
+
+    def __iter__(self):
+        for row in self._row_numbers():
+            yield Utterance(self, int(row))
+
+    def __getitem__(self, key):
+        """
+        Return one row view, or a result view for a slice.
+
+        Args:
+            key (int | slice): Position among the visible rows.
+
+        Returns:
+            Utterance | CallResult: The row or the sliced result.
+        """
+        if isinstance(key, slice):
+            if isinstance(self._rows, slice):
+                start, stop, step = self._rows.indices(len(self.columns["starts"]))
+                rows = range(start, stop, step)[key]
+                if rows.step > 0:
+                    rows = slice(rows.start, rows.stop, rows.step)
+                else:
+                    rows = np.array(rows, dtype=np.intp)
+                return CallResult(self.columns, self.speakers, self.metadata, rows)
+            return CallResult(self.columns, self.speakers, self.metadata, self._rows[key])
+        return Utterance(self, int(self._row_numbers()[key]))
+
+    def between(self, start, end):
+        """
+        Return the utterances starting in [start, end).
+
+        Rows are expected in time order, as produced by the transcriber; the
+        range is then found by binary search and returned as a view.
+
+        Args:
+            start (float): Range start in seconds.
+            end (float): Range end in seconds.
+
+        Returns:
+            CallResult: View of the utterances in the range.
+        """
+        starts = self.starts
+        first, last = np.searchsorted(starts, [start, end], side="left")
+        return self[int(first):int(last)]
+
+    def for_speaker(self, speaker):
+        """
+        Return the utterances of one speaker.
+
+        The view shares the column arrays and text buffer; only the indices
+        of the speaker's rows are stored.
+
+        Args:
+            speaker (str): Speaker label.
+
+        Returns:
+            CallResult: View of the speaker's utterances.
+        """
+        if speaker not in self.speakers:
+            return CallResult(self.columns, self.speakers, self.metadata, np.zeros(0, dtype=np.intp))
+        code = self.speakers.index(speaker)
+        rows = self._row_numbers()
+        return CallResult(self.columns, self.speakers, self.metadata,
+                          rows[self.speaker_ids == code])
+
+    def to_rows(self):
+        """
+        Return the utterances as [text, speaker, sentiment] lists for export.
+
+        Returns:
+            List[List]: One list per utterance.
+        """
+        return [[row.text, row.speaker or "", row.sentiment] for row in self]
+
+    def save(self, path):
+        """
+        Write the visible rows to a file whose columns can be memory-mapped.
+
+        The file holds a magic string, a JSON header and the raw little-endian
+        columns, each aligned to 64 bytes. The file is written to a temporary
+        name and renamed into place.
+
+        Args:
+            path (str): Target path.
+
+        Returns:
+            None
+        """
+        compact = self._compact()
+        header = {"count": len(compact), "speakers": compact.speakers,
+                  "metadata": compact.metadata, "columns": {}}
+        position = 0
+        for name, dtype in COLUMNS:
+            array = compact.columns[name]
+            header["columns"][name] = {"dtype": np.dtype(dtype).newbyteorder("<").str,
+                                       "offset": position, "length": len(array)}
+            position += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        encoded = json.dumps(header).encode("utf-8")
+        base = -(-(len(MAGIC) + 8 + len(encoded)) // ALIGNMENT) * ALIGNMENT
+
+        temporary = f"{path}.tmp-{os.getpid()}"
+        with open(temporary, "wb") as output:
+            output.write(MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+            for name, dtype in COLUMNS:
+                output.seek(base + header["columns"][name]["offset"])
+                output.write(compact.columns[name].astype(np.dtype(dtype).newbyteorder("<"),
+                                                           copy=False).tobytes())
+            output.truncate(base + position)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Read a result written by save().
+
+        Args:
+            path (str): Path of the file.
+            mmap (bool): Whether to memory-map the columns read-only instead of
+                         reading them into memory.
+
+        Returns:
+            CallResult: The result.
+        """
+        with open(path, "rb") as stream:
+            if stream.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a call result file")
+            (length,) = struct.unpack("<Q", stream.read(8))
+            header = json.loads(stream.read(length).decode("utf-8"))
+            base = -(-(len(MAGIC) + 8 + length) // ALIGNMENT) * ALIGNMENT
+            columns = {}
+            for name, spec in header["columns"].items():
+                dtype = np.dtype(spec["dtype"])
+                if mmap and spec["length"]:
+                    columns[name] = np.memmap(path, dtype=dtype, mode="r",
+                                              offset=base + spec["offset"], shape=(spec["length"],))
+                else:
+                    stream.seek(base + spec["offset"])
+                    columns[name] = np.fromfile(stream, dtype=dtype, count=spec["length"])
+        return cls(columns, header["speakers"], header["metadata"])
+
+    def _compact(self):
+        """
+        Return the visible rows as a result that owns contiguous columns.
+
+        Returns:
+            CallResult: Self if all rows are visible, else a compacted copy.
+        """
+        if isinstance(self._rows, slice) and self._rows == slice(0, len(self.columns["starts"])):
+            return self
+        rows = self._row_numbers()
+        offsets = self.columns["text_offsets"]
+        lengths = offsets[rows + 1] - offsets[rows]
+        new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=new_offsets[1:])
+        buffer = self.columns["text_buffer"]
+        texts = b"".join(bytes(buffer[offsets[row]:offsets[row + 1]]) for row in rows)
+        columns = {
+            "starts": self.starts.copy(),
+            "ends": self.ends.copy(),
+            "speaker_ids": self.speaker_ids.copy(),
+            "sentiments": self.sentiments.copy(),
+            "text_offsets": new_offsets,
+            "text_buffer": np.frombuffer(texts, dtype=np.uint8),
+            }
+        return CallResult(columns, self.speakers, self.metadata)
@@ -0,0 +1,246 @@
+"""The module provides interchangeable inference backends for sentence encoding."""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_CACHE_DIR = "data/cache/onnx"
+ONNX_OPSET = 13
+
+
+class TorchBackend:
+    """
+    Encodes sentences with the SentenceTransformer PyTorch model.
+
+    Args:
+        model_name (str): Name of the SentenceTransformer model.
+        threads (int): Number of intra-op CPU threads; None keeps the default.
+
+    Methods:
+        encode(sentences, batch_size): Encodes sentences into embeddings.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name, threads=None):
+        """
+        Initialize the TorchBackend and load the model.
+
+        Args:
+            model_name (str): Name of the SentenceTransformer model.
+            threads (int): Number of intra-op CPU threads; None keeps the default.
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, sentences, batch_size):
+        """
+        Encode sentences into embeddings.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+            batch_size (int): Number of sentences per forward pass.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        return self.model.encode(sentences, batch_size=batch_size, convert_to_numpy=True)
+
+
+class OnnxBackend:
+    """
+    Encodes sentences with an ONNX export of the model on ONNX Runtime.
+
+    On first use the transformer is exported to ONNX (and, when quantize is
+    set, dynamically quantized to int8 weights) into a cache directory along
+    with its tokenizer; later runs load the cached files without PyTorch.
+    Mean pooling over the attention mask reproduces the pooling layer of the
+    paraphrase-* SentenceTransformer models. Requires the optional packages
+    onnxruntime and transformers.
+
+    Args:
+        model_name (str): Name of the SentenceTransformer model.
+        quantize (bool): Whether to use int8 dynamically quantized weights.
+        threads (int): Number of intra-op CPU threads; None lets ONNX Runtime decide.
+        cache_dir (str): Directory holding exported models.
+
+    Methods:
+        encode(sentences, batch_size): Encodes sentences into embeddings.
+    """
+
+    def __init__(self, model_name, quantize=False, threads=None, cache_dir=ONNX_CACHE_DIR):
+        """
+        Initialize the OnnxBackend, exporting the model if it is not cached.
+
+        Args:
+            model_name (str): Name of the SentenceTransformer model.
+            quantize (bool): Whether to use int8 dynamically quantized weights.
+            threads (int): Number of intra-op CPU threads; None lets ONNX Runtime decide.
+            cache_dir (str): Directory holding exported models.
+        """
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+        except ImportError as error:
+            raise ImportError(
+                "The onnx backends require the onnxruntime and transformers packages"
+                ) from error
+
+        self.model_name = model_name
+        self.name = "onnx-int8" if quantize else "onnx"
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.join(cache_dir, slug)
+        model_file = os.path.join(self.directory, "model-int8.onnx" if quantize else "model.onnx")
+        if not os.path.exists(model_file):
+            self._export(quantize)
+
+        with open(os.path.join(self.directory, "config.json"), "r") as config:
+            self.max_seq_length = json.load(config)["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(self.directory)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model_file, sess_options=options, providers=["CPUExecutionProvider"]
+            )
+
+    def encode(self, sentences, batch_size):
+        """
+        Encode sentences into mean-pooled embeddings.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+            batch_size (int): Number of sentences per forward pass.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            tokens = self.tokenizer(
+                list(sentences[start:start + batch_size]),
+                padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np",
+                )
+            mask = tokens["attention_mask"].astype(np.int64)
+            hidden = self.session.run(
+                ["last_hidden_state"],
+                {"input_ids": tokens["input_ids"].astype(np.int64), "attention_mask": mask},
+                )[0]
+            weights = mask[..., None].astype(np.float32)
+            summed = (hidden * weights).sum(axis=1)
+            batches.append(summed / np.maximum(weights.sum(axis=1), 1e-9))
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(batches).astype(np.float32, copy=False)
+
+    def _export(self, quantize):
+        """
+        Export the transformer and tokenizer into the cache directory.
+
+        Files are written to a temporary directory first and moved into place,
+        so concurrent or interrupted exports never leave a partial model.
+
+        Args:
+            quantize (bool): Whether to also write the int8 quantized model.
+
+        Returns:
+            None
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        os.makedirs(os.path.dirname(self.directory) or ".", exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(self.directory) or ".")
+        try:
+            fp32_file = os.path.join(staging, "model.onnx")
+            if os.path.exists(os.path.join(self.directory, "model.onnx")):
+                shutil.copy(os.path.join(self.directory, "model.onnx"), fp32_file)
+            else:
+                sentence_model = SentenceTransformer(self.model_name, device="cpu")
+                transformer = sentence_model[0]
+                auto_model = transformer.auto_model.eval()
+                auto_model.config.return_dict = False
+                dummy = transformer.tokenizer(["export"], return_tensors="pt")
+                with torch.no_grad():
+                    torch.onnx.export(
+                        auto_model,
+                        (dummy["input_ids"], dummy["attention_mask"]),
+                        fp32_file,
+                        input_names=["input_ids", "attention_mask"],
+                        output_names=["last_hidden_state", "pooler_output"],
+                        dynamic_axes={
+                            "input_ids": {0: "batch", 1: "sequence"},
+                            "attention_mask": {0: "batch", 1: "sequence"},
+                            "last_hidden_state": {0: "batch", 1: "sequence"},
+                            "pooler_output": {0: "batch"},
+                            },
+                        opset_version=ONNX_OPSET,
+                        do_constant_folding=True,
+                        )
+                transformer.tokenizer.save_pretrained(staging)
+                with open(os.path.join(staging, "config.json"), "w") as config:
+                    json.dump({"max_seq_length": sentence_model.max_seq_length}, config)
+            if quantize:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                quantize_dynamic(
+                    fp32_file, os.path.join(staging, "model-int8.onnx"), weight_type=QuantType.QInt8
+                    )
+            os.makedirs(self.directory, exist_ok=True)
+            for name in os.listdir(staging):
+                target = os.path.join(self.directory, name)
+                if not os.path.exists(target):
+                    os.replace(os.path.join(staging, name), target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def create_backend(name, model_name, threads=None):
+    """
+    Create an encoding backend by name.
+
+    Args:
+        name (str): One of "torch", "onnx" or "onnx-int8".
+        model_name (str): Name of the SentenceTransformer model.
+        threads (int): Number of intra-op CPU threads; None keeps the default.
+
+    Returns:
+        TorchBackend | OnnxBackend: The backend.
+    """
+    if name == "torch":
+        return TorchBackend(model_name, threads=threads)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(model_name, quantize=name == "onnx-int8", threads=threads)
+    raise ValueError(f"Unknown backend {name!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def embedding_agreement(reference, candidate):
+    """
+    Compare embeddings from two backends row by row.
+
+    Args:
+        reference (np.ndarray): Embeddings from the reference (torch) backend.
+        candidate (np.ndarray): Embeddings of the same sentences from another backend.
+
+    Returns:
+        dict: Minimum and mean cosine similarity between matching rows.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosine = (reference * candidate).sum(axis=1) / np.maximum(norms, 1e-12)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
@@ -0,0 +1,254 @@
+"""The module batches sentence encoding requests from concurrent callers."""
+
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 10.0
+BUCKET_WIDTH = 8
+LATENCY_WINDOW = 1024
+_STOP = object()
+
+
+def word_length(sentence):
+    """
+    Approximate the token length of a sentence by its word count.
+
+    Args:
+        sentence (str): Sentence to measure.
+
+    Returns:
+        int: Number of whitespace-separated words.
+    """
+    return len(sentence.split())
+
+
+class _Request:
+    """One caller's sentences and the future that receives their embeddings."""
+
+    __slots__ = ("future", "rows", "remaining", "submitted")
+
+    def __init__(self, size):
+        self.future = Future()
+        self.rows = [None] * size
+        self.remaining = size
+        self.submitted = time.perf_counter()
+
+
+class EncodingService:
+    """
+    Shares one encoder between concurrent callers through dynamic batching.
+
+    Callers submit sentences and block on a future. A background thread
+    groups queued sentences from all callers into buckets of similar length,
+    so batches carry little padding, and encodes a bucket when it reaches
+    max_batch_size or when its oldest sentence has waited max_wait_ms. Each
+    caller receives exactly its own rows, in its original order.
+
+    Args:
+        encode_batch (Callable[[List[str]], np.ndarray]): Encodes one batch.
+        max_batch_size (int): Largest number of sentences per batch.
+        max_wait_ms (float): Longest time a sentence waits for its batch to fill.
+        bucket_width (int): Width of a length bucket, in units of length_fn.
+        length_fn (Callable[[str], int]): Approximate token length of a sentence.
+
+    Methods:
+        encode(sentences): Encodes sentences, blocking until they are done.
+        submit(sentences): Queues sentences and returns a future.
+        stats(): Returns queue depth, batch fill ratio and latency percentiles.
+        close(): Stops the batching thread.
+        shared(name, encode_batch): Returns the process-wide service for a model.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, encode_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 bucket_width=BUCKET_WIDTH, length_fn=word_length):
+        """
+        Initialize the EncodingService and start its batching thread.
+
+        Args:
+            encode_batch (Callable[[List[str]], np.ndarray]): Encodes one batch.
+            max_batch_size (int): Largest number of sentences per batch.
+            max_wait_ms (float): Longest time a sentence waits for its batch to fill.
+            bucket_width (int): Width of a length bucket, in units of length_fn.
+            length_fn (Callable[[str], int]): Approximate token length of a sentence.
+        """
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.bucket_width = bucket_width
+        self.length_fn = length_fn
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._batches = 0
+        self._batched_sentences = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="encoding-service", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def shared(cls, name, encode_batch, **options):
+        """
+        Return the process-wide service for a model, creating it on first use.
+
+        Args:
+            name (str): Identity of the model, e.g. its name and backend.
+            encode_batch (Callable[[List[str]], np.ndarray]): Encodes one batch.
+            **options: Keyword arguments for a newly created service.
+
+        Returns:
+            EncodingService: The shared service.
+        """
+        with cls._shared_lock:
+            service = cls._shared.get(name)
+            if service is None:
+                service = cls(encode_batch, **options)
+                cls._shared[name] = service
+            return service
+
+    def submit(self, sentences):
+        """
+        Queue sentences for encoding.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            concurrent.futures.Future: Resolves to a float32 matrix, one row per sentence.
+        """
+        request = _Request(len(sentences))
+        if not sentences:
+            request.future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return request.future
+        with self._lock:
+            self._pending += len(sentences)
+        for index, sentence in enumerate(sentences):
+            self._queue.put((sentence, request, index, time.perf_counter()))
+        return request.future
+
+    def encode(self, sentences):
+        """
+        Encode sentences, blocking until their batches have run.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        return self.submit(sentences).result()
+
+    def stats(self):
+        """
+        Return service metrics.
+
+        Returns:
+            dict: queue_depth, batches, fill_ratio, p50_ms and p99_ms.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+            batches, sentences, depth = self._batches, self._batched_sentences, self._pending
+        stats = {
+            "queue_depth": depth,
+            "batches": batches,
+            "fill_ratio": sentences / (batches * self.max_batch_size) if batches else 0.0,
+            "p50_ms": 0.0,
+            "p99_ms": 0.0,
+            }
+        if len(latencies):
+            stats["p50_ms"] = float(np.percentile(latencies, 50) * 1000.0)
+            stats["p99_ms"] = float(np.percentile(latencies, 99) * 1000.0)
+        return stats
+
+    def close(self):
+        """
+        Stop the batching thread after flushing queued sentences.
+
+        Returns:
+            None
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        """
+        Collect queued sentences into length buckets and flush them when due.
+
+        Returns:
+            None
+        """
+        buckets = collections.defaultdict(list)
+        stopping = False
+        while not stopping:
+            timeout = None
+            if buckets:
+                oldest = min(items[0][3] for items in buckets.values())
+                timeout = max(oldest + self.max_wait - time.perf_counter(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                bucket = buckets[self.length_fn(item[0]) // self.bucket_width]
+                bucket.append(item)
+                if len(bucket) >= self.max_batch_size:
+                    self._flush(bucket[:self.max_batch_size])
+                    del bucket[:self.max_batch_size]
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            now = time.perf_counter()
+            for key in list(buckets):
+                items = buckets[key]
+                if items and (stopping or now - items[0][3] >= self.max_wait):
+                    self._flush(items)
+                    items = []
+                if not items:
+                    del buckets[key]
+
+    def _flush(self, items):
+        """
+        Encode one batch and hand each row to the request it came from.
+
+        Args:
+            items (List[tuple]): (sentence, request, index, enqueued_at) tuples.
+
+        Returns:
+            None
+        """
+        try:
+            embeddings = np.asarray(self.encode_batch([item[0] for item in items]), dtype=np.float32)
+        except Exception as error:  # pylint: disable=broad-except
+            for _, request, _, _ in items:
+                if not request.future.done():
+                    request.future.set_exception(error)
+            embeddings = None
+        finished = []
+        with self._lock:
+            self._pending -= len(items)
+            self._batches += 1
+            self._batched_sentences += len(items)
+            if embeddings is not None:
+                for (_, request, index, _), row in zip(items, embeddings):
+                    request.rows[index] = row
+                    request.remaining -= 1
+                    if request.remaining == 0:
+                        finished.append(request)
+                now = time.perf_counter()
+                self._latencies.extend(now - request.submitted for request in finished)
+        for request in finished:
+            if not request.future.done():
+                request.future.set_result(np.stack(request.rows))
@@ -0,0 +1,248 @@
+"""The module caches sentence embeddings of frequently repeated phrases."""
+
+import collections
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+CACHE_DIR = "data/cache/embeddings"
+CAPACITY = 200000
+MEMORY_ENTRIES = 4096
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """
+    Normalize a sentence so trivially different spellings share a cache entry.
+
+    Args:
+        text (str): Sentence as transcribed.
+
+    Returns:
+        str: NFKC-normalized, lower-cased text with collapsed whitespace.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+class EmbeddingCache:
+    """
+    Caches sentence embeddings by normalized text and model name.
+
+    Lookups go to an in-process LRU first, then to an on-disk float16 matrix
+    that is memory-mapped by every process using the same cache directory.
+    A SQLite table maps each text key to its row in the matrix; a row becomes
+    visible to readers only after its vector has been written. Sentences
+    missing from both tiers are encoded together in a single batch.
+
+    Args:
+        model_name (str): Name of the model producing the embeddings.
+        cache_dir (str): Directory of the on-disk tier; None disables it.
+        capacity (int): Maximum number of rows in the on-disk matrix.
+        memory_entries (int): Capacity of the in-process LRU.
+
+    Methods:
+        encode(sentences, encode_batch): Returns embeddings, encoding only misses.
+        stats(): Returns hit and miss counters.
+    """
+
+    def __init__(self, model_name, cache_dir=CACHE_DIR, capacity=CAPACITY,
+                 memory_entries=MEMORY_ENTRIES):
+        """
+        Initialize the EmbeddingCache.
+
+        Args:
+            model_name (str): Name of the model producing the embeddings.
+            cache_dir (str): Directory of the on-disk tier; None disables it.
+            capacity (int): Maximum number of rows in the on-disk matrix.
+            memory_entries (int): Capacity of the in-process LRU.
+        """
+        self.model_name = model_name
+        self.capacity = capacity
+        self.memory_entries = memory_entries
+        self.directory = None
+        if cache_dir is not None:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            self.directory = os.path.join(cache_dir, slug)
+        self._memory = collections.OrderedDict()
+        self._counters = collections.Counter()
+        self._lock = threading.Lock()
+        self._db = None
+        self._vectors = None
+
+    def key(self, sentence):
+        """
+        Return the cache key of a sentence.
+
+        Args:
+            sentence (str): Sentence as transcribed.
+
+        Returns:
+            str: Hex digest of the model name and normalized text.
+        """
+        material = f"{self.model_name}\x1f{normalize_text(sentence)}"
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def encode(self, sentences, encode_batch):
+        """
+        Return embeddings for sentences, encoding only the cache misses.
+
+        Args:
+            sentences (List[str]): Sentences to embed.
+            encode_batch (Callable[[List[str]], np.ndarray]): Encodes a list of sentences.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        keys = [self.key(sentence) for sentence in sentences]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    found[key] = vector
+            disk = self._read_disk([key for key in dict.fromkeys(keys) if key not in found])
+            self._counters["disk_hits"] += len(disk)
+            for key, vector in disk.items():
+                self._remember(key, vector)
+            found.update(disk)
+
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if key not in found and key not in missing:
+                missing[key] = sentence
+        if missing:
+            encoded = np.asarray(encode_batch(list(missing.values())), dtype=np.float32)
+            with self._lock:
+                self._counters["misses"] += len(missing)
+                for key, vector in zip(missing, encoded):
+                    found[key] = vector
+                    self._remember(key, vector)
+                self._write_disk(dict(zip(missing, encoded)))
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+    def stats(self):
+        """
+        Return hit and miss counters of unique sentences per call.
+
+        Returns:
+            dict: memory_hits, disk_hits, misses and hit_rate.
+        """
+        with self._lock:
+            counters = {name: self._counters[name] for name in ("memory_hits", "disk_hits", "misses")}
+        lookups = sum(counters.values())
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        counters["hit_rate"] = hits / lookups if lookups else 0.0
+        return counters
+
+    def _remember(self, key, vector):
+        """Insert into the in-process LRU; the caller holds the lock."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _connect(self):
+        """Open the row index, creating it on first use."""
+        if self._db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(self.directory, "index.sqlite"), timeout=30, check_same_thread=False
+                )
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                "key TEXT PRIMARY KEY, row INTEGER UNIQUE NOT NULL, ready INTEGER NOT NULL DEFAULT 0)"
+                )
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+            self._db.commit()
+        return self._db
+
+    def _matrix(self, dim=None):
+        """
+        Map the on-disk float16 matrix, creating it once the dimension is known.
+
+        Args:
+            dim (int): Embedding dimension; required only to create the matrix.
+
+        Returns:
+            np.memmap: Matrix of shape (capacity, dim), or None if not created yet.
+        """
+        if self._vectors is not None:
+            return self._vectors
+        db = self._connect()
+        row = db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if row is None:
+            if dim is None:
+                return None
+            db.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (int(dim),))
+            db.commit()
+            row = db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        path = os.path.join(self.directory, "vectors.f16")
+        shape = (self.capacity, row[0])
+        size = shape[0] * shape[1] * np.dtype(np.float16).itemsize
+        handle = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(handle).st_size < size:
+                os.ftruncate(handle, size)
+        finally:
+            os.close(handle)
+        self._vectors = np.memmap(path, dtype=np.float16, mode="r+", shape=shape)
+        return self._vectors
+
+    def _read_disk(self, keys):
+        """Fetch ready rows for the given keys from the on-disk tier."""
+        if self.directory is None or not keys:
+            return {}
+        vectors = self._matrix()
+        if vectors is None:
+            return {}
+        found = {}
+        db = self._connect()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            query = f"SELECT key, row FROM rows WHERE ready = 1 AND key IN ({placeholders})"
+            for key, row in db.execute(query, chunk):
+                found[key] = vectors[row].astype(np.float32)
+        return found
+
+    def _write_disk(self, encoded):
+        """Append new vectors to the on-disk tier while rows remain."""
+        if self.directory is None or not encoded:
+            return
+        vectors = self._matrix(dim=len(next(iter(encoded.values()))))
+        db = self._connect()
+        assigned = []
+        with db:
+            for key in encoded:
+                db.execute(
+                    "INSERT OR IGNORE INTO rows (key, row) "
+                    "SELECT ?, COALESCE(MAX(row) + 1, 0) FROM rows",
+                    (key,),
+                    )
+                row, ready = db.execute("SELECT row, ready FROM rows WHERE key = ?", (key,)).fetchone()
+                if row >= self.capacity:
+                    db.execute("DELETE FROM rows WHERE key = ?", (key,))
+                    break
+                if not ready:
+                    assigned.append((key, row))
+        if not assigned:
+            return
+        for key, row in assigned:
+            vectors[row] = encoded[key]
+        vectors.flush()
+        with db:
+            db.executemany("UPDATE rows SET ready = 1 WHERE key = ?", [(key,) for key, _ in assigned])
@@ -0,0 +1,192 @@
+"""The module scores sentences against a whole call in linear time."""
+
+import tempfile
+
+import numpy as np
+
+BATCH_SIZE = 64
+EPSILON = 1e-12
+
+
+def normalize(embeddings):
+    """
+    Scale each embedding to unit length in place; all-zero rows stay zero.
+
+    Args:
+        embeddings (np.ndarray): float32 matrix of shape (n, d).
+
+    Returns:
+        np.ndarray: The same matrix, normalized.
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.maximum(norms, EPSILON, out=norms)
+    embeddings /= norms
+    return embeddings
+
+
+class SentimentScorer:
+    """
+    Computes each sentence's summed cosine similarity to every sentence of a call.
+
+    The score of sentence i is sum_j cos(e_i, e_j). With unit vectors n_i this
+    equals n_i . S, where S = sum_j n_j, so all scores follow from one pass to
+    build S and one matrix-vector product: O(N*d) time and no N x N matrix.
+
+    Args:
+        batch_size (int): Number of sentences encoded at a time by score_stream().
+
+    Methods:
+        score(embedding_batches): Scores embeddings that are already in memory.
+        score_stream(sentences, encode): Encodes and scores one batch at a time.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        """
+        Initialize the SentimentScorer.
+
+        Args:
+            batch_size (int): Number of sentences encoded at a time by score_stream().
+        """
+        self.batch_size = batch_size
+
+    def score(self, embedding_batches):
+        """
+        Score sentences whose embeddings are already in memory.
+
+        Args:
+            embedding_batches (Iterable[np.ndarray]): Embedding matrices in sentence order.
+
+        Returns:
+            List[float]: Score per sentence.
+        """
+        batches = [
+            normalize(np.array(batch, dtype=np.float32))
+            for batch in embedding_batches if len(batch)
+            ]
+        if not batches:
+            return []
+        total = np.zeros(batches[0].shape[1], dtype=np.float64)
+        for batch in batches:
+            total += batch.sum(axis=0, dtype=np.float64)
+        total = total.astype(np.float32)
+        return np.concatenate([batch @ total for batch in batches]).tolist()
+
+    def score_stream(self, sentences, encode):
+        """
+        Encode and score sentences while holding one batch of embeddings at a time.
+
+        The first pass encodes fixed-size batches, adds them to the running sum
+        and spills the normalized vectors to a temporary memory-mapped file; the
+        second pass reads the file back batch by batch to compute the scores.
+
+        Args:
+            sentences (Sequence[str]): Sentences to score.
+            encode (Callable[[List[str]], np.ndarray]): Encodes a batch of sentences.
+
+        Returns:
+            List[float]: Score per sentence.
+        """
+        count = len(sentences)
+        if not count:
+            return []
+        scores = np.zeros(count, dtype=np.float32)
+        with tempfile.TemporaryFile() as spill:
+            vectors = None
+            total = None
+            for start in range(0, count, self.batch_size):
+                batch = normalize(np.array(encode(list(sentences[start:start + self.batch_size])),
+                                           dtype=np.float32))
+                if vectors is None:
+                    vectors = np.memmap(spill, dtype=np.float32, mode="w+",
+                                        shape=(count, batch.shape[1]))
+                    total = np.zeros(batch.shape[1], dtype=np.float64)
+                vectors[start:start + len(batch)] = batch
+                total += batch.sum(axis=0, dtype=np.float64)
+            total = total.astype(np.float32)
+            for start in range(0, count, self.batch_size):
+                np.dot(vectors[start:start + self.batch_size], total,
+                       out=scores[start:start + self.batch_size])
+            del vectors
+        return scores.tolist()
+
+
+class RunningScore:
+    """
+    Keeps the score of a call up to date while its sentences arrive one by one.
+
+    The CQR is the sum of all sentence scores, sum_i n_i . S = S . S, so it
+    only depends on the running sum S: adding a sentence updates S and the
+    CQR in O(d), however long the call already is. Every earlier sentence's
+    score changes with each new sentence, so individual scores are computed
+    on demand instead of being kept up to date.
+
+    Attributes:
+        count (int): Number of sentences added.
+        total (np.ndarray): float64 running sum S of the unit embeddings.
+
+    Methods:
+        add(embedding): Adds a sentence and returns its current score.
+        cqr(): Returns the current Call Quality Rate.
+        score(index): Returns a sentence's current score.
+        scores(): Returns every sentence's current score.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty RunningScore.
+        """
+        self.count = 0
+        self.total = None
+        self._vectors = []
+
+    def add(self, embedding):
+        """
+        Add a sentence to the call.
+
+        Args:
+            embedding (np.ndarray): Embedding of the sentence, of shape (d,).
+
+        Returns:
+            float: Score of the new sentence against the call so far.
+        """
+        vector = normalize(np.array(embedding, dtype=np.float32).reshape(1, -1))[0]
+        if self.total is None:
+            self.total = np.zeros(vector.shape[0], dtype=np.float64)
+        self.total += vector
+        self._vectors.append(vector)
+        self.count += 1
+        return float(vector @ self.total)
+
+    def cqr(self):
+        """
+        Return the Call Quality Rate of the sentences added so far.
+
+        Returns:
+            float: Sum of every sentence's score, |S|^2.
+        """
+        if self.total is None:
+            return 0.0
+        return float(self.total @ self.total)
+
+    def score(self, index):
+        """
+        Return a sentence's score against every sentence added so far.
+
+        Args:
+            index (int): Position of the sentence.
+
+        Returns:
+            float: The score.
+        """
+        return float(self._vectors[index] @ self.total)
+
+    def scores(self):
+        """
+        Return every sentence's score, as SentimentScorer would for the same sentences.
+
+        Returns:
+            List[float]: Score per sentence.
+        """
+        if not self._vectors:
+            return []
+        return (np.stack(self._vectors) @ self.total.astype(np.float32)).tolist()
@@ -1,6 +1,11 @@
 """The module performs speaker's analyzes sentiment."""
 
-from sentence_transformers import SentenceTransformer, util
+import threading
+
+from domain.instrumentation.instrumentation import instruments
+from domain.sentiment_analysis.backends import BACKENDS, create_backend
+from domain.sentiment_analysis.batching import EncodingService
+from domain.sentiment_analysis.scoring import BATCH_SIZE, SentimentScorer
 
 class SentimentAnalyzer:
     """
@@ -8,35 +13,147 @@ class SentimentAnalyzer:
 
     Args:
         model_name (str): Name of the SentenceTransformer model.
+        batch_size (int): Number of sentences encoded at a time.
+        embedding_cache (EmbeddingCache): Cache of embeddings of repeated phrases.
+        backend (str): Inference backend: "torch", "onnx" or "onnx-int8".
+        threads (int): Number of CPU threads used by the backend.
+        batching (bool): Whether to share the model through the process-wide
+                         dynamic batching service.
 
     Attributes:
-        model (SentenceTransformer): SentenceTransformer model for sentiment analysis.
+        backend (TorchBackend | OnnxBackend): Backend encoding sentences with the model,
+                                              loaded on first use.
+        backend_name (str): Name of the backend, available without loading it.
+        scorer (SentimentScorer): Linear-time scorer of encoded sentences.
+        embedding_cache (EmbeddingCache): Cache consulted before the model, or None.
+        encoding_service (EncodingService): Shared batching service, or None.
 
     Methods:
         analyze_sentiment(sentences): Analyzes sentiment of given sentences.
+        encode(sentences): Encodes sentences into embeddings.
+        score(embedding_batches): Scores previously encoded sentences.
     """
 
-    def __init__(self, model_name):
+    def __init__(self, model_name, batch_size=BATCH_SIZE, embedding_cache=None,
+                 backend="torch", threads=None, batching=False):
         """
         Initialize the SentimentAnalyzer with the SentenceTransformer model.
 
         Args:
             model_name (str): Name of the SentenceTransformer model.
+            batch_size (int): Number of sentences encoded at a time.
+            embedding_cache (EmbeddingCache): Cache of embeddings of repeated phrases;
+                                              its model name should include the backend.
+            backend (str): Inference backend: "torch", "onnx" or "onnx-int8".
+            threads (int): Number of CPU threads used by the backend.
+            batching (bool): Whether to share the model through the process-wide
+                             dynamic batching service.
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
         self.model_name = model_name
-        self.model = SentenceTransformer(self.model_name)
+        self.backend_name = backend
+        self.threads = threads
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self.scorer = SentimentScorer(batch_size=batch_size)
+        self.embedding_cache = embedding_cache
+        self.encoding_service = None
+        if batching:
+            self.encoding_service = EncodingService.shared(
+                f"{model_name}:{backend}", self._encode_backend
+                )
+
+    @property
+    def backend(self):
+        """
+        The encoding backend, loaded on first use.
+
+        Returns:
+            TorchBackend | OnnxBackend: The backend.
+        """
+        with self._backend_lock:
+            if self._backend is None:
+                with instruments.timer("sentiment.model_load"):
+                    self._backend = create_backend(self.backend_name, self.model_name,
+                                                   threads=self.threads)
+            return self._backend
 
     def analyze_sentiment(self, sentences):
         """
         Analyze the sentiment of given sentences.
 
+        Sentences are encoded in fixed-size batches and scored without ever
+        holding more than one batch of embeddings in memory.
+
         Args:
             sentences (List[str]): List of sentences for sentiment analysis.
 
         Returns:
             List[float]: List of sentiment scores for each sentence.
         """
-        scores = self.model.encode(sentences, convert_to_tensor=True)
-        cos_scores = util.pytorch_cos_sim(scores, scores)
-        sentiment_scores = cos_scores.sum(dim=1).tolist()
-        return sentiment_scores
+        with instruments.timer("sentiment.analyze"):
+            return self.scorer.score_stream(sentences, self.encode)
+
+    def encode(self, sentences):
+        """
+        Encode sentences into embeddings.
+
+        With an embedding cache, only sentences not seen before are sent to
+        the model, together in one batch.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(sentences, self._encode_model)
+        return self._encode_model(sentences)
+
+    def _encode_model(self, sentences):
+        """
+        Encode sentences with the model, through the batching service if enabled.
+
+        The batching service encodes on its own thread, outside the caller's
+        call record, so the caller times its wait for the embeddings instead.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        instruments.count("sentiment.sentences", len(sentences))
+        if self.encoding_service is not None:
+            with instruments.timer("sentiment.encode_wait"):
+                return self.encoding_service.encode(sentences)
+        return self._encode_backend(sentences)
+
+    def _encode_backend(self, sentences):
+        """
+        Encode sentences with the configured backend.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            np.ndarray: float32 matrix with one embedding per sentence.
+        """
+        backend = self.backend
+        with instruments.timer("sentiment.encode"):
+            return backend.encode(sentences, self.scorer.batch_size)
+
+    def score(self, embedding_batches):
+        """
+        Score sentences from their embeddings, which may arrive in several batches.
+
+        Args:
+            embedding_batches (List[np.ndarray]): Embeddings in sentence order.
+
+        Returns:
+            List[float]: List of sentiment scores for each sentence.
+        """
+        with instruments.timer("sentiment.scoring"):
+            return self.scorer.score(embedding_batches)
@@ -0,0 +1,77 @@
+"""The module plans and splices the second pass of two-pass cascade transcription."""
+
+import collections
+
+TRIAGE_THRESHOLD = 0.8
+PADDING_SECONDS = 0.5
+
+Span = collections.namedtuple("Span", ["utterance", "first", "last", "start", "end"])
+
+
+def plan_spans(results, threshold=TRIAGE_THRESHOLD, padding_seconds=PADDING_SECONDS,
+               total_seconds=None):
+    """
+    Find the runs of low-confidence words that the large model should decode again.
+
+    Runs within one utterance whose padded windows overlap are merged, so
+    no audio is decoded twice for the same utterance.
+
+    Args:
+        results (List[dict]): Parsed first-pass results in time order.
+        threshold (float): Words below this confidence are decoded again.
+        padding_seconds (float): Context decoded on each side of a run.
+        total_seconds (float): Duration of the recording, to clip the windows.
+
+    Returns:
+        List[Span]: Spans with the utterance index, the first and last word
+                    index of the run and the audio window to decode.
+    """
+    spans = []
+    for index, result in enumerate(results):
+        words = result.get("result") or []
+        current = None
+        for position, word in enumerate(words):
+            if word.get("conf", 1.0) >= threshold:
+                continue
+            start = max(word["start"] - padding_seconds, 0.0)
+            end = word["end"] + padding_seconds
+            if total_seconds is not None:
+                end = min(end, total_seconds)
+            if current is not None and start <= current.end:
+                current = current._replace(last=position, end=end)
+            else:
+                if current is not None:
+                    spans.append(current)
+                current = Span(index, position, position, start, end)
+        if current is not None:
+            spans.append(current)
+    return spans
+
+
+def splice(result, spans, decoded):
+    """
+    Replace the low-confidence runs of one utterance with the large model's words.
+
+    A run is replaced by the second-pass words whose midpoint lies between
+    the confident words around it; words recognized in the padding belong to
+    those neighbours and are dropped.
+
+    Args:
+        result (dict): Parsed first-pass result of the utterance.
+        spans (List[Span]): Spans of the utterance, in word order.
+        decoded (List[List[dict]]): Second-pass words of each span, with
+                                    times in the original recording.
+
+    Returns:
+        dict: The result with the runs replaced and its text rebuilt.
+    """
+    words = list(result.get("result") or [])
+    for span, replacement in sorted(zip(spans, decoded), key=lambda item: -item[0].first):
+        lower = words[span.first - 1]["end"] if span.first > 0 else span.start
+        upper = words[span.last + 1]["start"] if span.last + 1 < len(words) else span.end
+        kept = [word for word in replacement
+                if lower <= (word["start"] + word["end"]) / 2 <= upper]
+        words[span.first:span.last + 1] = kept
+    spliced = dict(result, result=words)
+    spliced["text"] = " ".join(word["word"] for word in words)
+    return spliced
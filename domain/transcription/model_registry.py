@@ -0,0 +1,280 @@
+"""The module keeps a process-wide registry of extracted and loaded Vosk models."""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import zipfile
+
+from domain.instrumentation.instrumentation import instruments
+
+MODELS_DIR = "domain/transcription/models"
+COMPLETE_MARKER = ".complete"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def _resident_bytes():
+    """
+    Return the current resident set size of the process.
+
+    Returns:
+        int: Resident memory in bytes, or 0 if it cannot be determined.
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ModelStats:
+    """
+    Load statistics of a single registered model.
+
+    Attributes:
+        model_dir (str): Directory the model was loaded from.
+        extract_time (float): Seconds spent extracting the archive (0 if reused).
+        load_time (float): Seconds spent constructing the model.
+        resident_bytes (int): Growth of the resident set size caused by loading.
+        hits (int): Number of times the loaded model was served from the registry.
+    """
+
+    __slots__ = ("model_dir", "extract_time", "load_time", "resident_bytes", "hits")
+
+    def __init__(self, model_dir, extract_time, load_time, resident_bytes):
+        self.model_dir = model_dir
+        self.extract_time = extract_time
+        self.load_time = load_time
+        self.resident_bytes = resident_bytes
+        self.hits = 0
+
+    def as_dict(self):
+        """
+        Convert the statistics to a plain dictionary.
+
+        Returns:
+            dict: Statistics keyed by attribute name.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ModelRegistry:
+    """
+    Extracts Vosk model archives once and shares loaded models across the process.
+
+    Archives are extracted into a content-addressed directory named after the
+    SHA-256 of the zip file, so an archive is unpacked at most once per machine.
+    Loaded models are kept in a class-level table, so every Transcriber instance
+    and every Streamlit session in the process reuses the same model object.
+    Loaded models are looked up without locking; a model being extracted or
+    loaded only holds up callers waiting for that same model.
+
+    Args:
+        models_dir (str): Directory holding the extracted models.
+        loader (Callable[[str], object]): Factory building a model from a directory.
+
+    Methods:
+        get(model_path): Returns the loaded model for an archive or directory.
+        prepare(model_path): Extracts the archive if needed without loading it.
+        stats(model_path): Returns load statistics for a registered model.
+        clear(): Drops all loaded models from the registry.
+    """
+
+    _lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _load_locks = {}
+    _models = {}
+    _stats = {}
+    _digests = {}
+
+    def __init__(self, models_dir=MODELS_DIR, loader=None):
+        """
+        Initialize the ModelRegistry.
+
+        Args:
+            models_dir (str): Directory holding the extracted models.
+            loader (Callable[[str], object]): Factory building a model from a directory;
+                                              vosk.Model, imported on first load, if omitted.
+        """
+        self.models_dir = models_dir
+        self.loader = loader
+
+    def get(self, model_path):
+        """
+        Return the loaded model for the given archive or model directory.
+
+        Args:
+            model_path (str): Path to a model zip archive or an extracted model directory.
+
+        Returns:
+            vosk.Model: The shared model instance.
+        """
+        key = os.path.realpath(model_path)
+        model = self._models.get(key)
+        if model is not None:
+            self._count_hit(key)
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._count_hit(key)
+                return model
+
+            started = time.perf_counter()
+            model_dir = self.prepare(model_path)
+            extract_time = time.perf_counter() - started
+
+            loader = self.loader
+            if loader is None:
+                import vosk
+
+                loader = vosk.Model
+            rss_before = _resident_bytes()
+            started = time.perf_counter()
+            model = loader(model_dir)
+            load_time = time.perf_counter() - started
+            resident = max(_resident_bytes() - rss_before, 0)
+
+            self._models[key] = model
+            self._stats[key] = ModelStats(model_dir, extract_time, load_time, resident)
+            instruments.observe("transcription.model_load", extract_time + load_time)
+            return model
+
+    def _count_hit(self, key):
+        """
+        Count a lookup served by an already loaded model.
+
+        Args:
+            key (str): Resolved model path.
+
+        Returns:
+            None
+        """
+        with self._stats_lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.hits += 1
+
+    def stats(self, model_path):
+        """
+        Return load statistics for a registered model.
+
+        Args:
+            model_path (str): Path the model was registered with.
+
+        Returns:
+            ModelStats: Statistics, or None if the model has not been loaded.
+        """
+        return self._stats.get(os.path.realpath(model_path))
+
+    @classmethod
+    def clear(cls):
+        """
+        Drop all loaded models from the registry.
+
+        Returns:
+            None
+        """
+        with cls._lock, cls._stats_lock:
+            cls._models.clear()
+            cls._stats.clear()
+
+    def prepare(self, model_path):
+        """
+        Return the directory to load the model from, extracting the archive if needed.
+
+        Worker processes can load from the returned directory without hashing
+        or extracting the archive again.
+
+        Args:
+            model_path (str): Path to a model zip archive or an extracted model directory.
+
+        Returns:
+            str: Path to the model directory.
+        """
+        if os.path.isdir(model_path):
+            return model_path
+
+        target = os.path.join(self.models_dir, self._digest(model_path))
+        if not os.path.exists(os.path.join(target, COMPLETE_MARKER)):
+            self._extract(model_path, target)
+        return self._model_root(target)
+
+    def _digest(self, archive_path):
+        """
+        Compute the SHA-256 of an archive, memoized by path, size and mtime.
+
+        Args:
+            archive_path (str): Path to the zip archive.
+
+        Returns:
+            str: Hex digest of the archive contents.
+        """
+        info = os.stat(archive_path)
+        memo_key = (os.path.realpath(archive_path), info.st_size, info.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(archive_path, "rb") as archive:
+                for chunk in iter(lambda: archive.read(HASH_CHUNK_SIZE), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self._digests[memo_key] = digest
+        return digest
+
+    @staticmethod
+    def _extract(archive_path, target):
+        """
+        Extract an archive into the target directory atomically.
+
+        The archive is unpacked into a temporary sibling directory that is
+        renamed into place once complete, so an interrupted extraction never
+        leaves a directory that looks usable.
+
+        Args:
+            archive_path (str): Path to the zip archive.
+            target (str): Content-addressed destination directory.
+
+        Returns:
+            None
+        """
+        parent = os.path.dirname(target) or "."
+        os.makedirs(parent, exist_ok=True)
+        partial = f"{target}.partial-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(partial, ignore_errors=True)
+        with zipfile.ZipFile(archive_path, "r") as zip_ref:
+            zip_ref.extractall(partial)
+        open(os.path.join(partial, COMPLETE_MARKER), "w").close()
+        if os.path.exists(os.path.join(target, COMPLETE_MARKER)):
+            # Another copy of the same archive finished extracting first.
+            shutil.rmtree(partial, ignore_errors=True)
+            return
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(partial, target)
+
+    @staticmethod
+    def _model_root(target):
+        """
+        Return the model directory inside an extracted archive.
+
+        Archives usually wrap the model in a single top-level folder, e.g.
+        ``vosk-model-ru-0.42/``; in that case the folder itself is returned.
+
+        Args:
+            target (str): Extracted archive directory.
+
+        Returns:
+            str: Path to the model directory.
+        """
+        entries = [name for name in os.listdir(target) if name != COMPLETE_MARKER]
+        if len(entries) == 1 and os.path.isdir(os.path.join(target, entries[0])):
+            return os.path.join(target, entries[0])
+        return target
+
+
+registry = ModelRegistry()
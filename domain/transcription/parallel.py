@@ -0,0 +1,270 @@
+"""This module transcribes long recordings in parallel across worker processes."""
+
+import collections
+import json
+import multiprocessing
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from domain.transcription.model_registry import registry
+from domain.transcription.report import TranscriptionReport
+
+BLOCK_SECONDS = 0.01
+TARGET_SECONDS = 120.0
+SEARCH_SECONDS = 10.0
+OVERLAP_SECONDS = 1.0
+READ_FRAMES = 4000
+
+Segment = collections.namedtuple("Segment", ["start", "end", "owned_start", "owned_end"])
+
+_worker_model = None
+
+
+def block_energies(frames, block_samples):
+    """
+    Compute the mean energy of consecutive fixed-size blocks of audio.
+
+    Args:
+        frames (Iterable[np.ndarray]): int16 frames, as yielded by AudioDecoder.
+        block_samples (int): Samples per block; should divide the frame size.
+
+    Returns:
+        np.ndarray: float32 energy per block.
+    """
+    energies = []
+    for frame in frames:
+        usable = len(frame) - len(frame) % block_samples
+        if usable:
+            blocks = frame[:usable].astype(np.float32).reshape(-1, block_samples)
+            energies.append(np.einsum("ij,ij->i", blocks, blocks) / block_samples)
+    if not energies:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(energies).astype(np.float32)
+
+
+def plan_segments(energies, total_seconds, block_seconds=BLOCK_SECONDS,
+                  target_seconds=TARGET_SECONDS, search_seconds=SEARCH_SECONDS,
+                  overlap_seconds=OVERLAP_SECONDS):
+    """
+    Split a recording into overlapping segments cut at its quietest points.
+
+    Each cut is placed at the lowest-energy block within search_seconds of the
+    target segment length. Every segment owns the span between its cuts and
+    extends overlap_seconds past them on each side, so words crossing a cut
+    are recognized whole by at least one segment.
+
+    Args:
+        energies (np.ndarray): Energy per block, from block_energies().
+        total_seconds (float): Duration of the recording.
+        block_seconds (float): Duration of one energy block.
+        target_seconds (float): Preferred segment length.
+        search_seconds (float): How far from the target a cut may move.
+        overlap_seconds (float): Audio added past each cut.
+
+    Returns:
+        List[Segment]: Segments in time order.
+    """
+    cuts = [0.0]
+    while total_seconds - cuts[-1] > target_seconds + search_seconds:
+        low = int((cuts[-1] + target_seconds - search_seconds) / block_seconds)
+        high = min(int((cuts[-1] + target_seconds + search_seconds) / block_seconds), len(energies))
+        if high <= low:
+            cuts.append(cuts[-1] + target_seconds)
+            continue
+        quietest = low + int(np.argmin(energies[low:high]))
+        cuts.append((quietest + 0.5) * block_seconds)
+    cuts.append(total_seconds)
+    return [
+        Segment(max(start - overlap_seconds, 0.0), min(end + overlap_seconds, total_seconds), start, end)
+        for start, end in zip(cuts, cuts[1:])
+        ]
+
+
+def _init_worker(model_dir):
+    """
+    Load the model once in a worker process.
+
+    Args:
+        model_dir (str): Extracted model directory.
+
+    Returns:
+        None
+    """
+    global _worker_model
+    _worker_model = registry.get(model_dir)
+
+
+def _owned_utterance(result, segment):
+    """
+    Shift an utterance to absolute time and keep the words its segment owns.
+
+    A word belongs to the segment containing its midpoint, so a word seen by
+    two overlapping segments is kept exactly once.
+
+    Args:
+        result (dict): Parsed recognizer result with word timestamps.
+        segment (Segment): Segment the result was recognized in.
+
+    Returns:
+        dict: Utterance with absolute times, or None if no words remain.
+    """
+    words = []
+    for word in result.get("result", []):
+        start = word["start"] + segment.start
+        end = word["end"] + segment.start
+        if segment.owned_start <= (start + end) / 2 < segment.owned_end:
+            words.append(dict(word, start=start, end=end))
+    if not words:
+        return None
+    return {
+        "result": words,
+        "text": " ".join(word["word"] for word in words),
+        "start": words[0]["start"],
+        "end": words[-1]["end"],
+        }
+
+
+def recognize_segment(wav_path, segment):
+    """
+    Recognize one segment of a decoded WAV file in a worker process.
+
+    Args:
+        wav_path (str): Path to a 16 kHz mono 16-bit WAV file.
+        segment (Segment): Segment to recognize.
+
+    Returns:
+        List[dict]: Owned utterances with absolute timestamps.
+    """
+    import vosk
+
+    utterances = []
+    with wave.open(wav_path, "rb") as wav:
+        rate = wav.getframerate()
+        recognizer = vosk.KaldiRecognizer(_worker_model, rate)
+        recognizer.SetWords(True)
+        wav.setpos(int(segment.start * rate))
+        remaining = int(segment.end * rate) - int(segment.start * rate)
+        results = []
+        while remaining > 0:
+            data = wav.readframes(min(READ_FRAMES, remaining))
+            if not data:
+                break
+            remaining -= len(data) // 2
+            if recognizer.AcceptWaveform(data):
+                results.append(recognizer.Result())
+        results.append(recognizer.FinalResult())
+    for result in results:
+        utterance = _owned_utterance(json.loads(result), segment)
+        if utterance is not None:
+            utterances.append(utterance)
+    return utterances
+
+
+class ParallelTranscriber:
+    """
+    Transcribes a recording as overlapping segments in a pool of processes.
+
+    The pool is created on first use and reused across calls, and each worker
+    loads the model once. Workers use the "spawn" start method so the pool is
+    safe to create from threaded hosts such as Streamlit.
+
+    Args:
+        model_path (str): Path to the Vosk model directory or zip archive.
+        decoder (AudioDecoder): Decoder producing 16 kHz mono PCM.
+        workers (int): Number of worker processes.
+        model_registry (ModelRegistry): Registry that extracts the model archive.
+        target_seconds (float): Preferred segment length.
+        overlap_seconds (float): Audio added past each cut.
+
+    Attributes:
+        report (TranscriptionReport): Timing of the most recent run.
+
+    Methods:
+        transcribe(audio_path): Transcribes the given audio file.
+        close(): Shuts the worker pool down.
+    """
+
+    def __init__(self, model_path, decoder, workers, model_registry=None,
+                 target_seconds=TARGET_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+        """
+        Initialize the ParallelTranscriber.
+
+        Args:
+            model_path (str): Path to the Vosk model directory or zip archive.
+            decoder (AudioDecoder): Decoder producing 16 kHz mono PCM.
+            workers (int): Number of worker processes.
+            model_registry (ModelRegistry): Registry that extracts the model archive.
+            target_seconds (float): Preferred segment length.
+            overlap_seconds (float): Audio added past each cut.
+        """
+        self.model_path = model_path
+        self.decoder = decoder
+        self.workers = workers
+        self.model_registry = model_registry or registry
+        self.target_seconds = target_seconds
+        self.overlap_seconds = overlap_seconds
+        self.report = None
+        self._pool = None
+
+    def transcribe(self, audio_path):
+        """
+        Transcribe the given audio file in parallel.
+
+        Args:
+            audio_path (str | BinaryIO): Path to an audio file or an uploaded file object.
+
+        Yields:
+            str: JSON utterance with word timestamps and absolute "start"/"end",
+                 in time order.
+        """
+        started = time.perf_counter()
+        with self.decoder.decoded(audio_path) as wav_path:
+            rate = self.decoder.sample_rate
+            block_samples = int(rate * BLOCK_SECONDS)
+            energies = block_energies(self.decoder.frames(wav_path), block_samples)
+            with wave.open(wav_path, "rb") as wav:
+                total_seconds = wav.getnframes() / rate
+            segments = plan_segments(
+                energies, total_seconds,
+                target_seconds=self.target_seconds,
+                overlap_seconds=self.overlap_seconds,
+                )
+            pool = self._get_pool()
+            futures = [pool.submit(recognize_segment, wav_path, segment) for segment in segments]
+            for future in futures:
+                for utterance in future.result():
+                    yield json.dumps(utterance, ensure_ascii=False)
+        self.report = TranscriptionReport(
+            "parallel", total_seconds, time.perf_counter() - started, self.workers
+            )
+
+    def close(self):
+        """
+        Shut the worker pool down.
+
+        Returns:
+            None
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_pool(self):
+        """
+        Return the worker pool, starting it on first use.
+
+        Returns:
+            ProcessPoolExecutor: The worker pool.
+        """
+        if self._pool is None:
+            model_dir = self.model_registry.prepare(self.model_path)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_dir,),
+                )
+        return self._pool
@@ -0,0 +1,132 @@
+"""The module shares a bounded set of Vosk recognizers between concurrent callers."""
+
+import contextlib
+import threading
+import time
+
+RECOGNIZER_SLOTS = 2
+
+
+class RecognizerPool:
+    """
+    A fixed number of reusable recognizers over one shared model.
+
+    A caller borrows a recognizer for a whole recording and returns it
+    after the final result, which resets the recognizer, so it can serve
+    the next recording without being built again. When every recognizer is
+    in use, callers wait, so concurrent sessions never run more recognizers
+    than the node has cores for.
+
+    Args:
+        model (vosk.Model): Loaded model shared by the recognizers.
+        sample_rate (int): Sample rate of the audio.
+        slots (int): Number of recognizers.
+        factory (Callable): Builds a recognizer from a model and a sample rate;
+                            vosk.KaldiRecognizer if omitted.
+
+    Methods:
+        acquire(): Context manager borrowing a recognizer.
+        stats(): Returns the slots in use and the time spent waiting.
+        shared(model_path, model, sample_rate, slots): Returns the process-wide
+            pool of a model.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, model, sample_rate, slots=RECOGNIZER_SLOTS, factory=None):
+        """
+        Initialize the RecognizerPool. Recognizers are built on first use.
+
+        Args:
+            model (vosk.Model): Loaded model shared by the recognizers.
+            sample_rate (int): Sample rate of the audio.
+            slots (int): Number of recognizers.
+            factory (Callable): Builds a recognizer from a model and a sample rate.
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.slots = slots
+        self.factory = factory
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def shared(cls, model_path, model, sample_rate, slots=RECOGNIZER_SLOTS):
+        """
+        Return the process-wide pool of a model, creating it on first use.
+
+        Args:
+            model_path (str): Path the model was loaded from.
+            model (vosk.Model): The loaded model.
+            sample_rate (int): Sample rate of the audio.
+            slots (int): Number of recognizers of a newly created pool.
+
+        Returns:
+            RecognizerPool: The shared pool.
+        """
+        with cls._shared_lock:
+            key = (model_path, sample_rate)
+            pool = cls._shared.get(key)
+            if pool is None:
+                pool = cls(model, sample_rate, slots)
+                cls._shared[key] = pool
+            return pool
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """
+        Borrow a recognizer, waiting for a free slot if needed.
+
+        The recognizer has to be read up to its final result before the
+        block ends, so the next borrower starts from a clean state.
+
+        Yields:
+            vosk.KaldiRecognizer: A recognizer in word mode.
+        """
+        started = time.perf_counter()
+        with self._condition:
+            waited = self._in_use >= self.slots
+            while self._in_use >= self.slots:
+                self._condition.wait()
+            self._in_use += 1
+            if waited:
+                self._waits += 1
+                self._wait_seconds += time.perf_counter() - started
+            recognizer = self._idle.pop() if self._idle else None
+        try:
+            if recognizer is None:
+                factory = self.factory
+                if factory is None:
+                    import vosk
+
+                    factory = vosk.KaldiRecognizer
+                recognizer = factory(self.model, self.sample_rate)
+                recognizer.SetWords(True)
+                with self._condition:
+                    self._created += 1
+            yield recognizer
+        except BaseException:
+            recognizer = None  # its state is unknown, so it is not reused
+            raise
+        finally:
+            with self._condition:
+                if recognizer is not None:
+                    self._idle.append(recognizer)
+                self._in_use -= 1
+                self._condition.notify()
+
+    def stats(self):
+        """
+        Return pool metrics.
+
+        Returns:
+            dict: slots, in_use, created recognizers, waits and wait_seconds.
+        """
+        with self._condition:
+            return {"slots": self.slots, "in_use": self._in_use, "created": self._created,
+                    "waits": self._waits, "wait_seconds": self._wait_seconds}
@@ -0,0 +1,95 @@
+"""The module describes how fast a transcription ran relative to the audio length."""
+
+
+class TranscriptionReport:
+    """
+    Timing report of a single transcription run.
+
+    Attributes:
+        mode (str): Transcription mode, e.g. "serial" or "parallel".
+        audio_seconds (float): Duration of the transcribed audio.
+        wall_seconds (float): Wall-clock time spent recognizing it.
+        workers (int): Number of recognizer processes used.
+    """
+
+    __slots__ = ("mode", "audio_seconds", "wall_seconds", "workers")
+
+    def __init__(self, mode, audio_seconds=0.0, wall_seconds=0.0, workers=1):
+        self.mode = mode
+        self.audio_seconds = audio_seconds
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+
+    @property
+    def real_time_factor(self):
+        """Wall time per second of audio; below 1.0 is faster than real time."""
+        if not self.audio_seconds:
+            return 0.0
+        return self.wall_seconds / self.audio_seconds
+
+    def as_dict(self):
+        """
+        Convert the report to a plain dictionary.
+
+        Returns:
+            dict: Report fields including the real-time factor.
+        """
+        report = {name: getattr(self, name) for name in TranscriptionReport.__slots__}
+        report["real_time_factor"] = self.real_time_factor
+        return report
+
+
+class CascadeReport(TranscriptionReport):
+    """
+    Timing report of a two-pass cascade transcription.
+
+    wall_seconds covers both passes. The speedup is estimated against
+    running the large model on the whole recording at the real-time factor
+    it reached on the re-decoded spans.
+
+    Attributes:
+        triage_wall_seconds (float): Wall time of the small-model pass.
+        second_pass_audio_seconds (float): Audio decoded again by the large model.
+        second_pass_wall_seconds (float): Wall time of the large-model pass.
+        spans (int): Number of re-decoded spans.
+    """
+
+    __slots__ = ("triage_wall_seconds", "second_pass_audio_seconds", "second_pass_wall_seconds",
+                 "spans")
+
+    def __init__(self, audio_seconds=0.0, wall_seconds=0.0, triage_wall_seconds=0.0,
+                 second_pass_audio_seconds=0.0, second_pass_wall_seconds=0.0, spans=0):
+        super().__init__("cascade", audio_seconds, wall_seconds)
+        self.triage_wall_seconds = triage_wall_seconds
+        self.second_pass_audio_seconds = second_pass_audio_seconds
+        self.second_pass_wall_seconds = second_pass_wall_seconds
+        self.spans = spans
+
+    @property
+    def second_pass_fraction(self):
+        """Share of the audio decoded again by the large model."""
+        if not self.audio_seconds:
+            return 0.0
+        return self.second_pass_audio_seconds / self.audio_seconds
+
+    @property
+    def estimated_speedup(self):
+        """Estimated large-model-only wall time over the cascade's, or None without a second pass."""
+        if not self.second_pass_audio_seconds or not self.wall_seconds:
+            return None
+        large_only = self.second_pass_wall_seconds / self.second_pass_audio_seconds * self.audio_seconds
+        return large_only / self.wall_seconds
+
+    def as_dict(self):
+        """
+        Convert the report to a plain dictionary.
+
+        Returns:
+            dict: Report fields of both passes, the second-pass fraction and
+                  the estimated speedup.
+        """
+        report = super().as_dict()
+        report.update({name: getattr(self, name) for name in CascadeReport.__slots__})
+        report["second_pass_fraction"] = self.second_pass_fraction
+        report["estimated_speedup"] = self.estimated_speedup
+        return report
@@ -1,6 +1,19 @@
 """This module transcribes audio files into text format."""
 
-import vosk
+import contextlib
+import json
+import threading
+import time
+
+from domain.audio.decoding import AudioDecoder
+from domain.audio.vad import VadReport
+from domain.instrumentation.instrumentation import instruments
+from domain.transcription.cascade import TRIAGE_THRESHOLD, plan_spans, splice
+from domain.transcription.model_registry import registry
+from domain.transcription.parallel import ParallelTranscriber
+from domain.transcription.recognizer_pool import RecognizerPool
+from domain.transcription.report import CascadeReport, TranscriptionReport
+from domain.transcription.words import LiveEvent, TokenTable, parse_result
 
 class Transcriber:
     """
@@ -8,54 +21,400 @@ class Transcriber:
 
     Args:
         model_path (str): Path to the Vosk model directory.
+        workers (int): Number of recognizer processes; values above 1 enable
+                       parallel chunked transcription.
+        vad (VoiceActivityDetector): Detector restricting serial recognition
+                                     to speech regions; None recognizes everything.
+        recognizer_slots (int): Size of the process-wide recognizer pool shared
+                                by all transcribers of the model; None builds
+                                an unpooled recognizer per transcription.
+        triage_model_path (str): Small Vosk model for a first pass; only spans
+                                 with low word confidence are then decoded by
+                                 the model at model_path. None decodes
+                                 everything with the model at model_path.
+        triage_threshold (float): Word confidence below which the first
+                                  pass is decoded again.
 
     Attributes:
-        model (vosk.Model): Vosk model for speech recognition.
+        model (vosk.Model): Vosk model for speech recognition, shared process-wide.
+        report (TranscriptionReport): Timing of the most recent transcription
+                                      in the calling thread, so sessions
+                                      sharing a transcriber see their own.
+        vad_report (VadReport): Audio skipped by the detector in the most
+                                recent transcription in the calling thread,
+                                if a detector is set.
 
     Methods:
         transcribe(audio_path): Transcribes the given audio file.
+        transcribe_words(audio_path): Yields utterances with word arrays.
+        stream(frames): Yields partial and final results of live audio.
+        model_stats(): Returns load statistics of the shared model.
+        close(): Shuts down the parallel worker pool, if any.
     """
 
-    def __init__(self, model_path):
+    def __init__(self, model_path, model_registry=None, decoder=None, workers=1, vad=None,
+                 recognizer_slots=None, triage_model_path=None, triage_threshold=TRIAGE_THRESHOLD):
         """
         Initialize the Transcriber with the Vosk model.
 
         Args:
-            model_path (str): Path to the Vosk model directory.
+            model_path (str): Path to the Vosk model directory or zip archive.
+            model_registry (ModelRegistry): Registry serving the shared model.
+            decoder (AudioDecoder): Decoder producing 16 kHz mono PCM frames.
+            workers (int): Number of recognizer processes; values above 1 enable
+                           parallel chunked transcription.
+            vad (VoiceActivityDetector): Detector restricting serial recognition
+                                         to speech regions; None recognizes everything.
+            recognizer_slots (int): Size of the process-wide recognizer pool shared
+                                    by all transcribers of the model; None builds
+                                    an unpooled recognizer per transcription.
+            triage_model_path (str): Small Vosk model for a first pass; only spans
+                                     with low word confidence are then decoded
+                                     by the model at model_path.
+            triage_threshold (float): Word confidence below which the first
+                                      pass is decoded again.
         """
         self.model_path = model_path
+        self.model_registry = model_registry or registry
+        self.decoder = decoder or AudioDecoder()
+        self.workers = workers
+        self.vad = vad
+        self.recognizer_slots = recognizer_slots
+        self.triage_model_path = triage_model_path
+        self.triage_threshold = triage_threshold
+        self._local = threading.local()
+        self._parallel = None
+        if workers > 1:
+            self._parallel = ParallelTranscriber(
+                model_path, self.decoder, workers, model_registry=self.model_registry
+                )
+
+    @property
+    def report(self):
+        """Timing of the most recent transcription in the calling thread."""
+        return getattr(self._local, "report", None)
+
+    @report.setter
+    def report(self, report):
+        self._local.report = report
+
+    @property
+    def vad_report(self):
+        """Audio skipped by the detector in the most recent transcription in the calling thread."""
+        return getattr(self._local, "vad_report", None)
+
+    @vad_report.setter
+    def vad_report(self, report):
+        self._local.vad_report = report
 
-    def _extract_model(self):
+    @property
+    def model(self):
         """
-        Extracts the model from a zipfile.
+        The Vosk model, extracted and loaded once per process on first access.
 
-        Parameters:
-            self (object): The instance of the class.
+        Returns:
+            vosk.Model: The shared model instance.
+        """
+        return self.model_registry.get(self.model_path)
+
+    def model_stats(self):
+        """
+        Return load statistics of the shared model.
 
         Returns:
-            None
+            ModelStats: Extraction time, load time, resident size and hit count,
+                        or None if the model has not been loaded yet.
         """
-        with zipfile.ZipFile(self.model_path, "r") as zip_ref:
-            zip_ref.extractall("domain/transcription/models")
+        return self.model_registry.stats(self.model_path)
 
     def transcribe(self, audio_path):
         """
         Transcribe the given audio file.
 
+        With a voice activity detector, only the speech regions are fed to
+        the recognizer and word times are mapped back to the original
+        timeline. With a triage model, the recording is decoded in two
+        passes, see _transcribe_cascade().
+
         Args:
-            audio_path (str): Path to the audio file for transcription.
+            audio_path (str | BinaryIO): Path to a WAV, MP3 or raw PCM file,
+                                         or an uploaded file object.
 
         Yields:
-            str: Transcription result for each audio chunk.
-        """
-        self._extract_model()
-        self.model = vosk.Model("domain/transcription/models/vosk-model-ru-0.42")
-        recognizer = vosk.KaldiRecognizer(self.model, 16000)
-        with open(audio_path, "rb") as audio_file:
-            while True:
-                data = audio_file.read(4000)
-                if len(data) == 0:
-                    break
-                if recognizer.AcceptWaveform(data):
+            str: Recognizer result JSON with word timings for each utterance,
+                 ending with the final result at end of file.
+        """
+        if self._parallel is not None:
+            yield from self._parallel.transcribe(audio_path)
+            self.report = self._parallel.report
+            instruments.observe("transcription.parallel", self.report.wall_seconds,
+                                self.report.audio_seconds)
+            return
+
+        if self.triage_model_path is not None:
+            yield from self._transcribe_cascade(audio_path)
+            return
+
+        if self.vad is None:
+            report = TranscriptionReport("serial")
+            yield from self._recognize(self.decoder.frames(audio_path), report)
+            self.report = report
+            return
+
+        with self.decoder.decoded(audio_path) as wav_path:
+            regions, detect_seconds = self.vad.detect_file(self.decoder, wav_path)
+            report = TranscriptionReport("serial+vad")
+            yield from self._recognize(
+                regions.speech_frames(self.decoder.frames(wav_path)), report, regions
+                )
+        report.audio_seconds = regions.audio_seconds
+        self.report = report
+        self.vad_report = VadReport(
+            regions.audio_seconds, regions.speech_seconds, detect_seconds, report.wall_seconds
+            )
+
+    def _transcribe_cascade(self, audio_path):
+        """
+        Decode with the small triage model, then again with the large model where it is unsure.
+
+        Runs of words below triage_threshold are decoded again by the large
+        model, with some audio around them for context, and its words are
+        spliced in place of the run. Results are yielded once both passes
+        are done, because any of them may still change.
+
+        Args:
+            audio_path (str | BinaryIO): Path to a WAV, MP3 or raw PCM file,
+                                         or an uploaded file object.
+
+        Yields:
+            str: Recognizer result JSON for each utterance of the first pass.
+        """
+        with self.decoder.decoded(audio_path) as wav_path:
+            regions = None
+            frames = self.decoder.frames(wav_path)
+            if self.vad is not None:
+                regions, detect_seconds = self.vad.detect_file(self.decoder, wav_path)
+                frames = regions.speech_frames(frames)
+            triage = TranscriptionReport("triage")
+            results = [json.loads(result) for result in
+                       self._recognize(frames, triage, regions, self.triage_model_path,
+                                       stage="transcription.triage")]
+            audio = self.decoder.mapped(wav_path)
+            spans = plan_spans(results, self.triage_threshold, total_seconds=audio.duration)
+            report = CascadeReport(audio.duration, triage_wall_seconds=triage.wall_seconds,
+                                   spans=len(spans))
+            started = time.perf_counter()
+            decoded = []
+            if spans:
+                with self._recognizer() as recognizer:
+                    decoded = [_decode_span(audio, recognizer, span, self.decoder.frame_samples)
+                               for span in spans]
+            report.second_pass_wall_seconds = time.perf_counter() - started
+        report.second_pass_audio_seconds = sum(span.end - span.start for span in spans)
+        report.wall_seconds = report.triage_wall_seconds + report.second_pass_wall_seconds
+        instruments.observe("transcription.second_pass", report.second_pass_wall_seconds,
+                            report.second_pass_audio_seconds)
+        self.report = report
+        if regions is not None:
+            self.vad_report = VadReport(
+                regions.audio_seconds, regions.speech_seconds, detect_seconds, report.wall_seconds
+                )
+        for index, result in enumerate(results):
+            own = [position for position, span in enumerate(spans) if span.utterance == index]
+            if own:
+                result = splice(result, [spans[position] for position in own],
+                                [decoded[position] for position in own])
+            yield json.dumps(result, ensure_ascii=False)
+
+    def _recognize(self, frames, report, regions=None, model_path=None,
+                   stage="transcription.recognize"):
+        """
+        Feed frames to a recognizer in word mode and yield its results.
+
+        Args:
+            frames (Iterable[np.ndarray]): int16 audio to recognize.
+            report (TranscriptionReport): Receives the audio length and wall time.
+            regions (SpeechRegions): Regions the frames were taken from, to map
+                                     word times back to the original timeline.
+            model_path (str): Model to recognize with; model_path of the
+                              transcriber if omitted.
+            stage (str): Instrumentation stage of the recognition loop.
+
+        Yields:
+            str: Recognizer result JSON, ending with the final result.
+        """
+        with self._recognizer(model_path) as recognizer:
+            samples = 0
+            started = time.perf_counter()
+            for frame in frames:
+                samples += len(frame)
+                if recognizer.AcceptWaveform(frame.tobytes()):
                     result = recognizer.Result()
-                    yield result
+                    report.wall_seconds += time.perf_counter() - started
+                    yield _to_original(result, regions)
+                    started = time.perf_counter()
+            result = recognizer.FinalResult()
+        report.wall_seconds += time.perf_counter() - started
+        report.audio_seconds = samples / self.decoder.sample_rate
+        instruments.observe(stage, report.wall_seconds, report.audio_seconds)
+        yield _to_original(result, regions)
+
+    @contextlib.contextmanager
+    def _recognizer(self, model_path=None):
+        """
+        Provide a recognizer in word mode, borrowed from the shared pool if enabled.
+
+        Args:
+            model_path (str): Model to recognize with; model_path of the
+                              transcriber if omitted.
+
+        Yields:
+            vosk.KaldiRecognizer: The recognizer.
+        """
+        model_path = model_path or self.model_path
+        model = self.model_registry.get(model_path)
+        if self.recognizer_slots is None:
+            import vosk
+
+            recognizer = vosk.KaldiRecognizer(model, self.decoder.sample_rate)
+            recognizer.SetWords(True)
+            yield recognizer
+            return
+        pool = RecognizerPool.shared(model_path, model, self.decoder.sample_rate,
+                                     self.recognizer_slots)
+        with pool.acquire() as recognizer:
+            yield recognizer
+
+    def transcribe_words(self, audio_path, tokens=None):
+        """
+        Transcribe the given audio file into utterances with word arrays.
+
+        Each recognizer result is parsed once; results without any
+        recognized words are skipped.
+
+        Args:
+            audio_path (str | BinaryIO): Path to a WAV, MP3 or raw PCM file,
+                                         or an uploaded file object.
+            tokens (TokenTable): Table receiving the words; a new table per
+                                 call if omitted.
+
+        Yields:
+            RecognizedUtterance: Utterance with word times, confidences and token ids.
+        """
+        tokens = tokens if tokens is not None else TokenTable()
+        for result in self.transcribe(audio_path):
+            utterance = parse_result(result, tokens)
+            if utterance is not None:
+                instruments.count("transcription.utterances")
+                yield utterance
+
+    def stream(self, frames, tokens=None):
+        """
+        Recognize live audio, yielding hypotheses while the frames arrive.
+
+        Frames are fed to one recognizer as they come, so a final result is
+        yielded as soon as the recognizer closes an utterance, not at the end
+        of the call. Between final results, the partial hypothesis is yielded
+        whenever it changes. The detector and the parallel workers are not
+        used: both need the whole recording in advance.
+
+        Args:
+            frames (Iterable[np.ndarray]): int16 audio at the decoder's sample
+                                           rate, e.g. from a live source.
+            tokens (TokenTable): Table receiving the words; a new table per
+                                 call if omitted.
+
+        Yields:
+            LiveEvent: Partial hypotheses and final utterances, with word
+                       times counted from the first frame.
+        """
+        tokens = tokens if tokens is not None else TokenTable()
+        report = TranscriptionReport("live")
+        with self._recognizer() as recognizer:
+            samples = 0
+            partial = ""
+            received = time.perf_counter()
+            for frame in frames:
+                received = time.perf_counter()
+                samples += len(frame)
+                if recognizer.AcceptWaveform(frame.tobytes()):
+                    utterance = parse_result(recognizer.Result(), tokens)
+                    report.wall_seconds += time.perf_counter() - received
+                    partial = ""
+                    if utterance is not None:
+                        yield LiveEvent("final", utterance.text, utterance, received)
+                    continue
+                text = json.loads(recognizer.PartialResult()).get("partial", "")
+                report.wall_seconds += time.perf_counter() - received
+                if text != partial:
+                    partial = text
+                    yield LiveEvent("partial", text, None, received)
+            utterance = parse_result(recognizer.FinalResult(), tokens)
+        report.audio_seconds = samples / self.decoder.sample_rate
+        self.report = report
+        instruments.observe("transcription.live", report.wall_seconds, report.audio_seconds)
+        if utterance is not None:
+            yield LiveEvent("final", utterance.text, utterance, received)
+
+    def close(self):
+        """
+        Shut down the parallel worker pool, if any.
+
+        Returns:
+            None
+        """
+        if self._parallel is not None:
+            self._parallel.close()
+
+
+def _decode_span(audio, recognizer, span, frame_samples):
+    """
+    Decode one span of a recording, leaving the recognizer reset for the next span.
+
+    Args:
+        audio (DecodedAudio): Memory-mapped decoded recording.
+        recognizer (vosk.KaldiRecognizer): Recognizer in word mode.
+        span (Span): Window to decode.
+        frame_samples (int): Samples fed at a time.
+
+    Returns:
+        List[dict]: Recognized words with times in the original recording.
+    """
+    samples = audio.span(span.start, span.end)
+    results = []
+    for start in range(0, len(samples), frame_samples):
+        if recognizer.AcceptWaveform(samples[start:start + frame_samples].tobytes()):
+            results.append(recognizer.Result())
+    results.append(recognizer.FinalResult())
+    words = []
+    for result in results:
+        for word in json.loads(result).get("result", []):
+            word["start"] = round(word["start"] + span.start, 3)
+            word["end"] = round(word["end"] + span.start, 3)
+            words.append(word)
+    return words
+
+
+def _to_original(result, regions):
+    """
+    Map the word times of a result recognized on speech regions to the original timeline.
+
+    Args:
+        result (str): Recognizer result JSON.
+        regions (SpeechRegions): Regions the audio was taken from; None leaves
+                                 the result unchanged.
+
+    Returns:
+        str: Result JSON with original word times.
+    """
+    if regions is None:
+        return result
+    parsed = json.loads(result)
+    words = parsed.get("result")
+    if not words:
+        return result
+    starts = regions.to_original([word["start"] for word in words], side="right")
+    ends = regions.to_original([word["end"] for word in words], side="left")
+    for word, start, end in zip(words, starts, ends):
+        word["start"], word["end"] = round(float(start), 3), round(float(end), 3)
+    return json.dumps(parsed, ensure_ascii=False)
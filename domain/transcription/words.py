@@ -0,0 +1,287 @@
+"""The module parses recognizer results into word-level NumPy arrays."""
+
+import json
+import threading
+
+import numpy as np
+
+
+class TokenTable:
+    """
+    Assigns a stable integer id to each distinct word.
+
+    Methods:
+        ids(words): Returns the id of each word, adding new words.
+        words(ids): Returns the word of each id.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty TokenTable.
+        """
+        self.tokens = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def ids(self, words):
+        """
+        Return the id of each word, adding words seen for the first time.
+
+        Args:
+            words (Iterable[str]): Words to look up.
+
+        Returns:
+            np.ndarray: int32 id per word.
+        """
+        with self._lock:
+            ids = []
+            for word in words:
+                token = self._ids.get(word)
+                if token is None:
+                    token = self._ids[word] = len(self.tokens)
+                    self.tokens.append(word)
+                ids.append(token)
+        return np.array(ids, dtype=np.int32)
+
+    def words(self, ids):
+        """
+        Return the word of each id.
+
+        Args:
+            ids (Iterable[int]): Token ids.
+
+        Returns:
+            List[str]: Words.
+        """
+        return [self.tokens[token] for token in ids]
+
+
+class RecognizedUtterance:
+    """
+    One recognizer result with its words as parallel arrays.
+
+    Attributes:
+        text (str): Recognized text.
+        starts (np.ndarray): float32 word start times in seconds.
+        ends (np.ndarray): float32 word end times in seconds.
+        confidences (np.ndarray): float32 word confidences.
+        token_ids (np.ndarray): int32 ids of the words in tokens.
+        tokens (TokenTable): Table resolving token ids to words.
+    """
+
+    __slots__ = ("text", "starts", "ends", "confidences", "token_ids", "tokens")
+
+    def __init__(self, text, starts, ends, confidences, token_ids, tokens):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        self.token_ids = token_ids
+        self.tokens = tokens
+
+    @property
+    def start(self):
+        """Start of the first word, or NaN without word timing."""
+        return float(self.starts[0]) if len(self.starts) else float("nan")
+
+    @property
+    def end(self):
+        """End of the last word, or NaN without word timing."""
+        return float(self.ends[-1]) if len(self.ends) else float("nan")
+
+    @property
+    def confidence(self):
+        """Mean word confidence, or NaN without words."""
+        return float(self.confidences.mean()) if len(self.confidences) else float("nan")
+
+    def as_item(self):
+        """
+        Return the utterance as a transcript item without per-word objects.
+
+        Returns:
+            dict: text, start, end and mean confidence.
+        """
+        return {"text": self.text, "start": self.start, "end": self.end,
+                "confidence": self.confidence}
+
+
+class LiveEvent:
+    """
+    A recognizer hypothesis produced while audio is still arriving.
+
+    Attributes:
+        kind (str): "partial" for a hypothesis that may still change, "final"
+                    for a closed utterance.
+        text (str): Recognized text.
+        utterance (RecognizedUtterance): Words of a final result; None for partials.
+        received (float): time.perf_counter() when the frame that produced the
+                          event arrived, to measure lag.
+    """
+
+    __slots__ = ("kind", "text", "utterance", "received")
+
+    def __init__(self, kind, text, utterance, received):
+        self.kind = kind
+        self.text = text
+        self.utterance = utterance
+        self.received = received
+
+
+def parse_result(result, tokens, offset=0.0):
+    """
+    Parse one recognizer result into a RecognizedUtterance.
+
+    Args:
+        result (str | dict): Result() or FinalResult() JSON, or its parsed form.
+        tokens (TokenTable): Table receiving the words.
+        offset (float): Seconds added to every word time.
+
+    Returns:
+        RecognizedUtterance: The utterance, or None if nothing was recognized.
+    """
+    if isinstance(result, str):
+        result = json.loads(result)
+    text = result.get("text", "")
+    words = result.get("result", [])
+    if not text and not words:
+        return None
+    count = len(words)
+    starts = np.fromiter((word["start"] for word in words), dtype=np.float32, count=count)
+    ends = np.fromiter((word["end"] for word in words), dtype=np.float32, count=count)
+    confidences = np.fromiter((word.get("conf", 1.0) for word in words), dtype=np.float32, count=count)
+    if offset:
+        starts += offset
+        ends += offset
+    token_ids = tokens.ids(word["word"] for word in words)
+    return RecognizedUtterance(text or " ".join(word["word"] for word in words),
+                               starts, ends, confidences, token_ids, tokens)
+
+
+class WordTimeline:
+    """
+    All words of a call as parallel arrays, for vectorized filtering and aggregation.
+
+    Args:
+        starts (np.ndarray): float32 word start times.
+        ends (np.ndarray): float32 word end times.
+        confidences (np.ndarray): float32 word confidences.
+        token_ids (np.ndarray): int32 token ids.
+        utterance_ids (np.ndarray): int32 index of each word's utterance.
+        tokens (TokenTable): Table resolving token ids to words.
+
+    Methods:
+        from_utterances(utterances): Concatenates recognized utterances.
+        between(start, end): Returns the words starting in a time range.
+        select(mask): Returns the words where mask is true.
+        words(): Returns the words as strings.
+        utterance_confidence(count): Returns the mean confidence per utterance.
+    """
+
+    __slots__ = ("starts", "ends", "confidences", "token_ids", "utterance_ids", "tokens")
+
+    def __init__(self, starts, ends, confidences, token_ids, utterance_ids, tokens):
+        """
+        Initialize the WordTimeline.
+
+        Args:
+            starts (np.ndarray): float32 word start times.
+            ends (np.ndarray): float32 word end times.
+            confidences (np.ndarray): float32 word confidences.
+            token_ids (np.ndarray): int32 token ids.
+            utterance_ids (np.ndarray): int32 index of each word's utterance.
+            tokens (TokenTable): Table resolving token ids to words.
+        """
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        self.token_ids = token_ids
+        self.utterance_ids = utterance_ids
+        self.tokens = tokens
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_utterances(cls, utterances, tokens=None):
+        """
+        Concatenate recognized utterances into one timeline.
+
+        Args:
+            utterances (Sequence[RecognizedUtterance]): Utterances in time order.
+            tokens (TokenTable): Table shared by the utterances; taken from the
+                                 first utterance if omitted.
+
+        Returns:
+            WordTimeline: The words of all utterances.
+        """
+        if tokens is None:
+            tokens = utterances[0].tokens if utterances else TokenTable()
+        if not utterances:
+            empty = np.zeros(0, dtype=np.float32)
+            return cls(empty, empty, empty, np.zeros(0, dtype=np.int32),
+                       np.zeros(0, dtype=np.int32), tokens)
+        lengths = [len(utterance.starts) for utterance in utterances]
+        return cls(
+            np.concatenate([utterance.starts for utterance in utterances]),
+            np.concatenate([utterance.ends for utterance in utterances]),
+            np.concatenate([utterance.confidences for utterance in utterances]),
+            np.concatenate([utterance.token_ids for utterance in utterances]),
+            np.repeat(np.arange(len(utterances), dtype=np.int32), lengths),
+            tokens,
+            )
+
+    def select(self, mask):
+        """
+        Return the words where mask is true, or at the given indices.
+
+        Args:
+            mask (np.ndarray | slice): Boolean mask, index array or slice.
+
+        Returns:
+            WordTimeline: The selected words.
+        """
+        return WordTimeline(self.starts[mask], self.ends[mask], self.confidences[mask],
+                            self.token_ids[mask], self.utterance_ids[mask], self.tokens)
+
+    def between(self, start, end):
+        """
+        Return the words starting in [start, end) as a view.
+
+        Args:
+            start (float): Range start in seconds.
+            end (float): Range end in seconds.
+
+        Returns:
+            WordTimeline: The words in the range.
+        """
+        first, last = np.searchsorted(self.starts, [start, end], side="left")
+        return self.select(slice(int(first), int(last)))
+
+    def words(self):
+        """
+        Return the words as strings.
+
+        Returns:
+            List[str]: One word per entry.
+        """
+        return self.tokens.words(self.token_ids)
+
+    def utterance_confidence(self, count=None):
+        """
+        Return the mean word confidence of each utterance.
+
+        Args:
+            count (int): Number of utterances; inferred from the ids if omitted.
+
+        Returns:
+            np.ndarray: float32 mean confidence per utterance; NaN without words.
+        """
+        if count is None:
+            count = int(self.utterance_ids.max()) + 1 if len(self) else 0
+        totals = np.bincount(self.utterance_ids, weights=self.confidences, minlength=count)
+        counts = np.bincount(self.utterance_ids, minlength=count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (totals / counts).astype(np.float32)
@@ -0,0 +1,79 @@
+"""Distributed Call Quality Rate (CQR) analysis through a shared job queue.
+
+Usage:
+    python jobs.py submit data/raw
+    python jobs.py work --concurrency 4
+    python jobs.py status
+"""
+
+import argparse
+
+from domain.batch.batch import MODEL_PATH, SENTIMENT_MODEL, build_pipeline, find_audio
+from domain.jobs.analysis import run_node, submit_calls
+from domain.jobs.job_queue import JOBS_PATH, LEASE_SECONDS, STATES, open_store
+
+
+def print_status(store):
+    """
+    Print job counts per state and throughput per worker.
+
+    Args:
+        store (SQLiteJobStore): Store to report on.
+
+    Returns:
+        None
+    """
+    status = store.status()
+    print("  ".join(f"{state}={status[state]}" for state in STATES))
+    for worker in status["workers"]:
+        print(f"{worker['node']:<20} {worker['worker']:<40} done={worker['done']:<6} "
+              f"{worker['calls_per_hour']:.1f} calls/hour  "
+              f"{worker['audio_hours_per_wall_hour']:.2f} audio-hours per wall-hour")
+
+
+def main():
+    """
+    Submit recordings, run workers on this node or show the queue status.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", default=JOBS_PATH, help="job store location")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="queue recordings for analysis")
+    submit.add_argument("sources", nargs="+", help="audio files or directories to scan")
+    submit.add_argument("--output-dir", default="data/processed")
+
+    work = commands.add_parser("work", help="run analysis workers on this node")
+    work.add_argument("--concurrency", type=int, default=2,
+                      help="worker processes and most jobs running on this node")
+    work.add_argument("--node", default=None, help="node name; the host name by default")
+    work.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    work.add_argument("--idle-exit", action="store_true", help="exit once the queue is empty")
+    work.add_argument("--model-path", default=MODEL_PATH)
+    work.add_argument("--sentiment-model", default=SENTIMENT_MODEL)
+    work.add_argument("--no-vad", action="store_true", help="recognize silence as well")
+    work.add_argument("--triage-model-path", default=None,
+                      help="small Vosk model decoding first; the large model only "
+                           "decodes spans it is unsure of")
+
+    commands.add_parser("status", help="show job counts and worker throughput")
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        added = submit_calls(open_store(args.store), find_audio(args.sources), args.output_dir)
+        print(f"queued {added} new jobs")
+    elif args.command == "work":
+        run_node(args.store, args.concurrency, node=args.node, lease_seconds=args.lease_seconds,
+                 factory=build_pipeline,
+                 factory_args=(args.model_path, args.sentiment_model, not args.no_vad,
+                               args.triage_model_path),
+                 idle_exit=args.idle_exit)
+    else:
+        print_status(open_store(args.store))
+
+
+if __name__ == "__main__":
+    main()
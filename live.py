@@ -0,0 +1,85 @@
+"""Live Call Quality Rate (CQR) scoring of a call in progress.
+
+Usage:
+    arecord -f S16_LE -r 16000 -c 1 -t raw | python live.py
+    python live.py --listen 9000
+    python live.py --replay data/raw/call.wav
+"""
+
+import argparse
+import sys
+
+from domain.audio.decoding import AudioDecoder
+from domain.audio.sources import accept_pcm, read_pcm, replay_file
+from domain.batch.batch import MODEL_PATH, SENTIMENT_MODEL
+from domain.pipeline.live import LiveCallScorer
+from domain.sentiment_analysis.embedding_cache import EmbeddingCache
+from domain.sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+from domain.transcription.transcription import Transcriber
+
+
+def print_updates(scorer, frames):
+    """
+    Score frames and print partial hypotheses in place and final utterances on their own line.
+
+    Args:
+        scorer (LiveCallScorer): Scorer of the call.
+        frames (Iterable[np.ndarray]): Live audio.
+
+    Returns:
+        None
+    """
+    for update in scorer.run(frames):
+        if update.kind == "partial":
+            print(f"\r\033[K... {update.text}", end="", flush=True)
+            continue
+        print(f"\r\033[K[{update.start:7.2f}-{update.end:7.2f}] {update.text}  "
+              f"score={update.score:.4f}  cqr={update.cqr:.4f}  lag={update.lag_seconds:.3f}s",
+              flush=True)
+    lags = scorer.lag_percentiles()
+    print(f"utterances={len(scorer.utterances)}  cqr={scorer.running.cqr():.4f}")
+    if lags:
+        print("lag: " + "  ".join(f"p{percentile}={seconds:.3f}s"
+                                  for percentile, seconds in lags.items()))
+
+
+def main():
+    """
+    Score a live call from standard input, a TCP connection or a replayed file.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--listen", type=int, metavar="PORT",
+                        help="accept one TCP connection sending 16 kHz mono s16le PCM")
+    source.add_argument("--replay", metavar="PATH", help="replay a recording in real time")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed; 0 replays as fast as possible")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--sentiment-model", default=SENTIMENT_MODEL)
+    args = parser.parse_args()
+
+    decoder = AudioDecoder()
+    transcriber = Transcriber(model_path=args.model_path, decoder=decoder)
+    sentiment_analyzer = SentimentAnalyzer(
+        model_name=args.sentiment_model, embedding_cache=EmbeddingCache(args.sentiment_model)
+        )
+    # Load the models before the call starts, so the first utterance is not delayed.
+    transcriber.model
+    sentiment_analyzer.backend
+    scorer = LiveCallScorer(transcriber, sentiment_analyzer)
+
+    if args.replay:
+        print_updates(scorer, replay_file(decoder, args.replay, speed=args.speed))
+    elif args.listen:
+        print(f"waiting for PCM on port {args.listen}", file=sys.stderr)
+        with accept_pcm(args.listen) as stream:
+            print_updates(scorer, read_pcm(stream, decoder.sample_rate))
+    else:
+        print_updates(scorer, read_pcm(sys.stdin.buffer, decoder.sample_rate))
+
+
+if __name__ == "__main__":
+    main()
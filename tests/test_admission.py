@@ -0,0 +1,236 @@
+"""Module for testing admission control and the shared recognizer pool."""
+
+import threading
+import time
+import unittest
+from domain.pipeline.admission import AdmissionController, AdmissionRejected
+from domain.transcription.recognizer_pool import RecognizerPool
+
+
+class CountingRecognizer:
+    """
+    A recognizer stand-in counting how many instances exist.
+
+    Methods:
+        SetWords(self, words): Record the word mode.
+    """
+
+    created = 0
+
+    def __init__(self, model, sample_rate):
+        CountingRecognizer.created += 1
+        self.words = False
+
+    def SetWords(self, words):
+        """Record the word mode."""
+        self.words = words
+
+
+class TestAdmissionController(unittest.TestCase):
+    """
+    A test case class for testing bounded admission with a waiting queue.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_slots_bound_concurrency(self): Test that at most slots callers run.
+        test_waiters_see_position(self): Test queue positions and wait estimates.
+        test_full_queue_rejects(self): Test backpressure once the queue is full.
+        test_estimate_follows_durations(self): Test the moving duration average.
+    """
+
+    def test_slots_bound_concurrency(self):
+        """
+        Test that eight callers on two slots never run more than two at once.
+
+        Returns:
+            None
+        """
+        controller = AdmissionController(slots=2, max_queue=10)
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def analyze():
+            with controller.admit(poll_seconds=0.01):
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.02)
+                with lock:
+                    running[0] -= 1
+
+        threads = [threading.Thread(target=analyze) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(controller.stats()["running"], 0)
+
+    def test_waiters_see_position(self):
+        """
+        Test that waiting callers are told their place and expected wait.
+
+        Returns:
+            None
+        """
+        controller = AdmissionController(slots=1, max_queue=5, service_seconds=30.0)
+        release = threading.Event()
+        seen = {}
+
+        def hold():
+            with controller.admit():
+                release.wait()
+
+        def wait(name):
+            with controller.admit(on_wait=lambda position, estimate: seen.setdefault(
+                    name, (position, estimate)), poll_seconds=0.01):
+                pass
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        while controller.stats()["running"] == 0:
+            time.sleep(0.001)
+        first = threading.Thread(target=wait, args=("first",))
+        first.start()
+        while "first" not in seen:
+            time.sleep(0.001)
+        second = threading.Thread(target=wait, args=("second",))
+        second.start()
+        while "second" not in seen:
+            time.sleep(0.001)
+        release.set()
+        for thread in (holder, first, second):
+            thread.join()
+
+        self.assertEqual(seen["first"], (1, 30.0))
+        self.assertEqual(seen["second"], (2, 60.0))
+
+    def test_full_queue_rejects(self):
+        """
+        Test that a caller is rejected at once when max_queue callers wait.
+
+        Returns:
+            None
+        """
+        controller = AdmissionController(slots=1, max_queue=1)
+        release = threading.Event()
+
+        def hold():
+            with controller.admit(poll_seconds=0.01):
+                release.wait()
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        while controller.stats()["waiting"] < 1:
+            time.sleep(0.001)
+
+        with self.assertRaises(AdmissionRejected):
+            with controller.admit():
+                pass
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    def test_estimate_follows_durations(self):
+        """
+        Test that the duration estimate moves toward observed durations.
+
+        Returns:
+            None
+        """
+        controller = AdmissionController(slots=1, service_seconds=10.0)
+        with controller.admit():
+            pass
+
+        self.assertLess(controller.service_seconds, 10.0)
+        self.assertEqual(controller.wait_estimate(0), 0.0)
+
+
+class TestRecognizerPool(unittest.TestCase):
+    """
+    A test case class for testing the bounded recognizer pool.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_recognizers_reused(self): Test that recognizers are built once per slot.
+        test_failed_recognizer_dropped(self): Test that a recognizer left in
+                                              an unknown state is not reused.
+        test_callers_wait_for_slot(self): Test that borrowers beyond the slots wait.
+    """
+
+    def setUp(self):
+        """
+        Reset the recognizer count.
+
+        Returns:
+            None
+        """
+        CountingRecognizer.created = 0
+
+    def test_recognizers_reused(self):
+        """
+        Test that sequential borrowers share one recognizer in word mode.
+
+        Returns:
+            None
+        """
+        pool = RecognizerPool(object(), 16000, slots=2, factory=CountingRecognizer)
+        for _ in range(5):
+            with pool.acquire() as recognizer:
+                self.assertTrue(recognizer.words)
+
+        self.assertEqual(CountingRecognizer.created, 1)
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+    def test_failed_recognizer_dropped(self):
+        """
+        Test that a recognizer is rebuilt after a borrower failed.
+
+        Returns:
+            None
+        """
+        pool = RecognizerPool(object(), 16000, slots=1, factory=CountingRecognizer)
+        with self.assertRaises(ValueError):
+            with pool.acquire():
+                raise ValueError("broken audio")
+        with pool.acquire():
+            pass
+
+        self.assertEqual(CountingRecognizer.created, 2)
+
+    def test_callers_wait_for_slot(self):
+        """
+        Test that a borrower waits while every recognizer is in use.
+
+        Returns:
+            None
+        """
+        pool = RecognizerPool(object(), 16000, slots=1, factory=CountingRecognizer)
+        borrowed = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with pool.acquire():
+                borrowed.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        borrowed.wait()
+        threading.Timer(0.05, release.set).start()
+        with pool.acquire():
+            pass
+        holder.join()
+
+        self.assertEqual(pool.stats()["waits"], 1)
+        self.assertGreater(pool.stats()["wait_seconds"], 0.02)
+        self.assertEqual(CountingRecognizer.created, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
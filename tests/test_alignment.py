@@ -0,0 +1,158 @@
+"""Module for testing the alignment of transcripts to speaker segments."""
+
+import copy
+import unittest
+import numpy as np
+from domain.alignment.alignment import SpeakerIndex, align
+
+def overlap_totals(segments, start, end):
+    """
+    Return the overlap of an interval with each speaker by scanning every segment.
+
+    Args:
+        segments (List[dict]): Diarization segments.
+        start (float): Interval start.
+        end (float): Interval end.
+
+    Returns:
+        dict: Seconds of overlap per speaker that overlaps the interval.
+    """
+    totals = {}
+    for segment in segments:
+        overlap = min(end, segment["end"]) - max(start, segment["start"])
+        if overlap > 0:
+            totals[segment["speaker"]] = totals.get(segment["speaker"], 0.0) + overlap
+    return totals
+
+class TestSpeakerIndex(unittest.TestCase):
+    """
+    A test case class for testing the SpeakerIndex class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Build a small diarization with overlapping speech.
+        test_most_overlap(self): Test that the speaker with most overlap wins.
+        test_words_and_gaps(self): Test word spans, points and gaps.
+        test_inputs_unchanged(self): Test that inputs are not mutated.
+        test_matches_brute_force(self): Test random calls against a full scan.
+        test_long_segment_candidates(self): Test that a long segment adds
+                                            only the pairs it intersects.
+    """
+
+    def setUp(self):
+        """
+        Build a small diarization in which the speakers overlap from 4 to 5 s.
+
+        Returns:
+            None
+        """
+        self.segments = [
+            {"start": 3.0, "end": 6.0, "speaker": "SPEAKER_01"},
+            {"start": 0.0, "end": 5.0, "speaker": "SPEAKER_00"},
+            {"start": 8.0, "end": 9.0, "speaker": "SPEAKER_00"},
+            ]
+
+    def test_most_overlap(self):
+        """
+        Test that each utterance gets the speaker with the most overlap.
+
+        Returns:
+            None
+        """
+        transcript = [
+            {"text": "a", "start": 0.5, "end": 3.5},
+            {"text": "b", "start": 4.2, "end": 5.8},
+            {"text": "c", "start": 8.2, "end": 8.8},
+            ]
+        self.assertEqual(align(transcript, self.segments), ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00"])
+
+    def test_words_and_gaps(self):
+        """
+        Test that word lists give an utterance its span, that points inside a
+        segment are matched and that gaps take the nearest speaker when asked.
+
+        Returns:
+            None
+        """
+        index = SpeakerIndex(self.segments)
+        utterance = {"text": "x y", "result": [{"word": "x", "start": 5.5, "end": 5.7},
+                                                {"word": "y", "start": 5.8, "end": 5.9}]}
+        point = {"start": 8.5, "end": 8.5}
+        gap = {"start": 7.5, "end": 7.7}
+        untimed = {"text": "z"}
+
+        self.assertEqual(index.label([utterance, point]), ["SPEAKER_01", "SPEAKER_00"])
+        self.assertEqual(index.label([gap, untimed], nearest=False), [None, None])
+        self.assertEqual(index.label([gap, untimed]), ["SPEAKER_00", None])
+        self.assertEqual(index.label([{"start": 6.2, "end": 6.4}]), ["SPEAKER_01"])
+        self.assertEqual(SpeakerIndex([]).label([gap]), [None])
+
+    def test_inputs_unchanged(self):
+        """
+        Test that the transcript and segments are left unchanged.
+
+        Returns:
+            None
+        """
+        transcript = [{"text": "a", "start": 0.5, "end": 3.5}]
+        segments_before = copy.deepcopy(self.segments)
+        transcript_before = copy.deepcopy(transcript)
+        align(transcript, self.segments)
+        self.assertEqual(self.segments, segments_before)
+        self.assertEqual(transcript, transcript_before)
+
+    def test_matches_brute_force(self):
+        """
+        Test random calls with overlapping speech against a full scan.
+
+        Returns:
+            None
+        """
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            starts = np.sort(rng.uniform(0, 300, 200))
+            segments = [
+                {"start": float(start), "end": float(start + length), "speaker": f"S{speaker}"}
+                for start, length, speaker in zip(starts, rng.exponential(2.0, 200),
+                                                  rng.integers(0, 4, 200))
+                ]
+            rng.shuffle(segments)
+            queries = np.sort(rng.uniform(0, 300, 100))
+            lengths = rng.exponential(3.0, 100)
+            items = [{"start": float(start), "end": float(start + length)}
+                     for start, length in zip(queries, lengths)]
+            labels = SpeakerIndex(segments).label(items, nearest=False)
+            for item, label in zip(items, labels):
+                totals = overlap_totals(segments, item["start"], item["end"])
+                if not totals:
+                    self.assertIsNone(label)
+                else:
+                    self.assertAlmostEqual(totals[label], max(totals.values()))
+
+    def test_long_segment_candidates(self):
+        """
+        Test that a long early segment only adds pairs for the intervals it
+        covers: every candidate pair intersects and none is missed.
+
+        Returns:
+            None
+        """
+        starts = np.arange(2000) * 1.0
+        segments = [{"start": float(start), "end": float(start) + 0.9, "speaker": f"S{index % 2}"}
+                    for index, start in enumerate(starts)]
+        segments.append({"start": 1.0, "end": 300.0, "speaker": "MUSIC"})
+        index = SpeakerIndex(segments)
+        query_starts, query_ends = starts + 0.1, starts + 0.8
+
+        queries, positions = index.candidates(query_starts, query_ends)
+
+        intersecting = ((index.starts[None, :] < query_ends[:, None])
+                        & (index.ends[None, :] > query_starts[:, None]))
+        self.assertEqual(len(queries), int(intersecting.sum()))
+        self.assertEqual(len(queries), 2000 + 299)
+        self.assertTrue(intersecting[queries, positions].all())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+"""Module for testing the functionality of the AudioDecoder class."""
+
+import io
+import os
+import tempfile
+import unittest
+import wave
+import numpy as np
+from domain.audio.decoding import AudioDecoder
+
+def make_wav(samples, sample_rate, channels=1):
+    """
+    Build an in-memory 16-bit WAV file.
+
+    Args:
+        samples (np.ndarray): int16 samples, shaped (n,) or (n, channels).
+        sample_rate (int): Sample rate of the file.
+        channels (int): Number of channels.
+
+    Returns:
+        io.BytesIO: The WAV file, named like an upload.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    buffer.seek(0)
+    buffer.name = "upload.wav"
+    return buffer
+
+class TestAudioDecoder(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the AudioDecoder class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_passthrough(self): Test that 16 kHz mono WAV is framed unchanged.
+        test_resample_telephony(self): Test that 8 kHz stereo audio is downmixed
+                                       and resampled to 16 kHz.
+        test_frames_reuse_buffer(self): Test that frames share one buffer.
+        test_decoded_removes_temp_file(self): Test that the decoded() context
+                                              manager cleans up after itself.
+        test_decoded_file_mapped(self): Test that frames of a decoded file
+                                        are read-only views of one mapping.
+        test_ffmpeg_early_close(self): Test that stopping early does not raise
+                                       ffmpeg's broken-pipe exit status.
+        test_ffmpeg_failure(self): Test that a failed decode read to the end raises.
+    """
+
+    def setUp(self):
+        """
+        Initializes the decoder under test.
+
+        Returns:
+            None
+        """
+        self.decoder = AudioDecoder(frame_samples=4000)
+
+    def test_passthrough(self):
+        """
+        Test that 16 kHz mono WAV is split into full frames plus a short tail
+        without altering the samples.
+
+        Returns:
+            None
+        """
+        samples = (np.sin(np.arange(10000) * 0.05) * 8000).astype(np.int16)
+        frames = [frame.copy() for frame in self.decoder.frames(make_wav(samples, 16000))]
+
+        self.assertEqual([len(frame) for frame in frames], [4000, 4000, 2000])
+        np.testing.assert_array_equal(np.concatenate(frames), samples)
+
+    def test_resample_telephony(self):
+        """
+        Test that 8 kHz stereo audio is downmixed and resampled to 16 kHz.
+
+        Returns:
+            None
+        """
+        t = np.arange(8000) / 8000
+        tone = np.sin(2 * np.pi * 200 * t) * 8000
+        stereo = np.stack([tone, tone], axis=1)
+        decoded = np.concatenate(
+            [frame.copy() for frame in self.decoder.frames(make_wav(stereo, 8000, channels=2))]
+            )
+
+        self.assertAlmostEqual(len(decoded), 16000, delta=2)
+        expected = np.sin(2 * np.pi * 200 * np.arange(len(decoded)) / 16000) * 8000
+        self.assertLess(np.abs(decoded - expected).max(), 100)
+
+    def test_frames_reuse_buffer(self):
+        """
+        Test that every full frame is a view of the same preallocated buffer.
+
+        Returns:
+            None
+        """
+        samples = np.zeros(12000, dtype=np.int16)
+        frames = list(self.decoder.frames(make_wav(samples, 16000)))
+
+        self.assertTrue(all(np.shares_memory(frames[0], frame) for frame in frames))
+
+    def test_decoded_removes_temp_file(self):
+        """
+        Test that decoded() writes a 16 kHz mono WAV and removes it on exit.
+
+        Returns:
+            None
+        """
+        samples = np.zeros(8000, dtype=np.int16)
+        with self.decoder.decoded(make_wav(samples, 8000)) as path:
+            self.assertTrue(self.decoder.is_decoded(path))
+            with wave.open(path, "rb") as wav:
+                self.assertEqual(wav.getframerate(), 16000)
+                self.assertEqual(wav.getnchannels(), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_decoded_file_mapped(self):
+        """
+        Test that a decoded file is memory-mapped: its frames and spans are
+        read-only views of the mapped samples, and other layouts are not mapped.
+
+        Returns:
+            None
+        """
+        samples = (np.arange(10000) % 2000 - 1000).astype(np.int16)
+        self.assertIsNone(self.decoder.mapped(make_wav(samples, 16000)))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "call.wav")
+            with open(path, "wb") as target:
+                target.write(make_wav(samples, 16000).getvalue())
+            telephony_path = os.path.join(directory, "telephony.wav")
+            with open(telephony_path, "wb") as target:
+                target.write(make_wav(samples, 8000).getvalue())
+            self.assertIsNone(self.decoder.mapped(telephony_path))
+            audio = self.decoder.mapped(path)
+            frames = list(self.decoder.frames(path))
+
+            self.assertEqual(len(audio), 10000)
+            self.assertAlmostEqual(audio.duration, 0.625)
+            self.assertEqual([len(frame) for frame in frames], [4000, 4000, 2000])
+            self.assertFalse(np.shares_memory(frames[0], frames[1]))
+            self.assertFalse(frames[0].flags.writeable)
+            np.testing.assert_array_equal(np.concatenate(frames), samples)
+            np.testing.assert_array_equal(audio.span(0.25, 0.5), samples[4000:8000])
+            del audio, frames
+
+    @unittest.skipIf(os.name != "posix", "the stand-in ffmpeg is a shell script")
+    def test_ffmpeg_early_close(self):
+        """
+        Test that closing the frames of an endless ffmpeg stream after the
+        first frame neither raises nor waits for ffmpeg to finish.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            decoder = fake_ffmpeg_decoder(
+                directory, "cat /dev/zero; echo 'Broken pipe' >&2; exit 1")
+            frames = decoder.frames(make_source(directory))
+            self.assertEqual(len(next(frames)), 4000)
+            frames.close()
+
+    @unittest.skipIf(os.name != "posix", "the stand-in ffmpeg is a shell script")
+    def test_ffmpeg_failure(self):
+        """
+        Test that a non-zero ffmpeg exit after its output was read raises
+        with ffmpeg's error message.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            decoder = fake_ffmpeg_decoder(directory, "echo 'invalid data' >&2; exit 1")
+            with self.assertRaisesRegex(RuntimeError, "invalid data"):
+                list(decoder.frames(make_source(directory)))
+
+
+def fake_ffmpeg_decoder(directory, script):
+    """
+    Build a decoder whose ffmpeg is a shell script.
+
+    Args:
+        directory (str): Directory receiving the script.
+        script (str): Shell commands run in place of ffmpeg.
+
+    Returns:
+        AudioDecoder: Decoder using the script.
+    """
+    path = os.path.join(directory, "ffmpeg")
+    with open(path, "w") as target:
+        target.write(f"#!/bin/sh\n{script}\n")
+    os.chmod(path, 0o755)
+    return AudioDecoder(frame_samples=4000, ffmpeg=path)
+
+
+def make_source(directory):
+    """
+    Write a file that is not WAV, so it is handed to ffmpeg.
+
+    Args:
+        directory (str): Directory receiving the file.
+
+    Returns:
+        str: Path to the file.
+    """
+    path = os.path.join(directory, "call.mp3")
+    with open(path, "wb") as target:
+        target.write(b"ID3" + bytes(64))
+    return path
+
+if __name__ == "__main__":
+    unittest.main()
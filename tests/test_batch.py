@@ -0,0 +1,192 @@
+"""Module for testing headless batch analysis with a resumable manifest."""
+
+import json
+import os
+import tempfile
+import unittest
+import wave
+import numpy as np
+from domain.audio.decoding import AudioDecoder
+from domain.batch.batch import BatchManifest, BatchRunner, find_audio
+from domain.pipeline.pipeline import PipelineResult
+from domain.results.call_result import CallResult
+
+
+class FakePipeline:
+    """
+    A pipeline stand-in returning one utterance per second of audio.
+
+    Methods:
+        run(self, audio_path, audio_hash): Return a fixed-shape result.
+    """
+
+    def __init__(self, fail_name):
+        self.decoder = AudioDecoder()
+        self.fail_name = fail_name
+
+    def run(self, audio_path, audio_hash=None):
+        """
+        Return one utterance per second, all by one speaker.
+
+        Args:
+            audio_path (str): Path to the decoded audio file.
+            audio_hash (str): Digest of the audio bytes.
+
+        Returns:
+            PipelineResult: The result.
+        """
+        with wave.open(audio_path, "rb") as wav:
+            seconds = wav.getnframes() // wav.getframerate()
+        if seconds == 3 and self.fail_name:
+            raise RuntimeError(self.fail_name)
+        transcript = [{"text": f"utterance {i}", "start": float(i), "end": i + 0.9}
+                      for i in range(seconds)]
+        diarization = [{"start": 0.0, "end": float(seconds), "speaker": "SPEAKER_00"}]
+        return PipelineResult(transcript, diarization, [0.5] * seconds, {})
+
+
+def fake_pipeline(fail_name=None):
+    """Build a FakePipeline in a worker process."""
+    return FakePipeline(fail_name)
+
+
+class TestBatch(unittest.TestCase):
+    """
+    A test case class for testing batch runs and resuming them.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Write recordings of 1, 2 and 3 seconds.
+        test_find_audio(self): Test that directories are scanned for audio.
+        test_run_writes_results(self): Test results, manifest and throughput.
+        test_resume_skips_done(self): Test that a second run redoes only
+                                      failed and changed recordings.
+        test_truncated_manifest(self): Test that a cut-off last line is ignored.
+        test_missing_recording(self): Test that a missing file fails alone.
+        tearDown(self): Remove the recordings.
+    """
+
+    def setUp(self):
+        """
+        Write three recordings of 1, 2 and 3 seconds and a non-audio file.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.raw = os.path.join(self.directory.name, "raw")
+        self.output = os.path.join(self.directory.name, "processed")
+        os.makedirs(os.path.join(self.raw, "nested"))
+        self.paths = []
+        for seconds, name in ((1, "a.wav"), (2, "nested/b.wav"), (3, "c.wav")):
+            path = os.path.join(self.raw, name)
+            with wave.open(path, "wb") as output:
+                output.setnchannels(1)
+                output.setsampwidth(2)
+                output.setframerate(16000)
+                output.writeframes(np.full(16000 * seconds, seconds, dtype="<i2").tobytes())
+            self.paths.append(path)
+        with open(os.path.join(self.raw, "notes.txt"), "w") as stream:
+            stream.write("not audio")
+
+    def test_find_audio(self):
+        """
+        Test that directories are scanned recursively for audio files only.
+
+        Returns:
+            None
+        """
+        self.assertEqual(find_audio([self.raw]), sorted(self.paths))
+
+    def test_run_writes_results(self):
+        """
+        Test that every recording gets a result file and a manifest entry.
+
+        Returns:
+            None
+        """
+        runner = BatchRunner(self.output, workers=2, factory=fake_pipeline)
+        report = runner.run(find_audio([self.raw]))
+
+        self.assertEqual((report.calls, report.failed, report.skipped), (3, 0, 0))
+        self.assertAlmostEqual(report.audio_seconds, 6.0)
+        self.assertGreater(report.calls_per_hour, 0)
+        self.assertGreater(report.audio_hours_per_wall_hour, 0)
+        entry = runner.manifest.done[os.path.abspath(self.paths[1])]
+        call = CallResult.load(entry["output"])
+        self.assertEqual(len(call), 2)
+        self.assertEqual(call[0].speaker, "SPEAKER_00")
+        self.assertAlmostEqual(call.metadata["cqr"], 1.0)
+
+    def test_resume_skips_done(self):
+        """
+        Test that a second run skips done recordings and retries failures and changes.
+
+        Returns:
+            None
+        """
+        BatchRunner(self.output, workers=1, factory=fake_pipeline,
+                    factory_args=("broken",)).run(self.paths)
+        stats = os.stat(self.paths[0])
+        os.utime(self.paths[0], ns=(stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))
+
+        finished = []
+        report = BatchRunner(self.output, workers=1, factory=fake_pipeline).run(
+            self.paths, progress=finished.append
+            )
+
+        self.assertEqual((report.calls, report.failed, report.skipped), (2, 0, 1))
+        self.assertEqual(sorted(entry["source"] for entry in finished),
+                         sorted([os.path.abspath(self.paths[0]), os.path.abspath(self.paths[2])]))
+
+    def test_truncated_manifest(self):
+        """
+        Test that a line cut short by an interrupted run is ignored.
+
+        Returns:
+            None
+        """
+        path = os.path.join(self.output, "manifest.jsonl")
+        manifest = BatchManifest(path)
+        manifest.record(os.path.abspath(self.paths[0]), "done", {"output": "a.cqr"})
+        with open(path, "a", encoding="utf-8") as stream:
+            stream.write(json.dumps({"source": "x", "status": "done"})[:12])
+
+        reloaded = BatchManifest(path)
+        self.assertTrue(reloaded.is_done(os.path.abspath(self.paths[0])))
+        self.assertFalse(reloaded.is_done(os.path.abspath(self.paths[1])))
+
+    def test_missing_recording(self):
+        """
+        Test that a recording missing when it is analyzed is recorded as failed
+        while the others are analyzed, and is retried by the next run.
+
+        Returns:
+            None
+        """
+        missing = os.path.join(self.raw, "removed.wav")
+        runner = BatchRunner(self.output, workers=1, factory=fake_pipeline)
+        report = runner.run([missing] + self.paths)
+
+        self.assertEqual((report.calls, report.failed, report.skipped), (3, 1, 0))
+        self.assertFalse(runner.manifest.is_done(missing))
+        with open(runner.manifest.path, encoding="utf-8") as stream:
+            entries = [json.loads(line) for line in stream]
+        failed = [entry for entry in entries if entry["status"] == "failed"]
+        self.assertEqual([(entry["source"], entry["fingerprint"]) for entry in failed],
+                         [(missing, None)])
+
+    def tearDown(self):
+        """
+        Remove the recordings.
+
+        Returns:
+            None
+        """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
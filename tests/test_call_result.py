@@ -0,0 +1,100 @@
+"""Module for testing the functionality of the CallResult class."""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from domain.results.call_result import CallResult
+
+class TestCallResult(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the CallResult class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Build a result of four utterances.
+        test_rows(self): Test the row views and export rows.
+        test_views_share_columns(self): Test time-range and speaker views.
+        test_save_and_load(self): Test the memory-mapped file format.
+    """
+
+    def setUp(self):
+        """
+        Build a result of four utterances by two speakers.
+
+        Returns:
+            None
+        """
+        transcript = [
+            {"text": "Здравствуйте", "start": 0.0, "end": 1.5},
+            {"text": "Hello", "start": 1.6, "end": 2.0},
+            {"text": "Чем могу помочь?", "start": 2.5, "end": 4.0},
+            {"text": "untimed", "result": [{"word": "untimed", "start": 5.0, "end": 5.5}]},
+            ]
+        speakers = ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00", None]
+        self.result = CallResult.from_transcript(
+            transcript, speakers, [0.5, 0.25, 0.75, 0.0], metadata={"call_id": "abc"}
+            )
+
+    def test_rows(self):
+        """
+        Test that rows read back the texts, speakers, times and scores.
+
+        Returns:
+            None
+        """
+        self.assertEqual(len(self.result), 4)
+        row = self.result[2]
+        self.assertEqual(row.text, "Чем могу помочь?")
+        self.assertEqual(row.speaker, "SPEAKER_00")
+        self.assertAlmostEqual(row.start, 2.5)
+        self.assertFalse(hasattr(row, "__dict__"))
+        self.assertEqual(self.result[3].speaker, None)
+        self.assertAlmostEqual(self.result[3].end, 5.5)
+        self.assertEqual(self.result.to_rows()[1], ["Hello", "SPEAKER_01", 0.25])
+        self.assertEqual(self.result.starts.dtype, np.float32)
+        self.assertEqual(self.result.speaker_ids.dtype, np.int16)
+
+    def test_views_share_columns(self):
+        """
+        Test that time ranges are views and speaker selections share columns.
+
+        Returns:
+            None
+        """
+        window = self.result.between(1.0, 4.5)
+        self.assertEqual([row.text for row in window], ["Hello", "Чем могу помочь?"])
+        self.assertTrue(np.shares_memory(window.starts, self.result.columns["starts"]))
+
+        agent = self.result.for_speaker("SPEAKER_00")
+        self.assertIs(agent.columns, self.result.columns)
+        self.assertEqual([row.text for row in agent], ["Здравствуйте", "Чем могу помочь?"])
+        self.assertEqual([row.text for row in agent.between(2.0, 10.0)], ["Чем могу помочь?"])
+        self.assertEqual(len(self.result.for_speaker("nobody")), 0)
+        self.assertEqual([row.text for row in self.result[::-2]], ["untimed", "Hello"])
+
+    def test_save_and_load(self):
+        """
+        Test that a saved result and a saved view load back memory-mapped.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "call.cqr")
+            self.result.save(path)
+            loaded = CallResult.load(path)
+            self.assertIsInstance(loaded.columns["starts"], np.memmap)
+            self.assertEqual(loaded.to_rows(), self.result.to_rows())
+            self.assertEqual(loaded.metadata, {"call_id": "abc"})
+
+            view_path = os.path.join(directory, "agent.cqr")
+            loaded.for_speaker("SPEAKER_00").save(view_path)
+            agent = CallResult.load(view_path, mmap=False)
+            self.assertEqual([row.text for row in agent], ["Здравствуйте", "Чем могу помочь?"])
+            del loaded
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+"""Module for testing two-pass cascade transcription."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+import wave
+from unittest import mock
+import numpy as np
+from domain.transcription.cascade import Span, plan_spans, splice
+from domain.transcription.transcription import Transcriber
+
+RATE = 16000
+
+
+def words_result(words):
+    """Build a recognizer result from (word, start, end, conf) tuples."""
+    return {"text": " ".join(word for word, *_ in words),
+            "result": [{"word": word, "start": start, "end": end, "conf": conf}
+                       for word, start, end, conf in words]}
+
+
+class SmallRecognizer:
+    """
+    A triage recognizer stand-in with one word per second, unsure of the third.
+
+    Methods:
+        SetWords(self, words): Ignored.
+        AcceptWaveform(self, data): Count the samples.
+        FinalResult(self): Return word i at [i, i + 0.8] for every full second.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.samples = 0
+
+    def SetWords(self, words):
+        """Ignore the word mode."""
+
+    def AcceptWaveform(self, data):
+        """Count the received samples."""
+        self.samples += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        """Return one word per full second, with low confidence for the third."""
+        seconds = self.samples // self.sample_rate
+        self.samples = 0
+        return json.dumps(words_result(
+            [(f"w{i}", float(i), i + 0.8, 0.4 if i == 2 else 0.95) for i in range(seconds)]
+            ))
+
+
+class LargeRecognizer(SmallRecognizer):
+    """
+    A large-model recognizer stand-in with a confident word every half second.
+
+    Methods:
+        FinalResult(self): Return "big" at [k/2, k/2 + 0.25] for the received audio.
+    """
+
+    def FinalResult(self):
+        """Return a word starting every half second of received audio."""
+        count = -(-self.samples * 2 // self.sample_rate)
+        self.samples = 0
+        return json.dumps(words_result(
+            [("big", k / 2, k / 2 + 0.25, 1.0) for k in range(count)]
+            ))
+
+
+def fake_recognizer(model, sample_rate):
+    """Build the stand-in recognizer of a model path."""
+    if model == "small":
+        return SmallRecognizer(sample_rate)
+    return LargeRecognizer(sample_rate)
+
+
+class TestCascadePlanning(unittest.TestCase):
+    """
+    A test case class for testing span planning and splicing.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_runs_become_padded_spans(self): Test that runs of unsure words
+                                             become padded, clipped spans.
+        test_close_runs_merge(self): Test that runs with overlapping windows merge.
+        test_splice_keeps_neighbours(self): Test that words decoded in the
+                                            padding do not replace neighbours.
+    """
+
+    def test_runs_become_padded_spans(self):
+        """
+        Test that each run of low-confidence words becomes one padded span,
+        clipped to the recording.
+
+        Returns:
+            None
+        """
+        results = [
+            words_result([("a", 0.1, 0.4, 0.3), ("b", 1.0, 1.5, 0.9)]),
+            {"text": ""},
+            words_result([("c", 5.0, 5.5, 0.9), ("d", 6.0, 6.4, 0.5), ("e", 6.5, 7.9, 0.6)]),
+            ]
+
+        spans = plan_spans(results, threshold=0.8, padding_seconds=0.5, total_seconds=8.0)
+
+        self.assertEqual(spans, [Span(0, 0, 0, 0.0, 0.9), Span(2, 1, 2, 5.5, 8.0)])
+
+    def test_close_runs_merge(self):
+        """
+        Test that two unsure words around one sure word form one span when
+        their padded windows overlap, and two spans otherwise.
+
+        Returns:
+            None
+        """
+        result = words_result([("a", 0.0, 0.5, 0.2), ("b", 0.6, 1.0, 0.9), ("c", 1.2, 1.6, 0.2)])
+
+        self.assertEqual(len(plan_spans([result], padding_seconds=0.5)), 1)
+        self.assertEqual(len(plan_spans([result], padding_seconds=0.1)), 2)
+
+    def test_splice_keeps_neighbours(self):
+        """
+        Test that only second-pass words between the confident neighbours
+        replace the run, and that the text is rebuilt.
+
+        Returns:
+            None
+        """
+        result = words_result([("a", 0.0, 1.0, 0.9), ("b", 1.2, 1.8, 0.3), ("c", 2.0, 2.5, 0.9)])
+        span = Span(0, 1, 1, 0.7, 2.3)
+        decoded = [{"word": "x", "start": 0.7, "end": 1.0, "conf": 1.0},
+                   {"word": "y", "start": 1.2, "end": 1.5, "conf": 1.0},
+                   {"word": "z", "start": 1.5, "end": 1.8, "conf": 1.0},
+                   {"word": "w", "start": 2.0, "end": 2.3, "conf": 1.0}]
+
+        spliced = splice(result, [span], [decoded])
+
+        self.assertEqual(spliced["text"], "a y z c")
+        self.assertEqual([word["start"] for word in spliced["result"]], [0.0, 1.2, 1.5, 2.0])
+
+
+class TestCascadeTranscriber(unittest.TestCase):
+    """
+    A test case class for testing the cascade mode of the Transcriber.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Write a 5 s recording.
+        test_unsure_span_decoded_again(self): Test that only the unsure word
+                                              is replaced by large-model words.
+        test_large_model_not_loaded(self): Test that a confident first pass
+                                           never loads the large model.
+        tearDown(self): Remove the recording.
+    """
+
+    def setUp(self):
+        """
+        Write a 5 s recording of low noise.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "call.wav")
+        samples = np.random.default_rng(2).integers(-100, 100, 5 * RATE).astype("<i2")
+        with wave.open(self.path, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(RATE)
+            output.writeframes(samples.tobytes())
+        self.registry = mock.Mock()
+        self.registry.get.side_effect = lambda path: path
+
+    def test_unsure_span_decoded_again(self):
+        """
+        Test that the third word is decoded again over [1.5, 3.3] and that
+        only the large-model words between its neighbours are spliced in.
+
+        Returns:
+            None
+        """
+        transcriber = Transcriber("large", model_registry=self.registry,
+                                  triage_model_path="small", triage_threshold=0.8)
+        with mock.patch.dict(sys.modules, {"vosk": mock.Mock(KaldiRecognizer=fake_recognizer)}):
+            results = [json.loads(result) for result in transcriber.transcribe(self.path)]
+
+        self.assertEqual(results[-1]["text"], "w0 w1 big big w3 w4")
+        report = transcriber.report
+        self.assertEqual(report.mode, "cascade")
+        self.assertEqual(report.spans, 1)
+        self.assertAlmostEqual(report.audio_seconds, 5.0)
+        self.assertAlmostEqual(report.second_pass_fraction, 1.8 / 5.0)
+        self.assertIn("estimated_speedup", report.as_dict())
+
+    def test_large_model_not_loaded(self):
+        """
+        Test that with every word above the threshold the first pass is kept
+        and the large model is never requested.
+
+        Returns:
+            None
+        """
+        transcriber = Transcriber("large", model_registry=self.registry,
+                                  triage_model_path="small", triage_threshold=0.3)
+        with mock.patch.dict(sys.modules, {"vosk": mock.Mock(KaldiRecognizer=fake_recognizer)}):
+            results = [json.loads(result) for result in transcriber.transcribe(self.path)]
+
+        self.assertEqual(results[-1]["text"], "w0 w1 w2 w3 w4")
+        self.assertEqual(transcriber.report.second_pass_fraction, 0.0)
+        self.assertIsNone(transcriber.report.estimated_speedup)
+        self.assertNotIn(mock.call("large"), self.registry.get.call_args_list)
+
+    def tearDown(self):
+        """
+        Remove the recording.
+
+        Returns:
+            None
+        """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Module for testing the conversation metrics engine."""
+
+import unittest
+import numpy as np
+from domain.metrics.conversation import ConversationBatch
+from domain.results.call_result import CallResult
+
+class TestConversationMetrics(unittest.TestCase):
+    """
+    A test case class for testing the ConversationBatch class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Describe a short call between an agent and a customer.
+        test_turn_taking(self): Test talk time, interruptions, latency and silence.
+        test_sentiment(self): Test per-speaker mean sentiment and trend.
+        test_batch_matches_single_calls(self): Test that batching does not mix calls.
+        test_calls_without_speech(self): Test calls with no segments or no duration.
+    """
+
+    def setUp(self):
+        """
+        Describe a 20 s call: the customer interrupts once and the agent
+        answers after 1 s and 2 s pauses.
+
+        Returns:
+            None
+        """
+        self.segments = [
+            {"start": 1.0, "end": 5.0, "speaker": "AGENT"},
+            {"start": 4.0, "end": 8.0, "speaker": "CUSTOMER"},
+            {"start": 9.0, "end": 12.0, "speaker": "AGENT"},
+            {"start": 12.0, "end": 14.0, "speaker": "CUSTOMER"},
+            {"start": 16.0, "end": 18.0, "speaker": "AGENT"},
+            ]
+        transcript = [{"text": str(index), "start": float(start), "end": float(start) + 1}
+                      for index, start in enumerate((1, 4, 9, 12, 16))]
+        self.utterances = CallResult.from_transcript(
+            transcript, ["AGENT", "CUSTOMER", "AGENT", "CUSTOMER", "AGENT"],
+            [0.1, -0.5, 0.4, -0.2, 0.7],
+            )
+
+    def test_turn_taking(self):
+        """
+        Test talk time, interruptions, overlap, response latency and silence.
+
+        Returns:
+            None
+        """
+        batch = ConversationBatch()
+        batch.add(self.segments, self.utterances, duration=20.0)
+        metrics = batch.compute()
+        agent, customer = metrics.speaker_rows(0)
+
+        self.assertEqual(agent["speaker"], "AGENT")
+        self.assertAlmostEqual(agent["talk_seconds"], 9.0)
+        self.assertAlmostEqual(agent["talk_ratio"], 9.0 / 15.0)
+        self.assertEqual(customer["interruptions"], 1)
+        self.assertAlmostEqual(customer["overlap_seconds"], 1.0)
+        self.assertEqual(agent["interruptions"], 0)
+        self.assertEqual(agent["responses"], 2)
+        self.assertAlmostEqual(agent["response_latency"], 1.5)
+        self.assertEqual(customer["responses"], 1)
+        self.assertAlmostEqual(customer["response_latency"], 0.0)
+        # Silence: 0-1, 8-9, 14-16 and 18-20 s.
+        self.assertAlmostEqual(metrics.silence_share[0], 6.0 / 20.0)
+        self.assertAlmostEqual(metrics.overlap_share[0], 1.0 / 20.0)
+
+    def test_sentiment(self):
+        """
+        Test that sentiment mean and trend are computed per speaker.
+
+        Returns:
+            None
+        """
+        batch = ConversationBatch()
+        batch.add(self.segments, self.utterances)
+        agent, customer = batch.compute().speaker_rows(0)
+
+        self.assertEqual(agent["utterances"], 3)
+        self.assertAlmostEqual(agent["mean_sentiment"], 0.4, places=6)
+        minutes = np.array([1.0, 9.0, 16.0]) / 60.0
+        expected = np.polyfit(minutes, [0.1, 0.4, 0.7], 1)[0]
+        self.assertAlmostEqual(agent["sentiment_trend"], expected, places=3)
+        self.assertAlmostEqual(customer["mean_sentiment"], -0.35, places=6)
+
+    def test_batch_matches_single_calls(self):
+        """
+        Test that a batch of shuffled calls gives the same metrics as each call alone.
+
+        Returns:
+            None
+        """
+        rng = np.random.default_rng(3)
+        calls = []
+        for _ in range(5):
+            starts = np.sort(rng.uniform(0, 600, 300))
+            calls.append([
+                {"start": float(start), "end": float(start + length), "speaker": f"S{speaker}"}
+                for start, length, speaker in zip(starts, rng.exponential(3.0, 300),
+                                                  rng.integers(0, 3, 300))
+                ])
+        batch = ConversationBatch()
+        for segments in calls:
+            batch.add(list(reversed(segments)))
+        together = batch.compute()
+        for index, segments in enumerate(calls):
+            single = ConversationBatch()
+            single.add(segments)
+            alone = single.compute()
+            batched = {row.pop("speaker"): row for row in together.speaker_rows(index)}
+            for row in alone.speaker_rows(0):
+                expected = batched[row.pop("speaker")]
+                for name, value in row.items():
+                    np.testing.assert_allclose(value, expected[name], rtol=1e-9, err_msg=name)
+            self.assertAlmostEqual(together.silence_share[index], alone.silence_share[0])
+
+    def test_calls_without_speech(self):
+        """
+        Test that a batch whose calls have no segments, or no duration, gives
+        zero shares instead of failing or dividing by zero.
+
+        Returns:
+            None
+        """
+        batch = ConversationBatch()
+        batch.add([])
+        metrics = batch.compute()
+        self.assertEqual(metrics.speaker_rows(0), [])
+        self.assertEqual(metrics.call_seconds.tolist(), [0.0])
+        self.assertEqual(metrics.silence_share.tolist(), [0.0])
+        self.assertEqual(metrics.overlap_share.tolist(), [0.0])
+
+        batch = ConversationBatch()
+        batch.add([{"start": 0.0, "end": 0.0, "speaker": "AGENT"}], duration=0.0)
+        batch.add([], duration=5.0)
+        batch.add(self.segments, duration=20.0)
+        metrics = batch.compute()
+        self.assertEqual(metrics.speaker_rows(0)[0]["talk_ratio"], 0.0)
+        self.assertEqual(metrics.silence_share[:2].tolist(), [0.0, 1.0])
+        self.assertAlmostEqual(metrics.silence_share[2], 6.0 / 20.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 """Module for testing the functionality of the Diarizer class."""
 
+import os
+import tempfile
 import unittest
+import wave
+import numpy as np
 from domain.diarization.diarization import Diarizer
 
 class DiarizationService:
@@ -96,5 +100,156 @@ class TestDiarization(unittest.TestCase):
 
         # TODO: Add more specific assertions based on the expected output
 
+class ToneBackend:
+    """
+    A diarization backend stand-in for audio made of two pure tones.
+
+    Every half second is attributed to the speaker of its dominant tone.
+    Local labels are numbered in order of appearance within each call, so
+    the same voice gets different labels in different windows.
+
+    Methods:
+        segments(self, audio, sample_rate): Split samples into tone turns.
+        embed(self, samples, sample_rate): Return a tone-specific embedding.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    @staticmethod
+    def _tone(samples):
+        """Return 1 for the high tone and 0 for the low tone."""
+        crossings = np.count_nonzero(np.diff(np.signbit(samples)))
+        return int(crossings / len(samples) > 0.05)
+
+    def segments(self, audio, sample_rate=None):
+        """
+        Split samples into turns of the same tone.
+
+        Args:
+            audio (np.ndarray): float32 samples.
+            sample_rate (int): Sample rate of the samples.
+
+        Returns:
+            List[Tuple[float, float, str]]: (start, end, label) turns.
+        """
+        self.calls += 1
+        block = sample_rate // 2
+        labels, turns = {}, []
+        for start in range(0, len(audio) - block + 1, block):
+            tone = self._tone(audio[start:start + block])
+            label = labels.setdefault(tone, f"LOCAL_{len(labels)}")
+            begin, end = start / sample_rate, (start + block) / sample_rate
+            if turns and turns[-1][2] == label and turns[-1][1] == begin:
+                turns[-1] = (turns[-1][0], end, label)
+            else:
+                turns.append((begin, end, label))
+        return turns
+
+    def embed(self, samples, sample_rate):
+        """
+        Return a one-hot embedding of the dominant tone.
+
+        Args:
+            samples (np.ndarray): float32 samples.
+            sample_rate (int): Sample rate of the samples.
+
+        Returns:
+            np.ndarray: Embedding.
+        """
+        return np.eye(2)[self._tone(samples)]
+
+class TestStreamingDiarization(unittest.TestCase):
+    """
+    A test case class for testing windowed streaming diarization.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Write a two-speaker recording of alternating tones.
+        test_speakers_linked_across_windows(self): Test that streaming output
+                                                   matches the true turns.
+        test_segments_emitted_incrementally(self): Test that segments arrive
+                                                   before the end of the audio.
+        tearDown(self): Remove the recording.
+    """
+
+    def setUp(self):
+        """
+        Write 100 s of audio alternating between two tones every 3 s.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "call.wav")
+        rate, turn = 16000, 3
+        time_axis = np.arange(rate * 100) / rate
+        tones = np.where((time_axis // turn).astype(int) % 2 == 0, 200.0, 1500.0)
+        samples = (8000 * np.sin(2 * np.pi * tones * time_axis)).astype("<i2")
+        with wave.open(self.path, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(rate)
+            output.writeframes(samples.tobytes())
+        self.expected = [
+            (float(start), float(min(start + turn, 100)), start // turn % 2)
+            for start in range(0, 100, turn)
+            ]
+
+    def tearDown(self):
+        """
+        Remove the recording.
+
+        Returns:
+            None
+        """
+        self.directory.cleanup()
+
+    def test_speakers_linked_across_windows(self):
+        """
+        Test that streaming diarization reproduces every turn with one
+        consistent label per speaker across windows.
+
+        Returns:
+            None
+        """
+        backend = ToneBackend()
+        diarizer = Diarizer(backend=backend, streaming=True, window_seconds=20, overlap_seconds=4)
+        segments = diarizer.diarize(self.path)
+
+        self.assertGreater(backend.calls, 5)
+        speakers = {}
+        for segment, (start, end, tone) in zip(segments, self.expected):
+            self.assertAlmostEqual(segment["start"], start)
+            self.assertAlmostEqual(segment["end"], end)
+            self.assertEqual(speakers.setdefault(tone, segment["speaker"]), segment["speaker"])
+        self.assertEqual(len(segments), len(self.expected))
+        self.assertEqual(len(set(speakers.values())), 2)
+
+    def test_segments_emitted_incrementally(self):
+        """
+        Test that the first segments are yielded after reading one window.
+
+        Returns:
+            None
+        """
+        diarizer = Diarizer(backend=ToneBackend(), streaming=True, window_seconds=20, overlap_seconds=4)
+        frames = diarizer.decoder.frames
+        read = []
+
+        def counting_frames(source):
+            for frame in frames(source):
+                read.append(len(frame))
+                yield frame
+
+        diarizer.decoder.frames = counting_frames
+        stream = diarizer.diarize_stream(self.path)
+        first = next(stream)
+        self.assertEqual(first["start"], 0.0)
+        self.assertLess(sum(read), 16000 * 25)
+        self.assertEqual(len(list(stream)) + 1, len(self.expected))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+"""Module for testing the functionality of the EmbeddingCache class."""
+
+import tempfile
+import unittest
+import numpy as np
+from domain.sentiment_analysis.embedding_cache import EmbeddingCache
+
+class CountingEncoder:
+    """
+    An encoder stand-in that records which sentences it was asked to encode.
+
+    Methods:
+        __call__(self, sentences): Return a deterministic embedding per sentence.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, sentences):
+        """
+        Return a deterministic embedding per sentence.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(sentences), 8).
+        """
+        self.calls.append(list(sentences))
+        return np.array([[len(sentence) + index for index in range(8)] for sentence in sentences],
+                        dtype=np.float32)
+
+class TestEmbeddingCache(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the EmbeddingCache class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Create a cache in a temporary directory.
+        test_only_misses_encoded(self): Test that repeated phrases skip the model.
+        test_shared_through_disk(self): Test that a second cache instance reads
+                                        vectors from the memory-mapped matrix.
+        tearDown(self): Remove the temporary directory.
+    """
+
+    def setUp(self):
+        """
+        Create a cache in a temporary directory.
+
+        Returns:
+            None
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.encoder = CountingEncoder()
+        self.cache = EmbeddingCache("test-model", cache_dir=self.tmp.name)
+
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+
+        Returns:
+            None
+        """
+        self.tmp.cleanup()
+
+    def test_only_misses_encoded(self):
+        """
+        Test that normalized duplicates are encoded once and later served from cache.
+
+        Returns:
+            None
+        """
+        first = self.cache.encode(["Здравствуйте!", "здравствуйте!  ", "Ожидайте"], self.encoder)
+        second = self.cache.encode(["Ожидайте", "До свидания"], self.encoder)
+
+        self.assertEqual(self.encoder.calls, [["Здравствуйте!", "Ожидайте"], ["До свидания"]])
+        np.testing.assert_array_equal(first[0], first[1])
+        np.testing.assert_array_equal(second[0], first[2])
+        self.assertEqual(self.cache.stats()["memory_hits"], 1)
+
+    def test_shared_through_disk(self):
+        """
+        Test that another instance over the same directory reads the float16 rows.
+
+        Returns:
+            None
+        """
+        expected = self.cache.encode(["Спасибо за звонок"], self.encoder)
+        other = EmbeddingCache("test-model", cache_dir=self.tmp.name)
+        actual = other.encode(["спасибо за звонок"], self.encoder)
+
+        self.assertEqual(len(self.encoder.calls), 1)
+        np.testing.assert_allclose(actual, expected, rtol=1e-3)
+        self.assertEqual(other.stats()["disk_hits"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Module for testing the functionality of the EncodingService class."""
+
+import threading
+import unittest
+import numpy as np
+from domain.sentiment_analysis.batching import EncodingService
+
+class RecordingEncoder:
+    """
+    An encoder stand-in that records batch sizes and embeds each sentence
+    as a vector filled with its length.
+
+    Methods:
+        __call__(self, sentences): Encode one batch.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, sentences):
+        """
+        Encode one batch.
+
+        Args:
+            sentences (List[str]): Sentences to encode.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(sentences), 4).
+        """
+        with self.lock:
+            self.batches.append(len(sentences))
+        return np.array([[len(sentence)] * 4 for sentence in sentences], dtype=np.float32)
+
+class TestEncodingService(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the EncodingService class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Start a service around a recording encoder.
+        test_callers_get_own_rows(self): Test that concurrent callers receive
+                                         their own embeddings in order.
+        test_batches_across_callers(self): Test that sentences from different
+                                           callers share batches.
+        tearDown(self): Stop the service.
+    """
+
+    def setUp(self):
+        """
+        Start a service around a recording encoder.
+
+        Returns:
+            None
+        """
+        self.encoder = RecordingEncoder()
+        self.service = EncodingService(self.encoder, max_batch_size=16, max_wait_ms=50)
+
+    def tearDown(self):
+        """
+        Stop the service.
+
+        Returns:
+            None
+        """
+        self.service.close()
+
+    def _encode_concurrently(self, requests):
+        """
+        Encode each list of sentences from its own thread.
+
+        Args:
+            requests (List[List[str]]): Sentences per caller.
+
+        Returns:
+            List[np.ndarray]: Embeddings per caller.
+        """
+        results = [None] * len(requests)
+        barrier = threading.Barrier(len(requests))
+
+        def call(index):
+            barrier.wait()
+            results[index] = self.service.encode(requests[index])
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(len(requests))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_callers_get_own_rows(self):
+        """
+        Test that concurrent callers receive their own embeddings in order.
+
+        Returns:
+            None
+        """
+        requests = [["a" * (caller + index) for index in range(1, 6)] for caller in range(8)]
+        results = self._encode_concurrently(requests)
+
+        for sentences, embeddings in zip(requests, results):
+            np.testing.assert_array_equal(embeddings[:, 0], [len(sentence) for sentence in sentences])
+
+    def test_batches_across_callers(self):
+        """
+        Test that sentences from different callers are encoded in shared batches
+        and that metrics are reported.
+
+        Returns:
+            None
+        """
+        requests = [["одно слово", "два слова"] for _ in range(8)]
+        self._encode_concurrently(requests)
+
+        self.assertLess(len(self.encoder.batches), len(requests))
+        stats = self.service.stats()
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["fill_ratio"], 0.0)
+        self.assertGreaterEqual(stats["p99_ms"], stats["p50_ms"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,20 @@
 """Module for testing the functionality of the GoogleSheetsExporter class."""
 
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock
+import gspread
+import requests
 from domain.google_sheets.google_sheets import GoogleSheetsExporter
+from domain.google_sheets.spool import ExportSpool, SpoolFlusher
+from domain.instrumentation.instrumentation import instruments
 
 class GoogleSheetsExportService:
     """
@@ -57,5 +69,363 @@ class GoogleSheetsExportService:
         # Verify that the export was successful
         self.assertTrue(exported)
 
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+    """
+    A minimal local stand-in for the Drive and Sheets APIs used by gspread.
+
+    The server attributes `requests`, `rows` and `throttle` record the number
+    of requests, the appended rows and how many append requests to reject
+    with HTTP 429 before accepting them.
+    """
+
+    SPREADSHEET = {
+        "spreadsheetId": "sheet1",
+        "properties": {"title": "Call Quality Rate"},
+        "sheets": [{"properties": {"sheetId": 0, "title": "Sheet1", "index": 0,
+                                   "gridProperties": {"rowCount": 1000, "columnCount": 26}}}],
+        }
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silence request logging."""
+
+    def _reply(self, status, body):
+        """Send a JSON response."""
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the Drive file listing and the spreadsheet metadata."""
+        self.server.requests += 1
+        if self.path.startswith("/drive/v3/files"):
+            self._reply(200, {"files": [{"id": "sheet1", "name": "Call Quality Rate"}]})
+        elif self.path.startswith("/v4/spreadsheets/sheet1"):
+            self._reply(200, self.SPREADSHEET)
+        else:
+            self._reply(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Accept values:append requests, throttling the first ones if configured."""
+        self.server.requests += 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not re.search(r"/values/.+:append", self.path):
+            self._reply(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+        elif self.server.throttle > 0:
+            self.server.throttle -= 1
+            self._reply(429, {"error": {"code": 429, "message": "quota exceeded",
+                                        "status": "RESOURCE_EXHAUSTED"}})
+        else:
+            self.server.rows.extend(body["values"])
+            self._reply(200, {"spreadsheetId": "sheet1", "updates": {}})
+
+class LocalRedirectAdapter(requests.adapters.HTTPAdapter):
+    """
+    A transport adapter that sends Google API requests to a local server.
+    """
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Rewrite the Google API host to the local server and send."""
+        request.url = re.sub(r"^https://[^/]*googleapis\.com", self.base_url, request.url)
+        return super().send(request, **kwargs)
+
+class TestGoogleSheetsBulkExport(unittest.TestCase):
+    """
+    A test case class for testing bulk export against a local fake Sheets server.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Start the fake server and build an exporter pointing at it.
+        test_bulk_append(self): Test that 500 rows are appended in order with
+                                a single append request.
+        test_backoff_on_throttling(self): Test that HTTP 429 responses are retried.
+        tearDown(self): Stop the fake server.
+    """
+
+    def setUp(self):
+        """
+        Start the fake server and build an exporter with a client pointing at it.
+
+        Returns:
+            None
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSheetsHandler)
+        self.server.requests = 0
+        self.server.rows = []
+        self.server.throttle = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        session = requests.Session()
+        session.mount("https://", LocalRedirectAdapter(f"http://127.0.0.1:{self.server.server_port}"))
+        self.exporter = GoogleSheetsExporter(
+            "credentials.json", client=gspread.Client(None, session=session), backoff_seconds=0.01
+            )
+
+    def tearDown(self):
+        """
+        Stop the fake server.
+
+        Returns:
+            None
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_bulk_append(self):
+        """
+        Test that a 500-utterance export is appended in order with one append
+        request, and that the export reports the requests it made.
+
+        Returns:
+            None
+        """
+        data = [["Transcript", "Speaker", "Sentiment Score"]]
+        data += [[f"utterance {index}", "SPEAKER_00", 0.5] for index in range(500)]
+
+        self.exporter.export_to_sheets(data)
+        setup_requests = self.server.requests - 1
+        self.assertEqual(self.exporter.last_export["rows"], len(data))
+        self.assertEqual(self.exporter.last_export["requests"], setup_requests + 1)
+        self.exporter.export_to_sheets(data[1:3])
+
+        self.assertEqual(self.server.rows, data + data[1:3])
+        self.assertEqual(self.server.requests - setup_requests, 2)
+        self.assertEqual(self.exporter.last_export["requests"], 1)
+
+    def test_backoff_on_throttling(self):
+        """
+        Test that throttled append requests are retried until they succeed.
+
+        Returns:
+            None
+        """
+        self.server.throttle = 2
+        self.exporter.export_to_sheets([["a", "b", 1.0]])
+
+        self.assertEqual(self.server.rows, [["a", "b", 1.0]])
+        self.assertEqual(self.exporter.last_export["retries"], 2)
+
+    def test_enqueue_returns_before_export(self):
+        """
+        Test that enqueue_export returns at once and the background flusher
+        appends the rows of each call exactly once.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "exports.sqlite")
+            exporter = GoogleSheetsExporter(
+                "credentials.json", client=self.exporter.client, backoff_seconds=0.01,
+                spool_path=path,
+                )
+            try:
+                self.assertTrue(exporter.enqueue_export("call-1", [["a", "SPEAKER_00", 0.5]]))
+                self.assertFalse(exporter.enqueue_export("call-1", [["a", "SPEAKER_00", 0.5]]))
+                deadline = time.time() + 5
+                while exporter.backlog()["pending"] and time.time() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(self.server.rows, [["call-1", "a", "SPEAKER_00", 0.5]])
+                self.assertFalse(exporter.enqueue_export("call-1", [["a", "SPEAKER_00", 0.5]]))
+            finally:
+                exporter.flusher.stop()
+                SpoolFlusher._shared.pop(path, None)
+
+class TestExportSpool(unittest.TestCase):
+    """
+    A test case class for testing the durable export spool and its flusher.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Create a spool in a temporary directory.
+        test_deduplicates_by_call_id(self): Test that a call id is queued once.
+        test_survives_restart(self): Test that pending exports outlive the process.
+        test_coalesces_and_retries(self): Test that exports are sent together
+                                          and kept after a failed export.
+        test_retry_skips_appended_chunks(self): Test that rows appended before
+                                                a failure are not sent again.
+        test_survives_spool_errors(self): Test that the flusher retries after
+                                          an error of the spool itself.
+        test_backlog(self): Test the reported backlog size and age.
+        tearDown(self): Remove the temporary directory.
+    """
+
+    def setUp(self):
+        """
+        Create a spool in a temporary directory.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "exports.sqlite")
+        self.spool = ExportSpool(self.path)
+
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+
+        Returns:
+            None
+        """
+        self.directory.cleanup()
+
+    def test_deduplicates_by_call_id(self):
+        """
+        Test that a call id is queued once, including after it was exported.
+
+        Returns:
+            None
+        """
+        self.assertTrue(self.spool.enqueue("call-1", [["a"]]))
+        self.assertFalse(self.spool.enqueue("call-1", [["b"]]))
+        claimed = self.spool.claim("test", max_rows=100)
+        self.assertEqual(claimed, [("call-1", [["a"]])])
+        self.spool.complete(["call-1"])
+        self.assertFalse(self.spool.enqueue("call-1", [["a"]]))
+        self.assertEqual(self.spool.backlog()["pending"], 0)
+
+    def test_survives_restart(self):
+        """
+        Test that pending exports and expired claims are seen by a new spool.
+
+        Returns:
+            None
+        """
+        self.spool.enqueue("call-1", [["a"]])
+        self.spool.enqueue("call-2", [["b"]])
+        crashed = ExportSpool(self.path, lease_seconds=0)
+        crashed.claim("crashed", max_rows=1)
+
+        restarted = ExportSpool(self.path)
+        claimed = restarted.claim("restarted", max_rows=100)
+        self.assertEqual([call_id for call_id, _ in claimed], ["call-1", "call-2"])
+
+    def test_coalesces_and_retries(self):
+        """
+        Test that pending exports are sent in one coalesced export and that a
+        failed export leaves them in the spool.
+
+        Returns:
+            None
+        """
+        exports = []
+        failures = [ConnectionError("offline")]
+
+        def export_rows(rows):
+            if failures:
+                raise failures.pop()
+            exports.append(rows)
+
+        for index in range(3):
+            self.spool.enqueue(f"call-{index}", [[f"row {index}"], [f"row {index}b"]])
+        flusher = SpoolFlusher(self.spool, export_rows, interval=60, max_rows=4)
+        try:
+            deadline = time.time() + 5
+            while failures and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.spool.backlog()["pending"], 3)
+
+            self.assertEqual(flusher.flush(), 2)
+            self.assertEqual(flusher.flush(), 1)
+            self.assertEqual(flusher.flush(), 0)
+        finally:
+            flusher.stop()
+        self.assertEqual(exports, [
+            [["call-0", "row 0"], ["call-0", "row 0b"], ["call-1", "row 1"], ["call-1", "row 1b"]],
+            [["call-2", "row 2"], ["call-2", "row 2b"]],
+            ])
+
+    def test_retry_skips_appended_chunks(self):
+        """
+        Test that when a later chunk fails, the retry sends only the rows that
+        were not appended and every row is appended once.
+
+        Returns:
+            None
+        """
+        appended = []
+        failures = [0]
+
+        def export_rows(rows):
+            if len(appended) == 3 and failures:
+                raise ConnectionError(f"offline {failures.pop()}")
+            appended.extend(rows)
+
+        for index in range(3):
+            self.spool.enqueue(f"call-{index}", [[f"row {index}"], [f"row {index}b"]])
+        flusher = SpoolFlusher(self.spool, export_rows, interval=60, max_rows=100, chunk_rows=3)
+        try:
+            deadline = time.time() + 5
+            while (failures or self.spool.backlog()["pending"]) and time.time() < deadline:
+                flusher.flush()
+                time.sleep(0.01)
+        finally:
+            flusher.stop()
+        self.assertEqual(appended, [[f"call-{index}", f"row {index}{suffix}"]
+                                    for index in range(3) for suffix in ("", "b")])
+        self.assertFalse(self.spool.enqueue("call-1", [["row 1"]]))
+
+    def test_survives_spool_errors(self):
+        """
+        Test that an error of the spool itself, such as a locked database, is
+        counted and that the flusher thread keeps running and retries.
+
+        Returns:
+            None
+        """
+        exports = []
+        claim = self.spool.claim
+        failures = [sqlite3.OperationalError("database is locked")]
+
+        def failing_claim(owner, max_rows):
+            if failures:
+                raise failures.pop()
+            return claim(owner, max_rows)
+
+        self.spool.claim = failing_claim
+        self.spool.enqueue("call-1", [["a"]])
+        instruments.reset()
+        instruments.enable()
+        flusher = SpoolFlusher(self.spool, exports.append, interval=0.05)
+        try:
+            deadline = time.time() + 5
+            while not exports and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(flusher._thread.is_alive())
+        finally:
+            flusher.stop()
+            counters = instruments.snapshot()["counters"]
+            instruments.disable()
+            instruments.reset()
+        self.assertEqual(exports, [[["call-1", "a"]]])
+        self.assertEqual(counters["google_sheets.spool_errors"], 1)
+
+    def test_backlog(self):
+        """
+        Test that the backlog reports pending exports, rows and the oldest age.
+
+        Returns:
+            None
+        """
+        self.assertEqual(self.spool.backlog()["oldest_age_seconds"], 0.0)
+        self.spool.enqueue("call-1", [["a"], ["b"]])
+        time.sleep(0.05)
+        self.spool.enqueue("call-2", [["c"]])
+        backlog = self.spool.backlog()
+        self.assertEqual(backlog["pending"], 2)
+        self.assertEqual(backlog["pending_rows"], 3)
+        self.assertGreaterEqual(backlog["oldest_age_seconds"], 0.05)
+
 if __name__ == "__main__":
     unittest.main()
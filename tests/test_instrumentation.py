@@ -0,0 +1,246 @@
+"""Module for testing the instrumentation layer and its exporters."""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import Mock
+import numpy as np
+from domain.instrumentation.export import JsonLinesWriter, MetricsExporter, prometheus_text
+from domain.instrumentation.instrumentation import Instruments, instruments
+from domain.pipeline.pipeline import AnalysisPipeline
+from domain.sentiment_analysis.batching import EncodingService
+from domain.sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+
+
+class TestInstruments(unittest.TestCase):
+    """
+    A test case class for testing timers, counters and call records.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_off_by_default(self): Test that nothing is recorded while off.
+        test_stages_and_counters(self): Test that runs and counts accumulate.
+        test_call_record_across_threads(self): Test that bound threads record
+                                               into the caller's call.
+        test_prometheus_text(self): Test the exposition format.
+    """
+
+    def test_off_by_default(self):
+        """
+        Test that a new Instruments records nothing and returns a shared no-op timer.
+
+        Returns:
+            None
+        """
+        disabled = Instruments()
+        with disabled.timer("stage") as timer:
+            timer.set_audio(1.0)
+        disabled.count("events")
+        with disabled.call("call") as record:
+            self.assertIsNone(record)
+
+        self.assertIs(disabled.timer("a"), disabled.timer("b"))
+        self.assertEqual(disabled.snapshot()["stages"], {})
+        self.assertEqual(disabled.snapshot()["counters"], {})
+
+    def test_stages_and_counters(self):
+        """
+        Test that timed runs, observed durations and counts accumulate, and
+        that the real-time factor follows from the audio processed.
+
+        Returns:
+            None
+        """
+        enabled = Instruments(enabled=True)
+        with enabled.timer("transcription.recognize") as timer:
+            timer.set_audio(10.0)
+        enabled.observe("transcription.recognize", 2.0, 10.0)
+        enabled.observe("sentiment.scoring", 0.5)
+        enabled.count("sentiment.sentences", 3)
+        enabled.count("sentiment.sentences")
+
+        snapshot = enabled.snapshot()
+        recognize = snapshot["stages"]["transcription.recognize"]
+        self.assertEqual(recognize["calls"], 2)
+        self.assertEqual(recognize["audio_seconds"], 20.0)
+        self.assertAlmostEqual(recognize["real_time_factor"], recognize["seconds"] / 20.0)
+        self.assertIsNone(snapshot["stages"]["sentiment.scoring"]["real_time_factor"])
+        self.assertEqual(snapshot["counters"], {"sentiment.sentences": 4})
+        self.assertGreater(snapshot["peak_rss_bytes"], 0)
+
+    def test_call_record_across_threads(self):
+        """
+        Test that a bound function records into the call of the thread that
+        bound it, while other threads only record process-wide.
+
+        Returns:
+            None
+        """
+        enabled = Instruments(enabled=True)
+        records = []
+        with enabled.call("abc", sink=records.append):
+            bound = threading.Thread(target=enabled.bind(enabled.observe),
+                                     args=("diarization.diarize", 1.5, 3.0))
+            unbound = threading.Thread(target=enabled.count, args=("other",))
+            bound.start()
+            unbound.start()
+            bound.join()
+            unbound.join()
+            enabled.count("transcription.utterances", 2)
+
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record["call_id"], "abc")
+        self.assertEqual(record["stages"]["diarization.diarize"]["real_time_factor"], 0.5)
+        self.assertEqual(record["counters"], {"transcription.utterances": 2})
+        self.assertIn("wall_seconds", record)
+        self.assertEqual(enabled.snapshot()["counters"]["other"], 1)
+
+    def test_prometheus_text(self):
+        """
+        Test that stages and counters are rendered as labelled samples with
+        HELP and TYPE lines.
+
+        Returns:
+            None
+        """
+        enabled = Instruments(enabled=True)
+        enabled.observe("transcription.recognize", 3.0, 30.0)
+        enabled.count('odd"name')
+
+        text = prometheus_text(enabled.snapshot())
+
+        self.assertIn("# TYPE cqr_stage_seconds_total counter", text)
+        self.assertIn('cqr_stage_seconds_total{stage="transcription.recognize"} 3.0', text)
+        self.assertIn('cqr_stage_real_time_factor{stage="transcription.recognize"} 0.1', text)
+        self.assertIn('cqr_events_total{name="odd\\"name"} 1', text)
+        self.assertIn("cqr_peak_rss_bytes ", text)
+        self.assertTrue(text.endswith("\n"))
+
+
+class TestMetricsExport(unittest.TestCase):
+    """
+    A test case class for testing the endpoint and the call records of a pipeline.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Enable the process-wide instruments.
+        test_endpoint(self): Test that /metrics serves the instruments.
+        test_pipeline_writes_call_lines(self): Test that each analyzed call
+                                               appends one JSON line.
+        test_batched_encoding_in_call(self): Test that waiting on the batching
+                                             service is recorded in the call.
+        tearDown(self): Disable and reset the instruments.
+    """
+
+    def setUp(self):
+        """
+        Enable the process-wide instruments with nothing recorded.
+
+        Returns:
+            None
+        """
+        instruments.reset()
+        instruments.enable()
+
+    def test_endpoint(self):
+        """
+        Test that the endpoint serves the current instruments as Prometheus text
+        and answers other paths with 404.
+
+        Returns:
+            None
+        """
+        exporter = MetricsExporter(instruments, port=0)
+        exporter.start()
+        try:
+            instruments.observe("sentiment.encode", 0.25)
+            with urllib.request.urlopen(exporter.url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(exporter.url.replace("/metrics", "/other"), timeout=5)
+        finally:
+            exporter.close()
+
+        self.assertTrue(content_type.startswith("text/plain"))
+        self.assertIn('cqr_stage_seconds_total{stage="sentiment.encode"} 0.25', body)
+
+    def test_pipeline_writes_call_lines(self):
+        """
+        Test that every call analyzed by the pipeline appends one JSON line
+        with the stages timed in its own and in its helper threads.
+
+        Returns:
+            None
+        """
+        diarizer = Mock()
+        diarizer.diarize.side_effect = lambda path: instruments.observe("diarization.diarize", 0.1)
+        transcriber = Mock(spec=["transcribe"])
+        transcriber.transcribe.side_effect = lambda path: iter([json.dumps({"text": "hello"})])
+        analyzer = Mock()
+        analyzer.encode.side_effect = lambda sentences: [[1.0]] * len(sentences)
+        analyzer.score.side_effect = lambda batches: [1.0]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics", "calls.jsonl")
+            pipeline = AnalysisPipeline(transcriber, diarizer, analyzer,
+                                        call_sink=JsonLinesWriter(path).write)
+            pipeline.run("first.wav", audio_hash="first")
+            pipeline.run("second.wav", audio_hash="second")
+            with open(path, encoding="utf-8") as lines:
+                records = [json.loads(line) for line in lines]
+
+        self.assertEqual([record["call_id"] for record in records], ["first", "second"])
+        self.assertIn("diarization.diarize", records[0]["stages"])
+        self.assertIn("pipeline.total", records[0]["stages"])
+        self.assertEqual(records[0]["utterances"], 1)
+        self.assertFalse(records[0]["cached"])
+        self.assertEqual(instruments.snapshot()["stages"]["pipeline.total"]["calls"], 2)
+
+    def test_batched_encoding_in_call(self):
+        """
+        Test that a call encoding through the shared batching service records
+        its wait and its sentences, although the batch runs on another thread.
+
+        Returns:
+            None
+        """
+        analyzer = SentimentAnalyzer("instrumented-model", batching=True)
+        analyzer._backend = Mock()
+        analyzer._backend.encode.side_effect = lambda sentences, batch_size: np.ones(
+            (len(sentences), 4), dtype=np.float32)
+        records = []
+        try:
+            with instruments.call("abc", sink=records.append):
+                analyzer.encode(["first sentence", "second sentence"])
+        finally:
+            analyzer.encoding_service.close()
+            EncodingService._shared.pop("instrumented-model:torch", None)
+
+        record = records[0]
+        self.assertEqual(record["stages"]["sentiment.encode_wait"]["calls"], 1)
+        self.assertNotIn("sentiment.encode", record["stages"])
+        self.assertEqual(record["counters"], {"sentiment.sentences": 2})
+        self.assertEqual(instruments.snapshot()["stages"]["sentiment.encode"]["calls"], 1)
+
+    def tearDown(self):
+        """
+        Disable and reset the process-wide instruments.
+
+        Returns:
+            None
+        """
+        instruments.disable()
+        instruments.reset()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""Module for testing the leased job queue and its workers."""
+
+import os
+import tempfile
+import time
+import unittest
+import wave
+import numpy as np
+from domain.audio.decoding import AudioDecoder
+from domain.jobs.analysis import run_node, submit_calls
+from domain.jobs.job_queue import JobWorker, SQLiteJobStore, open_store
+from domain.pipeline.pipeline import PipelineResult
+
+
+class SilentPipeline:
+    """
+    A pipeline stand-in returning an empty analysis.
+
+    Methods:
+        run(self, audio_path, audio_hash): Return an empty result.
+    """
+
+    def __init__(self):
+        self.decoder = AudioDecoder()
+
+    def run(self, audio_path, audio_hash=None):
+        """Return an empty result."""
+        return PipelineResult([], [], [], {})
+
+
+def silent_pipeline():
+    """Build a SilentPipeline in a worker process."""
+    return SilentPipeline()
+
+
+class TestJobQueue(unittest.TestCase):
+    """
+    A test case class for testing leases, retries, node limits and status.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Open a store in a temporary directory.
+        test_submit_deduplicates(self): Test that a key is queued once.
+        test_node_limit(self): Test that a node runs at most node_limit jobs.
+        test_dead_worker_retried(self): Test that an expired lease requeues the job.
+        test_attempts_exhausted(self): Test that a job fails after max_attempts.
+        test_heartbeat_keeps_lease(self): Test that a slow job keeps its lease.
+        test_lost_lease_drops_result(self): Test that a late result is ignored.
+        test_status(self): Test counts per state and worker throughput.
+        test_open_store(self): Test opening stores by location.
+        test_run_node(self): Test worker processes analyzing recordings.
+        tearDown(self): Remove the store.
+    """
+
+    def setUp(self):
+        """
+        Open a store in a temporary directory.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "jobs.sqlite")
+        self.store = SQLiteJobStore(self.path)
+
+    def test_submit_deduplicates(self):
+        """
+        Test that a job key is accepted once and jobs are claimed in order.
+
+        Returns:
+            None
+        """
+        self.assertTrue(self.store.submit("a", {"n": 1}))
+        self.assertTrue(self.store.submit("b", {"n": 2}))
+        self.assertFalse(self.store.submit("a", {"n": 3}))
+
+        self.assertEqual(self.store.claim("w", "node")["payload"], {"n": 1})
+        self.assertEqual(self.store.claim("w", "node")["payload"], {"n": 2})
+        self.assertIsNone(self.store.claim("w", "node"))
+
+    def test_node_limit(self):
+        """
+        Test that claims stop at the node limit but other nodes can still claim.
+
+        Returns:
+            None
+        """
+        for key in "abc":
+            self.store.submit(key, {})
+        self.assertIsNotNone(self.store.claim("w1", "node-1", node_limit=1))
+        self.assertIsNone(self.store.claim("w2", "node-1", node_limit=1))
+        self.assertIsNotNone(self.store.claim("w3", "node-2", node_limit=1))
+
+    def test_dead_worker_retried(self):
+        """
+        Test that a job whose worker stopped heartbeating goes to another worker.
+
+        Returns:
+            None
+        """
+        self.store.submit("a", {})
+        dead = self.store.claim("dead", "node", lease_seconds=0.05)
+        time.sleep(0.1)
+        retried = self.store.claim("alive", "node")
+
+        self.assertEqual(retried["id"], dead["id"])
+        self.assertEqual(retried["attempts"], 2)
+        self.assertFalse(self.store.complete(dead["id"], "dead"))
+        self.assertTrue(self.store.complete(retried["id"], "alive"))
+
+    def test_attempts_exhausted(self):
+        """
+        Test that a job failing max_attempts times stays failed.
+
+        Returns:
+            None
+        """
+        self.store.submit("a", {}, max_attempts=2)
+        for _ in range(2):
+            job = self.store.claim("w", "node")
+            self.store.fail(job["id"], "w", "boom")
+
+        self.assertIsNone(self.store.claim("w", "node"))
+        self.assertEqual(self.store.status()["failed"], 1)
+
+    def test_heartbeat_keeps_lease(self):
+        """
+        Test that a job running longer than its lease is not handed out again.
+
+        Returns:
+            None
+        """
+        self.store.submit("a", {})
+        claims = []
+
+        def slow(payload):
+            time.sleep(0.5)
+            claims.append(self.store.claim("other", "node"))
+            return {}
+
+        worker = JobWorker(self.store, slow, node="node", lease_seconds=0.15)
+
+        self.assertEqual(worker.run_once(), "done")
+        self.assertEqual(claims, [None])
+
+    def test_lost_lease_drops_result(self):
+        """
+        Test that a worker whose lease was taken over reports the job as lost.
+
+        Returns:
+            None
+        """
+        self.store.submit("a", {})
+
+        def stolen(payload):
+            self.store._db.execute("UPDATE jobs SET worker = 'thief'")
+            return {}
+
+        self.assertEqual(JobWorker(self.store, stolen, node="node").run_once(), "lost")
+
+    def test_status(self):
+        """
+        Test job counts per state and per-worker throughput.
+
+        Returns:
+            None
+        """
+        for key in "abcd":
+            self.store.submit(key, {})
+        worker = JobWorker(self.store, lambda payload: {"audio_seconds": 60.0}, node="node")
+        worker.run_once()
+        time.sleep(0.05)
+        worker.run_once()
+        self.store.claim("w2", "node")
+
+        status = self.store.status()
+        self.assertEqual([status[state] for state in ("queued", "running", "done", "failed")],
+                         [1, 1, 2, 0])
+        self.assertEqual(len(status["workers"]), 1)
+        self.assertEqual(status["workers"][0]["done"], 2)
+        self.assertAlmostEqual(status["workers"][0]["audio_seconds"], 120.0)
+        self.assertGreater(status["workers"][0]["calls_per_hour"], 0)
+
+    def test_open_store(self):
+        """
+        Test that stores are opened by path or URL and unknown schemes are rejected.
+
+        Returns:
+            None
+        """
+        self.assertEqual(open_store(f"sqlite:{self.path}").path, self.path)
+        with self.assertRaises(ValueError):
+            open_store("redis://localhost")
+
+    def test_run_node(self):
+        """
+        Test that worker processes drain the queue and save a result per call.
+
+        Returns:
+            None
+        """
+        paths = []
+        for index in range(3):
+            path = os.path.join(self.directory.name, f"call{index}.wav")
+            with wave.open(path, "wb") as output:
+                output.setnchannels(1)
+                output.setsampwidth(2)
+                output.setframerate(16000)
+                output.writeframes(np.full(1600, index, dtype="<i2").tobytes())
+            paths.append(path)
+        output_dir = os.path.join(self.directory.name, "processed")
+        self.assertEqual(submit_calls(self.store, paths, output_dir), 3)
+
+        run_node(self.path, 2, node="node", factory=silent_pipeline, idle_exit=True)
+
+        self.assertEqual(self.store.status()["done"], 3)
+        self.assertEqual(len(os.listdir(output_dir)), 3)
+
+    def tearDown(self):
+        """
+        Remove the store.
+
+        Returns:
+            None
+        """
+        self.store._db.close()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+"""Module for testing live sources, streaming transcription and live call scoring."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+import wave
+from unittest import mock
+import numpy as np
+from domain.audio.decoding import AudioDecoder
+from domain.audio.sources import read_pcm, replay_file
+from domain.pipeline.live import LiveCallScorer
+from domain.sentiment_analysis.scoring import SentimentScorer
+from domain.transcription.transcription import Transcriber
+
+RATE = 16000
+
+
+def write_wav(path, seconds, rate=RATE):
+    """Write a mono WAV file of low noise."""
+    samples = np.random.default_rng(3).integers(-100, 100, int(seconds * rate)).astype("<i2")
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(samples.tobytes())
+
+
+class FakeLiveRecognizer:
+    """
+    A recognizer stand-in closing an utterance of one word every second of audio.
+
+    Methods:
+        SetWords(self, words): Ignored.
+        AcceptWaveform(self, data): Count the samples; True when a second is complete.
+        PartialResult(self): Return the open word once half a second has arrived.
+        Result(self): Return the word of the closed second.
+        FinalResult(self): Return the open word, if any audio is left.
+    """
+
+    def __init__(self, model, sample_rate):
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.closed = 0
+
+    def SetWords(self, words):
+        """Ignore the word mode."""
+
+    def AcceptWaveform(self, data):
+        """Count the samples and report whether a second of audio is complete."""
+        self.samples += len(data) // 2
+        return self.samples // self.sample_rate > self.closed
+
+    def PartialResult(self):
+        """Return the open word once half a second of it has arrived."""
+        heard = self.samples - self.closed * self.sample_rate
+        text = f"w{self.closed}" if heard >= self.sample_rate // 2 else ""
+        return json.dumps({"partial": text})
+
+    def Result(self):
+        """Return the word of the second that just closed."""
+        index = self.closed
+        self.closed += 1
+        return self._result(index)
+
+    def FinalResult(self):
+        """Return the open word, if any audio arrived after the last closed second."""
+        if self.samples <= self.closed * self.sample_rate:
+            return json.dumps({"text": ""})
+        return self._result(self.closed)
+
+    @staticmethod
+    def _result(index):
+        word = {"word": f"w{index}", "start": float(index), "end": index + 0.5, "conf": 1.0}
+        return json.dumps({"text": word["word"], "result": [word]})
+
+
+class FakeAnalyzer:
+    """
+    A sentiment analyzer stand-in with a fixed random embedding per word.
+
+    Methods:
+        encode(self, sentences): Return the embedding of each sentence.
+    """
+
+    def __init__(self):
+        self.vectors = np.random.default_rng(5).normal(size=(32, 16)).astype(np.float32)
+
+    def encode(self, sentences):
+        """Return the embedding of each sentence "w<i>"."""
+        return self.vectors[[int(sentence[1:]) for sentence in sentences]]
+
+
+class TestLiveSources(unittest.TestCase):
+    """
+    A test case class for testing live PCM sources.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_read_pcm_chunks(self): Test that a stream is cut into fixed
+                                    chunks, dropping an odd trailing byte.
+        test_replay_paces_frames(self): Test that replayed frames are released
+                                        no earlier than their time in the recording.
+    """
+
+    def test_read_pcm_chunks(self):
+        """
+        Test that 0.25 s of PCM arrives as two 0.1 s chunks and the remainder.
+
+        Returns:
+            None
+        """
+        samples = np.arange(4000, dtype="<i2")
+        stream = io.BytesIO(samples.tobytes() + b"\x01")
+
+        frames = list(read_pcm(stream, RATE, chunk_seconds=0.1))
+
+        self.assertEqual([len(frame) for frame in frames], [1600, 1600, 800])
+        np.testing.assert_array_equal(np.concatenate(frames), samples)
+
+    def test_replay_paces_frames(self):
+        """
+        Test that each frame of a 1 s recording is released at its end time
+        in the recording, scaled by the speed.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "call.wav")
+            write_wav(path, 1.0)
+            now = [0.0]
+            releases = []
+
+            def sleep(seconds):
+                now[0] += seconds
+
+            for frame in replay_file(AudioDecoder(), path, speed=2.0, chunk_seconds=0.25,
+                                     clock=lambda: now[0], sleep=sleep):
+                releases.append((len(frame), now[0]))
+
+        self.assertEqual([length for length, _ in releases], [4000] * 4)
+        np.testing.assert_allclose([time for _, time in releases], [0.125, 0.25, 0.375, 0.5])
+
+
+class TestLiveCallScorer(unittest.TestCase):
+    """
+    A test case class for testing streaming transcription and live scoring.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Write a 3.5 s recording.
+        test_stream_events(self): Test that partials precede each final utterance.
+        test_live_scores_match_batch(self): Test that the live CQR and scores
+                                            match scoring the whole call at once.
+        tearDown(self): Remove the recording.
+    """
+
+    def setUp(self):
+        """
+        Write a 3.5 s recording.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "call.wav")
+        write_wav(self.path, 3.5)
+        self.decoder = AudioDecoder()
+        self.transcriber = Transcriber("unused", model_registry=mock.Mock(), decoder=self.decoder)
+
+    def test_stream_events(self):
+        """
+        Test that every utterance is announced by a partial before it is
+        finalized, and that the open utterance is finalized at the end.
+
+        Returns:
+            None
+        """
+        frames = replay_file(self.decoder, self.path, speed=0)
+        with mock.patch.dict(sys.modules, {"vosk": mock.Mock(KaldiRecognizer=FakeLiveRecognizer)}):
+            events = [(event.kind, event.text) for event in self.transcriber.stream(frames)]
+
+        self.assertEqual(events, [
+            ("partial", "w0"), ("final", "w0"),
+            ("partial", "w1"), ("final", "w1"),
+            ("partial", "w2"), ("final", "w2"),
+            ("partial", "w3"), ("final", "w3"),
+            ])
+        self.assertAlmostEqual(self.transcriber.report.audio_seconds, 3.5)
+
+    def test_live_scores_match_batch(self):
+        """
+        Test that the CQR after the last utterance and the final scores equal
+        scoring the whole call at once, and that every update is measured.
+
+        Returns:
+            None
+        """
+        analyzer = FakeAnalyzer()
+        scorer = LiveCallScorer(self.transcriber, analyzer)
+        frames = replay_file(self.decoder, self.path, speed=0)
+        with mock.patch.dict(sys.modules, {"vosk": mock.Mock(KaldiRecognizer=FakeLiveRecognizer)}):
+            finals = [update for update in scorer.run(frames) if update.kind == "final"]
+
+        expected = SentimentScorer().score([analyzer.vectors[:4]])
+        self.assertEqual([update.text for update in finals], ["w0", "w1", "w2", "w3"])
+        self.assertEqual([update.start for update in finals], [0.0, 1.0, 2.0, 3.0])
+        self.assertAlmostEqual(finals[-1].cqr, sum(expected), places=4)
+        np.testing.assert_allclose(scorer.scores(), expected, rtol=1e-5)
+        self.assertEqual(len(scorer.lags), 4)
+        self.assertLess(scorer.lag_percentiles()[100], 1.0)
+
+    def tearDown(self):
+        """
+        Remove the recording.
+
+        Returns:
+            None
+        """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Module for testing the functionality of the ModelRegistry class."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from domain.transcription.model_registry import ModelRegistry
+
+class TestModelRegistry(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the ModelRegistry class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Create a temporary model archive and a registry with a
+                     counting loader.
+        test_model_loaded_once(self): Test that repeated lookups reuse the model.
+        test_archive_extracted_once(self): Test that the archive is extracted
+                                           into a content-addressed directory once.
+        test_loading_blocks_only_same_model(self): Test that a slow load holds up
+                                                   only callers of that model.
+        tearDown(self): Clear the registry and remove temporary files.
+    """
+
+    def setUp(self):
+        """
+        Create a temporary model archive and a registry with a counting loader.
+
+        Returns:
+            None
+        """
+        ModelRegistry.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = os.path.join(self.tmp.name, "vosk-model-test.zip")
+        with zipfile.ZipFile(self.archive, "w") as zip_ref:
+            zip_ref.writestr("vosk-model-test/conf/model.conf", "--sample-frequency=16000\n")
+        self.loaded = []
+        self.registry = ModelRegistry(
+            models_dir=os.path.join(self.tmp.name, "models"),
+            loader=lambda path: self.loaded.append(path) or object(),
+            )
+
+    def tearDown(self):
+        """
+        Clear the registry and remove temporary files.
+
+        Returns:
+            None
+        """
+        ModelRegistry.clear()
+        self.tmp.cleanup()
+
+    def test_model_loaded_once(self):
+        """
+        Test that repeated lookups, including from a second registry instance,
+        return the same model and load it only once.
+
+        Returns:
+            None
+        """
+        first = self.registry.get(self.archive)
+        second = ModelRegistry(models_dir=self.registry.models_dir).get(self.archive)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.loaded), 1)
+        stats = self.registry.stats(self.archive)
+        self.assertEqual(stats.hits, 1)
+        self.assertGreaterEqual(stats.load_time, 0.0)
+
+    def test_archive_extracted_once(self):
+        """
+        Test that the archive is extracted into a content-addressed directory
+        and reused after the in-process models are dropped.
+
+        Returns:
+            None
+        """
+        self.registry.get(self.archive)
+        model_dir = self.loaded[0]
+        self.assertTrue(model_dir.endswith("vosk-model-test"))
+        self.assertTrue(os.path.isfile(os.path.join(model_dir, "conf", "model.conf")))
+
+        ModelRegistry.clear()
+        marker = os.path.join(os.path.dirname(model_dir), ".complete")
+        mtime = os.stat(marker).st_mtime_ns
+        self.registry.get(self.archive)
+
+        self.assertEqual(self.loaded[1], model_dir)
+        self.assertEqual(os.stat(marker).st_mtime_ns, mtime)
+
+    def test_loading_blocks_only_same_model(self):
+        """
+        Test that while one model is loading, a loaded model is served at once
+        and concurrent callers of the loading model share one load.
+
+        Returns:
+            None
+        """
+        loaded_dir = os.path.join(self.tmp.name, "loaded-model")
+        os.makedirs(loaded_dir)
+        ready = self.registry.get(loaded_dir)
+        release = threading.Event()
+        loads = []
+
+        def slow_loader(path):
+            loads.append(path)
+            release.wait(5)
+            return object()
+
+        slow = ModelRegistry(models_dir=self.registry.models_dir, loader=slow_loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(slow.get(self.archive)))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        try:
+            deadline = time.time() + 5
+            while not loads and time.time() < deadline:
+                time.sleep(0.01)
+            started = time.perf_counter()
+            self.assertIs(slow.get(loaded_dir), ready)
+            self.assertLess(time.perf_counter() - started, 1.0)
+        finally:
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(loads), 1)
+        self.assertIs(results[0], results[1])
+
+if __name__ == "__main__":
+    unittest.main()
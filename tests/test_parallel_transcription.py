@@ -0,0 +1,71 @@
+"""Module for testing the segment planning and merging of parallel transcription."""
+
+import unittest
+import numpy as np
+from domain.transcription.parallel import Segment, plan_segments, _owned_utterance
+
+class TestParallelTranscription(unittest.TestCase):
+    """
+    A test case class for testing segment planning and overlap de-duplication.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_cuts_at_silence(self): Test that cuts land on the quietest block.
+        test_segments_cover_recording(self): Test that owned spans tile the recording.
+        test_overlap_words_kept_once(self): Test that words seen by two segments
+                                            are kept by exactly one.
+    """
+
+    def test_cuts_at_silence(self):
+        """
+        Test that a cut is placed in the silent gap nearest the target length.
+
+        Returns:
+            None
+        """
+        energies = np.ones(30000, dtype=np.float32)
+        energies[10500:10600] = 0.0
+        segments = plan_segments(energies, 300.0, target_seconds=100.0, search_seconds=10.0)
+
+        self.assertGreaterEqual(segments[0].owned_end, 105.0)
+        self.assertLess(segments[0].owned_end, 106.0)
+
+    def test_segments_cover_recording(self):
+        """
+        Test that owned spans tile the recording and segments overlap by the margin.
+
+        Returns:
+            None
+        """
+        energies = np.random.default_rng(0).random(60000).astype(np.float32)
+        segments = plan_segments(energies, 600.0, target_seconds=100.0, overlap_seconds=1.0)
+
+        self.assertEqual(segments[0].owned_start, 0.0)
+        self.assertEqual(segments[-1].owned_end, 600.0)
+        for previous, current in zip(segments, segments[1:]):
+            self.assertEqual(previous.owned_end, current.owned_start)
+            self.assertAlmostEqual(previous.end - current.start, 2.0)
+
+    def test_overlap_words_kept_once(self):
+        """
+        Test that a word recognized by two overlapping segments is kept once,
+        with absolute timestamps.
+
+        Returns:
+            None
+        """
+        first = Segment(0.0, 11.0, 0.0, 10.0)
+        second = Segment(9.0, 20.0, 10.0, 20.0)
+        word = {"word": "привет", "start": 9.8, "end": 10.4, "conf": 1.0}
+        from_first = _owned_utterance({"result": [word]}, first)
+        shifted = dict(word, start=word["start"] - 9.0, end=word["end"] - 9.0)
+        from_second = _owned_utterance({"result": [shifted]}, second)
+
+        self.assertIsNone(from_first)
+        self.assertEqual(from_second["text"], "привет")
+        self.assertAlmostEqual(from_second["start"], 9.8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Module for testing the functionality of the AnalysisPipeline class."""
+
+import json
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock
+from domain.cache.result_cache import ResultCache
+from domain.pipeline.pipeline import AnalysisPipeline
+
+class SlowTranscriber:
+    """
+    A transcriber stand-in that yields utterances at a fixed pace.
+
+    Methods:
+        transcribe(self, audio_path): Yield recognizer-style JSON results.
+    """
+
+    def __init__(self, texts, delay):
+        self.texts = texts
+        self.delay = delay
+
+    def transcribe(self, audio_path):
+        """
+        Yield one recognizer-style JSON result per text after a delay.
+
+        Args:
+            audio_path (str): Ignored.
+
+        Yields:
+            str: JSON result.
+        """
+        for index, text in enumerate(self.texts):
+            time.sleep(self.delay)
+            yield json.dumps({"text": text, "start": float(index)})
+
+class TestAnalysisPipeline(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the AnalysisPipeline class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Build a pipeline from slow stand-in stages.
+        test_results_joined(self): Test that all stage outputs are joined in order.
+        test_stages_overlap(self): Test that latency is close to the slowest stage.
+        test_cached_rerun(self): Test that a rerun is served from the cache.
+    """
+
+    def setUp(self):
+        """
+        Build a pipeline whose transcription and diarization each take ~0.3 s.
+
+        Returns:
+            None
+        """
+        self.texts = [f"sentence {index}" for index in range(6)]
+        self.diarizer = Mock()
+        self.diarizer.diarize.side_effect = lambda path: time.sleep(0.3) or {"speakers": ["A"]}
+        self.analyzer = Mock()
+        self.analyzer.encode.side_effect = list
+        self.analyzer.score.side_effect = lambda batches: [
+            float(len(sentence)) for batch in batches for sentence in batch
+            ]
+        self.pipeline = AnalysisPipeline(
+            SlowTranscriber(self.texts, 0.05), self.diarizer, self.analyzer, batch_size=4
+            )
+
+    def test_results_joined(self):
+        """
+        Test that transcript, diarization and scores are joined in sentence order.
+
+        Returns:
+            None
+        """
+        result = self.pipeline.run("audio.wav")
+
+        self.assertEqual([item["text"] for item in result.transcript], self.texts)
+        self.assertEqual(result.diarization, {"speakers": ["A"]})
+        self.assertEqual(result.sentiment_scores, [float(len(text)) for text in self.texts])
+        self.diarizer.diarize.assert_called_once_with("audio.wav")
+
+    def test_stages_overlap(self):
+        """
+        Test that transcription and diarization run concurrently.
+
+        Returns:
+            None
+        """
+        result = self.pipeline.run("audio.wav")
+
+        sequential = result.timings["transcription"] + result.timings["diarization"]
+        self.assertLess(result.timings["total"], sequential * 0.8)
+
+    def test_cached_rerun(self):
+        """
+        Test that a second run on the same audio hash skips every stage.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.pipeline.cache = ResultCache(cache_dir=cache_dir)
+            self.assertFalse(self.pipeline.is_cached("abc"))
+            first = self.pipeline.run("audio.wav", audio_hash="abc")
+            self.assertTrue(self.pipeline.is_cached("abc"))
+            lookups = self.pipeline.cache.stats()
+            second = self.pipeline.run("audio.wav", audio_hash="abc")
+
+        self.assertEqual(second.transcript, first.transcript)
+        self.assertEqual(second.sentiment_scores, first.sentiment_scores)
+        self.assertEqual(self.diarizer.diarize.call_count, 1)
+        self.assertLess(second.timings["total"], 0.05)
+        stages = lookups["misses"]
+        self.assertEqual(self.pipeline.cache.stats()["memory_hits"], stages)
+
+if __name__ == "__main__":
+    unittest.main()
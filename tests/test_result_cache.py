@@ -0,0 +1,113 @@
+"""Module for testing the functionality of the ResultCache class."""
+
+import io
+import tempfile
+import unittest
+from domain.cache.result_cache import ResultCache, audio_digest, cache_key
+
+class TestResultCache(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the ResultCache class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Create a cache backed by a temporary directory.
+        test_keys(self): Test that keys depend on audio, stage and identity.
+        test_memory_and_disk_hits(self): Test lookups in both tiers.
+        test_disk_eviction(self): Test that the disk tier respects its size cap.
+        test_contains(self): Test that existence checks are not counted as lookups.
+        tearDown(self): Remove the temporary directory.
+    """
+
+    def setUp(self):
+        """
+        Create a cache backed by a temporary directory.
+
+        Returns:
+            None
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(cache_dir=self.tmp.name, memory_entries=2)
+
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+
+        Returns:
+            None
+        """
+        self.tmp.cleanup()
+
+    def test_keys(self):
+        """
+        Test that keys depend on the audio bytes, the stage and the model identity.
+
+        Returns:
+            None
+        """
+        digest = audio_digest(io.BytesIO(b"audio"))
+        self.assertEqual(digest, audio_digest(io.BytesIO(b"audio")))
+        self.assertNotEqual(cache_key(digest, "transcription", "small"),
+                            cache_key(digest, "transcription", "large"))
+        self.assertNotEqual(cache_key(digest, "transcription", "small"),
+                            cache_key(digest, "diarization", "small"))
+
+    def test_memory_and_disk_hits(self):
+        """
+        Test that values are served from memory, then from disk once evicted
+        from the in-memory LRU, and that misses are counted.
+
+        Returns:
+            None
+        """
+        for name in ("a", "b", "c"):
+            self.cache.put(name * 64, [name])
+
+        self.assertEqual(self.cache.get("c" * 64), ["c"])
+        self.assertEqual(self.cache.get("a" * 64), ["a"])
+        self.assertIsNone(self.cache.get("d" * 64))
+        self.assertEqual(ResultCache(cache_dir=self.tmp.name).get("b" * 64), ["b"])
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["disk_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_disk_eviction(self):
+        """
+        Test that the least recently used files are evicted past the size cap.
+
+        Returns:
+            None
+        """
+        cache = ResultCache(cache_dir=self.tmp.name, memory_entries=0, disk_bytes=2500)
+        for name in ("a", "b", "c"):
+            cache.put(name * 64, b"x" * 1000)
+
+        self.assertIsNone(cache.get("a" * 64))
+        self.assertIsNotNone(cache.get("c" * 64))
+        self.assertGreaterEqual(cache.stats()["evictions"], 1)
+
+    def test_contains(self):
+        """
+        Test that contains() sees both tiers without loading entries or
+        counting hits and misses.
+
+        Returns:
+            None
+        """
+        for name in ("a", "b", "c"):
+            self.cache.put(name * 64, [name])
+
+        self.assertTrue(self.cache.contains("a" * 64))
+        self.assertTrue(self.cache.contains("c" * 64))
+        self.assertFalse(self.cache.contains("d" * 64))
+        self.assertFalse(ResultCache(cache_dir=None).contains("a" * 64))
+        self.assertEqual(list(self.cache._memory), ["b" * 64, "c" * 64])
+        stats = self.cache.stats()
+        self.assertEqual(stats["memory_hits"] + stats["disk_hits"] + stats["misses"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Module for testing the interchangeable sentence encoding backends."""
+
+import importlib.util
+import unittest
+import numpy as np
+from domain.sentiment_analysis.backends import create_backend, embedding_agreement
+
+MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+HAS_ONNX = all(importlib.util.find_spec(name) for name in ("onnxruntime", "transformers"))
+
+class TestSentimentBackends(unittest.TestCase):
+    """
+    A test case class for testing the sentence encoding backends.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_unknown_backend(self): Test that an unknown backend name is rejected.
+        test_embedding_agreement(self): Test the cosine agreement metric.
+        test_onnx_matches_torch(self): Test that the ONNX backends reproduce
+                                       the torch embeddings.
+    """
+
+    def test_unknown_backend(self):
+        """
+        Test that an unknown backend name is rejected.
+
+        Returns:
+            None
+        """
+        with self.assertRaises(ValueError):
+            create_backend("tensorrt", MODEL_NAME)
+
+    def test_embedding_agreement(self):
+        """
+        Test that identical embeddings agree fully and opposite ones do not.
+
+        Returns:
+            None
+        """
+        embeddings = np.random.default_rng(1).normal(size=(4, 16))
+
+        self.assertAlmostEqual(embedding_agreement(embeddings, embeddings)["min_cosine"], 1.0)
+        self.assertAlmostEqual(embedding_agreement(embeddings, -embeddings)["mean_cosine"], -1.0)
+
+    @unittest.skipUnless(HAS_ONNX, "onnxruntime and transformers are not installed")
+    def test_onnx_matches_torch(self):
+        """
+        Test that the fp32 and int8 ONNX backends stay close to the torch embeddings.
+
+        Returns:
+            None
+        """
+        sentences = ["Здравствуйте, чем могу помочь?", "Спасибо за ожидание.", "До свидания!"]
+        reference = create_backend("torch", MODEL_NAME).encode(sentences, 8)
+
+        fp32 = create_backend("onnx", MODEL_NAME).encode(sentences, 8)
+        int8 = create_backend("onnx-int8", MODEL_NAME).encode(sentences, 8)
+
+        self.assertGreater(embedding_agreement(reference, fp32)["min_cosine"], 0.999)
+        self.assertGreater(embedding_agreement(reference, int8)["min_cosine"], 0.97)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Module for testing the functionality of the SentimentScorer class."""
+
+import unittest
+import numpy as np
+from domain.sentiment_analysis.scoring import RunningScore, SentimentScorer
+
+def quadratic_scores(embeddings):
+    """
+    Reference scores computed like the original implementation: row sums of
+    the full N x N cosine similarity matrix.
+
+    Args:
+        embeddings (np.ndarray): Matrix of shape (n, d).
+
+    Returns:
+        np.ndarray: Score per row.
+    """
+    norms = np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    unit = embeddings / norms
+    return (unit @ unit.T).sum(axis=1)
+
+class TestSentimentScorer(unittest.TestCase):
+    """
+    A test case class for testing the functionality of the SentimentScorer class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Generate random embeddings.
+        test_matches_cosine_matrix(self): Test that batched scores match the
+                                          N x N cosine matrix row sums.
+        test_stream_matches_cosine_matrix(self): Test that the chunked path
+                                                 matches the reference.
+        test_empty(self): Test that no sentences give no scores.
+    """
+
+    def setUp(self):
+        """
+        Generate random embeddings shaped like MiniLM output.
+
+        Returns:
+            None
+        """
+        rng = np.random.default_rng(7)
+        self.embeddings = rng.normal(size=(257, 384)).astype(np.float32)
+        self.expected = quadratic_scores(self.embeddings.astype(np.float64))
+        self.scorer = SentimentScorer(batch_size=32)
+
+    def test_matches_cosine_matrix(self):
+        """
+        Test that scores from several in-memory batches match the reference.
+
+        Returns:
+            None
+        """
+        batches = np.array_split(self.embeddings, 5)
+        scores = self.scorer.score(batches)
+
+        np.testing.assert_allclose(scores, self.expected, rtol=1e-4, atol=1e-4)
+
+    def test_stream_matches_cosine_matrix(self):
+        """
+        Test that the chunked path encodes fixed-size batches and matches the reference.
+
+        Returns:
+            None
+        """
+        sentences = [str(index) for index in range(len(self.embeddings))]
+        batch_sizes = []
+
+        def encode(batch):
+            batch_sizes.append(len(batch))
+            return self.embeddings[[int(sentence) for sentence in batch]]
+
+        scores = self.scorer.score_stream(sentences, encode)
+
+        np.testing.assert_allclose(scores, self.expected, rtol=1e-4, atol=1e-4)
+        self.assertTrue(all(size <= 32 for size in batch_sizes))
+
+    def test_empty(self):
+        """
+        Test that no sentences give no scores.
+
+        Returns:
+            None
+        """
+        self.assertEqual(self.scorer.score([]), [])
+        self.assertEqual(self.scorer.score_stream([], lambda batch: None), [])
+
+class TestRunningScore(unittest.TestCase):
+    """
+    A test case class for testing the incremental CQR of a live call.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_cqr_after_every_sentence(self): Test that the CQR matches the sum
+                                             of the reference scores of every prefix.
+        test_scores_match_reference(self): Test that the final scores match
+                                           the cosine matrix row sums.
+        test_empty(self): Test that an empty call scores zero.
+    """
+
+    def setUp(self):
+        """
+        Generate random embeddings shaped like MiniLM output.
+
+        Returns:
+            None
+        """
+        rng = np.random.default_rng(11)
+        self.embeddings = rng.normal(size=(40, 384)).astype(np.float32)
+
+    def test_cqr_after_every_sentence(self):
+        """
+        Test that after each added sentence the CQR and the new sentence's
+        score equal the reference computed over the whole prefix.
+
+        Returns:
+            None
+        """
+        running = RunningScore()
+        for count, embedding in enumerate(self.embeddings, start=1):
+            score = running.add(embedding)
+            expected = quadratic_scores(self.embeddings[:count].astype(np.float64))
+            self.assertAlmostEqual(running.cqr(), expected.sum(), places=3)
+            self.assertAlmostEqual(score, expected[-1], places=4)
+        self.assertEqual(running.count, len(self.embeddings))
+
+    def test_scores_match_reference(self):
+        """
+        Test that the scores of every sentence match the cosine matrix row sums.
+
+        Returns:
+            None
+        """
+        running = RunningScore()
+        for embedding in self.embeddings:
+            running.add(embedding)
+        expected = quadratic_scores(self.embeddings.astype(np.float64))
+
+        np.testing.assert_allclose(running.scores(), expected, rtol=1e-4, atol=1e-4)
+        self.assertAlmostEqual(running.score(3), expected[3], places=4)
+
+    def test_empty(self):
+        """
+        Test that an empty call has no scores and a CQR of zero.
+
+        Returns:
+            None
+        """
+        running = RunningScore()
+        self.assertEqual(running.cqr(), 0.0)
+        self.assertEqual(running.scores(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Module for testing the spool of uploaded recordings."""
+
+import gc
+import io
+import os
+import unittest
+import wave
+from unittest import mock
+import numpy as np
+from domain.audio.decoding import AudioDecoder
+from domain.audio.uploads import UploadSpool
+
+
+def make_upload(samples, sample_rate, name="upload.wav"):
+    """
+    Build an in-memory mono 16-bit WAV upload.
+
+    Args:
+        samples (np.ndarray): int16 samples.
+        sample_rate (int): Sample rate of the file.
+        name (str): File name of the upload.
+
+    Returns:
+        io.BytesIO: The WAV file, named like an upload.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+class TestUploadSpool(unittest.TestCase):
+    """
+    A test case class for testing the UploadSpool class.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Create a spool.
+        test_decoded_once(self): Test that an upload is decoded once and reused.
+        test_decoded_upload_copied(self): Test that a decoded upload is only copied.
+        test_older_uploads_removed(self): Test that only the latest upload is kept.
+        test_removed_with_session(self): Test that the files are removed when
+                                         the spool is closed or collected.
+        tearDown(self): Close the spool.
+    """
+
+    def setUp(self):
+        """
+        Create a spool.
+
+        Returns:
+            None
+        """
+        self.decoder = AudioDecoder()
+        self.spool = UploadSpool(self.decoder)
+
+    def test_decoded_once(self):
+        """
+        Test that a telephony upload is decoded to a mapped 16 kHz WAV once,
+        and that reruns get the same file without decoding again.
+
+        Returns:
+            None
+        """
+        upload = make_upload(np.zeros(8000, dtype=np.int16), 8000)
+        with mock.patch.object(self.decoder, "decode_to_file",
+                               wraps=self.decoder.decode_to_file) as decode:
+            first = self.spool.decoded_path(upload, "a" * 64)
+            second = self.spool.decoded_path(upload, "a" * 64)
+
+        self.assertEqual(first, second)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(os.listdir(self.spool.directory), [os.path.basename(first)])
+        self.assertAlmostEqual(self.decoder.mapped(first).duration, 1.0, places=3)
+        self.assertEqual(upload.tell(), 0)
+
+    def test_decoded_upload_copied(self):
+        """
+        Test that an upload already in the decoded layout is used as copied.
+
+        Returns:
+            None
+        """
+        samples = np.arange(16000, dtype=np.int16)
+        path = self.spool.decoded_path(make_upload(samples, 16000), "b" * 64)
+
+        np.testing.assert_array_equal(self.decoder.mapped(path).samples, samples)
+
+    def test_older_uploads_removed(self):
+        """
+        Test that spooling a new upload removes the previous one.
+
+        Returns:
+            None
+        """
+        first = self.spool.decoded_path(make_upload(np.zeros(100, dtype=np.int16), 16000), "c" * 64)
+        second = self.spool.decoded_path(make_upload(np.ones(100, dtype=np.int16), 16000), "d" * 64)
+
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+
+    def test_removed_with_session(self):
+        """
+        Test that close() removes the directory, and that a spool dropped
+        with its session removes it when collected.
+
+        Returns:
+            None
+        """
+        upload = make_upload(np.zeros(100, dtype=np.int16), 16000)
+        self.spool.decoded_path(upload, "e" * 64)
+        self.spool.close()
+        self.assertFalse(os.path.exists(self.spool.directory))
+        with self.assertRaises(ValueError):
+            self.spool.decoded_path(upload, "e" * 64)
+
+        session = {"upload_spool": UploadSpool(self.decoder)}
+        directory = session["upload_spool"].directory
+        session["upload_spool"].decoded_path(upload, "f" * 64)
+        session.clear()
+        gc.collect()
+        self.assertFalse(os.path.exists(directory))
+
+    def tearDown(self):
+        """
+        Close the spool.
+
+        Returns:
+            None
+        """
+        self.spool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
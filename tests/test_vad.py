@@ -0,0 +1,421 @@
+"""Module for testing voice activity detection and the stages that use it."""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import wave
+from unittest import mock
+import numpy as np
+from domain.audio.decoding import AudioDecoder
+from domain.audio.vad import SpeechRegions, VadReport, VoiceActivityDetector
+from domain.diarization.diarization import Diarizer
+from domain.transcription.transcription import Transcriber
+
+RATE = 16000
+
+
+def tone_call(layout, rate=RATE):
+    """
+    Build int16 audio from (seconds, frequency) pieces; frequency 0 is silence.
+
+    Args:
+        layout (List[Tuple[float, float]]): Pieces in order.
+        rate (int): Sample rate.
+
+    Returns:
+        np.ndarray: int16 samples.
+    """
+    pieces = []
+    for seconds, frequency in layout:
+        time_axis = np.arange(int(seconds * rate)) / rate
+        pieces.append(8000 * np.sin(2 * np.pi * frequency * time_axis))
+    return np.concatenate(pieces).astype("<i2")
+
+
+def write_wav(path, samples, rate=RATE):
+    """Write int16 samples to a mono WAV file."""
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(samples.tobytes())
+
+
+class TestVoiceActivityDetector(unittest.TestCase):
+    """
+    A test case class for testing speech region detection.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_regions_follow_speech(self): Test that regions cover the tones
+                                          with preroll and hangover.
+        test_short_pauses_bridged(self): Test that pauses within the hangover
+                                         do not split a region.
+        test_short_bursts_dropped(self): Test that clicks shorter than the
+                                         minimum speech length are dropped.
+        test_noise_rejected(self): Test that broadband noise is not speech.
+        test_frame_boundaries_ignored(self): Test that the result does not
+                                             depend on the decoder's frame size.
+        test_shorter_than_hangover(self): Test recordings shorter than the padding.
+        test_no_quiet_stretch(self): Test that audio without silence is all speech.
+    """
+
+    def setUp(self):
+        """
+        Create a detector without padding, for exact region borders.
+
+        Returns:
+            None
+        """
+        self.vad = VoiceActivityDetector(hangover_ms=0, preroll_ms=0)
+
+    def test_regions_follow_speech(self):
+        """
+        Test that regions cover the tones, widened by preroll and hangover.
+
+        Returns:
+            None
+        """
+        samples = tone_call([(1.0, 0), (2.0, 300), (3.0, 0), (1.0, 600), (1.0, 0)])
+        regions = VoiceActivityDetector().detect([samples], RATE)
+
+        np.testing.assert_allclose(regions.starts / RATE, [0.9, 5.9])
+        np.testing.assert_allclose(regions.ends / RATE, [3.3, 7.3])
+        self.assertAlmostEqual(regions.audio_seconds, 8.0)
+        self.assertAlmostEqual(regions.speech_seconds, 3.8)
+
+    def test_short_pauses_bridged(self):
+        """
+        Test that a pause shorter than the hangover keeps one region.
+
+        Returns:
+            None
+        """
+        samples = tone_call([(1.0, 300), (0.2, 0), (1.0, 300), (1.0, 0)])
+        vad = VoiceActivityDetector(hangover_ms=300, preroll_ms=0)
+
+        self.assertEqual(len(vad.detect([samples], RATE)), 1)
+        self.assertEqual(len(self.vad.detect([samples], RATE)), 2)
+
+    def test_short_bursts_dropped(self):
+        """
+        Test that a burst shorter than min_speech_ms is not a region.
+
+        Returns:
+            None
+        """
+        samples = tone_call([(1.0, 0), (0.1, 300), (1.0, 0), (0.5, 300), (1.0, 0)])
+        regions = self.vad.detect([samples], RATE)
+
+        np.testing.assert_allclose(regions.starts / RATE, [2.1])
+
+    def test_noise_rejected(self):
+        """
+        Test that loud white noise fails the zero-crossing test.
+
+        Returns:
+            None
+        """
+        noise = np.random.default_rng(0).normal(0, 8000, RATE * 2).astype("<i2")
+        regions = self.vad.detect([noise], RATE)
+
+        self.assertEqual(len(regions), 0)
+
+    def test_frame_boundaries_ignored(self):
+        """
+        Test that odd-sized decoder frames give the same regions as one frame.
+
+        Returns:
+            None
+        """
+        samples = tone_call([(0.7, 0), (1.3, 300), (0.9, 0), (0.6, 600), (0.5, 0)])
+        frames = np.array_split(samples, np.arange(1237, len(samples), 1237))
+        whole = self.vad.detect([samples], RATE)
+        split = self.vad.detect(frames, RATE)
+
+        np.testing.assert_array_equal(whole.starts, split.starts)
+        np.testing.assert_array_equal(whole.ends, split.ends)
+
+    def test_shorter_than_hangover(self):
+        """
+        Test that recordings shorter than the hangover and preroll are detected
+        without failing.
+
+        Returns:
+            None
+        """
+        for samples in (1600, 4000):
+            tone = tone_call([(samples / RATE, 300)])
+            regions = VoiceActivityDetector(min_speech_ms=0, threshold_db=40.0).detect(
+                [tone], RATE)
+            self.assertEqual((regions.starts.tolist(), regions.ends.tolist()), ([0], [samples]))
+
+    def test_no_quiet_stretch(self):
+        """
+        Test that a steady tone, and a tone whose level varies by 10 dB, are
+        speech throughout although neither has a quiet stretch for a noise floor.
+
+        Returns:
+            None
+        """
+        steady = tone_call([(10.0, 300)])
+        varying = np.concatenate([tone_call([(1.0, 300)]) // divisor
+                                  for divisor in (1, 3, 1, 2, 3, 1, 3, 2, 1, 3)])
+        for samples in (steady, varying):
+            regions = VoiceActivityDetector().detect([samples], RATE)
+            self.assertAlmostEqual(regions.speech_seconds, 10.0)
+
+
+class TestSpeechRegions(unittest.TestCase):
+    """
+    A test case class for testing the compacted timeline mapping.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_speech_frames(self): Test that only speech samples are yielded.
+        test_to_original(self): Test that compacted times map back.
+        test_split(self): Test that a span crossing regions is split.
+        test_report(self): Test the skipped share and saving estimate.
+    """
+
+    def setUp(self):
+        """
+        Create regions [1, 2) and [4, 6) seconds of a 10 s recording at 10 Hz.
+
+        Returns:
+            None
+        """
+        self.regions = SpeechRegions([10, 40], [20, 60], 100, 10)
+
+    def test_speech_frames(self):
+        """
+        Test that speech_frames yields the region samples across frame borders.
+
+        Returns:
+            None
+        """
+        samples = np.arange(100)
+        frames = [samples[i:i + 15] for i in range(0, 100, 15)]
+        speech = np.concatenate(list(self.regions.speech_frames(frames)))
+
+        np.testing.assert_array_equal(speech, np.r_[10:20, 40:60])
+
+    def test_to_original(self):
+        """
+        Test that compacted times map back, with borders resolved by side.
+
+        Returns:
+            None
+        """
+        np.testing.assert_allclose(self.regions.to_original([0.0, 0.5, 1.5, 3.0]), [1.0, 1.5, 4.5, 6.0])
+        self.assertAlmostEqual(float(self.regions.to_original([1.0], side="left")[0]), 2.0)
+        self.assertAlmostEqual(float(self.regions.to_original([1.0], side="right")[0]), 4.0)
+
+    def test_split(self):
+        """
+        Test that a compacted span crossing a region border becomes two spans.
+
+        Returns:
+            None
+        """
+        self.assertEqual(self.regions.split(0.5, 2.0), [(1.5, 2.0), (4.0, 5.0)])
+        self.assertEqual(self.regions.split(1.2, 1.8), [(4.2, 4.8)])
+
+    def test_report(self):
+        """
+        Test the skipped share and the linear estimate of the time saved.
+
+        Returns:
+            None
+        """
+        report = VadReport(audio_seconds=10.0, speech_seconds=2.5, detect_seconds=0.1,
+                           stage_seconds=1.0)
+
+        self.assertAlmostEqual(report.skipped_share, 0.75)
+        self.assertAlmostEqual(report.saved_seconds, 2.9)
+
+
+class FakeRecognizer:
+    """
+    A recognizer stand-in that reports one word per second of audio it receives.
+
+    Methods:
+        SetWords(self, words): Ignored.
+        AcceptWaveform(self, data): Count the samples.
+        FinalResult(self): Return one word per second of received audio.
+    """
+
+    def __init__(self, model, sample_rate):
+        self.sample_rate = sample_rate
+        self.samples = 0
+
+    def SetWords(self, words):
+        """Ignore the word mode setting."""
+
+    def AcceptWaveform(self, data):
+        """Count the received samples."""
+        self.samples += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        """Return a word starting at every full second of received audio."""
+        seconds = self.samples // self.sample_rate
+        words = [{"word": f"w{i}", "start": float(i), "end": i + 0.5, "conf": 1.0}
+                 for i in range(seconds)]
+        return json.dumps({"text": " ".join(word["word"] for word in words), "result": words})
+
+
+class ToneBackend:
+    """
+    A diarization backend stand-in labelling each half second by its tone.
+
+    Methods:
+        segments(self, audio, sample_rate): Split samples into tone turns.
+        embed(self, samples, sample_rate): Return a tone-specific embedding.
+    """
+
+    @staticmethod
+    def _tone(samples):
+        """Return 1 for the high tone and 0 for the low tone."""
+        return int(np.count_nonzero(np.diff(np.signbit(samples))) / len(samples) > 0.05)
+
+    def segments(self, audio, sample_rate=None):
+        """
+        Split samples into half-second turns labelled by tone.
+
+        Args:
+            audio (np.ndarray): float32 samples.
+            sample_rate (int): Sample rate of the samples.
+
+        Returns:
+            List[Tuple[float, float, str]]: (start, end, label) turns.
+        """
+        block = sample_rate // 2
+        return [(start / sample_rate, (start + block) / sample_rate,
+                 f"TONE_{self._tone(audio[start:start + block])}")
+                for start in range(0, len(audio) - block + 1, block)]
+
+    def embed(self, samples, sample_rate):
+        """Return a one-hot embedding of the dominant tone."""
+        return np.eye(2)[self._tone(samples)]
+
+
+class TestStagesWithVad(unittest.TestCase):
+    """
+    A test case class for testing recognition and diarization on speech regions.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        setUp(self): Write a recording with long silences.
+        test_transcriber_skips_silence(self): Test that the recognizer gets
+                                              only speech, with original times.
+        test_diarizer_skips_silence(self): Test that speaker segments keep
+                                           original times.
+        test_concurrent_detection_shared(self): Test that stages asking at
+                                                once share one detection pass.
+        tearDown(self): Remove the recording.
+    """
+
+    def setUp(self):
+        """
+        Write 2 s low tone, 5 s silence, 2 s high tone, 5 s silence.
+
+        Returns:
+            None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "call.wav")
+        write_wav(self.path, tone_call([(2.0, 300), (5.0, 0), (2.0, 1500), (5.0, 0)]))
+        self.vad = VoiceActivityDetector(hangover_ms=0, preroll_ms=0)
+
+    def test_transcriber_skips_silence(self):
+        """
+        Test that the recognizer gets 4 s of speech and that word times are
+        mapped back to the original recording.
+
+        Returns:
+            None
+        """
+        transcriber = Transcriber("unused", model_registry=mock.Mock(), vad=self.vad)
+        with mock.patch.dict(sys.modules, {"vosk": mock.Mock(KaldiRecognizer=FakeRecognizer)}):
+            results = [json.loads(result) for result in transcriber.transcribe(self.path)]
+
+        starts = [word["start"] for word in results[-1]["result"]]
+        self.assertEqual(starts, [0.0, 1.0, 7.0, 8.0])
+        self.assertAlmostEqual(transcriber.vad_report.skipped_seconds, 10.0)
+        self.assertAlmostEqual(transcriber.report.audio_seconds, 14.0)
+
+    def test_diarizer_skips_silence(self):
+        """
+        Test that each tone is one speaker covering its original time span.
+
+        Returns:
+            None
+        """
+        diarizer = Diarizer(backend=ToneBackend(), streaming=True, window_seconds=3.0,
+                            overlap_seconds=1.0, vad=self.vad)
+        segments = diarizer.diarize(self.path)
+
+        spans = {}
+        for segment in segments:
+            spans.setdefault(segment["speaker"], []).append((segment["start"], segment["end"]))
+        covered = sorted((min(s for s, _ in parts), max(e for _, e in parts), sum(e - s for s, e in parts))
+                         for parts in spans.values())
+        self.assertEqual(covered, [(0.0, 2.0, 2.0), (7.0, 9.0, 2.0)])
+        self.assertAlmostEqual(diarizer.vad_report.speech_seconds, 4.0)
+
+    def test_concurrent_detection_shared(self):
+        """
+        Test that a caller asking while detection of the same file is running
+        waits for that pass instead of decoding the file again.
+
+        Returns:
+            None
+        """
+        decoder = AudioDecoder()
+        frames = decoder.frames
+        release = threading.Event()
+        passes = []
+
+        def slow_frames(path):
+            passes.append(path)
+            release.wait(5)
+            yield from frames(path)
+
+        results = []
+        with mock.patch.object(decoder, "frames", slow_frames):
+            threads = [threading.Thread(target=lambda: results.append(
+                self.vad.detect_file(decoder, self.path))) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.1)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(passes), 1)
+        self.assertIs(results[0][0], results[1][0])
+        self.assertEqual(sorted(elapsed == 0.0 for _, elapsed in results), [False, True])
+
+    def tearDown(self):
+        """
+        Remove the recording.
+
+        Returns:
+            None
+        """
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
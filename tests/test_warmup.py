@@ -0,0 +1,94 @@
+"""Module for testing background model warm-up and lazy model loading."""
+
+import threading
+import unittest
+from unittest import mock
+from domain.pipeline.warmup import ModelWarmup
+from domain.sentiment_analysis.sentiment_analysis import SentimentAnalyzer
+
+
+class TestModelWarmup(unittest.TestCase):
+    """
+    A test case class for testing background warm-up and lazy loading.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_steps_run_in_background(self): Test that steps run off the caller's thread.
+        test_failure_recorded(self): Test that a failed step does not stop the others.
+        test_start_once(self): Test that repeated starts run the steps once.
+        test_sentiment_model_lazy(self): Test that the encoder loads on first use.
+    """
+
+    def test_steps_run_in_background(self):
+        """
+        Test that start() returns while a step is still loading.
+
+        Returns:
+            None
+        """
+        release = threading.Event()
+        warmup = ModelWarmup([("slow", release.wait), ("fast", lambda: None)])
+        warmup.start()
+
+        self.assertFalse(warmup.wait(0.05))
+        self.assertIn(warmup.status()["slow"]["state"], ("pending", "loading"))
+        self.assertFalse(warmup.ready())
+        release.set()
+        self.assertTrue(warmup.wait(5))
+        self.assertTrue(warmup.ready())
+
+    def test_failure_recorded(self):
+        """
+        Test that a failing step is reported and later steps still run.
+
+        Returns:
+            None
+        """
+        def broken():
+            raise OSError("model missing")
+
+        warmup = ModelWarmup([("broken", broken), ("fine", lambda: None)])
+        warmup.start()
+        warmup.wait(5)
+
+        status = warmup.status()
+        self.assertEqual(status["broken"]["state"], "failed")
+        self.assertIn("model missing", status["broken"]["error"])
+        self.assertEqual(status["fine"]["state"], "ready")
+        self.assertFalse(warmup.ready())
+
+    def test_start_once(self):
+        """
+        Test that starting the warm-up twice runs every step once.
+
+        Returns:
+            None
+        """
+        calls = []
+        warmup = ModelWarmup([("model", lambda: calls.append(1))])
+        warmup.start()
+        warmup.start()
+        warmup.wait(5)
+
+        self.assertEqual(calls, [1])
+
+    def test_sentiment_model_lazy(self):
+        """
+        Test that the sentence encoder is built on first use and only once.
+
+        Returns:
+            None
+        """
+        with mock.patch("domain.sentiment_analysis.sentiment_analysis.create_backend") as create:
+            analyzer = SentimentAnalyzer("model")
+            self.assertEqual(create.call_count, 0)
+            self.assertIs(analyzer.backend, analyzer.backend)
+            self.assertEqual(create.call_count, 1)
+        with self.assertRaises(ValueError):
+            SentimentAnalyzer("model", backend="tensorrt")
+
+
+if __name__ == "__main__":
+    unittest.main()
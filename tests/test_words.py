@@ -0,0 +1,101 @@
+"""Module for testing word-level parsing of recognizer results."""
+
+import json
+import sys
+import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+from domain.transcription.transcription import Transcriber
+from domain.transcription.words import TokenTable, WordTimeline, parse_result
+
+def recognizer_result(words, offset):
+    """
+    Build a recognizer result JSON string in word mode.
+
+    Args:
+        words (List[str]): Recognized words, 0.5 s apart.
+        offset (float): Start of the first word.
+
+    Returns:
+        str: Result JSON.
+    """
+    return json.dumps({
+        "result": [{"word": word, "start": offset + 0.5 * index, "end": offset + 0.5 * index + 0.4,
+                    "conf": 0.5 + 0.1 * index} for index, word in enumerate(words)],
+        "text": " ".join(words),
+        })
+
+class TestWordArrays(unittest.TestCase):
+    """
+    A test case class for testing word arrays parsed from recognizer results.
+
+    Inherits:
+        unittest.TestCase: The base class for all test cases in unittest.
+
+    Methods:
+        test_parse_result(self): Test parsing one result into arrays.
+        test_timeline(self): Test filtering and aggregating a call's words.
+        test_transcriber_word_mode(self): Test word mode and the final result.
+    """
+
+    def test_parse_result(self):
+        """
+        Test that a result becomes arrays with shared token ids.
+
+        Returns:
+            None
+        """
+        tokens = TokenTable()
+        utterance = parse_result(recognizer_result(["да", "нет", "да"], 1.0), tokens)
+
+        np.testing.assert_allclose(utterance.starts, [1.0, 1.5, 2.0])
+        np.testing.assert_allclose(utterance.confidences, [0.5, 0.6, 0.7])
+        self.assertEqual(utterance.token_ids.tolist(), [0, 1, 0])
+        self.assertEqual(tokens.words(utterance.token_ids), ["да", "нет", "да"])
+        self.assertEqual(utterance.as_item()["text"], "да нет да")
+        self.assertAlmostEqual(utterance.as_item()["end"], 2.4, places=5)
+        self.assertIsNone(parse_result('{"text" : ""}', tokens))
+
+    def test_timeline(self):
+        """
+        Test that a call's words can be filtered by time and aggregated per utterance.
+
+        Returns:
+            None
+        """
+        tokens = TokenTable()
+        utterances = [parse_result(recognizer_result(words, offset), tokens)
+                      for words, offset in ((["a", "b"], 0.0), (["c", "d", "e"], 5.0))]
+        timeline = WordTimeline.from_utterances(utterances)
+
+        self.assertEqual(len(timeline), 5)
+        self.assertEqual(timeline.between(0.4, 5.6).words(), ["b", "c", "d"])
+        self.assertEqual(timeline.select(timeline.confidences > 0.55).words(), ["b", "d", "e"])
+        np.testing.assert_allclose(timeline.utterance_confidence(), [0.55, 0.6], rtol=1e-6)
+        self.assertEqual(len(WordTimeline.from_utterances([])), 0)
+
+    def test_transcriber_word_mode(self):
+        """
+        Test that the transcriber enables word mode and emits the final result.
+
+        Returns:
+            None
+        """
+        recognizer = Mock()
+        recognizer.AcceptWaveform.side_effect = [True, False]
+        recognizer.Result.return_value = recognizer_result(["hello"], 0.0)
+        recognizer.FinalResult.return_value = recognizer_result(["bye"], 0.6)
+        decoder = Mock(sample_rate=16000)
+        decoder.frames.return_value = [np.zeros(4000, dtype="<i2")] * 2
+        transcriber = Transcriber("model", model_registry=Mock(), decoder=decoder)
+
+        vosk = Mock(KaldiRecognizer=Mock(return_value=recognizer))
+        with patch.dict(sys.modules, {"vosk": vosk}):
+            utterances = list(transcriber.transcribe_words("call.wav"))
+
+        recognizer.SetWords.assert_called_once_with(True)
+        self.assertEqual([utterance.text for utterance in utterances], ["hello", "bye"])
+        self.assertAlmostEqual(transcriber.report.audio_seconds, 0.5)
+
+if __name__ == "__main__":
+    unittest.main()